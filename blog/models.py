@@ -2,7 +2,8 @@ from django.db import models
 from django.urls import reverse
 from django.utils.text import slugify
 from django.contrib.auth.models import User
-from PIL import Image
+
+from core.images import ResponsiveImagesMixin
 
 
 class Category(models.Model):
@@ -25,7 +26,7 @@ class Category(models.Model):
         super().save(*args, **kwargs)
 
 
-class Post(models.Model):
+class Post(ResponsiveImagesMixin, models.Model):
     STATUS_CHOICES = [
         ('draft', 'Rascunho'),
         ('published', 'Publicado'),
@@ -52,6 +53,8 @@ class Post(models.Model):
     def __str__(self):
         return self.title
 
+    responsive_image_fields = ('featured_image',)
+
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.title)
@@ -63,16 +66,8 @@ class Post(models.Model):
             
         super().save(*args, **kwargs)
         
-        # Redimensionar imagem se necessário
-        if self.featured_image:
-            self.resize_image()
-
-    def resize_image(self):
-        if self.featured_image:
-            img = Image.open(self.featured_image.path)
-            if img.height > 800 or img.width > 1200:
-                img.thumbnail((1200, 800))
-                img.save(self.featured_image.path)
+        # Derivados responsivos da imagem, em segundo plano
+        self.schedule_image_derivatives()
 
     def get_absolute_url(self):
         return reverse('blog:post_detail', kwargs={'slug': self.slug})
@@ -1,17 +1,17 @@
 from django.shortcuts import render, get_object_or_404, redirect
-from django.core.paginator import Paginator
 from django.contrib import messages
 from django.db.models import Q
 from .models import Post, Category, Comment
-from core.models import SiteSettings
-
-
-def get_site_settings():
-    """Helper para obter configurações do site"""
-    settings_obj, created = SiteSettings.objects.get_or_create(pk=1)
-    return settings_obj
+from core.site_cache import get_site_settings
+from core.page_cache import cache_public_page
+from core.conditional import conditional_page
+from monitour_common.query_budget import query_budget
+from monitour_common.pagination import paginate
+from core import recommendations
 
 
+@query_budget(queries=6)
+@cache_public_page(Post, Category)
 def post_list(request):
     """Lista de posts do blog com paginação e filtros"""
     site_settings = get_site_settings()
@@ -21,7 +21,7 @@ def post_list(request):
     search_query = request.GET.get('q')
     
     # Query base
-    posts = Post.objects.filter(status='published').order_by('-published_at')
+    posts = Post.objects.filter(status='published').select_related('category', 'author').order_by('-published_at')
     
     # Filtro por categoria
     if category_slug:
@@ -36,9 +36,7 @@ def post_list(request):
         )
     
     # Paginação
-    paginator = Paginator(posts, 9)  # 9 posts por página
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = paginate(request, posts, 9, ordering=('-published_at', '-id'))  # 9 posts por página
     
     # Posts em destaque (sidebar)
     featured_posts = Post.objects.filter(
@@ -68,6 +66,19 @@ def post_list(request):
     return render(request, 'blog/post_list.html', context)
 
 
+def _post_detail_querysets(request, slug):
+    # O post e os que podem aparecer como relacionados (recomendados ou mesma categoria)
+    post = Post.objects.filter(slug=slug)
+    return [Post.objects.filter(
+        Q(slug=slug)
+        | Q(pk__in=recommendations.related_ids(Post, post.values('pk')))
+        | Q(status='published', category__in=post.values('category'))
+    )]
+
+
+@query_budget(queries=12)
+@conditional_page(Category, Comment, querysets=_post_detail_querysets)
+@cache_public_page(Post, Category, Comment)
 def post_detail(request, slug):
     """Detalhe do post com comentários"""
     site_settings = get_site_settings()
@@ -96,16 +107,14 @@ def post_detail(request, slug):
         else:
             messages.error(request, 'Por favor, preencha todos os campos.')
     
-    # Posts relacionados (mesma categoria)
-    related_posts = Post.objects.filter(
-        status='published',
-        category=post.category
-    ).exclude(id=post.id)[:3]
-    
-    # Posts populares (com mais comentários aprovados)
-    popular_posts = Post.objects.filter(
-        status='published'
-    ).exclude(id=post.id)[:5]
+    # Posts relacionados (pré-calculados por semelhança de conteúdo)
+    related_posts = list(recommendations.related(post, limit=3))
+    if not related_posts:
+        # Ainda sem recomendações: mesma categoria
+        related_posts = Post.objects.filter(
+            status='published',
+            category=post.category
+        ).exclude(id=post.id)[:3]
     
     # Categorias
     categories = Category.objects.all()
@@ -115,7 +124,6 @@ def post_detail(request, slug):
         'post': post,
         'comments': comments,
         'related_posts': related_posts,
-        'popular_posts': popular_posts,
         'categories': categories,
     }
     
@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import ContactMessage, Newsletter, Testimonial, SiteSettings
+from django.utils import timezone
+from .models import ContactMessage, Newsletter, Testimonial, SiteSettings, OutgoingEmail
 
 
 @admin.register(ContactMessage)
@@ -79,3 +80,19 @@ class SiteSettingsAdmin(admin.ModelAdmin):
     
     def has_delete_permission(self, request, obj=None):
         return False
+
+
+@admin.register(OutgoingEmail)
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = ['subject', 'status', 'attempts', 'next_attempt_at', 'created_at', 'sent_at']
+    list_filter = ['status', 'created_at']
+    search_fields = ['subject', 'to']
+    readonly_fields = ['attempts', 'claimed_by', 'last_error', 'created_at', 'sent_at']
+    actions = ['requeue']
+    
+    @admin.action(description='Reenviar os e-mails selecionados')
+    def requeue(self, request, queryset):
+        updated = queryset.exclude(status='sent').update(
+            status='pending', attempts=0, next_attempt_at=timezone.now(), claimed_by='',
+        )
+        self.message_user(request, f'{updated} e-mail(s) colocado(s) de volta na fila.')
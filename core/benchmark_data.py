@@ -0,0 +1,362 @@
+"""
+Massa de dados sintética para testes de carga e benchmarks (generate_benchmark_data).
+
+Os dados são gerados com bulk_create em lotes, com chaves primárias atribuídas
+aqui mesmo, então os relacionamentos ficam consistentes sem reler nada do
+banco. Como bulk_create não chama save() nem sinais, o que eles fariam é
+reproduzido aqui: slug, published_at e os agregados de avaliação do pacote são
+gravados junto, e no fim o índice de busca, as recomendações, as facetas e o
+cache de páginas são reconstruídos de uma vez.
+
+A geração usa um random.Random com semente fixa e datas relativas a uma data
+de referência: a mesma semente, escala e data de referência sobre o mesmo banco
+produzem os mesmos dados. Slugs e e-mails derivam da chave primária, então
+rodar o comando de novo acrescenta dados sem conflito.
+
+Volume por unidade de escala (aproximado): mil pacotes com 15 mil avaliações
+e 5 mil pedidos de reserva, 2 mil posts com 16 mil comentários, 10 mil
+inscritos na newsletter e 3 mil mensagens de contato.
+"""
+import itertools
+import random
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from io import BytesIO
+
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.color import no_style
+from django.db import connection, models, transaction
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.text import slugify
+
+from blog.models import Category, Comment, Post
+from packages import facets
+from packages.models import BookingInquiry, Destination, PackageCategory, Review, TourPackage
+
+from . import images, recommendations, search_index
+from .models import ContactMessage, Newsletter, Testimonial
+from .page_cache import invalidate_model
+
+# Quantidades por unidade de --scale
+PACOTES = 1000
+AVALIACOES_POR_PACOTE = 15
+RESERVAS = 5000
+POSTS = 2000
+COMENTARIOS_POR_POST = 8
+NEWSLETTER = 10000
+CONTATOS = 3000
+DEPOIMENTOS = 50
+
+# Ordem de gravação: pais antes dos filhos
+MODELS = [TourPackage, Review, BookingInquiry, Post, Comment, Newsletter, ContactMessage, Testimonial]
+
+# Imagens compartilhadas por todos os registros gerados
+PACKAGE_IMAGE = 'packages/featured/benchmark.jpg'
+POST_IMAGE = 'blog/images/benchmark.jpg'
+
+NOMES = [
+    'Ana', 'Bruno', 'Carla', 'Daniel', 'Eduarda', 'Felipe', 'Gabriela', 'Henrique', 'Isabela', 'João',
+    'Juliana', 'Lucas', 'Mariana', 'Nicolas', 'Patrícia', 'Rafael', 'Sabrina', 'Thiago', 'Vanessa', 'Wesley',
+]
+SOBRENOMES = [
+    'Silva', 'Santos', 'Oliveira', 'Souza', 'Lima', 'Pereira', 'Costa', 'Rodrigues', 'Almeida', 'Nascimento',
+]
+CATEGORIAS_PACOTE = [
+    ('Praia', 'fa-solid fa-umbrella-beach'), ('Serra', 'fa-solid fa-mountain'),
+    ('Ecoturismo', 'fa-solid fa-leaf'), ('Histórico', 'fa-solid fa-landmark'),
+    ('Aventura', 'fa-solid fa-person-hiking'), ('Religioso', 'fa-solid fa-church'),
+]
+DESTINOS = [
+    'Porto Seguro', 'Morro de São Paulo', 'Chapada Diamantina', 'Praia do Forte', 'Itacaré', 'Trancoso',
+    'Maragogi', 'Porto de Galinhas', 'Fernando de Noronha', 'Jericoacoara', 'Lençóis Maranhenses', 'Natal',
+    'Gramado', 'Bonito', 'Foz do Iguaçu', 'Ouro Preto', 'Arraial do Cabo', 'Paraty', 'Ilhabela', 'Campos do Jordão',
+]
+CATEGORIAS_BLOG = ['Dicas de Viagem', 'Destinos', 'Gastronomia', 'Roteiros', 'Notícias', 'Cultura']
+ATRATIVOS = [
+    'praias de águas cristalinas', 'trilhas na mata atlântica', 'cachoeiras', 'centro histórico', 'passeio de barco',
+    'mergulho com snorkel', 'culinária regional', 'pôr do sol', 'artesanato local', 'piscinas naturais',
+    'mirantes', 'vida noturna', 'festas tradicionais', 'passeio de buggy', 'observação de aves',
+]
+ESTILOS = ['Essencial', 'Completo', 'Premium', 'Família', 'Aventura', 'Romântico', 'Econômico', 'Feriado']
+TEMAS_POST = [
+    'Quando ir a {destino}', 'O que fazer em {destino}', 'Roteiro de 3 dias em {destino}',
+    'Onde comer em {destino}', '{destino} com crianças', 'Quanto custa viajar para {destino}',
+]
+
+
+def _money(value):
+    return Decimal(value).quantize(Decimal('0.01'))
+
+
+class BulkWriter:
+    """Acumula objetos por modelo e grava em lotes, sempre na ordem de MODELS."""
+
+    def __init__(self, batch_size):
+        self.batch_size = batch_size
+        self.buffers = {model: [] for model in MODELS}
+        self.counts = Counter()
+
+    def add(self, obj):
+        buffer = self.buffers[type(obj)]
+        buffer.append(obj)
+        if len(buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        for model, buffer in self.buffers.items():
+            if buffer:
+                model._base_manager.bulk_create(buffer, batch_size=self.batch_size)
+                self.counts[model] += len(buffer)
+                buffer.clear()
+
+
+class IdSequence:
+    """Próximas chaves primárias de cada modelo, a partir do maior id existente."""
+
+    def __init__(self, model_list):
+        self._counters = {
+            model: itertools.count((model._base_manager.aggregate(top=Max('pk'))['top'] or 0) + 1)
+            for model in model_list
+        }
+
+    def __call__(self, model):
+        return next(self._counters[model])
+
+
+@contextmanager
+def explicit_timestamps(model_list):
+    """Desliga auto_now/auto_now_add para gravar as datas geradas."""
+    changed = []
+    for model in model_list:
+        for field in model._meta.concrete_fields:
+            if isinstance(field, models.DateField) and (field.auto_now or field.auto_now_add):
+                changed.append((field, field.auto_now, field.auto_now_add))
+                field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in changed:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def reset_sequences(model_list):
+    """Ajusta as sequências do banco depois de inserir chaves primárias explícitas."""
+    statements = connection.ops.sequence_reset_sql(no_style(), model_list)
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+def _placeholder_image(name, color):
+    """Cria a imagem compartilhada pelos registros gerados, se ainda não existir."""
+    if default_storage.exists(name):
+        return name
+    from PIL import Image
+
+    buffer = BytesIO()
+    Image.new('RGB', (1600, 1000), color).save(buffer, 'JPEG', quality=85)
+    return default_storage.save(name, ContentFile(buffer.getvalue()))
+
+
+class Generator:
+    def __init__(self, scale, seed, reference_date, batch_size):
+        self.scale = scale
+        self.rng = random.Random(seed)
+        self.now = timezone.make_aware(datetime.combine(reference_date, time(18, 0)))
+        self.writer = BulkWriter(batch_size)
+        self.next_id = IdSequence(MODELS)
+
+    def moment(self, start, end):
+        """Instante aleatório entre start e end (limitado à data de referência)."""
+        end = min(end, self.now)
+        if end <= start:
+            return end
+        return start + timedelta(seconds=self.rng.randrange(int((end - start).total_seconds())))
+
+    def person(self):
+        return f'{self.rng.choice(NOMES)} {self.rng.choice(SOBRENOMES)}'
+
+    def text(self, sentences):
+        """Parágrafo com atrativos sorteados (vocabulário variado para busca e recomendações)."""
+        return ' '.join(
+            f'Aproveite {self.rng.choice(ATRATIVOS)}, {self.rng.choice(ATRATIVOS)} e {self.rng.choice(ATRATIVOS)}.'
+            for _ in range(sentences)
+        )
+
+    def reference_data(self):
+        self.authors = []
+        for username in ('benchmark_autor1', 'benchmark_autor2', 'benchmark_autor3'):
+            author, created = User.objects.get_or_create(
+                username=username, defaults={'first_name': 'Equipe', 'last_name': 'MONITOUR'},
+            )
+            if created:
+                author.set_unusable_password()
+                author.save(update_fields=['password'])
+            self.authors.append(author)
+
+        self.package_categories = [
+            PackageCategory.objects.get_or_create(slug=slugify(nome), defaults={'name': nome, 'icon': icon})[0]
+            for nome, icon in CATEGORIAS_PACOTE
+        ]
+        self.destinations = [
+            Destination.objects.get_or_create(slug=slugify(nome), defaults={
+                'name': nome, 'country': 'Brasil', 'description': f'Conheça {nome}.',
+            })[0]
+            for nome in DESTINOS
+        ]
+        self.blog_categories = [
+            Category.objects.get_or_create(slug=slugify(nome), defaults={'name': nome})[0]
+            for nome in CATEGORIAS_BLOG
+        ]
+        self.package_image = _placeholder_image(PACKAGE_IMAGE, (30, 120, 170))
+        self.post_image = _placeholder_image(POST_IMAGE, (230, 140, 40))
+
+    def packages(self):
+        rng = self.rng
+        self.package_ids = []
+        for _ in range(PACOTES * self.scale):
+            pk = self.next_id(TourPackage)
+            destination = rng.choice(self.destinations)
+            days = rng.randint(1, 10)
+            price = _money(rng.uniform(190, 6500))
+            discount = rng.choice([0, 0, 0, 10, 15, 20])
+            created = self.moment(self.now - timedelta(days=3 * 365), self.now)
+            title = f'{destination.name} {rng.choice(ESTILOS)}'
+            package = TourPackage(
+                pk=pk, title=title, slug=f'{slugify(title)}-{pk}',
+                category=rng.choice(self.package_categories), destination=destination,
+                short_description=f'{days} dias em {destination.name}: {rng.choice(ATRATIVOS)} e {rng.choice(ATRATIVOS)}.',
+                description=self.text(rng.randint(4, 10)), highlights=self.text(2),
+                includes='Transporte\nHospedagem\nCafé da manhã\nGuia local',
+                price=price, original_price=_money(price / (1 - Decimal(discount) / 100)) if discount else None,
+                discount_percentage=discount, duration_days=days, duration_nights=max(days - 1, 0),
+                max_people=rng.choice([12, 20, 30, 46]), difficulty=rng.choice(['easy', 'easy', 'moderate', 'challenging']),
+                available_from=created.date(), available_until=(created + timedelta(days=rng.randint(90, 540))).date(),
+                featured_image=self.package_image,
+                status=rng.choices(['active', 'inactive', 'sold_out'], weights=[85, 10, 5])[0],
+                featured=rng.random() < 0.05, created_at=created, updated_at=created,
+            )
+
+            # Avaliações com os agregados que ratings.apply_delta manteria
+            stars = Counter()
+            reviews = []
+            for _ in range(rng.randint(0, AVALIACOES_POR_PACOTE * 2)):
+                rating = rng.choices([1, 2, 3, 4, 5], weights=[3, 5, 12, 35, 45])[0]
+                approved = rng.random() < 0.9
+                if approved:
+                    stars[rating] += 1
+                nome = self.person()
+                reviews.append(Review(
+                    pk=self.next_id(Review), package_id=pk, name=nome,
+                    email=f'{slugify(nome).replace("-", ".")}@exemplo.com.br', rating=rating,
+                    comment=f'Viagem {rng.choice(["incrível", "muito boa", "boa", "regular"])}. {self.text(1)}',
+                    approved=approved, created_at=self.moment(created, self.now),
+                ))
+            package.review_count = sum(stars.values())
+            package.rating_sum = sum(rating * total for rating, total in stars.items())
+            package.avg_rating = (
+                (Decimal(package.rating_sum) / package.review_count).quantize(Decimal('0.01'))
+                if package.review_count else Decimal('0')
+            )
+            for rating in range(1, 6):
+                setattr(package, f'rating_{rating}_count', stars[rating])
+
+            self.writer.add(package)
+            for review in reviews:
+                self.writer.add(review)
+            self.package_ids.append((pk, created))
+
+        for _ in range(RESERVAS * self.scale):
+            package_id, created = rng.choice(self.package_ids)
+            quando = self.moment(created, self.now)
+            nome = f'{self.person()} {rng.choice(SOBRENOMES)}'
+            self.writer.add(BookingInquiry(
+                pk=self.next_id(BookingInquiry), package_id=package_id, full_name=nome,
+                email=f'{slugify(nome).replace("-", ".")}@exemplo.com.br', phone=f'(71) 9{rng.randrange(10**7, 10**8)}',
+                preferred_date=(quando + timedelta(days=rng.randint(15, 180))).date(),
+                number_of_people=rng.randint(1, 6),
+                status=rng.choice(['pending', 'contacted', 'confirmed', 'cancelled']),
+                created_at=quando, updated_at=quando,
+            ))
+
+    def posts(self):
+        rng = self.rng
+        for _ in range(POSTS * self.scale):
+            pk = self.next_id(Post)
+            title = rng.choice(TEMAS_POST).format(destino=rng.choice(DESTINOS))
+            created = self.moment(self.now - timedelta(days=4 * 365), self.now)
+            published = rng.random() < 0.9
+            self.writer.add(Post(
+                pk=pk, title=title, slug=f'{slugify(title)}-{pk}', author=rng.choice(self.authors),
+                category=rng.choice(self.blog_categories), excerpt=self.text(1),
+                content='\n\n'.join(self.text(rng.randint(3, 6)) for _ in range(rng.randint(4, 12))),
+                featured_image=self.post_image if rng.random() < 0.7 else None,
+                status='published' if published else 'draft', featured=published and rng.random() < 0.05,
+                created_at=created, updated_at=created,
+                # Como Post.save(): publicado recebe published_at
+                published_at=created if published else None,
+            ))
+            for _ in range(rng.randint(0, COMENTARIOS_POR_POST * 2)):
+                nome = self.person()
+                self.writer.add(Comment(
+                    pk=self.next_id(Comment), post_id=pk, name=nome,
+                    email=f'{slugify(nome).replace("-", ".")}@exemplo.com.br',
+                    content=f'Adorei as dicas! {self.text(1)}', approved=rng.random() < 0.85,
+                    created_at=self.moment(created, self.now),
+                ))
+
+    def contacts(self):
+        rng = self.rng
+        inicio = self.now - timedelta(days=3 * 365)
+        for _ in range(NEWSLETTER * self.scale):
+            pk = self.next_id(Newsletter)
+            nome = self.person()
+            self.writer.add(Newsletter(
+                pk=pk, email=f'{slugify(nome).replace("-", ".")}.{pk}@exemplo.com.br', name=nome,
+                active=rng.random() < 0.92, created_at=self.moment(inicio, self.now),
+            ))
+        for _ in range(CONTATOS * self.scale):
+            nome = self.person()
+            self.writer.add(ContactMessage(
+                pk=self.next_id(ContactMessage), name=nome,
+                email=f'{slugify(nome).replace("-", ".")}@exemplo.com.br', phone=f'(71) 9{rng.randrange(10**7, 10**8)}',
+                subject=f'Dúvida sobre {rng.choice(DESTINOS)}', message=self.text(2),
+                status=rng.choice(['new', 'read', 'replied', 'archived']), created_at=self.moment(inicio, self.now),
+            ))
+        for _ in range(DEPOIMENTOS * self.scale):
+            self.writer.add(Testimonial(
+                pk=self.next_id(Testimonial), name=self.person(), location=f'{rng.choice(DESTINOS)}',
+                testimonial=f'Viagem inesquecível! {self.text(1)}', rating=rng.choice([4, 5, 5]),
+                featured=rng.random() < 0.1, created_at=self.moment(inicio, self.now),
+            ))
+
+
+def rebuild_derived():
+    """Reconstrói o que os sinais manteriam: busca, recomendações, facetas, imagens e cache."""
+    search_index.rebuild()
+    recommendations.rebuild()
+    facets.invalidate()
+    for name in (PACKAGE_IMAGE, POST_IMAGE):
+        images.process_image(name)
+    for model in (*MODELS, Destination, PackageCategory, Category):
+        invalidate_model(model)
+
+
+def generate(scale=1, seed=42, reference_date=None, batch_size=5000, derived=True):
+    """Gera a massa de dados e retorna um Counter {modelo: linhas inseridas}."""
+    generator = Generator(scale, seed, reference_date or timezone.localdate(), batch_size)
+    with transaction.atomic(), explicit_timestamps(MODELS):
+        generator.reference_data()
+        generator.packages()
+        generator.posts()
+        generator.contacts()
+        generator.writer.flush()
+        reset_sequences(MODELS)
+    if derived:
+        rebuild_derived()
+    return generator.writer.counts
@@ -0,0 +1,85 @@
+"""
+Requisições condicionais (ETag / Last-Modified) das páginas públicas.
+
+O validador de uma página é calculado sem renderizá-la: uma única consulta
+devolve o maior updated_at e o total de linhas de cada conjunto de objetos
+exibidos (o total acusa exclusões e itens que saíram do conjunto). Modelos sem
+updated_at entram pelo carimbo de geração do cache de páginas (core.page_cache),
+que é lido do cache e não do banco.
+
+Quando o validador enviado pelo navegador confere, a view nem é chamada e a
+resposta é um 304 sem corpo.
+"""
+import hashlib
+from functools import wraps
+
+from django.contrib.messages import get_messages
+from django.utils import timezone
+from django.views.decorators.http import condition
+
+from monitour_common.conditional import latest_changes
+
+from .page_cache import model_generations
+
+# Templates e código mudam a cada deploy (reinício dos workers); com preload_app
+# todos os workers compartilham este valor
+_STARTED_AT = timezone.now().replace(microsecond=0)
+
+
+def _is_conditional_request(request):
+    if request.method not in ('GET', 'HEAD'):
+        return False
+    if request.user.is_authenticated:
+        return False
+    # Mensagens da sessão precisam ser exibidas para este visitante apenas
+    if len(get_messages(request)):
+        return False
+    return True
+
+
+def conditional_page(*models, querysets=None):
+    """
+    Decorator que responde 304 quando a página não mudou desde a última visita.
+
+    querysets(request, *args, **kwargs) devolve os conjuntos de objetos exibidos
+    (todos com updated_at); models são os modelos sem updated_at dos quais a
+    página também depende. SiteSettings é incluído sempre (cabeçalho e rodapé).
+    """
+    from .models import SiteSettings
+
+    def validators(request, *args, **kwargs):
+        if not hasattr(request, '_page_validators'):
+            request._page_validators = (None, None)
+            if _is_conditional_request(request):
+                changes = latest_changes([SiteSettings.objects.all(), *querysets(request, *args, **kwargs)])
+                timestamps = [latest for latest, _ in changes if latest is not None]
+                fingerprint = '|'.join([
+                    *(f'{latest.isoformat() if latest else "-"}:{total}' for latest, total in changes),
+                    *model_generations(models),
+                    _STARTED_AT.isoformat(),
+                    # O HTML traz o token CSRF do visitante
+                    request.COOKIES.get('csrftoken', ''),
+                ])
+                request._page_validators = (
+                    hashlib.sha1(fingerprint.encode()).hexdigest(),
+                    max([*timestamps, _STARTED_AT]),
+                )
+        return request._page_validators
+
+    def decorator(view_func):
+        conditional_view = condition(
+            etag_func=lambda request, *args, **kwargs: validators(request, *args, **kwargs)[0],
+            last_modified_func=lambda request, *args, **kwargs: validators(request, *args, **kwargs)[1],
+        )(view_func)
+
+        @wraps(view_func)
+        def _wrapped_view(request, *args, **kwargs):
+            response = conditional_view(request, *args, **kwargs)
+            if getattr(request, '_page_validators', (None,))[0] is not None:
+                # Sempre revalidar: o navegador guarda a página, mas pergunta se mudou
+                response.setdefault('Cache-Control', 'no-cache')
+            return response
+
+        return _wrapped_view
+
+    return decorator
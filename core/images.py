@@ -0,0 +1,229 @@
+"""
+Derivados responsivos das imagens enviadas pelo admin.
+
+Para cada imagem é gerado, fora da requisição, um conjunto de versões em
+várias larguras nos formatos AVIF, WebP e JPEG, além de um placeholder
+desfocado (LQIP) embutido como data URI. Os arquivos ficam em
+derivatives/<hash do conteúdo>/, então só são gerados de novo quando o arquivo
+de origem muda, e o mesmo arquivo enviado duas vezes reaproveita os derivados.
+
+Os modelos usam ResponsiveImagesMixin; os templates usam as tags de
+core.templatetags.responsive_images.
+"""
+import base64
+import hashlib
+import io
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from PIL import Image, ImageFilter, ImageOps, features
+
+logger = logging.getLogger(__name__)
+
+DERIVATIVES_DIR = 'derivatives'
+
+# Larguras geradas (nunca maiores que a imagem original)
+DERIVATIVE_WIDTHS = (320, 640, 960, 1280)
+
+# Do mais eficiente para o mais compatível; o último é o fallback do <img>
+FORMATS = [
+    ('avif', 'AVIF', 'image/avif', {'quality': 50}),
+    ('webp', 'WEBP', 'image/webp', {'quality': 75, 'method': 6}),
+    ('jpg', 'JPEG', 'image/jpeg', {'quality': 80, 'optimize': True, 'progressive': True}),
+]
+
+PLACEHOLDER_WIDTH = 16
+
+MANIFEST_KEY_PREFIX = 'core:img'
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def available_formats():
+    """Formatos suportados pelo Pillow instalado (AVIF depende da versão/compilação)."""
+    return [fmt for fmt in FORMATS if fmt[0] != 'avif' or features.check('avif')]
+
+
+def content_hash(name, storage=default_storage):
+    digest = hashlib.sha256()
+    with storage.open(name, 'rb') as source:
+        for chunk in iter(lambda: source.read(64 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:20]
+
+
+def _target_widths(width):
+    widths = [w for w in DERIVATIVE_WIDTHS if w < width]
+    largest = min(width, DERIVATIVE_WIDTHS[-1])
+    if largest not in widths:
+        widths.append(largest)
+    return widths
+
+
+def _placeholder(img):
+    """Miniatura desfocada (poucas centenas de bytes) para exibir enquanto a imagem carrega."""
+    height = max(1, round(img.height * PLACEHOLDER_WIDTH / img.width))
+    tiny = img.convert('RGB').resize((PLACEHOLDER_WIDTH, height)).filter(ImageFilter.GaussianBlur(1))
+    buffer = io.BytesIO()
+    tiny.save(buffer, 'JPEG', quality=40)
+    return 'data:image/jpeg;base64,' + base64.b64encode(buffer.getvalue()).decode()
+
+
+def build_derivatives(name, digest, storage=default_storage):
+    """Gera os derivados de uma imagem e retorna o manifesto (dimensões, placeholder e variantes)."""
+    with storage.open(name, 'rb') as source:
+        img = ImageOps.exif_transpose(Image.open(source))
+        img.load()
+
+    if img.mode not in ('RGB', 'RGBA'):
+        img = img.convert('RGBA' if 'A' in img.getbands() else 'RGB')
+
+    base = f'{DERIVATIVES_DIR}/{digest[:2]}/{digest}'
+    variants = {}
+    for ext, pil_format, _, options in available_formats():
+        variants[ext] = []
+        for width in _target_widths(img.width):
+            height = round(img.height * width / img.width)
+            resized = img if width == img.width else img.resize((width, height), Image.LANCZOS)
+            if pil_format == 'JPEG':
+                resized = resized.convert('RGB')
+            buffer = io.BytesIO()
+            resized.save(buffer, pil_format, **options)
+            path = f'{base}/{width}w.{ext}'
+            if storage.exists(path):
+                storage.delete(path)
+            storage.save(path, ContentFile(buffer.getvalue()))
+            variants[ext].append([width, path])
+
+    return {
+        'hash': digest,
+        'width': img.width,
+        'height': img.height,
+        'placeholder': _placeholder(img),
+        'variants': variants,
+    }
+
+
+def _manifest_key(name):
+    return f'{MANIFEST_KEY_PREFIX}:{hashlib.sha1(name.encode()).hexdigest()}'
+
+
+def get_manifest(name):
+    """Manifesto dos derivados de um arquivo, ou None se ainda não foram gerados."""
+    if not name:
+        return None
+    key = _manifest_key(name)
+    manifest = cache.get(key)
+    if manifest is None:
+        from .models import ResponsiveImage
+
+        record = ResponsiveImage.objects.filter(source=name).first()
+        manifest = record.manifest() if record else False
+        cache.set(key, manifest, None)
+    return manifest or None
+
+
+def process_image(name, force=False):
+    """Gera (ou reaproveita) os derivados de um arquivo. Retorna True se algo foi gerado."""
+    from .models import ResponsiveImage
+
+    if not name or not default_storage.exists(name):
+        return False
+
+    digest = content_hash(name)
+    record = ResponsiveImage.objects.filter(source=name).first()
+    if record and record.content_hash == digest and not force:
+        return False
+
+    # Mesmo conteúdo já processado com outro nome de arquivo
+    existing = None if force else ResponsiveImage.objects.filter(content_hash=digest).first()
+    manifest = existing.manifest() if existing else build_derivatives(name, digest)
+
+    ResponsiveImage.objects.update_or_create(source=name, defaults={
+        'content_hash': digest,
+        'width': manifest['width'],
+        'height': manifest['height'],
+        'placeholder': manifest['placeholder'],
+        'variants': manifest['variants'],
+    })
+    cache.delete(_manifest_key(name))
+    return True
+
+
+def _process_and_invalidate(model_label, names):
+    from .page_cache import invalidate_model
+
+    close_old_connections()
+    changed = False
+    for name in names:
+        try:
+            changed |= process_image(name)
+        except Exception:
+            logger.exception('Falha ao gerar derivados de %s', name)
+    if changed:
+        # Páginas em cache ainda apontam para a imagem original
+        invalidate_model(apps.get_model(model_label))
+    close_old_connections()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='image-derivatives')
+    return _executor
+
+
+def schedule(model_label, names):
+    """Agenda a geração dos derivados para depois do commit, fora da thread da requisição."""
+    names = [name for name in names if name]
+    if not names:
+        return
+
+    def submit():
+        if getattr(settings, 'IMAGE_DERIVATIVES_ASYNC', True):
+            _get_executor().submit(_process_and_invalidate, model_label, names)
+        else:
+            _process_and_invalidate(model_label, names)
+
+    transaction.on_commit(submit)
+
+
+class ResponsiveImagesMixin:
+    """
+    Gera derivados dos campos listados em responsive_image_fields após o save,
+    apenas quando o arquivo do campo mudou.
+    """
+
+    responsive_image_fields = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember_image_names()
+        return instance
+
+    def _remember_image_names(self):
+        self._image_names = {
+            field: getattr(self, field).name
+            for field in self.responsive_image_fields
+            if field in self.__dict__
+        }
+
+    def schedule_image_derivatives(self):
+        previous = getattr(self, '_image_names', {})
+        changed = [
+            getattr(self, field).name
+            for field in self.responsive_image_fields
+            if getattr(self, field) and getattr(self, field).name != previous.get(field)
+        ]
+        schedule(self._meta.label, changed)
+        self._remember_image_names()
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from core import static_export
+
+
+class Command(BaseCommand):
+    help = 'Exporta as páginas públicas em HTML estático para o nginx servir com try_files'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--clean',
+            action='store_true',
+            help='Apaga a exportação anterior antes de gerar as páginas',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'Exportando páginas para {static_export.export_root()}...')
+
+        result = static_export.export_all(clean=options['clean'])
+
+        for path, error in result['failed']:
+            self.stdout.write(self.style.WARNING(f'  {path}: {error}'))
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {result['written']} página(s) exportada(s), {result['removed']} removida(s), "
+            f"{len(result['failed'])} com erro (servidas pelo gunicorn)!"
+        ))
@@ -0,0 +1,54 @@
+import time
+from datetime import date
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core import benchmark_data
+
+
+class Command(BaseCommand):
+    help = 'Gera uma massa de dados sintética e determinística para testes de carga e benchmarks'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scale', type=int, default=1,
+            help='Multiplicador do volume (1 ≈ 50 mil linhas; 20 passa de 1 milhão)',
+        )
+        parser.add_argument('--seed', type=int, default=42, help='Semente do gerador (padrão: 42)')
+        parser.add_argument(
+            '--reference-date', type=date.fromisoformat,
+            help='Data "de hoje" usada nas datas geradas, AAAA-MM-DD (padrão: hoje)',
+        )
+        parser.add_argument('--batch-size', type=int, default=5000, help='Linhas por INSERT (padrão: 5000)')
+        parser.add_argument(
+            '--skip-derived', action='store_true',
+            help='Não reconstrói índice de busca, recomendações e caches ao final',
+        )
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Permite gerar com DEBUG=False (nunca use no banco de produção)',
+        )
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG and not options['force']:
+            raise CommandError('DEBUG=False: use um banco de benchmark e passe --force para confirmar.')
+        if options['scale'] < 1:
+            raise CommandError('--scale deve ser 1 ou mais.')
+
+        self.stdout.write(f"Gerando dados de benchmark (escala {options['scale']}, semente {options['seed']})...")
+        started = time.perf_counter()
+        counts = benchmark_data.generate(
+            scale=options['scale'],
+            seed=options['seed'],
+            reference_date=options['reference_date'],
+            batch_size=options['batch_size'],
+            derived=not options['skip_derived'],
+        )
+        elapsed = time.perf_counter() - started
+
+        for model, total in counts.items():
+            self.stdout.write(f'  {model._meta.label}: {total}')
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {sum(counts.values())} linhas geradas em {elapsed:.1f}s!'
+        ))
@@ -0,0 +1,37 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from core import images
+from core.page_cache import invalidate_model
+
+MODELS = ['packages.TourPackage', 'blog.Post', 'core.Testimonial']
+
+
+class Command(BaseCommand):
+    help = 'Gera os derivados responsivos (AVIF/WebP/JPEG e placeholder) das imagens existentes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Gera novamente mesmo as imagens que não mudaram',
+        )
+
+    def handle(self, *args, **options):
+        formats = ', '.join(ext for ext, _, _, _ in images.available_formats())
+        self.stdout.write(f'Gerando derivados ({formats})...')
+
+        generated = 0
+        for label in MODELS:
+            model = apps.get_model(label)
+            names = set()
+            for values in model.objects.values_list(*model.responsive_image_fields):
+                names.update(name for name in values if name)
+
+            count = sum(images.process_image(name, force=options['force']) for name in sorted(names))
+            if count:
+                invalidate_model(model)
+            self.stdout.write(f'  {label}: {count} de {len(names)} imagem(ns) processada(s)')
+            generated += count
+
+        self.stdout.write(self.style.SUCCESS(f'✅ {generated} imagem(ns) processada(s)!'))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from core import recommendations
+
+
+class Command(BaseCommand):
+    help = 'Recalcula as recomendações de pacotes e posts relacionados (TF-IDF e similaridade de cosseno)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--if-stale', action='store_true',
+            help='Só os tipos ainda não ajustados ou que cresceram desde o último ajuste (para agendamento)',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('Recalculando recomendações...')
+
+        totals = recommendations.rebuild(only_stale=options['if_stale'])
+
+        for doc_type, total in totals.items():
+            self.stdout.write(f'  {doc_type}: {total} item(ns)')
+        if not totals:
+            self.stdout.write('  nenhum tipo defasado')
+        self.stdout.write(self.style.SUCCESS('✅ Recomendações recalculadas!'))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from core import search_index
+
+
+class Command(BaseCommand):
+    help = 'Reconstrói o índice de busca textual (posts, pacotes e destinos)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Quantidade de documentos gravados por lote (padrão: 500)',
+        )
+
+    def handle(self, *args, **options):
+        backend = search_index.get_search_backend()
+        self.stdout.write(f'Reconstruindo índice de busca ({backend.__class__.__name__})...')
+
+        totals = search_index.rebuild(batch_size=options['batch_size'])
+
+        for doc_type, total in totals.items():
+            self.stdout.write(f'  {doc_type}: {total} documento(s)')
+        self.stdout.write(
+            self.style.SUCCESS(f'✅ Índice reconstruído com {sum(totals.values())} documentos!')
+        )
@@ -0,0 +1,22 @@
+from django.db import migrations
+
+
+def criar_indice_de_busca(apps, schema_editor):
+    from core.search_index import get_search_backend
+    get_search_backend(schema_editor.connection.vendor).create_index(schema_editor)
+
+
+def remover_indice_de_busca(apps, schema_editor):
+    from core.search_index import get_search_backend
+    get_search_backend(schema_editor.connection.vendor).drop_index(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(criar_indice_de_busca, remover_indice_de_busca),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResponsiveImage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=255, unique=True, verbose_name='Arquivo de origem')),
+                ('content_hash', models.CharField(db_index=True, max_length=40, verbose_name='Hash do conteúdo')),
+                ('width', models.PositiveIntegerField(verbose_name='Largura')),
+                ('height', models.PositiveIntegerField(verbose_name='Altura')),
+                ('placeholder', models.TextField(verbose_name='Placeholder (LQIP)')),
+                ('variants', models.JSONField(default=dict, verbose_name='Variantes')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+            ],
+            options={
+                'verbose_name': 'Imagem Responsiva',
+                'verbose_name_plural': 'Imagens Responsivas',
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_responsiveimage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Recommendation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('doc_type', models.CharField(max_length=20, verbose_name='Tipo')),
+                ('object_id', models.PositiveBigIntegerField(verbose_name='Item')),
+                ('related_id', models.PositiveBigIntegerField(verbose_name='Item relacionado')),
+                ('score', models.FloatField(verbose_name='Similaridade')),
+                ('rank', models.PositiveSmallIntegerField(verbose_name='Posição')),
+            ],
+            options={
+                'verbose_name': 'Recomendação',
+                'verbose_name_plural': 'Recomendações',
+                'ordering': ['doc_type', 'object_id', 'rank'],
+                'indexes': [models.Index(fields=['doc_type', 'object_id', 'rank'], name='core_recommendation_lookup'), models.Index(fields=['doc_type', 'related_id'], name='core_recommendation_related')],
+            },
+        ),
+    ]
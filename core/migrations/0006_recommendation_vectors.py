@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_outgoingemail'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecommendationModel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('doc_type', models.CharField(max_length=20, unique=True, verbose_name='Tipo')),
+                ('vocabulary', models.JSONField(default=list, verbose_name='Vocabulário')),
+                ('idf', models.JSONField(default=list, verbose_name='IDF')),
+                ('fitted_count', models.PositiveIntegerField(default=0, verbose_name='Itens no ajuste')),
+                ('fitted_at', models.DateTimeField(auto_now=True, verbose_name='Ajustado em')),
+            ],
+            options={
+                'verbose_name': 'Modelo de Recomendação',
+                'verbose_name_plural': 'Modelos de Recomendação',
+            },
+        ),
+        migrations.CreateModel(
+            name='RecommendationVector',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('doc_type', models.CharField(max_length=20, verbose_name='Tipo')),
+                ('object_id', models.PositiveBigIntegerField(verbose_name='Item')),
+                ('columns', models.JSONField(default=list, verbose_name='Colunas')),
+                ('weights', models.JSONField(default=list, verbose_name='Pesos')),
+            ],
+            options={
+                'verbose_name': 'Vetor de Recomendação',
+                'verbose_name_plural': 'Vetores de Recomendação',
+                'constraints': [models.UniqueConstraint(fields=('doc_type', 'object_id'), name='core_recommendation_vector_unique')],
+            },
+        ),
+    ]
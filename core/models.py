@@ -1,5 +1,7 @@
 from django.db import models
-from PIL import Image
+from django.utils import timezone
+
+from .images import ResponsiveImagesMixin
 
 
 class ContactMessage(models.Model):
@@ -42,7 +44,7 @@ class Newsletter(models.Model):
         return f"{self.name} - {self.email}" if self.name else self.email
 
 
-class Testimonial(models.Model):
+class Testimonial(ResponsiveImagesMixin, models.Model):
     name = models.CharField('Nome', max_length=100)
     location = models.CharField('Localização', max_length=100, blank=True)
     testimonial = models.TextField('Depoimento')
@@ -60,17 +62,12 @@ class Testimonial(models.Model):
     def __str__(self):
         return f"{self.name} - {self.rating} estrelas"
     
+    responsive_image_fields = ('photo',)
+    
     def save(self, *args, **kwargs):
         super().save(*args, **kwargs)
-        if self.photo:
-            self.resize_image()
-    
-    def resize_image(self):
-        if self.photo:
-            img = Image.open(self.photo.path)
-            if img.height > 400 or img.width > 400:
-                img.thumbnail((400, 400))
-                img.save(self.photo.path)
+        # Derivados responsivos são gerados em segundo plano (core.images)
+        self.schedule_image_derivatives()
 
 
 class SiteSettings(models.Model):
@@ -115,6 +112,125 @@ class SiteSettings(models.Model):
         # Garantir que só existe uma instância
         self.pk = 1
         super().save(*args, **kwargs)
+        
+        # Avisar todos os workers que a cópia em memória ficou obsoleta
+        from .site_cache import invalidate_site_settings
+        invalidate_site_settings()
     
     def delete(self, *args, **kwargs):
         pass  # Não permitir deletar as configurações
+
+
+class ResponsiveImage(models.Model):
+    """Derivados gerados para um arquivo de imagem (ver core.images)."""
+    source = models.CharField('Arquivo de origem', max_length=255, unique=True)
+    content_hash = models.CharField('Hash do conteúdo', max_length=40, db_index=True)
+    width = models.PositiveIntegerField('Largura')
+    height = models.PositiveIntegerField('Altura')
+    placeholder = models.TextField('Placeholder (LQIP)')
+    variants = models.JSONField('Variantes', default=dict)
+    updated_at = models.DateTimeField('Atualizado em', auto_now=True)
+    
+    class Meta:
+        verbose_name = 'Imagem Responsiva'
+        verbose_name_plural = 'Imagens Responsivas'
+    
+    def __str__(self):
+        return self.source
+    
+    def manifest(self):
+        return {
+            'hash': self.content_hash,
+            'width': self.width,
+            'height': self.height,
+            'placeholder': self.placeholder,
+            'variants': self.variants,
+        }
+
+
+class Recommendation(models.Model):
+    """Vizinho de um post ou pacote por semelhança de conteúdo (ver core.recommendations)."""
+    doc_type = models.CharField('Tipo', max_length=20)
+    object_id = models.PositiveBigIntegerField('Item')
+    related_id = models.PositiveBigIntegerField('Item relacionado')
+    score = models.FloatField('Similaridade')
+    rank = models.PositiveSmallIntegerField('Posição')
+    
+    class Meta:
+        verbose_name = 'Recomendação'
+        verbose_name_plural = 'Recomendações'
+        ordering = ['doc_type', 'object_id', 'rank']
+        indexes = [
+            models.Index(fields=['doc_type', 'object_id', 'rank'], name='core_recommendation_lookup'),
+            models.Index(fields=['doc_type', 'related_id'], name='core_recommendation_related'),
+        ]
+    
+    def __str__(self):
+        return f'{self.doc_type} {self.object_id} -> {self.related_id} ({self.score:.2f})'
+
+
+class RecommendationModel(models.Model):
+    """Vocabulário e IDF do TF-IDF das recomendações de um tipo (ver core.recommendations)."""
+    doc_type = models.CharField('Tipo', max_length=20, unique=True)
+    vocabulary = models.JSONField('Vocabulário', default=list)
+    idf = models.JSONField('IDF', default=list)
+    fitted_count = models.PositiveIntegerField('Itens no ajuste', default=0)
+    fitted_at = models.DateTimeField('Ajustado em', auto_now=True)
+    
+    class Meta:
+        verbose_name = 'Modelo de Recomendação'
+        verbose_name_plural = 'Modelos de Recomendação'
+    
+    def __str__(self):
+        return f'{self.doc_type} ({len(self.vocabulary)} termos)'
+
+
+class RecommendationVector(models.Model):
+    """Vetor TF-IDF normalizado de um item, guardado esparso (colunas e pesos não nulos)."""
+    doc_type = models.CharField('Tipo', max_length=20)
+    object_id = models.PositiveBigIntegerField('Item')
+    columns = models.JSONField('Colunas', default=list)
+    weights = models.JSONField('Pesos', default=list)
+    
+    class Meta:
+        verbose_name = 'Vetor de Recomendação'
+        verbose_name_plural = 'Vetores de Recomendação'
+        constraints = [
+            models.UniqueConstraint(fields=['doc_type', 'object_id'], name='core_recommendation_vector_unique'),
+        ]
+    
+    def __str__(self):
+        return f'{self.doc_type} {self.object_id} ({len(self.columns)} termos)'
+
+
+class OutgoingEmail(models.Model):
+    """E-mail transacional na fila de envio (ver core.outbox e o comando run_mail_worker)."""
+    STATUS_CHOICES = [
+        ('pending', 'Pendente'),
+        ('sent', 'Enviado'),
+        ('dead', 'Falhou definitivamente'),
+    ]
+    
+    subject = models.CharField('Assunto', max_length=255)
+    body = models.TextField('Mensagem')
+    from_email = models.CharField('Remetente', max_length=255, blank=True)
+    to = models.JSONField('Destinatários', default=list)
+    reply_to = models.JSONField('Responder para', default=list, blank=True)
+    status = models.CharField('Status', max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField('Tentativas', default=0)
+    next_attempt_at = models.DateTimeField('Próxima tentativa', default=timezone.now)
+    claimed_by = models.CharField('Reservado por', max_length=32, blank=True)
+    last_error = models.TextField('Último erro', blank=True)
+    created_at = models.DateTimeField('Criado em', auto_now_add=True)
+    sent_at = models.DateTimeField('Enviado em', null=True, blank=True)
+    
+    class Meta:
+        verbose_name = 'E-mail na Fila'
+        verbose_name_plural = 'Fila de E-mails'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='core_outgoing_email_due'),
+        ]
+    
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.to)}"
@@ -0,0 +1,14 @@
+"""
+Fila de saída (outbox) dos e-mails transacionais, gravada em core_outgoingemail.
+
+A reserva dos lotes, as novas tentativas e o descarte são os mesmos nos dois
+projetos e ficam em monitour_common.outbox; o comando run_mail_worker esvazia
+a fila.
+"""
+from monitour_common.outbox import Outbox
+
+from .models import OutgoingEmail
+
+fila = Outbox(OutgoingEmail)
+enqueue = fila.enqueue
+deliver_batch = fila.deliver_batch
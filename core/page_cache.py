@@ -0,0 +1,156 @@
+"""
+Cache de página inteira para visitantes anônimos.
+
+As páginas públicas só mudam quando a equipe edita o conteúdo no admin, então
+o HTML renderizado é guardado no cache compartilhado e servido sem consultas.
+A chave inclui um carimbo de geração para cada modelo do qual a página depende;
+os sinais em core.signals trocam o carimbo quando um desses modelos é salvo ou
+removido, o que invalida todas as páginas que o usam.
+"""
+import hashlib
+import re
+import threading
+import uuid
+from contextlib import contextmanager
+from functools import wraps
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+
+PAGE_KEY_PREFIX = 'core:page'
+GENERATION_KEY_PREFIX = 'core:page_gen'
+
+# Parâmetros de campanha não alteram o conteúdo da página
+IGNORED_QUERY_PARAMS = {'fbclid', 'gclid'}
+
+CSRF_PLACEHOLDER = '__CSRF_TOKEN__'
+CSRF_INPUT_RE = re.compile(r'(name="csrfmiddlewaretoken" value=")([^"]+)(")')
+
+_bypass = threading.local()
+
+
+def _model_label(model):
+    return model._meta.label_lower
+
+
+def _generation_key(label):
+    return f'{GENERATION_KEY_PREFIX}:{label}'
+
+
+def _get_generations(labels):
+    """Lê os carimbos de geração dos modelos, criando os que faltarem."""
+    keys = [_generation_key(label) for label in labels]
+    generations = cache.get_many(keys)
+    for key in keys:
+        if key not in generations:
+            cache.add(key, uuid.uuid4().hex, None)
+            generations[key] = cache.get(key)
+    return [generations[key] for key in keys]
+
+
+def model_generations(models):
+    """Carimbos de geração atuais dos modelos (mudam a cada alteração, ver invalidate_model)."""
+    return _get_generations(sorted({_model_label(model) for model in models}))
+
+
+def normalize_query_string(query_dict):
+    """Ordena os parâmetros e remove valores vazios e de rastreamento de campanha."""
+    items = []
+    for key in sorted(query_dict.keys()):
+        if key in IGNORED_QUERY_PARAMS or key.startswith('utm_'):
+            continue
+        for value in sorted(query_dict.getlist(key)):
+            if value != '':
+                items.append((key, value))
+    return urlencode(items)
+
+
+def page_cache_key(request, labels):
+    """Monta a chave da página a partir do caminho, da query string normalizada e das gerações."""
+    url = f'{request.path}?{normalize_query_string(request.GET)}'
+    url_hash = hashlib.sha1(url.encode()).hexdigest()
+    generations = hashlib.sha1('.'.join(_get_generations(labels)).encode()).hexdigest()
+    return f'{PAGE_KEY_PREFIX}:{url_hash}:{generations}'
+
+
+@contextmanager
+def bypass_page_cache():
+    """Renderiza as views sem ler nem gravar o cache (usado pela exportação estática)."""
+    _bypass.active = True
+    try:
+        yield
+    finally:
+        _bypass.active = False
+
+
+def _is_cacheable_request(request):
+    if getattr(_bypass, 'active', False):
+        return False
+    if request.method not in ('GET', 'HEAD'):
+        return False
+    if request.user.is_authenticated:
+        return False
+    # Mensagens da sessão precisam ser exibidas para este visitante apenas
+    if len(get_messages(request)):
+        return False
+    return True
+
+
+def invalidate_model(model):
+    """Troca o carimbo de geração do modelo após o commit, invalidando as páginas que dependem dele."""
+    key = _generation_key(_model_label(model))
+    transaction.on_commit(lambda: cache.set(key, uuid.uuid4().hex, None))
+
+
+def cache_public_page(*models):
+    """
+    Decorator que guarda o HTML da view para visitantes anônimos.
+
+    Recebe os modelos dos quais a página depende; SiteSettings é incluído
+    sempre, pois o cabeçalho e o rodapé usam as configurações do site.
+    """
+    from .models import SiteSettings
+
+    labels = sorted({_model_label(model) for model in (SiteSettings, *models)})
+
+    def decorator(view_func):
+        @wraps(view_func)
+        def _wrapped_view(request, *args, **kwargs):
+            if not getattr(settings, 'PAGE_CACHE_ENABLED', True) or not _is_cacheable_request(request):
+                return view_func(request, *args, **kwargs)
+
+            key = page_cache_key(request, labels)
+            cached = cache.get(key)
+            if cached is not None:
+                content = cached['content']
+                if cached['has_csrf']:
+                    # Cada visitante recebe o próprio token (e o cookie correspondente)
+                    content = content.replace(CSRF_PLACEHOLDER, get_token(request))
+                response = HttpResponse(content, content_type=cached['content_type'])
+                response['X-Page-Cache'] = 'HIT'
+                return response
+
+            response = view_func(request, *args, **kwargs)
+            if response.status_code != 200 or response.streaming or response.cookies:
+                return response
+            if hasattr(response, 'render') and callable(response.render):
+                response.render()
+
+            content = response.content.decode(response.charset)
+            content, csrf_count = CSRF_INPUT_RE.subn(rf'\g<1>{CSRF_PLACEHOLDER}\g<3>', content)
+            cache.set(key, {
+                'content': content,
+                'content_type': response['Content-Type'],
+                'has_csrf': csrf_count > 0,
+            }, settings.PAGE_CACHE_TIMEOUT)
+            response['X-Page-Cache'] = 'MISS'
+            return response
+
+        return _wrapped_view
+
+    return decorator
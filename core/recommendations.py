@@ -0,0 +1,373 @@
+"""
+Recomendações de conteúdo semelhante (pacotes relacionados e posts relacionados).
+
+Cada pacote e post vira um vetor TF-IDF do título e do texto, normalizado pelo
+mesmo processo do índice de busca (sem acentos e sem stopwords). Os k vizinhos
+mais próximos por similaridade de cosseno são gravados em core_recommendation,
+e as páginas de detalhe fazem uma única consulta indexada.
+
+O vocabulário e o IDF ficam em RecommendationModel e o vetor de cada item, só
+com os termos não nulos, em RecommendationVector. O comando
+rebuild_recommendations recalcula tudo (vocabulário, IDF, vetores e vizinhos);
+com --if-stale, só os tipos que cresceram mais que REFIT_GROWTH desde o último
+ajuste (o deploy agenda essa execução). Entre reconstruções, os sinais em
+core.signals atualizam apenas o item salvo: o vetor dele é recalculado com o
+vocabulário atual e gravado na própria linha, e só as listas de vizinhos
+afetadas são regravadas. Nada é reajustado durante um save.
+"""
+import math
+from collections import Counter
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
+
+from .search_index import query_terms
+
+TOP_K = 6
+
+# Limite do vocabulário (termos mais frequentes), para a matriz da reconstrução caber na memória
+MAX_FEATURES = 5000
+
+# O título pesa mais que o corpo do texto
+TITLE_REPEAT = 3
+
+# Crescimento (fração de itens novos desde a última reconstrução) a partir do
+# qual rebuild_recommendations --if-stale reajusta o tipo, para o vocabulário e
+# o IDF não ficarem defasados
+REFIT_GROWTH = 0.2
+
+
+def _post_text(post):
+    category = post.category.name if post.category_id else ''
+    return post.title, ' '.join([post.excerpt, post.content, category])
+
+
+def _package_text(package):
+    return package.title, ' '.join([
+        package.short_description, package.description, package.highlights,
+        package.destination.name, package.category.name,
+    ])
+
+
+def _registry():
+    from blog.models import Post
+    from packages.models import TourPackage
+
+    return {
+        'post': (Post, _post_text, Post.objects.filter(status='published').select_related('category')),
+        'package': (TourPackage, _package_text,
+                    TourPackage.objects.filter(status='active').select_related('destination', 'category')),
+    }
+
+
+def doc_type_for(model):
+    for doc_type, (registered_model, _, _) in _registry().items():
+        if registered_model is model:
+            return doc_type
+    return None
+
+
+def tokens(title, body):
+    return query_terms(title) * TITLE_REPEAT + query_terms(body)
+
+
+# --- Vetorização -----------------------------------------------------------
+
+def _term_frequencies(terms, vocabulary):
+    """Vetor TF sublinear (1 + log tf) de um documento no vocabulário dado."""
+    vector = np.zeros(len(vocabulary), dtype=np.float32)
+    for term, count in Counter(terms).items():
+        column = vocabulary.get(term)
+        if column is not None:
+            vector[column] = 1.0 + math.log(count)
+    return vector
+
+
+def _normalize(matrix):
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def fit(documents):
+    """
+    Monta o modelo TF-IDF de uma lista de (id, termos).
+
+    Retorna um dict com ids, vocabulário, idf e a matriz normalizada (uma linha por documento).
+    """
+    document_frequency = Counter()
+    for _, terms in documents:
+        document_frequency.update(set(terms))
+
+    vocabulary_terms = [term for term, _ in document_frequency.most_common(MAX_FEATURES)]
+    vocabulary = {term: column for column, term in enumerate(vocabulary_terms)}
+
+    total = len(documents)
+    idf = np.array(
+        [math.log((1 + total) / (1 + document_frequency[term])) + 1.0 for term in vocabulary_terms],
+        dtype=np.float32,
+    )
+
+    matrix = np.zeros((total, len(vocabulary)), dtype=np.float32)
+    for row, (_, terms) in enumerate(documents):
+        matrix[row] = _term_frequencies(terms, vocabulary)
+    matrix = _normalize(matrix * idf)
+
+    return {
+        'ids': [object_id for object_id, _ in documents],
+        'fitted_count': total,
+        'vocabulary': vocabulary,
+        'idf': idf,
+        'matrix': matrix,
+    }
+
+
+def vectorize(model, terms):
+    """Vetor normalizado de um documento no vocabulário de um modelo já ajustado."""
+    return _normalize(_term_frequencies(terms, model['vocabulary']) * model['idf'])
+
+
+def sparse(vector):
+    """(colunas, pesos) dos valores não nulos de um vetor."""
+    columns = np.flatnonzero(vector)
+    return columns.tolist(), vector[columns].tolist()
+
+
+def top_neighbors(scores, ids, exclude, k=TOP_K):
+    """Os k ids de maior similaridade (positiva), excluindo o próprio documento."""
+    scores = scores.copy()
+    if exclude in ids:
+        scores[ids.index(exclude)] = -1.0
+    if len(scores) > k:
+        candidates = np.argpartition(-scores, k)[:k]
+    else:
+        candidates = np.arange(len(scores))
+    ranked = sorted(candidates, key=lambda column: -scores[column])
+    return [(ids[column], float(scores[column])) for column in ranked if scores[column] > 0]
+
+
+class StoredVectors:
+    """Vetores gravados de um tipo em formato CSR, para produtos escalares sem a matriz densa."""
+
+    def __init__(self, doc_type, size):
+        from .models import RecommendationVector
+
+        self.size = size
+        self.ids = []
+        offsets, columns, weights = [0], [], []
+        rows = RecommendationVector.objects.filter(doc_type=doc_type).values_list('object_id', 'columns', 'weights')
+        for object_id, row_columns, row_weights in rows.iterator(chunk_size=2000):
+            self.ids.append(object_id)
+            columns.extend(row_columns)
+            weights.extend(row_weights)
+            offsets.append(len(columns))
+        self.offsets = np.array(offsets, dtype=np.int64)
+        self.columns = np.array(columns, dtype=np.int64)
+        self.weights = np.array(weights, dtype=np.float32)
+        # Linha de cada entrada não nula, para somar os produtos por linha
+        self.rows = np.repeat(np.arange(len(self.ids)), np.diff(self.offsets))
+
+    def vector(self, object_id):
+        """Vetor denso de um item gravado."""
+        row = self.ids.index(object_id)
+        start, end = self.offsets[row], self.offsets[row + 1]
+        vector = np.zeros(self.size, dtype=np.float32)
+        vector[self.columns[start:end]] = self.weights[start:end]
+        return vector
+
+    def scores(self, vector):
+        """Similaridade de cada item gravado com o vetor (normalizado) informado."""
+        return np.bincount(
+            self.rows, weights=self.weights * vector[self.columns], minlength=len(self.ids),
+        ).astype(np.float32)
+
+
+# --- Persistência ----------------------------------------------------------
+
+def _save_neighbors(doc_type, neighbors_by_id):
+    """Regrava as listas de vizinhos dos ids informados."""
+    from .models import Recommendation
+
+    Recommendation.objects.filter(doc_type=doc_type, object_id__in=list(neighbors_by_id)).delete()
+    Recommendation.objects.bulk_create([
+        Recommendation(doc_type=doc_type, object_id=object_id, related_id=related_id, score=score, rank=rank)
+        for object_id, neighbors in neighbors_by_id.items()
+        for rank, (related_id, score) in enumerate(neighbors)
+    ], batch_size=1000)
+
+
+def rebuild_type(doc_type, batch_size=256):
+    """Recalcula o modelo, os vetores e todos os vizinhos de um tipo. Retorna o número de documentos."""
+    from .models import Recommendation, RecommendationModel, RecommendationVector
+
+    _, build_text, queryset = _registry()[doc_type]
+    documents = [(obj.pk, tokens(*build_text(obj))) for obj in queryset.iterator(chunk_size=500)]
+    model = fit(documents)
+
+    neighbors_by_id = {}
+    ids, matrix = model['ids'], model['matrix']
+    # Similaridades calculadas em blocos de linhas para limitar a memória
+    for start in range(0, len(ids), batch_size):
+        block = matrix[start:start + batch_size] @ matrix.T
+        for offset, scores in enumerate(block):
+            object_id = ids[start + offset]
+            neighbors_by_id[object_id] = top_neighbors(scores, ids, exclude=object_id)
+
+    vectors = []
+    for row, object_id in enumerate(ids):
+        columns, weights = sparse(matrix[row])
+        vectors.append(RecommendationVector(doc_type=doc_type, object_id=object_id, columns=columns, weights=weights))
+
+    with transaction.atomic():
+        Recommendation.objects.filter(doc_type=doc_type).delete()
+        _save_neighbors(doc_type, neighbors_by_id)
+        RecommendationVector.objects.filter(doc_type=doc_type).delete()
+        RecommendationVector.objects.bulk_create(vectors, batch_size=1000)
+        RecommendationModel.objects.update_or_create(doc_type=doc_type, defaults={
+            'vocabulary': sorted(model['vocabulary'], key=model['vocabulary'].get),
+            'idf': model['idf'].tolist(),
+            'fitted_count': model['fitted_count'],
+        })
+    return len(ids)
+
+
+def stale_types():
+    """Tipos sem modelo ajustado ou que cresceram mais que REFIT_GROWTH desde o último ajuste."""
+    from .models import RecommendationModel, RecommendationVector
+
+    fitted = dict(RecommendationModel.objects.values_list('doc_type', 'fitted_count'))
+    counts = dict(
+        RecommendationVector.objects.values('doc_type').annotate(total=Count('id')).values_list('doc_type', 'total')
+    )
+    return [
+        doc_type for doc_type in _registry()
+        if doc_type not in fitted or counts.get(doc_type, 0) > fitted[doc_type] * (1 + REFIT_GROWTH)
+    ]
+
+
+def rebuild(only_stale=False):
+    """Recalcula as recomendações de todos os tipos (ou só dos defasados). Retorna o número de documentos por tipo."""
+    doc_types = stale_types() if only_stale else list(_registry())
+    return {doc_type: rebuild_type(doc_type) for doc_type in doc_types}
+
+
+def _load_model(doc_type):
+    """Vocabulário e IDF gravados do tipo; None se ele ainda não foi ajustado."""
+    from .models import RecommendationModel
+
+    row = RecommendationModel.objects.filter(doc_type=doc_type).values_list('vocabulary', 'idf').first()
+    if row is None:
+        return None
+    vocabulary, idf = row
+    return {
+        'vocabulary': {term: column for column, term in enumerate(vocabulary)},
+        'idf': np.array(idf, dtype=np.float32),
+    }
+
+
+def _neighbors_of_affected(doc_type, vectors, changed_id, scores):
+    """
+    Listas a regravar quando changed_id mudou ou saiu: as de quem já o tinha e
+    (com scores) as em que ele passa a entrar.
+    """
+    from .models import Recommendation
+
+    current = {}
+    for object_id, related_id, score in Recommendation.objects.filter(doc_type=doc_type).exclude(
+        object_id=changed_id
+    ).values_list('object_id', 'related_id', 'score').order_by('object_id', 'rank'):
+        current.setdefault(object_id, []).append((related_id, score))
+
+    neighbors_by_id = {}
+    for row, object_id in enumerate(vectors.ids):
+        if object_id == changed_id:
+            continue
+        neighbors = current.get(object_id, [])
+        had_item = any(related_id == changed_id for related_id, _ in neighbors)
+        score = float(scores[row]) if scores is not None else 0.0
+        enters = score > 0 and (len(neighbors) < TOP_K or score > neighbors[-1][1])
+        if had_item or enters:
+            neighbors_by_id[object_id] = top_neighbors(
+                vectors.scores(vectors.vector(object_id)), vectors.ids, exclude=object_id,
+            )
+    return neighbors_by_id
+
+
+def update_object(obj):
+    """
+    Atualiza as recomendações após salvar um item, sem recalcular o modelo.
+
+    O item é (re)vetorizado com o vocabulário gravado e só a linha dele é
+    regravada; a lista dele é recalculada e ele entra ou sai das listas dos
+    demais conforme a nova similaridade. Sem modelo ajustado, não faz nada: a
+    próxima execução de rebuild_recommendations inclui o item.
+    """
+    from .models import RecommendationVector
+
+    doc_type = doc_type_for(type(obj))
+    if doc_type is None:
+        return
+    _, build_text, queryset = _registry()[doc_type]
+    if not queryset.filter(pk=obj.pk).exists():
+        remove_object(obj)
+        return
+
+    model = _load_model(doc_type)
+    if model is None:
+        return
+    vector = vectorize(model, tokens(*build_text(obj)))
+    columns, weights = sparse(vector)
+    RecommendationVector.objects.update_or_create(
+        doc_type=doc_type, object_id=obj.pk, defaults={'columns': columns, 'weights': weights},
+    )
+
+    vectors = StoredVectors(doc_type, len(model['idf']))
+    scores = vectors.scores(vector)
+    neighbors_by_id = {obj.pk: top_neighbors(scores, vectors.ids, exclude=obj.pk)}
+    neighbors_by_id.update(_neighbors_of_affected(doc_type, vectors, obj.pk, scores))
+
+    with transaction.atomic():
+        _save_neighbors(doc_type, neighbors_by_id)
+
+
+def remove_object(obj):
+    """Tira o vetor do item e o remove das listas de vizinhos, recalculando só as que o continham."""
+    from .models import Recommendation, RecommendationVector
+
+    doc_type = doc_type_for(type(obj))
+    if doc_type is None:
+        return
+    RecommendationVector.objects.filter(doc_type=doc_type, object_id=obj.pk).delete()
+    model = _load_model(doc_type)
+
+    with transaction.atomic():
+        Recommendation.objects.filter(doc_type=doc_type, object_id=obj.pk).delete()
+        if model is None:
+            Recommendation.objects.filter(doc_type=doc_type, related_id=obj.pk).delete()
+            return
+        vectors = StoredVectors(doc_type, len(model['idf']))
+        _save_neighbors(doc_type, _neighbors_of_affected(doc_type, vectors, obj.pk, None))
+
+
+def related_ids(model, object_ids, limit=TOP_K):
+    """Subconsulta com os ids recomendados para os objetos informados (ids ou subconsulta de ids)."""
+    from .models import Recommendation
+
+    return Recommendation.objects.filter(
+        doc_type=doc_type_for(model), object_id__in=object_ids, rank__lt=limit,
+    ).values('related_id')
+
+
+def related(obj, limit=TOP_K):
+    """Itens mais parecidos com obj, do mais para o menos semelhante (uma consulta)."""
+    from .models import Recommendation
+
+    doc_type = doc_type_for(type(obj))
+    _, _, queryset = _registry()[doc_type]
+    recommendations = Recommendation.objects.filter(doc_type=doc_type, object_id=obj.pk)
+    return queryset.filter(
+        pk__in=Subquery(recommendations.filter(rank__lt=limit).values('related_id'))
+    ).annotate(
+        similarity_rank=Subquery(recommendations.filter(related_id=OuterRef('pk')).values('rank')[:1])
+    ).order_by('similarity_rank')
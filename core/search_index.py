@@ -0,0 +1,407 @@
+"""
+Índice de busca textual do site (posts, pacotes e destinos).
+
+O índice fica em uma tabela própria (core_search_index) mantida pelos sinais em
+core.signals e reconstruída pelo comando rebuild_search_index. O backend é
+escolhido pelo banco em uso:
+
+- SQLite: tabela virtual FTS5, ranqueada com bm25();
+- PostgreSQL: tsvector com configuração 'portuguese' e índice GIN,
+  ranqueado com ts_rank_cd();
+- outros bancos (ex: MySQL): tabela comum consultada com LIKE, ranqueada em
+  Python (BasicSearchBackend).
+
+Os textos e as consultas são normalizados em Python (minúsculas e sem acentos),
+então "São Paulo", "sao paulo" e "SAO PAULO" encontram os mesmos documentos.
+"""
+import re
+import unicodedata
+
+from django.conf import settings
+from django.db import connection
+from django.utils.module_loading import import_string
+
+INDEX_TABLE = 'core_search_index'
+
+# Peso do título em relação ao corpo do documento no ranqueamento
+TITLE_WEIGHT = 10.0
+BODY_WEIGHT = 1.0
+
+STOPWORDS_PT = {
+    'a', 'ao', 'aos', 'as', 'com', 'da', 'das', 'de', 'do', 'dos', 'e', 'em',
+    'na', 'nas', 'no', 'nos', 'o', 'os', 'ou', 'para', 'pela', 'pelas', 'pelo',
+    'pelos', 'por', 'que', 'se', 'um', 'uma', 'umas', 'uns',
+}
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+
+def fold(text):
+    """Remove acentos e converte para minúsculas ("Ilhéus" -> "ilheus")."""
+    if not text:
+        return ''
+    decomposed = unicodedata.normalize('NFKD', str(text))
+    return ''.join(c for c in decomposed if not unicodedata.combining(c)).lower()
+
+
+def query_terms(query):
+    """Quebra a consulta em termos normalizados, sem stopwords."""
+    return [t for t in _TOKEN_RE.findall(fold(query)) if t not in STOPWORDS_PT]
+
+
+# --- Documentos indexados --------------------------------------------------
+
+def _post_document(post):
+    if post.status != 'published':
+        return None
+    category = post.category.name if post.category_id else ''
+    return post.title, ' '.join([post.excerpt, post.content, category])
+
+
+def _package_document(package):
+    if package.status != 'active':
+        return None
+    body = ' '.join([
+        package.short_description, package.description, package.highlights,
+        package.destination.name, package.destination.country, package.category.name,
+    ])
+    return package.title, body
+
+
+def _destination_document(destination):
+    return destination.name, ' '.join([destination.country, destination.description])
+
+
+def _registry():
+    from blog.models import Post
+    from packages.models import TourPackage, Destination
+
+    return {
+        'post': (Post, _post_document, Post.objects.filter(status='published').select_related('category', 'author')),
+        'package': (TourPackage, _package_document,
+                    TourPackage.objects.filter(status='active').select_related('destination', 'category')),
+        'destination': (Destination, _destination_document, Destination.objects.all()),
+    }
+
+
+def doc_type_for(model):
+    for doc_type, (registered_model, _, _) in _registry().items():
+        if registered_model is model:
+            return doc_type
+    return None
+
+
+# --- Backends --------------------------------------------------------------
+
+class SearchBackend:
+    """Interface comum dos backends de busca."""
+
+    def create_index(self, schema_editor):
+        raise NotImplementedError
+
+    def drop_index(self, schema_editor):
+        schema_editor.execute(f'DROP TABLE IF EXISTS {INDEX_TABLE}')
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {INDEX_TABLE}')
+
+    def remove(self, doc_type, object_id):
+        self.remove_many(doc_type, [object_id])
+
+    def remove_many(self, doc_type, object_ids):
+        object_ids = list(object_ids)
+        if not object_ids:
+            return
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'DELETE FROM {INDEX_TABLE} WHERE doc_type = %s AND object_id = %s',
+                [(doc_type, object_id) for object_id in object_ids],
+            )
+
+    def index(self, documents):
+        """Grava (doc_type, object_id, título, corpo) substituindo as versões anteriores."""
+        raise NotImplementedError
+
+    def search(self, query, limit_per_type=10):
+        """Retorna [(doc_type, object_id, score)] do mais para o menos relevante."""
+        raise NotImplementedError
+
+
+class SQLiteFTSBackend(SearchBackend):
+    """Busca com a extensão FTS5 do SQLite."""
+
+    def create_index(self, schema_editor):
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {INDEX_TABLE} USING fts5("
+            f"doc_type UNINDEXED, object_id UNINDEXED, title, body, "
+            f"tokenize = 'unicode61 remove_diacritics 2')"
+        )
+
+    def index(self, documents):
+        documents = list(documents)
+        if not documents:
+            return
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'DELETE FROM {INDEX_TABLE} WHERE doc_type = %s AND object_id = %s',
+                [(doc_type, object_id) for doc_type, object_id, _, _ in documents],
+            )
+            cursor.executemany(
+                f'INSERT INTO {INDEX_TABLE} (doc_type, object_id, title, body) VALUES (%s, %s, %s, %s)',
+                [(doc_type, object_id, fold(title), fold(body)) for doc_type, object_id, title, body in documents],
+            )
+
+    def search(self, query, limit_per_type=10):
+        terms = query_terms(query)
+        if not terms:
+            return []
+        # Busca por prefixo cobre plurais e flexões ("praia" encontra "praias")
+        match = ' '.join(f'"{term}"*' for term in terms)
+        sql = f"""
+            SELECT doc_type, object_id, score FROM (
+                SELECT doc_type, object_id, score,
+                       ROW_NUMBER() OVER (PARTITION BY doc_type ORDER BY score DESC) AS position
+                FROM (
+                    SELECT doc_type, object_id,
+                           -bm25({INDEX_TABLE}, 0, 0, %s, %s) AS score
+                    FROM {INDEX_TABLE}
+                    WHERE {INDEX_TABLE} MATCH %s
+                )
+            )
+            WHERE position <= %s
+            ORDER BY score DESC
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [TITLE_WEIGHT, BODY_WEIGHT, match, limit_per_type])
+            return [(doc_type, int(object_id), score) for doc_type, object_id, score in cursor.fetchall()]
+
+
+class PostgresSearchBackend(SearchBackend):
+    """Busca com tsvector (configuração 'portuguese') e índice GIN."""
+
+    def create_index(self, schema_editor):
+        schema_editor.execute(
+            f"CREATE TABLE IF NOT EXISTS {INDEX_TABLE} ("
+            f"doc_type varchar(20) NOT NULL, "
+            f"object_id bigint NOT NULL, "
+            f"search_vector tsvector NOT NULL, "
+            f"PRIMARY KEY (doc_type, object_id))"
+        )
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {INDEX_TABLE}_vector_gin "
+            f"ON {INDEX_TABLE} USING GIN (search_vector)"
+        )
+
+    def index(self, documents):
+        documents = list(documents)
+        if not documents:
+            return
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"""
+                INSERT INTO {INDEX_TABLE} (doc_type, object_id, search_vector)
+                VALUES (%s, %s,
+                        setweight(to_tsvector('portuguese', %s), 'A') ||
+                        setweight(to_tsvector('portuguese', %s), 'D'))
+                ON CONFLICT (doc_type, object_id)
+                DO UPDATE SET search_vector = EXCLUDED.search_vector
+                """,
+                [(doc_type, object_id, fold(title), fold(body)) for doc_type, object_id, title, body in documents],
+            )
+
+    def search(self, query, limit_per_type=10):
+        terms = query_terms(query)
+        if not terms:
+            return []
+        tsquery = ' & '.join(f'{term}:*' for term in terms)
+        sql = f"""
+            SELECT doc_type, object_id, score FROM (
+                SELECT doc_type, object_id, ts_rank_cd(search_vector, q) AS score,
+                       ROW_NUMBER() OVER (
+                           PARTITION BY doc_type ORDER BY ts_rank_cd(search_vector, q) DESC
+                       ) AS position
+                FROM {INDEX_TABLE}, to_tsquery('portuguese', %s) AS q
+                WHERE search_vector @@ q
+            ) ranked
+            WHERE position <= %s
+            ORDER BY score DESC
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [tsquery, limit_per_type])
+            return cursor.fetchall()
+
+
+class BasicSearchBackend(SearchBackend):
+    """
+    Busca sem recursos específicos do banco (MySQL e outros): uma tabela comum
+    consultada com LIKE. Serve para sites pequenos; não usa índice textual.
+    """
+
+    def create_index(self, schema_editor):
+        schema_editor.execute(
+            f"CREATE TABLE IF NOT EXISTS {INDEX_TABLE} ("
+            f"doc_type varchar(20) NOT NULL, "
+            f"object_id bigint NOT NULL, "
+            f"title text NOT NULL, "
+            f"body text NOT NULL, "
+            f"PRIMARY KEY (doc_type, object_id))"
+        )
+
+    def index(self, documents):
+        documents = list(documents)
+        if not documents:
+            return
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'DELETE FROM {INDEX_TABLE} WHERE doc_type = %s AND object_id = %s',
+                [(doc_type, object_id) for doc_type, object_id, _, _ in documents],
+            )
+            cursor.executemany(
+                f'INSERT INTO {INDEX_TABLE} (doc_type, object_id, title, body) VALUES (%s, %s, %s, %s)',
+                [(doc_type, object_id, fold(title), fold(body)) for doc_type, object_id, title, body in documents],
+            )
+
+    def search(self, query, limit_per_type=10):
+        terms = query_terms(query)
+        if not terms:
+            return []
+        # Todos os termos precisam aparecer (no título ou no corpo), como nos outros backends
+        where = ' AND '.join(['(title LIKE %s OR body LIKE %s)'] * len(terms))
+        params = [f'%{term}%' for term in terms for _ in range(2)]
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT doc_type, object_id, title, body FROM {INDEX_TABLE} WHERE {where}', params)
+            rows = cursor.fetchall()
+
+        scored = sorted(
+            (
+                (doc_type, int(object_id), sum(
+                    TITLE_WEIGHT * title.count(term) + BODY_WEIGHT * body.count(term) for term in terms
+                ))
+                for doc_type, object_id, title, body in rows
+            ),
+            key=lambda hit: hit[2], reverse=True,
+        )
+        per_type = {}
+        hits = []
+        for hit in scored:
+            if per_type.get(hit[0], 0) < limit_per_type:
+                per_type[hit[0]] = per_type.get(hit[0], 0) + 1
+                hits.append(hit)
+        return hits
+
+
+BACKENDS = {
+    'sqlite': SQLiteFTSBackend,
+    'postgresql': PostgresSearchBackend,
+}
+
+
+def get_search_backend(vendor=None):
+    """Retorna o backend configurado em SEARCH_BACKEND ou o adequado ao banco em uso."""
+    backend_path = getattr(settings, 'SEARCH_BACKEND', None)
+    if backend_path:
+        return import_string(backend_path)()
+    vendor = vendor or connection.vendor
+    return BACKENDS.get(vendor, BasicSearchBackend)()
+
+
+# --- Operações usadas pelos sinais, views e comandos -----------------------
+
+def update_object(obj):
+    """Indexa (ou remove do índice) um objeto após ser salvo."""
+    doc_type = doc_type_for(type(obj))
+    if doc_type is None:
+        return
+    _, build_document, _ = _registry()[doc_type]
+    backend = get_search_backend()
+    document = build_document(obj)
+    if document is None:
+        backend.remove(doc_type, obj.pk)
+    else:
+        backend.index([(doc_type, obj.pk, *document)])
+
+
+def remove_object(obj):
+    doc_type = doc_type_for(type(obj))
+    if doc_type is not None:
+        get_search_backend().remove(doc_type, obj.pk)
+
+
+def update_queryset(queryset, batch_size=500):
+    """Reindexa em lote os objetos de um queryset (ex: pacotes de um destino renomeado)."""
+    doc_type = doc_type_for(queryset.model)
+    if doc_type is None:
+        return
+    _, build_document, _ = _registry()[doc_type]
+    backend = get_search_backend()
+    batch = []
+    removed = []
+    for obj in queryset.iterator(chunk_size=batch_size):
+        document = build_document(obj)
+        if document is None:
+            removed.append(obj.pk)
+            continue
+        batch.append((doc_type, obj.pk, *document))
+        if len(batch) >= batch_size:
+            backend.index(batch)
+            batch = []
+    backend.index(batch)
+    backend.remove_many(doc_type, removed)
+
+
+def rebuild(batch_size=500):
+    """Recria o índice inteiro. Retorna o número de documentos por tipo."""
+    backend = get_search_backend()
+    backend.clear()
+    totals = {}
+    for doc_type, (_, build_document, queryset) in _registry().items():
+        batch = []
+        totals[doc_type] = 0
+        for obj in queryset.iterator(chunk_size=batch_size):
+            document = build_document(obj)
+            if document is None:
+                continue
+            batch.append((doc_type, obj.pk, *document))
+            if len(batch) >= batch_size:
+                backend.index(batch)
+                totals[doc_type] += len(batch)
+                batch = []
+        backend.index(batch)
+        totals[doc_type] += len(batch)
+    return totals
+
+
+def search(query, limit_per_type=10):
+    """
+    Busca posts, pacotes e destinos, ordenados por relevância.
+
+    Retorna um dict com as listas de objetos por tipo ('posts', 'packages',
+    'destinations'), a lista combinada 'ranked' e o 'total'.
+    """
+    hits = get_search_backend().search(query, limit_per_type=limit_per_type)
+    ids_by_type = {}
+    for doc_type, object_id, _ in hits:
+        ids_by_type.setdefault(doc_type, []).append(object_id)
+
+    objects = {}
+    for doc_type, (_, _, queryset) in _registry().items():
+        objects[doc_type] = queryset.in_bulk(ids_by_type.get(doc_type, []))
+
+    ranked = [
+        objects[doc_type][object_id]
+        for doc_type, object_id, _ in hits
+        if object_id in objects[doc_type]
+    ]
+
+    def ordered(doc_type):
+        return [objects[doc_type][pk] for pk in ids_by_type.get(doc_type, []) if pk in objects[doc_type]]
+
+    results = {
+        'posts': ordered('post'),
+        'packages': ordered('package'),
+        'destinations': ordered('destination'),
+        'ranked': ranked,
+    }
+    results['total'] = len(ranked)
+    return results
@@ -0,0 +1,83 @@
+"""
+Signals do app core.
+Invalida o cache de páginas públicas e mantém o índice de busca, as
+recomendações e a exportação estática atualizados quando o conteúdo exibido é
+alterado.
+"""
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from blog.models import Post, Comment, Category
+from packages.models import TourPackage, Review, Destination, PackageCategory
+from .models import Testimonial, SiteSettings
+from .page_cache import invalidate_model
+from . import recommendations, search_index, static_export
+
+PAGE_CACHE_MODELS = [
+    TourPackage, Review, Destination, PackageCategory,
+    Post, Comment, Category,
+    Testimonial, SiteSettings,
+]
+
+
+@receiver([post_save, post_delete])
+def invalidar_cache_de_paginas(sender, **kwargs):
+    """Invalida as páginas em cache que dependem do modelo alterado."""
+    if sender in PAGE_CACHE_MODELS:
+        invalidate_model(sender)
+
+
+@receiver([post_save, post_delete])
+def regenerar_paginas_estaticas(sender, instance, **kwargs):
+    """Regenera as páginas exportadas que dependem do objeto alterado."""
+    if sender in PAGE_CACHE_MODELS:
+        static_export.schedule(instance)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=TourPackage)
+@receiver(post_save, sender=Destination)
+def atualizar_indice_de_busca(sender, instance, **kwargs):
+    """Reindexa o objeto salvo (ou o remove do índice se deixou de ser público)."""
+    search_index.update_object(instance)
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=TourPackage)
+@receiver(post_delete, sender=Destination)
+def remover_do_indice_de_busca(sender, instance, **kwargs):
+    """Remove o objeto excluído do índice de busca."""
+    search_index.remove_object(instance)
+
+
+@receiver(post_save, sender=Destination)
+@receiver(post_save, sender=PackageCategory)
+def reindexar_pacotes_relacionados(sender, instance, created, **kwargs):
+    """Os pacotes indexam o nome do destino e da categoria; reindexa-os após uma alteração."""
+    if created:
+        return
+    related = {Destination: 'destination', PackageCategory: 'category'}[sender]
+    search_index.update_queryset(
+        TourPackage.objects.filter(**{related: instance}).select_related('destination', 'category')
+    )
+
+
+@receiver(post_save, sender=Category)
+def reindexar_posts_da_categoria(sender, instance, created, **kwargs):
+    """Os posts indexam o nome da categoria; reindexa-os após uma alteração."""
+    if not created:
+        search_index.update_queryset(Post.objects.filter(category=instance).select_related('category'))
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=TourPackage)
+def atualizar_recomendacoes(sender, instance, **kwargs):
+    """Recalcula os vizinhos do item salvo e das listas em que ele entra ou sai."""
+    transaction.on_commit(lambda: recommendations.update_object(instance))
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=TourPackage)
+def remover_das_recomendacoes(sender, instance, **kwargs):
+    transaction.on_commit(lambda: recommendations.remove_object(instance))
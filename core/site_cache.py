@@ -0,0 +1,117 @@
+"""
+Cache em memória do processo para as configurações do site e estatísticas públicas.
+
+Cada worker do gunicorn mantém sua própria cópia de SiteSettings. A cópia é
+validada contra um carimbo de versão guardado no cache compartilhado
+(settings.CACHES['default']); quando SiteSettings.save() roda, o carimbo muda
+e todos os workers recarregam as configurações na próxima requisição.
+"""
+import threading
+import time
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Sum
+
+VERSION_KEY = 'core:site_settings:version'
+
+# Tempo (em segundos) que as estatísticas agregadas ficam em memória
+STATS_TIMEOUT = 15 * 60
+
+# Anos de experiência não vêm do banco
+YEARS_EXPERIENCE = 10
+
+DEFAULT_SETTINGS = {
+    'company_name': 'MONITOUR',
+    'site_title': 'MONITOUR - Turismo & Viagens',
+    'meta_description': 'Sua agência de turismo especializada em experiências únicas e inesquecíveis.',
+    'phone': '(11) 99999-9999',
+    'whatsapp': '+5511999999999',
+    'email': 'contato@monitour.com.br',
+}
+
+_lock = threading.RLock()
+_state = {
+    'version': None,
+    'settings': None,
+    'stats': None,
+    'stats_expires_at': 0.0,
+}
+
+
+def _current_version():
+    """Lê o carimbo de versão compartilhado, criando um se ainda não existir."""
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def _load_settings():
+    from .models import SiteSettings
+
+    settings_obj = SiteSettings.objects.filter(pk=1).first()
+    if settings_obj is None:
+        # Criar configurações padrão se não existirem
+        settings_obj, _ = SiteSettings.objects.get_or_create(pk=1, defaults=DEFAULT_SETTINGS)
+    return settings_obj
+
+
+def _load_stats():
+    from packages.models import BookingInquiry, Destination
+
+    bookings = BookingInquiry.objects.filter(status='confirmed').aggregate(
+        tours=Count('id'),
+        clients=Sum('number_of_people'),
+    )
+    return {
+        'years_experience': YEARS_EXPERIENCE,
+        'happy_clients': bookings['clients'] or 0,
+        'destinations': Destination.objects.count(),
+        'tours_completed': bookings['tours'] or 0,
+    }
+
+
+def get_site_settings():
+    """Retorna a instância única de SiteSettings, sem consultar o banco se a cópia local estiver válida."""
+    version = _current_version()
+    if _state['version'] == version and _state['settings'] is not None:
+        return _state['settings']
+
+    with _lock:
+        if _state['version'] != version or _state['settings'] is None:
+            _state['settings'] = _load_settings()
+            _state['stats'] = None
+            _state['version'] = version
+    return _state['settings']
+
+
+def get_site_stats():
+    """Retorna as estatísticas públicas (clientes, destinos, viagens) a partir de contagens em cache."""
+    now = time.monotonic()
+    stats = _state['stats']
+    if stats is not None and now < _state['stats_expires_at']:
+        return stats
+
+    with _lock:
+        if _state['stats'] is None or now >= _state['stats_expires_at']:
+            _state['stats'] = _load_stats()
+            _state['stats_expires_at'] = now + STATS_TIMEOUT
+    return _state['stats']
+
+
+def invalidate_site_settings():
+    """Troca o carimbo de versão após o commit, forçando todos os workers a recarregar."""
+    def bump():
+        cache.set(VERSION_KEY, uuid.uuid4().hex, None)
+        clear_local_cache()
+
+    transaction.on_commit(bump)
+
+
+def clear_local_cache():
+    """Descarta a cópia em memória deste processo."""
+    with _lock:
+        _state.update(version=None, settings=None, stats=None, stats_expires_at=0.0)
@@ -0,0 +1,420 @@
+"""
+Exportação estática das páginas públicas, servidas diretamente pelo nginx.
+
+As páginas de _pages() são renderizadas chamando as próprias views, resolvidas
+pelo URLconf, com um request de visitante anônimo, e gravadas em STATIC_EXPORT_ROOT/<caminho>/index.html; o nginx as
+entrega com try_files e só repassa ao gunicorn o que não foi exportado
+(formulários, busca, listagens com filtros, admin).
+
+Durante a renderização de cada página são registrados os objetos carregados
+do banco (um receptor de post_init conectado só enquanto a exportação roda). Esse mapa de dependências fica em STATIC_EXPORT_ROOT/_deps.json e,
+com STATIC_EXPORT_ENABLED, os sinais em core.signals regeneram em segundo
+plano apenas as páginas que usam o objeto alterado, as que listam o modelo
+dele e a própria página do objeto.
+"""
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.db import close_old_connections, transaction
+from django.db.models.signals import post_init
+from django.http import Http404
+from django.template import TemplateDoesNotExist
+from django.template.loader import get_template
+from django.urls import resolve, reverse
+
+from .page_cache import CSRF_INPUT_RE, bypass_page_cache
+
+try:
+    import fcntl
+except ImportError:  # Windows (desenvolvimento)
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+DEPENDENCIES_FILE = '_deps.json'
+LOCK_FILE = '_deps.lock'
+
+# Preenche o token CSRF dos formulários a partir do cookie do visitante
+# (obtido em core:csrf_cookie quando ainda não existe)
+CSRF_SCRIPT = """<script>
+(function () {
+    function token() {
+        var match = document.cookie.match(/(?:^|; )csrftoken=([^;]+)/);
+        return match ? decodeURIComponent(match[1]) : null;
+    }
+    function fill() {
+        document.querySelectorAll('input[name="csrfmiddlewaretoken"]').forEach(function (input) {
+            input.value = token() || '';
+        });
+    }
+    if (token()) { fill(); } else { fetch('%s', {credentials: 'same-origin'}).then(fill); }
+})();
+</script>
+"""
+
+_BODY_END_RE = re.compile(r'</body>', re.IGNORECASE)
+
+
+class StaticPage:
+    """
+    Página exportada.
+
+    url_name: nome da rota; queryset: função que devolve os objetos com página
+    própria (uma página por objeto, com os kwargs da rota lidos dos atributos);
+    lists: modelos cujas inclusões e exclusões mudam a página; template: se
+    informado, a página só é exportada quando o template existe.
+    """
+
+    def __init__(self, url_name, queryset=None, url_kwargs=(), lists=(), template=None):
+        self.url_name = url_name
+        self.queryset = queryset
+        self.url_kwargs = url_kwargs
+        self.lists = lists
+        self.template = template
+
+    def path_for(self, obj=None):
+        kwargs = {name: getattr(obj, name) for name in self.url_kwargs}
+        return reverse(self.url_name, kwargs=kwargs or None)
+
+    def paths(self):
+        """Pares (caminho, objeto dono) das páginas a exportar."""
+        if self.template and not _template_exists(self.template):
+            return []
+        if self.queryset is None:
+            return [(self.path_for(), None)]
+        return [(self.path_for(obj), obj) for obj in self.queryset().iterator()]
+
+    def owns(self, model):
+        return self.queryset is not None and self.queryset().model is model
+
+
+def _template_exists(name):
+    try:
+        get_template(name)
+    except TemplateDoesNotExist:
+        return False
+    return True
+
+
+def _pages():
+    from blog.models import Post, Category
+    from packages.models import TourPackage, Destination, PackageCategory
+    from .models import Testimonial
+
+    return [
+        StaticPage('core:home', lists=(Post, TourPackage, Testimonial)),
+        StaticPage('core:about', lists=(Testimonial, TourPackage, Destination, Post)),
+        # Páginas com template opcional: enquanto ele não existir, ficam com o gunicorn
+        StaticPage('core:privacy_policy', template='core/privacy_policy.html'),
+        StaticPage('core:terms_of_use', template='core/terms_of_use.html'),
+        StaticPage('packages:destination_list', lists=(Destination, TourPackage),
+                   template='packages/destination_list.html'),
+        StaticPage('packages:category_list', lists=(PackageCategory, TourPackage),
+                   template='packages/category_list.html'),
+        StaticPage('blog:category_list', lists=(Category, Post), template='blog/category_list.html'),
+        StaticPage('packages:package_detail', url_kwargs=('slug',),
+                   queryset=lambda: TourPackage.objects.filter(status='active')),
+        StaticPage('blog:post_detail', url_kwargs=('slug',),
+                   queryset=lambda: Post.objects.filter(status='published')),
+    ]
+
+
+def _global_models():
+    """Modelos usados em todas as páginas (cabeçalho e rodapé)."""
+    from .models import SiteSettings
+
+    return (SiteSettings,)
+
+
+def object_key(obj):
+    return f'{obj._meta.label_lower}:{obj.pk}'
+
+
+def export_root():
+    return Path(settings.STATIC_EXPORT_ROOT)
+
+
+# --- Renderização ----------------------------------------------------------
+
+_recording = threading.local()
+_exports = 0
+_exports_lock = threading.Lock()
+RECORDER_UID = 'core.static_export.record_instance'
+
+
+def _record_instance(sender, instance, **kwargs):
+    loaded = getattr(_recording, 'objects', None)
+    if loaded is not None and instance.pk is not None:
+        loaded.add(object_key(instance))
+
+
+@contextmanager
+def _recording_dependencies():
+    """Mantém o receptor de post_init conectado enquanto alguma exportação roda no processo."""
+    global _exports
+    with _exports_lock:
+        if not _exports:
+            post_init.connect(_record_instance, dispatch_uid=RECORDER_UID)
+        _exports += 1
+    try:
+        yield
+    finally:
+        with _exports_lock:
+            _exports -= 1
+            if not _exports:
+                post_init.disconnect(dispatch_uid=RECORDER_UID)
+
+
+@contextmanager
+def _record_objects():
+    _recording.objects = set()
+    try:
+        yield _recording.objects
+    finally:
+        _recording.objects = None
+
+
+def _request_factory():
+    from django.test import RequestFactory
+
+    host = getattr(settings, 'STATIC_EXPORT_HOST', '') or settings.ALLOWED_HOSTS[0]
+    return RequestFactory(HTTP_HOST=host)
+
+
+def prepare_html(content):
+    """Remove o token CSRF da renderização e injeta o script que o preenche no navegador."""
+    content, csrf_count = CSRF_INPUT_RE.subn(r'\g<1>\g<3>', content)
+    if csrf_count:
+        script = CSRF_SCRIPT % reverse('core:csrf_cookie')
+        content = _BODY_END_RE.sub(lambda match: script + match.group(0), content, count=1)
+    return content
+
+
+def render_page(factory, path):
+    """Renderiza um caminho. Retorna (html ou None se a página não existe, objetos carregados)."""
+    request = factory.get(path, secure=True)
+    request.user = AnonymousUser()
+    with bypass_page_cache(), _record_objects() as loaded:
+        try:
+            match = resolve(path)
+            response = match.func(request, *match.args, **match.kwargs)
+        except Http404:
+            return None, set()
+        if hasattr(response, 'render'):
+            response = response.render()
+    if response.status_code == 404:
+        return None, set()
+    if response.status_code != 200:
+        raise RuntimeError(f'{path} respondeu {response.status_code}')
+    return prepare_html(response.content.decode(response.charset)), set(loaded)
+
+
+def _file_for(path):
+    return export_root() / path.strip('/') / 'index.html'
+
+
+def _write_atomic(target, data):
+    target.parent.mkdir(parents=True, exist_ok=True)
+    descriptor, temporary = tempfile.mkstemp(dir=target.parent, prefix='.tmp-')
+    with os.fdopen(descriptor, 'w', encoding='utf-8') as handle:
+        handle.write(data)
+    os.chmod(temporary, 0o644)
+    os.replace(temporary, target)
+
+
+def _delete_page(path):
+    target = _file_for(path)
+    target.unlink(missing_ok=True)
+    # Remove os diretórios que ficaram vazios (exceto a raiz)
+    directory = target.parent
+    while directory != export_root() and directory.exists() and not any(directory.iterdir()):
+        directory.rmdir()
+        directory = directory.parent
+
+
+# --- Mapa de dependências --------------------------------------------------
+
+@contextmanager
+def _locked():
+    """Serializa as atualizações entre os processos do gunicorn."""
+    export_root().mkdir(parents=True, exist_ok=True)
+    with open(export_root() / LOCK_FILE, 'w') as lock:
+        if fcntl:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def load_dependencies():
+    """{caminho: {'objects': [chaves], 'lists': [modelos], 'owner': chave ou None}}"""
+    try:
+        with open(export_root() / DEPENDENCIES_FILE, encoding='utf-8') as handle:
+            return json.load(handle)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _save_dependencies(dependencies):
+    _write_atomic(export_root() / DEPENDENCIES_FILE, json.dumps(dependencies, sort_keys=True))
+
+
+def _render_into(factory, dependencies, path, page, owner=None):
+    """Renderiza e grava uma página, atualizando o mapa. Retorna 'written' ou 'removed'."""
+    html, loaded = render_page(factory, path)
+    if html is None:
+        _delete_page(path)
+        dependencies.pop(path, None)
+        return 'removed'
+    _write_atomic(_file_for(path), html)
+    dependencies[path] = {
+        'url_name': page.url_name,
+        'objects': sorted(loaded),
+        'lists': sorted(model._meta.label_lower for model in page.lists),
+        'owner': object_key(owner) if owner is not None else None,
+    }
+    return 'written'
+
+
+def export_all(clean=False):
+    """Exporta todas as páginas. Retorna um dict com os totais e os caminhos que falharam."""
+    result = {'written': 0, 'removed': 0, 'failed': []}
+    factory = _request_factory()
+    with _locked(), _recording_dependencies():
+        previous = load_dependencies()
+        if clean:
+            for child in export_root().iterdir():
+                if child.name == LOCK_FILE:
+                    continue
+                if child.is_dir():
+                    shutil.rmtree(child)
+                else:
+                    child.unlink()
+            previous = {}
+
+        dependencies = {}
+        for page in _pages():
+            for path, owner in page.paths():
+                try:
+                    result[_render_into(factory, dependencies, path, page, owner)] += 1
+                except Exception as exc:
+                    logger.exception('Falha ao exportar %s', path)
+                    _delete_page(path)
+                    result['failed'].append((path, str(exc)))
+
+        # Páginas de objetos que deixaram de existir ou mudaram de slug
+        for path in set(previous) - set(dependencies):
+            _delete_page(path)
+            result['removed'] += 1
+        _save_dependencies(dependencies)
+    return result
+
+
+def affected_paths(dependencies, keys, labels):
+    """Caminhos que carregaram algum dos objetos ou listam algum dos modelos."""
+    if labels & {model._meta.label_lower for model in _global_models()}:
+        return set(dependencies)
+    keys = set(keys)
+    return {
+        path for path, entry in dependencies.items()
+        if keys.intersection(entry['objects']) or labels.intersection(entry['lists'])
+    }
+
+
+def regenerate(instances):
+    """Regenera as páginas afetadas pela alteração dos objetos informados."""
+    pages_by_name = {page.url_name: page for page in _pages()}
+    factory = _request_factory()
+    with _locked(), _recording_dependencies():
+        dependencies = load_dependencies()
+        keys = {object_key(instance) for instance in instances}
+        labels = {instance._meta.label_lower for instance in instances}
+        targets = {path: None for path in affected_paths(dependencies, keys, labels)}
+
+        # A página do próprio objeto: pode ter sido criada, removida ou mudado de endereço
+        owned = {entry['owner']: path for path, entry in dependencies.items() if entry.get('owner')}
+        for instance in instances:
+            for page in pages_by_name.values():
+                if not page.owns(type(instance)):
+                    continue
+                current = page.queryset().filter(pk=instance.pk).first()
+                new_path = page.path_for(current) if current is not None else None
+                old_path = owned.get(object_key(instance))
+                if old_path and old_path != new_path:
+                    _delete_page(old_path)
+                    dependencies.pop(old_path, None)
+                    targets.pop(old_path, None)
+                if new_path:
+                    targets[new_path] = current
+
+        for path, owner in targets.items():
+            entry = dependencies.get(path)
+            page = pages_by_name[entry['url_name']] if entry else _page_for_owner(pages_by_name, owner)
+            if page is None:
+                continue
+            if owner is None and entry and entry.get('owner'):
+                pk = entry['owner'].rpartition(':')[2]
+                owner = page.queryset().filter(pk=pk).first()
+            try:
+                _render_into(factory, dependencies, path, page, owner)
+            except Exception:
+                logger.exception('Falha ao regenerar %s', path)
+        _save_dependencies(dependencies)
+    return sorted(targets)
+
+
+def _page_for_owner(pages_by_name, owner):
+    if owner is None:
+        return None
+    return next((page for page in pages_by_name.values() if page.owns(type(owner))), None)
+
+
+# --- Agendamento a partir dos sinais ---------------------------------------
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='static-export')
+    return _executor
+
+
+def _regenerate_in_background(instances):
+    close_old_connections()
+    try:
+        regenerate(instances)
+    except Exception:
+        logger.exception('Falha ao regenerar as páginas estáticas')
+    close_old_connections()
+
+
+def schedule(instance):
+    """Agenda, para depois do commit, a regeneração das páginas afetadas por instance."""
+    if not getattr(settings, 'STATIC_EXPORT_ENABLED', False):
+        return
+    instances = [instance]
+    # Avaliações e comentários aparecem na página do pacote ou post a que pertencem
+    # (sem buscar o pai no banco: ele pode ter sido excluído em cascata)
+    owner_models = [page.queryset().model for page in _pages() if page.queryset is not None]
+    for field in instance._meta.concrete_fields:
+        parent_id = getattr(instance, field.attname) if field.many_to_one else None
+        if parent_id is not None and field.related_model in owner_models:
+            instances.append(field.related_model(pk=parent_id))
+
+    transaction.on_commit(lambda: _get_executor().submit(_regenerate_in_background, instances))
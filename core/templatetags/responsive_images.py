@@ -0,0 +1,64 @@
+"""
+Tags para exibir imagens com os derivados gerados por core.images.
+
+    {% load responsive_images %}
+    {% responsive_image package.featured_image alt=package.title sizes="(min-width: 1024px) 33vw, 100vw" class="w-full h-48 object-cover" %}
+    <img srcset="{{ post.featured_image|srcset:'webp' }}" ...>
+
+Enquanto os derivados não existem, a imagem original é usada.
+"""
+from django import template
+from django.core.files.storage import default_storage
+from django.utils.html import format_html, format_html_join
+
+from core.images import available_formats, get_manifest
+
+register = template.Library()
+
+
+def _srcset(manifest, ext):
+    return ', '.join(f'{default_storage.url(path)} {width}w' for width, path in manifest['variants'].get(ext, []))
+
+
+@register.filter
+def srcset(image, ext='jpg'):
+    """Valor do atributo srcset da imagem no formato pedido (avif, webp ou jpg)."""
+    manifest = get_manifest(getattr(image, 'name', None))
+    if not manifest:
+        return ''
+    return _srcset(manifest, ext)
+
+
+@register.simple_tag
+def responsive_image(image, alt='', sizes='100vw', loading='lazy', **attrs):
+    """<picture> com fontes AVIF/WebP, fallback JPEG e placeholder desfocado."""
+    if not image:
+        return ''
+    extra = format_html_join('', ' {}="{}"', attrs.items())
+    manifest = get_manifest(image.name)
+    if not manifest:
+        return format_html('<img src="{}" alt="{}" loading="{}"{}>', image.url, alt, loading, extra)
+
+    sources = format_html_join(
+        '', '<source type="{}" srcset="{}" sizes="{}">',
+        (
+            (mime, _srcset(manifest, ext), sizes)
+            for ext, _, mime, _ in available_formats()
+            if ext != 'jpg' and manifest['variants'].get(ext)
+        ),
+    )
+    fallback = manifest['variants']['jpg']
+    return format_html(
+        '<picture>{}<img src="{}" srcset="{}" sizes="{}" width="{}" height="{}" alt="{}" '
+        'loading="{}" decoding="async" style="background-size: cover; background-image: url({})"{}></picture>',
+        sources,
+        default_storage.url(fallback[-1][1]),
+        _srcset(manifest, 'jpg'),
+        sizes,
+        manifest['width'],
+        manifest['height'],
+        alt,
+        loading,
+        manifest['placeholder'],
+        extra,
+    )
@@ -1,3 +1,631 @@
-from django.test import TestCase
+import base64
+import tempfile
+from datetime import date, datetime, timezone as dt_timezone
+from decimal import Decimal
+from io import BytesIO, StringIO
+from smtplib import SMTPException
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import AnonymousUser, User
+from django.core import mail
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.template import Context, RequestContext, Template
+from django.db.models.signals import post_init
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from blog.models import Category, Post
+from monitour_common.pagination import KeysetPaginator, decode_cursor, encode_cursor
+from monitour_common.query_budget import QueryBudget, QueryBudgetTestMixin, QueryStats
+from packages import facets
+from packages.models import Destination, PackageCategory, Review, TourPackage
+
+from . import images, outbox, page_cache, recommendations, search_index, site_cache, static_export
+from .models import OutgoingEmail, Recommendation, RecommendationModel, RecommendationVector, ResponsiveImage, SiteSettings
+
+
+class QueryBudgetTests(QueryBudgetTestMixin, TestCase):
+    """As páginas públicas ficam dentro do orçamento declarado e sem N+1."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = PackageCategory.objects.create(name='Praia', slug='praia')
+        cls.destination = Destination.objects.create(
+            name='Bahia', slug='bahia', country='Brasil', description='Litoral',
+        )
+        cls.author = User.objects.create(username='autor')
+        cls.blog_category = Category.objects.create(name='Dicas', slug='dicas')
+        # Criadas na primeira visita ao site, uma única vez
+        SiteSettings.objects.create(pk=1, **site_cache.DEFAULT_SETTINGS)
+
+    def assertWithinQueryBudget(self, path, method='get', **kwargs):
+        # Worker recém-iniciado: sem o índice de facetas em memória
+        facets._local.update(seq=None, index=None)
+        return super().assertWithinQueryBudget(path, method, **kwargs)
+
+    def create_content(self, total):
+        start = TourPackage.objects.count()
+        for index in range(start, start + total):
+            package = TourPackage.objects.create(
+                title=f'Pacote {index}', slug=f'pacote-{index}', category=self.category,
+                destination=self.destination, short_description='Resumo', description='Descrição',
+                highlights='Destaques', price=100 + index, duration_days=3, featured=True,
+                available_from=date(2026, 1, 1), available_until=date(2027, 1, 1),
+                featured_image='packages/featured/teste.jpg',
+            )
+            Review.objects.create(
+                package=package, name='Cliente', email='cliente@example.com', rating=5,
+                comment='Ótimo', approved=True,
+            )
+            Post.objects.create(
+                title=f'Post {index}', slug=f'post-{index}', category=self.blog_category,
+                author=self.author, excerpt='Resumo', content='Conteúdo', status='published',
+                featured=True,
+            )
+
+    def urls(self):
+        return [
+            reverse('core:home'),
+            reverse('core:about'),
+            reverse('core:search') + '?q=praia',
+            reverse('packages:package_list'),
+            reverse('packages:package_detail', args=['pacote-0']),
+            reverse('blog:post_list'),
+            reverse('blog:post_detail', args=['post-0']),
+        ]
+
+    def test_public_pages_within_budget(self):
+        self.create_content(2)
+        for url in self.urls():
+            with self.subTest(url=url):
+                response = self.assertWithinQueryBudget(url)
+                self.assertEqual(response.status_code, 200)
+
+    def test_listings_do_not_grow_with_rows(self):
+        self.create_content(2)
+        for url in self.urls():
+            self.assertWithinQueryBudget(url)
+        self.create_content(10)
+        for url in self.urls():
+            with self.subTest(url=url):
+                self.assertWithinQueryBudget(url)
+
+    def test_repeated_query_is_reported(self):
+        stats = QueryStats()
+        for pk in range(8):
+            stats(lambda *args: None, 'SELECT * FROM t WHERE id = %s', (pk,), False, {})
+        problems = QueryBudget(queries=20, repeated=5).violations(stats)
+        self.assertEqual(len(problems), 1)
+        self.assertIn('8x', problems[0])
+
+
+class SearchIndexTests(TestCase):
+    """Índice de busca mantido pelos sinais e consultado pelas views."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = PackageCategory.objects.create(name='Praia', slug='praia')
+        cls.destination = Destination.objects.create(
+            name='Ilhéus', slug='ilheus', country='Brasil', description='Litoral sul da Bahia',
+        )
+        cls.author = User.objects.create(username='autor')
+
+    def setUp(self):
+        # Páginas e índice de facetas em cache de outros testes
+        cache.clear()
+
+    def create_package(self, title, **kwargs):
+        fields = dict(
+            title=title, category=self.category, destination=self.destination,
+            short_description='Resumo', description='Descrição', highlights='Destaques',
+            price=100, duration_days=3, available_from=date(2026, 1, 1), available_until=date(2027, 1, 1),
+            featured_image='packages/featured/teste.jpg',
+        )
+        fields.update(kwargs)
+        return TourPackage.objects.create(**fields)
+
+    def hits(self, query):
+        return [(doc_type, object_id) for doc_type, object_id, _ in
+                search_index.get_search_backend().search(query)]
+
+    def test_search_ignores_accents_and_case(self):
+        package = self.create_package('Passeio de Escuna')
+        for query in ['ilheus', 'ILHÉUS', 'escuna']:
+            with self.subTest(query=query):
+                self.assertIn(('package', package.pk), self.hits(query))
+
+    def test_unpublished_content_leaves_the_index(self):
+        package = self.create_package('Passeio de Escuna')
+        post = Post.objects.create(
+            title='Escuna ao entardecer', slug='escuna', author=self.author,
+            excerpt='Resumo', content='Conteúdo', status='published',
+        )
+        self.assertEqual(len(self.hits('escuna')), 2)
+        package.status = 'inactive'
+        package.save()
+        post.delete()
+        self.assertEqual(self.hits('escuna'), [])
+
+    def test_renamed_destination_reindexes_packages_in_batch(self):
+        packages = [self.create_package(f'Pacote {index}', slug=f'pacote-{index}') for index in range(3)]
+        packages[2].status = 'inactive'
+        packages[2].save()
+        self.destination.name = 'Itacaré'
+        # UPDATE e reindexação do destino, SELECT dos pacotes, um lote para os
+        # ativos (DELETE + INSERT) e a remoção do inativo
+        with self.assertNumQueries(7):
+            self.destination.save()
+        self.assertEqual(
+            sorted(self.hits('itacare')),
+            [('destination', self.destination.pk), ('package', packages[0].pk), ('package', packages[1].pk)],
+        )
+
+    def test_stopword_only_query_does_not_filter_packages(self):
+        package = self.create_package('Passeio de Escuna')
+        self.assertEqual(self.hits('de para'), [])
+        response = self.client.get(reverse('packages:package_list'), {'q': 'de para'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([p.pk for p in response.context['page_obj'].object_list], [package.pk])
+
+    def test_basic_backend_is_the_fallback(self):
+        self.assertIsInstance(search_index.get_search_backend('mysql'), search_index.BasicSearchBackend)
+
+    @override_settings(SEARCH_BACKEND='core.search_index.BasicSearchBackend')
+    def test_basic_backend_search(self):
+        # A tabela FTS5 do SQLite também aceita as consultas comuns do backend básico
+        backend = search_index.get_search_backend()
+        backend.index([
+            ('package', 1, 'Praia do Forte', 'Litoral norte'),
+            ('package', 2, 'Chapada', 'Trilhas e praias'),
+            ('post', 3, 'Dicas de praia', 'Protetor solar'),
+        ])
+        self.assertEqual(self.hits('praia'), [('package', 1), ('post', 3), ('package', 2)])
+        self.assertEqual(search_index.get_search_backend().search('praia', limit_per_type=1)[0][:2], ('package', 1))
+        self.assertEqual(self.hits('praia litoral'), [('package', 1)])
+        backend.remove_many('package', [1, 2])
+        self.assertEqual(self.hits('praia'), [('post', 3)])
+
+
+class RecommendationTests(TestCase):
+    """Vetores esparsos no banco, atualizados item a item e reajustados só pelo comando."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = PackageCategory.objects.create(name='Aventura', slug='aventura')
+        cls.destination = Destination.objects.create(
+            name='Chapada', slug='chapada', country='Brasil', description='Serra',
+        )
+
+    def create_package(self, slug, highlights):
+        with self.captureOnCommitCallbacks(execute=True):
+            return TourPackage.objects.create(
+                title=slug, slug=slug, category=self.category, destination=self.destination,
+                short_description='Resumo', description='Descrição', highlights=highlights, price=300,
+                duration_days=3, available_from=date(2026, 1, 1), available_until=date(2027, 1, 1),
+                featured_image='packages/featured/teste.jpg',
+            )
+
+    def related(self, package):
+        return [related.slug for related in recommendations.related(package)]
+
+    def test_save_without_model_does_not_refit(self):
+        self.create_package('cachoeira', 'cachoeira trilha')
+        self.assertFalse(RecommendationModel.objects.exists())
+        self.assertFalse(RecommendationVector.objects.exists())
+        self.assertEqual(recommendations.stale_types(), ['post', 'package'])
+
+    def test_incremental_update_uses_stored_vocabulary(self):
+        waterfall = self.create_package('cachoeira', 'cachoeira trilha banho')
+        cave = self.create_package('gruta', 'gruta lanterna')
+        self.create_package('mergulho', 'mergulho recife')
+        recommendations.rebuild()
+        model = RecommendationModel.objects.get(doc_type='package')
+        self.assertEqual(RecommendationVector.objects.filter(doc_type='package').count(), 3)
+        self.assertEqual(set(self.related(waterfall)), {'gruta', 'mergulho'})
+
+        # Novo pacote parecido com a cachoeira: entra na lista dela sem reajustar o modelo
+        self.create_package('poco', 'cachoeira trilha banho poco')
+        self.assertEqual(RecommendationModel.objects.get(doc_type='package').fitted_at, model.fitted_at)
+        self.assertEqual(self.related(waterfall)[0], 'poco')
+        self.assertEqual(RecommendationVector.objects.filter(doc_type='package').count(), 4)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            cave.delete()
+        self.assertFalse(RecommendationVector.objects.filter(object_id=cave.pk).exists())
+        self.assertFalse(Recommendation.objects.filter(doc_type='package', related_id=cave.pk).exists())
+        self.assertNotIn('gruta', self.related(waterfall))
+
+    def test_growth_marks_the_type_as_stale(self):
+        for index in range(5):
+            self.create_package(f'trilha-{index}', 'trilha')
+        recommendations.rebuild()
+        self.assertEqual(recommendations.stale_types(), [])
+        self.create_package('trilha-5', 'trilha')
+        self.assertEqual(recommendations.stale_types(), [])
+        self.create_package('trilha-6', 'trilha')
+        self.assertEqual(recommendations.stale_types(), ['package'])
+        self.assertEqual(recommendations.rebuild(only_stale=True), {'package': 7})
+
+
+class StaticExportTests(TestCase):
+    """Exportação das páginas públicas chamando as views pelo URLconf."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.package = TourPackage.objects.create(
+            title='Escuna', slug='escuna',
+            category=PackageCategory.objects.create(name='Praia', slug='praia'),
+            destination=Destination.objects.create(name='Bahia', slug='bahia', country='Brasil', description='Litoral'),
+            short_description='Resumo', description='Descrição', highlights='Destaques', price=300,
+            duration_days=3, available_from=date(2026, 1, 1), available_until=date(2027, 1, 1),
+            featured_image='packages/featured/teste.jpg',
+        )
+
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_override = self.settings(STATIC_EXPORT_ROOT=directory.name, ALLOWED_HOSTS=['testserver'])
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def recorder_connected(self):
+        return any(key[0] == static_export.RECORDER_UID for key, _, _, _ in post_init.receivers)
+
+    def test_export_records_dependencies_only_while_running(self):
+        self.assertFalse(self.recorder_connected())
+        result = static_export.export_all()
+        self.assertFalse(self.recorder_connected())
+
+        # Páginas sem template nesta instalação não entram nem como falha
+        self.assertEqual(result['failed'], [])
+        dependencies = static_export.load_dependencies()
+        path = reverse('packages:package_detail', args=['escuna'])
+        self.assertTrue((static_export.export_root() / path.strip('/') / 'index.html').is_file())
+        self.assertIn(static_export.object_key(self.package), dependencies[path]['objects'])
+        self.assertNotIn(reverse('core:privacy_policy'), dependencies)
+
+    def test_missing_object_is_not_exported(self):
+        html, loaded = static_export.render_page(
+            static_export._request_factory(), reverse('packages:package_detail', args=['inexistente']),
+        )
+        self.assertIsNone(html)
+        self.assertEqual(loaded, set())
+
+
+class FailingEmailBackend(BaseEmailBackend):
+    """Servidor SMTP fora do ar."""
+
+    def send_messages(self, email_messages):
+        raise SMTPException('fora do ar')
+
+
+class OutboxTests(TestCase):
+    """E-mails do site entram na fila com os dados e saem pelo run_mail_worker."""
+
+    def test_contact_form_queues_the_email(self):
+        response = self.client.post(reverse('core:contact'), {
+            'name': 'Ana', 'email': 'ana@example.com', 'subject': 'Pacotes', 'message': 'Olá',
+        })
+        self.assertRedirects(response, reverse('core:contact'))
+        email = OutgoingEmail.objects.get()
+        self.assertEqual((email.status, email.reply_to), ('pending', ['ana@example.com']))
+        # Nada é enviado durante a requisição
+        self.assertEqual(mail.outbox, [])
+
+    def test_worker_sends_the_queue(self):
+        outbox.enqueue('Assunto', 'Mensagem', ['equipe@example.com'])
+        call_command(
+            'run_mail_worker', '--once', '--backend', 'django.core.mail.backends.locmem.EmailBackend',
+            stdout=StringIO(),
+        )
+        self.assertEqual([message.to for message in mail.outbox], [['equipe@example.com']])
+        self.assertEqual(OutgoingEmail.objects.get().status, 'sent')
+
+    @override_settings(MAIL_MAX_ATTEMPTS=2)
+    def test_failures_are_retried_then_dropped(self):
+        email = outbox.enqueue('Assunto', 'Mensagem', ['equipe@example.com'])
+        self.assertEqual(outbox.deliver_batch(FailingEmailBackend()), (0, 1, 0))
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts, email.claimed_by), ('pending', 1, ''))
+        self.assertIn('fora do ar', email.last_error)
+        # Adiado: não volta no próximo lote antes da espera
+        self.assertEqual(outbox.deliver_batch(FailingEmailBackend()), (0, 0, 0))
+
+        OutgoingEmail.objects.update(next_attempt_at=email.created_at)
+        self.assertEqual(outbox.deliver_batch(FailingEmailBackend()), (0, 0, 1))
+        self.assertEqual(OutgoingEmail.objects.get().status, 'dead')
+
+
+@override_settings(PAGE_CACHE_ENABLED=True)
+class PageCacheTests(TestCase):
+    """HTML das páginas públicas em cache para visitantes anônimos (core.page_cache)."""
+
+    def setUp(self):
+        cache.clear()
+        self.calls = 0
+
+        @page_cache.cache_public_page(Destination)
+        def view(request):
+            self.calls += 1
+            template = Template('<form>{% csrf_token %}</form>')
+            return HttpResponse(template.render(RequestContext(request)))
+
+        self.view = view
+
+    def get(self, path='/destinos/', user=None):
+        request = RequestFactory().get(path)
+        request.user = user or AnonymousUser()
+        return request
+
+    def csrf_value(self, response):
+        return page_cache.CSRF_INPUT_RE.search(response.content.decode()).group(2)
+
+    def test_key_ignores_parameter_order_and_tracking(self):
+        labels = ['packages.destination']
+        key = page_cache.page_cache_key(self.get('/destinos/?pais=Brasil&ordem=nome'), labels)
+        same = self.get('/destinos/?ordem=nome&utm_source=news&fbclid=abc&pagina=&pais=Brasil')
+        self.assertEqual(page_cache.page_cache_key(same, labels), key)
+        self.assertNotEqual(page_cache.page_cache_key(self.get('/destinos/?pais=Chile&ordem=nome'), labels), key)
+        self.assertNotEqual(page_cache.page_cache_key(self.get('/pacotes/?pais=Brasil&ordem=nome'), labels), key)
+
+    def test_each_response_gets_its_own_csrf_token(self):
+        first = self.view(self.get())
+        second = self.view(self.get())
+        self.assertEqual((first['X-Page-Cache'], second['X-Page-Cache'], self.calls), ('MISS', 'HIT', 1))
+        self.assertNotIn(page_cache.CSRF_PLACEHOLDER, second.content.decode())
+        self.assertNotEqual(self.csrf_value(first), self.csrf_value(second))
+        # O HTML guardado não tem o token de ninguém
+        cached = cache.get(page_cache.page_cache_key(self.get(), ['core.sitesettings', 'packages.destination']))
+        self.assertIn(page_cache.CSRF_PLACEHOLDER, cached['content'])
+
+    def test_logged_in_users_and_pending_messages_bypass_the_cache(self):
+        self.view(self.get())
+        response = self.view(self.get(user=User.objects.create(username='equipe')))
+        self.assertNotIn('X-Page-Cache', response)
+        request = self.get()
+        request._messages = ['Mensagem enviada com sucesso!']
+        self.assertNotIn('X-Page-Cache', self.view(request))
+        self.assertEqual(self.calls, 3)
+        self.assertEqual(self.view(self.get())['X-Page-Cache'], 'HIT')
+
+    def test_saving_a_model_invalidates_its_pages(self):
+        self.view(self.get())
+        self.assertEqual(self.view(self.get())['X-Page-Cache'], 'HIT')
+        with self.captureOnCommitCallbacks(execute=True):
+            Destination.objects.create(name='Bahia', slug='bahia', country='Brasil', description='Litoral')
+        self.assertEqual(self.view(self.get())['X-Page-Cache'], 'MISS')
+        self.assertEqual(self.calls, 2)
+        # Alterações em modelos dos quais a página não depende não a invalidam
+        with self.captureOnCommitCallbacks(execute=True):
+            Category.objects.create(name='Dicas', slug='dicas')
+        self.assertEqual(self.view(self.get())['X-Page-Cache'], 'HIT')
+
+
+@override_settings(PAGE_CACHE_ENABLED=False)
+class ConditionalPageTests(TestCase):
+    """ETag e Last-Modified das páginas públicas (core.conditional)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.package = TourPackage.objects.create(
+            title='Escuna', slug='escuna',
+            category=PackageCategory.objects.create(name='Praia', slug='praia'),
+            destination=Destination.objects.create(name='Bahia', slug='bahia', country='Brasil', description='Litoral'),
+            short_description='Resumo', description='Descrição', highlights='Destaques', price=300,
+            duration_days=3, available_from=date(2026, 1, 1), available_until=date(2027, 1, 1),
+            featured_image='packages/featured/teste.jpg',
+        )
+        cls.url = reverse('packages:package_detail', args=['escuna'])
+
+    def setUp(self):
+        cache.clear()
+        # O token CSRF entra no validador: a primeira visita só recebe o cookie
+        self.client.get(self.url)
+
+    def test_unchanged_page_is_not_modified(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+        # O validador custa uma consulta e a view nem é chamada
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        self.assertEqual(
+            self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, 304,
+        )
+
+    def test_edit_changes_the_etag(self):
+        etag = self.client.get(self.url)['ETag']
+        self.package.price = 450
+        with self.captureOnCommitCallbacks(execute=True):
+            self.package.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertContains(response, 'R$ 450,00')
+
+
+class KeysetPaginatorTests(TestCase):
+    """Paginação por cursor das listagens públicas (core.pagination)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = PackageCategory.objects.create(name='Praia', slug='praia')
+        destination = Destination.objects.create(name='Bahia', slug='bahia', country='Brasil', description='Litoral')
+        for index, price in enumerate([300, 200, 200, 200, 100, 50, 50]):
+            TourPackage.objects.create(
+                title=f'Pacote {index}', slug=f'pacote-{index}', category=category, destination=destination,
+                short_description='Resumo', description='Descrição', highlights='Destaques', price=price,
+                duration_days=3, available_from=date(2026, 1, 1), available_until=date(2027, 1, 1),
+                featured_image='packages/featured/teste.jpg',
+            )
+        # Empates na data de criação: o id desempata
+        TourPackage.objects.filter(price=200).update(created_at=datetime(2026, 3, 1, 12, 0, 0, 123456, dt_timezone.utc))
+
+    def walk(self, paginator):
+        """Percorre as páginas para frente e depois de volta; retorna os pks de cada página."""
+        forward, page = [], paginator.get_page()
+        self.assertFalse(page.has_previous())
+        while True:
+            forward.append([item.pk for item in page])
+            if not page.has_next():
+                break
+            page = paginator.get_page(page.next_cursor)
+        backward = [[item.pk for item in page]]
+        while page.has_previous():
+            page = paginator.get_page(page.previous_cursor)
+            backward.insert(0, [item.pk for item in page])
+        self.assertEqual(backward, forward)
+        return forward
+
+    def test_cursor_round_trip(self):
+        moment = datetime(2026, 3, 1, 12, 0, 0, 123456, dt_timezone.utc)
+        values, reverse = decode_cursor(encode_cursor([moment, 7], reverse=True))
+        self.assertTrue(reverse)
+        paginator = KeysetPaginator(TourPackage.objects.all(), 2, ('-created_at', '-id'))
+        # Os microssegundos sobrevivem ao cursor
+        self.assertEqual(paginator._to_python(values), (moment, 7))
+
+    def test_pages_with_ties_on_the_sort_key(self):
+        queryset = TourPackage.objects.all()
+        pages = self.walk(KeysetPaginator(queryset, 2, ('-created_at', '-id')))
+        expected = list(queryset.order_by('-created_at', '-id').values_list('pk', flat=True))
+        self.assertEqual([pk for page in pages for pk in page], expected)
+        self.assertEqual([len(page) for page in pages], [2, 2, 2, 1])
+
+    def test_list_mode_matches_the_queryset(self):
+        ordering = ('-price', 'id')
+        queryset = TourPackage.objects.all()
+        items = [
+            SimpleNamespace(pk=pk, price=price)
+            for pk, price in queryset.order_by(*ordering).values_list('pk', 'price')
+        ]
+        paginator = KeysetPaginator(items, 3, ordering, key=lambda item: (item.price, item.pk), model=TourPackage)
+        self.assertEqual(self.walk(paginator), self.walk(KeysetPaginator(queryset, 3, ordering)))
+
+    def test_last_page_and_single_page(self):
+        paginator = KeysetPaginator(TourPackage.objects.all(), 10, ('-created_at', '-id'))
+        page = paginator.get_page()
+        self.assertEqual((len(page), page.has_next(), page.has_previous()), (7, False, False))
+        empty = KeysetPaginator(TourPackage.objects.none(), 10, ('-created_at', '-id')).get_page()
+        self.assertEqual((len(empty), empty.next_cursor, empty.previous_cursor), (0, None, None))
+
+    def test_malformed_cursor_falls_back_to_the_first_page(self):
+        paginator = KeysetPaginator(TourPackage.objects.all(), 2, ('-created_at', '-id'))
+        first = [item.pk for item in paginator.get_page()]
+        cursors = [
+            'nao-e-um-cursor!',
+            base64.urlsafe_b64encode(b'{"x": 1}').decode(),
+            encode_cursor(['2026-03-01T12:00:00']),
+            encode_cursor(['ontem', 3]),
+        ]
+        for cursor in cursors:
+            with self.subTest(cursor=cursor):
+                page = paginator.get_page(cursor)
+                self.assertEqual([item.pk for item in page], first)
+                self.assertFalse(page.has_previous())
+
+
+class ResponsiveImageTests(TestCase):
+    """Derivados gerados por core.images e as tags de core.templatetags.responsive_images."""
+
+    name = 'packages/featured/praia.jpg'
+
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_override = self.settings(MEDIA_ROOT=directory.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.upload('blue')
+
+    def upload(self, color):
+        buffer = BytesIO()
+        Image.new('RGB', (400, 300), color).save(buffer, 'JPEG')
+        if default_storage.exists(self.name):
+            default_storage.delete(self.name)
+        default_storage.save(self.name, ContentFile(buffer.getvalue()))
+
+    def render(self, source):
+        image = TourPackage(featured_image=self.name).featured_image
+        return Template(source).render(Context({'image': image}))
+
+    def test_regenerates_only_when_the_content_changes(self):
+        with mock.patch.object(images, 'build_derivatives', wraps=images.build_derivatives) as build:
+            self.assertTrue(images.process_image(self.name))
+            self.assertFalse(images.process_image(self.name))
+            self.assertEqual(build.call_count, 1)
+
+            self.upload('red')
+            self.assertTrue(images.process_image(self.name))
+            self.assertEqual(build.call_count, 2)
+
+        record = ResponsiveImage.objects.get(source=self.name)
+        self.assertEqual(record.content_hash, images.content_hash(self.name))
+        self.assertEqual([width for width, _ in record.variants['jpg']], [320, 400])
+
+    def test_manifest_cache_is_invalidated_after_regeneration(self):
+        # Sem derivados a ausência também fica em cache (sem timeout)
+        self.assertIsNone(images.get_manifest(self.name))
+        with self.assertNumQueries(0):
+            self.assertIsNone(images.get_manifest(self.name))
+
+        images.process_image(self.name)
+        first = images.get_manifest(self.name)
+        self.assertEqual(first['hash'], images.content_hash(self.name))
+
+        self.upload('red')
+        images.process_image(self.name)
+        second = images.get_manifest(self.name)
+        self.assertNotEqual(second['hash'], first['hash'])
+        self.assertEqual(second['hash'], images.content_hash(self.name))
+
+    def test_tags_fall_back_to_the_original_without_a_manifest(self):
+        original = default_storage.url(self.name)
+        html = self.render('{% load responsive_images %}{% responsive_image image alt="Praia" %}')
+        self.assertEqual(html, f'<img src="{original}" alt="Praia" loading="lazy">')
+        self.assertEqual(self.render("{% load responsive_images %}{{ image|srcset:'webp' }}"), '')
+
+        images.process_image(self.name)
+        html = self.render('{% load responsive_images %}{% responsive_image image alt="Praia" %}')
+        self.assertIn('<picture>', html)
+        self.assertIn('320w', self.render("{% load responsive_images %}{{ image|srcset:'jpg' }}"))
+
+
+class SiteCacheTests(TestCase):
+    """Cópia em memória de SiteSettings e das estatísticas (core.site_cache)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        SiteSettings.objects.create(pk=1, company_name='MONITOUR')
+
+    def setUp(self):
+        cache.clear()
+        site_cache.clear_local_cache()
+        self.addCleanup(site_cache.clear_local_cache)
+
+    def test_save_bumps_the_version_stamp(self):
+        settings_obj = site_cache.get_site_settings()
+        version = cache.get(site_cache.VERSION_KEY)
+
+        settings_obj.company_name = 'Monitour Viagens'
+        with self.captureOnCommitCallbacks(execute=True):
+            settings_obj.save()
+
+        self.assertNotEqual(cache.get(site_cache.VERSION_KEY), version)
+        self.assertEqual(site_cache.get_site_settings().company_name, 'Monitour Viagens')
+
+    def test_warm_reads_run_no_queries(self):
+        site_cache.get_site_settings()
+        site_cache.get_site_stats()
+        with self.assertNumQueries(0):
+            self.assertEqual(site_cache.get_site_settings().company_name, 'MONITOUR')
+            self.assertEqual(site_cache.get_site_stats()['years_experience'], site_cache.YEARS_EXPERIENCE)
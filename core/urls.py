@@ -12,4 +12,5 @@ urlpatterns = [
     path('privacidade/', views.privacy_policy, name='privacy_policy'),
     path('termos/', views.terms_of_use, name='terms_of_use'),
     path('busca/', views.search, name='search'),
+    path('csrf/', views.csrf_cookie, name='csrf_cookie'),
 ]
\ No newline at end of file
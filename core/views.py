@@ -1,23 +1,29 @@
 from django.shortcuts import render, redirect
 from django.contrib import messages
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse
 from django.views.decorators.http import require_http_methods
-from django.views.decorators.csrf import csrf_protect
-from django.core.mail import send_mail
-from django.conf import settings
-from django.utils import timezone
-from django.db.models import Q
-from .models import ContactMessage, Newsletter, Testimonial, SiteSettings
-from blog.models import Post
-from packages.models import TourPackage
+from django.views.decorators.csrf import csrf_protect, ensure_csrf_cookie
+from django.db import transaction
+from .models import ContactMessage, Newsletter, Testimonial
+from .site_cache import get_site_settings, get_site_stats
+from .page_cache import cache_public_page
+from .conditional import conditional_page
+from . import outbox, search_index
+from blog.models import Category, Post
+from packages.models import PackageCategory, TourPackage
+from monitour_common.query_budget import query_budget
 
 
-def get_site_settings():
-    """Helper para obter configurações do site"""
-    settings_obj, created = SiteSettings.objects.get_or_create(pk=1)
-    return settings_obj
+def _home_querysets(request):
+    return [
+        Post.objects.filter(status='published', featured=True),
+        TourPackage.objects.filter(status='active', featured=True),
+    ]
 
 
+@query_budget(queries=14)
+@conditional_page(Testimonial, Category, PackageCategory, querysets=_home_querysets)
+@cache_public_page(Post, TourPackage, Testimonial, Category, PackageCategory)
 def home(request):
     """Página inicial com destaques"""
     site_settings = get_site_settings()
@@ -26,13 +32,13 @@ def home(request):
     featured_posts = Post.objects.filter(
         status='published', 
         featured=True
-    ).order_by('-published_at')[:3]
+    ).select_related('category').order_by('-published_at')[:3]
     
     # Pacotes em destaque
     featured_packages = TourPackage.objects.filter(
         status='active', 
         featured=True
-    ).order_by('-created_at')[:6]
+    ).select_related('category').order_by('-created_at')[:6]
     
     # Depoimentos
     testimonials = Testimonial.objects.filter(
@@ -50,17 +56,13 @@ def home(request):
     return render(request, 'core/home.html', context)
 
 
+@query_budget(queries=4)
 def about(request):
     """Página sobre nós"""
     site_settings = get_site_settings()
     
-    # Estatísticas da empresa (exemplo)
-    stats = {
-        'years_experience': 10,
-        'happy_clients': 5000,
-        'destinations': 50,
-        'tours_completed': 1200,
-    }
+    # Estatísticas da empresa
+    stats = get_site_stats()
     
     # Depoimentos para a página sobre
     testimonials = Testimonial.objects.filter(active=True)[:8]
@@ -87,26 +89,21 @@ def contact(request):
         message = request.POST.get('message')
         
         if name and email and subject and message:
-            # Salvar no banco
-            contact_msg = ContactMessage.objects.create(
-                name=name,
-                email=email,
-                phone=phone,
-                subject=subject,
-                message=message
-            )
-            
-            # Enviar email (opcional)
-            try:
-                send_mail(
+            # Salvar no banco e colocar o aviso na fila de e-mails (enviado pelo run_mail_worker)
+            with transaction.atomic():
+                ContactMessage.objects.create(
+                    name=name,
+                    email=email,
+                    phone=phone,
+                    subject=subject,
+                    message=message
+                )
+                outbox.enqueue(
                     subject=f'Contato do Site: {subject}',
-                    message=f'Nome: {name}\nEmail: {email}\nTelefone: {phone}\n\nMensagem:\n{message}',
-                    from_email=settings.DEFAULT_FROM_EMAIL if hasattr(settings, 'DEFAULT_FROM_EMAIL') else email,
-                    recipient_list=[site_settings.email] if site_settings.email else ['contato@monitour.com.br'],
-                    fail_silently=True,
+                    body=f'Nome: {name}\nEmail: {email}\nTelefone: {phone}\n\nMensagem:\n{message}',
+                    to=[site_settings.email] if site_settings.email else ['contato@monitour.com.br'],
+                    reply_to=[email],
                 )
-            except:
-                pass  # Se falhar no envio de email, não quebrar a aplicação
             
             messages.success(request, 'Mensagem enviada com sucesso! Entraremos em contato em breve.')
             return redirect('core:contact')
@@ -170,6 +167,7 @@ def terms_of_use(request):
     return render(request, 'core/terms_of_use.html', context)
 
 
+@query_budget(queries=5)
 def search(request):
     """Busca global"""
     from packages.models import Destination
@@ -180,6 +178,7 @@ def search(request):
     results = {
         'posts': [],
         'packages': [],
+        'destinations': [],
         'total': 0
     }
     
@@ -187,29 +186,8 @@ def search(request):
     popular_destinations = Destination.objects.all()[:6]
     
     if query and len(query) >= 3:
-        # Buscar posts
-        posts = Post.objects.filter(
-            status='published'
-        ).filter(
-            Q(title__icontains=query) | 
-            Q(content__icontains=query) |
-            Q(excerpt__icontains=query) |
-            Q(category__name__icontains=query)
-        ).distinct().order_by('-published_at')
-        results['posts'] = posts[:10]
-        
-        # Buscar pacotes
-        packages = TourPackage.objects.filter(
-            status='active'
-        ).filter(
-            Q(name__icontains=query) | 
-            Q(description__icontains=query) |
-            Q(destination__name__icontains=query) |
-            Q(destination__country__icontains=query)
-        ).distinct().order_by('-created_at')
-        results['packages'] = packages[:10]
-        
-        results['total'] = len(results['posts']) + len(results['packages'])
+        # Busca no índice textual, ordenada por relevância
+        results = search_index.search(query, limit_per_type=10)
     
     context = {
         'site_settings': site_settings,
@@ -241,19 +219,13 @@ def newsletter_subscribe(request):
         return redirect(request.META.get('HTTP_REFERER', 'core:home'))
     
     try:
-        # Criar inscrição
-        newsletter = Newsletter.objects.create(
-            email=email,
-            subscribed_at=timezone.now(),
-            is_active=True
-        )
-        
-        # Enviar email de boas-vindas (opcional)
-        try:
-            site_settings = get_site_settings()
-            send_mail(
-                subject=f'Bem-vindo(a) à Newsletter {site_settings.site_name}!',
-                message=f'''
+        site_settings = get_site_settings()
+        # Criar inscrição e colocar o e-mail de boas-vindas na fila
+        with transaction.atomic():
+            Newsletter.objects.create(email=email)
+            outbox.enqueue(
+                subject=f'Bem-vindo(a) à Newsletter {site_settings.company_name}!',
+                body=f'''
 Olá!
 
 Obrigado por se inscrever em nossa newsletter! 
@@ -267,14 +239,10 @@ Você receberá em primeira mão:
 Estamos muito felizes em tê-lo(a) conosco!
 
 Equipe MONITOUR
-{site_settings.website_url}
+{request.build_absolute_uri('/')}
                 ''',
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=[email],
-                fail_silently=True,
+                to=[email],
             )
-        except Exception as e:
-            print(f"Erro ao enviar email de boas-vindas: {e}")
         
         if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
             return JsonResponse({
@@ -296,3 +264,11 @@ Equipe MONITOUR
         messages.error(request, 'Erro ao processar inscrição. Tente novamente.')
     
     return redirect(request.META.get('HTTP_REFERER', 'core:home'))
+
+
+@ensure_csrf_cookie
+def csrf_cookie(request):
+    """Entrega o cookie CSRF para os formulários das páginas exportadas (core.static_export)"""
+    response = HttpResponse(status=204)
+    response['Cache-Control'] = 'no-store'
+    return response
@@ -6,6 +6,8 @@ echo "🚀 Iniciando deploy do MONITOUR..."
 # Variáveis
 PROJECT_DIR="/var/www/monitour"
 VENV_DIR="$PROJECT_DIR/venv"
+# Sistema administrativo (outro projeto Django, com banco e filas próprios)
+ADMIN_DIR="$PROJECT_DIR/monitour_admin"
 REPO_URL="https://github.com/seu-usuario/monitour-site.git"
 
 # Cores para output
@@ -87,6 +89,22 @@ python manage.py collectstatic --noinput
 log "Executando migrações..."
 python manage.py migrate
 
+# Reconstruir o índice de busca (mantido incrementalmente depois disso)
+log "Reconstruindo índice de busca..."
+python manage.py rebuild_search_index
+
+# Gerar derivados responsivos das imagens que ainda não têm (os novos uploads são processados em segundo plano)
+log "Gerando derivados das imagens..."
+python manage.py generate_image_derivatives
+
+# Recalcular recomendações (vocabulário e vizinhos); os saves seguintes são incrementais
+log "Recalculando recomendações..."
+python manage.py rebuild_recommendations
+
+# Exportar as páginas públicas para o nginx (alterações seguintes regeneram só as páginas afetadas)
+log "Exportando páginas estáticas..."
+python manage.py export_static_site
+
 # 8. Configurar permissões
 log "Configurando permissões..."
 sudo chown -R $USER:www-data $PROJECT_DIR
@@ -119,6 +137,112 @@ EOF
     sudo systemctl enable gunicorn
 fi
 
+# Worker da fila de e-mails (as views só gravam na fila)
+if [ ! -f "/etc/systemd/system/monitour-mail.service" ]; then
+    log "Criando serviço do worker de e-mails..."
+    sudo tee /etc/systemd/system/monitour-mail.service > /dev/null <<EOF
+[Unit]
+Description=MONITOUR mail worker
+After=network.target
+
+[Service]
+User=$USER
+Group=www-data
+WorkingDirectory=$PROJECT_DIR
+Environment="PATH=$VENV_DIR/bin"
+ExecStart=$VENV_DIR/bin/python manage.py run_mail_worker
+Restart=always
+
+[Install]
+WantedBy=multi-user.target
+EOF
+
+    sudo systemctl daemon-reload
+    sudo systemctl enable monitour-mail
+fi
+
+# Worker da fila de e-mails do sistema administrativo (dashboard.outbox)
+if [ ! -f "/etc/systemd/system/monitour-admin-mail.service" ]; then
+    log "Criando serviço do worker de e-mails do admin..."
+    sudo tee /etc/systemd/system/monitour-admin-mail.service > /dev/null <<EOF
+[Unit]
+Description=MONITOUR admin mail worker
+After=network.target
+
+[Service]
+User=$USER
+Group=www-data
+WorkingDirectory=$ADMIN_DIR
+Environment="PATH=$VENV_DIR/bin"
+Environment="DJANGO_SETTINGS_MODULE=admin_system.settings"
+ExecStart=$VENV_DIR/bin/python manage.py run_mail_worker
+Restart=always
+
+[Install]
+WantedBy=multi-user.target
+EOF
+
+    sudo systemctl daemon-reload
+    sudo systemctl enable monitour-admin-mail
+fi
+
+# Reajuste periódico das recomendações (os saves só atualizam o item salvo)
+if [ ! -f "/etc/systemd/system/monitour-recommendations.timer" ]; then
+    log "Agendando o reajuste das recomendações..."
+    sudo tee /etc/systemd/system/monitour-recommendations.service > /dev/null <<EOF
+[Unit]
+Description=MONITOUR recommendations refit
+
+[Service]
+Type=oneshot
+User=$USER
+Group=www-data
+WorkingDirectory=$PROJECT_DIR
+Environment="PATH=$VENV_DIR/bin"
+ExecStart=$VENV_DIR/bin/python manage.py rebuild_recommendations --if-stale
+EOF
+    sudo tee /etc/systemd/system/monitour-recommendations.timer > /dev/null <<EOF
+[Unit]
+Description=Reajusta as recomendações do MONITOUR a cada hora
+
+[Timer]
+OnCalendar=hourly
+Persistent=true
+
+[Install]
+WantedBy=timers.target
+EOF
+
+    sudo systemctl daemon-reload
+    sudo systemctl enable --now monitour-recommendations.timer
+fi
+
+# Worker dos relatórios em PDF do sistema administrativo (as views só colocam o
+# pedido na fila). Reescrito se ainda apontar para o site, onde o comando não existe.
+if ! grep -qs "^WorkingDirectory=$ADMIN_DIR\$" /etc/systemd/system/monitour-pdf.service; then
+    log "Criando serviço do worker de relatórios em PDF..."
+    sudo tee /etc/systemd/system/monitour-pdf.service > /dev/null <<EOF
+[Unit]
+Description=MONITOUR PDF worker
+After=network.target
+
+[Service]
+User=$USER
+Group=www-data
+WorkingDirectory=$ADMIN_DIR
+Environment="PATH=$VENV_DIR/bin"
+Environment="DJANGO_SETTINGS_MODULE=admin_system.settings"
+ExecStart=$VENV_DIR/bin/python manage.py run_pdf_worker
+Restart=always
+
+[Install]
+WantedBy=multi-user.target
+EOF
+
+    sudo systemctl daemon-reload
+    sudo systemctl enable monitour-pdf
+fi
+
 # 10. Configurar Nginx (se não existir)
 if [ ! -f "/etc/nginx/sites-available/monitour" ]; then
     log "Configurando Nginx..."
@@ -136,6 +260,9 @@ fi
 # 12. Iniciar serviços
 log "Iniciando serviços..."
 sudo systemctl start gunicorn
+sudo systemctl restart monitour-mail
+sudo systemctl restart monitour-admin-mail
+sudo systemctl restart monitour-pdf
 sudo systemctl start nginx
 
 # 13. Verificar status
@@ -152,6 +279,14 @@ else
     error "❌ Nginx falhou ao iniciar"
 fi
 
+for worker in monitour-mail monitour-admin-mail monitour-pdf; do
+    if sudo systemctl is-active --quiet "$worker"; then
+        log "✅ $worker está rodando"
+    else
+        warning "⚠️ $worker não está rodando: veja journalctl -u $worker"
+    fi
+done
+
 # 14. Teste de conectividade
 log "Testando conectividade..."
 if curl -s -o /dev/null -w "%{http_code}" http://localhost:8000/ | grep -q "200\|302"; then
@@ -6,7 +6,9 @@ import sys
 
 def main():
     """Run administrative tasks."""
-    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'monitour_site.settings')
+    # Os testes rodam com as configurações de monitour_site.settings_test
+    settings = 'monitour_site.settings_test' if sys.argv[1:2] == ['test'] else 'monitour_site.settings'
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings)
     try:
         from django.core.management import execute_from_command_line
     except ImportError as exc:
@@ -7,11 +7,16 @@ com o site público da MONITOUR.
 
 from pathlib import Path
 import os
+import sys
 from decouple import config
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Código compartilhado com o site público (monitour_common, na raiz do repositório)
+if str(BASE_DIR.parent) not in sys.path:
+    sys.path.append(str(BASE_DIR.parent))
+
 # SECURITY WARNING: keep the secret key used in production secret!
 SECRET_KEY = config('ADMIN_SECRET_KEY', default='django-insecure-admin-system-monitour-change-in-production')
 
@@ -66,6 +71,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'monitour_common.query_budget.QueryBudgetMiddleware',
 ]
 
 ROOT_URLCONF = 'admin_system.urls'
@@ -173,6 +179,43 @@ LOGOUT_REDIRECT_URL = '/login/'
 
 # Email Configuration
 EMAIL_BACKEND = config('EMAIL_BACKEND', default='django.core.mail.backends.console.EmailBackend')
+EMAIL_HOST = config('EMAIL_HOST', default='localhost')
+EMAIL_PORT = config('EMAIL_PORT', default=587, cast=int)
+EMAIL_USE_TLS = config('EMAIL_USE_TLS', default=True, cast=bool)
+EMAIL_HOST_USER = config('EMAIL_HOST_USER', default='')
+EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='')
+EMAIL_TIMEOUT = config('EMAIL_TIMEOUT', default=30, cast=int)
+DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default='MONITOUR <contato@monitour.com.br>')
+# Os e-mails vão para a fila (dashboard.outbox); o comando run_mail_worker envia,
+# com até MAIL_MAX_ATTEMPTS tentativas antes de marcar como 'dead'
+MAIL_MAX_ATTEMPTS = config('MAIL_MAX_ATTEMPTS', default=8, cast=int)
+# Destinatários dos alertas internos (ex.: ponto de equilíbrio), separados por vírgula;
+# vazio envia para EMAIL_HOST_USER
+ALERT_EMAILS = config(
+    'ADMIN_ALERT_EMAILS',
+    default='',
+    cast=lambda v: [s.strip() for s in v.split(',') if s.strip()]
+)
+
+# Orçamento de consultas por view (monitour_common.query_budget): 'log' registra o excesso, 'raise' falha
+QUERY_BUDGET_ENABLED = config('QUERY_BUDGET_ENABLED', default=DEBUG, cast=bool)
+QUERY_BUDGET_MODE = config('QUERY_BUDGET_MODE', default='log')
+
+# Cache
+# Compartilhado entre os workers (dashboard financeiro em cache, carimbo de geração)
+CACHES = {
+    'default': {
+        'BACKEND': config('ADMIN_CACHE_BACKEND', default='django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': config('ADMIN_CACHE_LOCATION', default='') or str(BASE_DIR / '.cache'),
+        'KEY_PREFIX': 'admin',
+    }
+}
+# Os testes usam admin_system.settings_test, com um cache em memória
+# Validade máxima do dashboard financeiro em cache (invalidado antes a cada pagamento, gasto ou cotação)
+FINANCIAL_DASHBOARD_CACHE_TIMEOUT = config('FINANCIAL_DASHBOARD_CACHE_TIMEOUT', default=900, cast=int)
+
+# Importação de extratos: processos que leem os arquivos OFX em paralelo (1 lê tudo no próprio processo)
+OFX_IMPORT_WORKERS = config('OFX_IMPORT_WORKERS', default=4, cast=int)
 
 # Security Settings (Production)
 if not DEBUG:
@@ -187,6 +230,13 @@ if not DEBUG:
 API_BASE_URL = config('API_BASE_URL', default='http://127.0.0.1:8001/api/')
 SITE_PUBLIC_URL = config('SITE_PUBLIC_URL', default='http://127.0.0.1:8000/')
 
+# Mercado Pago (MERCADOPAGO_API_URL aponta para o gateway falso nos testes de carga: fake_mercadopago)
+MERCADO_PAGO_ACCESS_TOKEN = config('MERCADOPAGO_ACCESS_TOKEN', default='')
+MERCADO_PAGO_PUBLIC_KEY = config('MERCADOPAGO_PUBLIC_KEY', default='')
+MERCADO_PAGO_API_URL = config('MERCADOPAGO_API_URL', default='https://api.mercadopago.com')
+# Endereço público do sistema interno (retorno do checkout e notificações do gateway)
+SITE_URL = config('SITE_URL', default='http://127.0.0.1:8001')
+
 # Sistema Interno - Configurações específicas
 ADMIN_SYSTEM_NAME = 'MONITOUR Admin System'
 ADMIN_SYSTEM_VERSION = '1.0.0'
@@ -0,0 +1,18 @@
+"""
+Configurações dos testes: as do sistema administrativo com um cache em
+memória, isolado por processo, para que nada dos arquivos de .cache do
+desenvolvimento vaze para os testes (nem o contrário).
+
+`manage.py test` usa este módulo; em outros executores (pytest-django, IDE)
+defina DJANGO_SETTINGS_MODULE=admin_system.settings_test.
+"""
+from .settings import *  # noqa: F401,F403
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Os alertas internos (ponto de equilíbrio) vão para a fila sem avisos de configuração
+ALERT_EMAILS = ['alertas@example.com']
@@ -22,13 +22,19 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
+from monitour_common.query_budget import query_report
+
 urlpatterns = [
     # Admin Django
     path('admin/', admin.site.urls),
+    path('__queries__/', query_report, name='query_report'),
     
     # API Endpoints
     path('api/', include('api.urls')),
     
+    # Passeios: relatórios, mapa de assentos, vendas e webhook do Mercado Pago
+    path('passeios/', include('passeios.urls')),
+    
     # Dashboard do Sistema Interno
     path('', include('dashboard.urls')),
 ]
@@ -0,0 +1,47 @@
+"""
+Requisições condicionais (ETag / Last-Modified) dos endpoints públicos da API.
+
+O validador sai de uma única consulta com o maior updated_at e o total de
+linhas dos conjuntos de objetos da resposta (o total acusa exclusões e itens
+que deixaram de ser ativos), sem serializar nada. Se o cliente já tem a versão
+atual, a resposta é um 304 sem corpo.
+"""
+import hashlib
+
+from django.views.decorators.http import condition
+
+from monitour_common.conditional import latest_changes
+
+
+class ConditionalGetMixin:
+    """
+    Responde 304 quando nada mudou desde a última resposta ao cliente.
+
+    As views definem get_validator_querysets() com os conjuntos de objetos
+    (todos com updated_at) que compõem a resposta.
+    """
+
+    def get_validator_querysets(self):
+        raise NotImplementedError
+
+    def _validators(self):
+        if not hasattr(self, '_conditional_validators'):
+            changes = latest_changes(self.get_validator_querysets())
+            fingerprint = '|'.join(
+                f'{latest.isoformat() if latest else "-"}:{total}' for latest, total in changes
+            )
+            timestamps = [latest for latest, _ in changes if latest is not None]
+            self._conditional_validators = (
+                hashlib.sha1(fingerprint.encode()).hexdigest(),
+                max(timestamps) if timestamps else None,
+            )
+        return self._conditional_validators
+
+    def get(self, request, *args, **kwargs):
+        conditional_get = condition(
+            etag_func=lambda *args, **kwargs: self._validators()[0],
+            last_modified_func=lambda *args, **kwargs: self._validators()[1],
+        )(super().get)
+        response = conditional_get(request, *args, **kwargs)
+        response.setdefault('Cache-Control', 'no-cache')
+        return response
@@ -0,0 +1,68 @@
+"""
+Classes de paginação da API.
+
+KeysetPagination pagina por cursor opaco sobre (-created_at, -id): cada página
+é buscada com "WHERE (created_at, id) < (...)" usando o índice, sem COUNT(*)
+nem OFFSET crescente. O cursor é o de monitour_common.pagination, que leva
+todos os campos da ordenação (o CursorPagination do DRF guarda só o primeiro e
+erra a página anterior quando há empates). Requisições com ?page= continuam
+recebendo a paginação numerada.
+"""
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.utils.urls import replace_query_param
+
+from monitour_common.pagination import InvalidCursor, KeysetPaginator
+
+
+class KeysetPagination(CursorPagination):
+    """Paginação por cursor, com fallback para o modo numerado quando ?page= é informado."""
+    page_size = 20
+    ordering = ('-created_at', '-id')
+    numbered_class = PageNumberPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.numbered = None
+        if self.numbered_class.page_query_param in request.query_params:
+            self.numbered = self.numbered_class()
+            self.numbered.page_size = self.page_size
+            return self.numbered.paginate_queryset(queryset.order_by(*self.ordering), request, view)
+
+        self.base_url = request.build_absolute_uri()
+        paginator = KeysetPaginator(queryset, self.get_page_size(request), self.ordering)
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            try:
+                paginator.parse_cursor(cursor)
+            except InvalidCursor:
+                raise NotFound(self.invalid_cursor_message)
+        self.page = paginator.get_page(cursor)
+        if self.page.has_other_pages():
+            self.display_page_controls = True
+        return list(self.page)
+
+    def _link(self, cursor):
+        if cursor is None:
+            return None
+        return replace_query_param(self.base_url, self.cursor_query_param, cursor)
+
+    def get_next_link(self):
+        return self._link(self.page.next_cursor)
+
+    def get_previous_link(self):
+        return self._link(self.page.previous_cursor)
+
+    def get_paginated_response(self, data):
+        if self.numbered is not None:
+            return self.numbered.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        if self.numbered is not None:
+            return self.numbered.get_paginated_response_schema(schema)
+        return super().get_paginated_response_schema(schema)
+
+
+class InscricaoPagination(KeysetPagination):
+    """Inscrições são ordenadas pela data de inscrição."""
+    ordering = ('-data_inscricao', '-id')
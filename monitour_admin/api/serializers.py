@@ -10,6 +10,7 @@ from dashboard.models import (
     Sale, 
     CustomerInquiry
 )
+from financas.models import Transacao
 
 class TourPackageCategorySerializer(serializers.ModelSerializer):
     """Serializer para categorias de pacotes"""
@@ -126,4 +127,14 @@ class RecentSalesSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'order_id', 'package_title', 'customer_name',
             'total_amount', 'payment_status', 'created_at'
-        ]
\ No newline at end of file
+        ]
+
+class TransacaoExtratoSerializer(serializers.ModelSerializer):
+    """Serializer para as linhas do livro razão (saldo calculado em financas.razao)"""
+    conta_nome = serializers.CharField(source='conta.nome', read_only=True)
+    categoria_nome = serializers.CharField(source='categoria.nome', read_only=True, default=None)
+    saldo = serializers.DecimalField(max_digits=14, decimal_places=2, read_only=True)
+
+    class Meta:
+        model = Transacao
+        fields = ['id', 'data', 'descricao', 'valor', 'saldo', 'conta', 'conta_nome', 'categoria', 'categoria_nome']
@@ -1,3 +1,92 @@
+from django.contrib.auth.models import User
 from django.test import TestCase
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
 
-# Create your tests here.
+from dashboard.models import CustomerInquiry, Destination, Sale, TourPackage, TourPackageCategory
+from monitour_common.query_budget import QueryBudgetTestMixin
+
+
+class QueryBudgetTests(QueryBudgetTestMixin, TestCase):
+    """Os endpoints da API ficam dentro do orçamento e sem N+1 por item."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = TourPackageCategory.objects.create(name='Praia', slug='praia')
+        cls.destination = Destination.objects.create(name='Bahia', slug='bahia', country='Brasil')
+        cls.user = User.objects.create_user('equipe', password='senha')
+        cls.token = Token.objects.create(user=cls.user)
+
+    def create_packages(self, total):
+        start = TourPackage.objects.count()
+        for index in range(start, start + total):
+            package = TourPackage.objects.create(
+                title=f'Pacote {index}', slug=f'pacote-{index}', description='Descrição',
+                short_description='Resumo', category=self.category, destination=self.destination,
+                duration_days=2, duration_nights=1, price_per_person=100,
+            )
+            Sale.objects.create(
+                package=package, customer_name='Cliente', customer_email='cliente@example.com',
+                customer_phone='71999999999', unit_price=100, total_amount=100, payment_method='pix',
+            )
+            CustomerInquiry.objects.create(
+                package=package, name='Cliente', email='cliente@example.com', subject='Dúvida', message='Olá',
+            )
+
+    def test_endpoints_within_budget(self):
+        urls = [
+            reverse('api:package_list'),
+            reverse('api:package_detail', args=['pacote-0']),
+            reverse('api:category_list'),
+            reverse('api:destination_list'),
+            reverse('api:admin_sale_list'),
+            reverse('api:admin_inquiry_list'),
+            reverse('api:dashboard_stats'),
+            reverse('api:recent_sales'),
+            reverse('api:admin_ledger'),
+        ]
+        # Com poucos e com muitos itens o orçamento é o mesmo
+        for total in (2, 10):
+            self.create_packages(total)
+            for url in urls:
+                with self.subTest(url=url, total=total):
+                    response = self.assertWithinQueryBudget(url, HTTP_AUTHORIZATION=f'Token {self.token.key}')
+                    self.assertEqual(response.status_code, 200)
+
+
+class ConditionalGetTests(TestCase):
+    """ETag e Last-Modified dos endpoints públicos de pacotes (api.conditional)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.package = TourPackage.objects.create(
+            title='Escuna', slug='escuna', description='Descrição', short_description='Resumo',
+            category=TourPackageCategory.objects.create(name='Praia', slug='praia'),
+            destination=Destination.objects.create(name='Bahia', slug='bahia', country='Brasil'),
+            duration_days=2, duration_nights=1, price_per_person=100,
+        )
+
+    def urls(self):
+        return [reverse('api:package_list'), reverse('api:package_detail', args=['escuna'])]
+
+    def test_unchanged_response_is_not_modified(self):
+        for url in self.urls():
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                # O validador custa uma consulta e nada é serializado
+                with self.assertNumQueries(1):
+                    self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+                self.assertEqual(
+                    self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, 304,
+                )
+
+    def test_edit_changes_the_etag(self):
+        etags = [self.client.get(url)['ETag'] for url in self.urls()]
+        self.package.price_per_person = 150
+        self.package.save()
+        for url, etag in zip(self.urls(), etags):
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotEqual(response['ETag'], etag)
@@ -27,4 +27,7 @@ urlpatterns = [
     # Dashboard e Estatísticas
     path('admin/dashboard/stats/', views.dashboard_stats, name='dashboard_stats'),
     path('admin/dashboard/recent-sales/', views.recent_sales, name='recent_sales'),
+    
+    # Livro razão das contas bancárias
+    path('admin/ledger/', views.ledger, name='admin_ledger'),
 ]
\ No newline at end of file
@@ -17,6 +17,11 @@ from dashboard.models import (
     Sale, 
     CustomerInquiry
 )
+from monitour_common.query_budget import query_budget
+from financas import razao
+from financas.forms import ExtratoFiltroForm
+from .conditional import ConditionalGetMixin
+from .pagination import KeysetPagination
 from .serializers import (
     TourPackageCategorySerializer,
     DestinationSerializer,
@@ -27,17 +32,20 @@ from .serializers import (
     CustomerInquiryCreateSerializer,
     CustomerInquirySerializer,
     DashboardStatsSerializer,
-    RecentSalesSerializer
+    RecentSalesSerializer,
+    TransacaoExtratoSerializer
 )
 
 # Endpoints Públicos (para Site Público)
-class TourPackageListAPIView(generics.ListAPIView):
+@query_budget(queries=5)
+class TourPackageListAPIView(ConditionalGetMixin, generics.ListAPIView):
     """Lista pacotes ativos para o site público"""
     serializer_class = TourPackageListSerializer
     permission_classes = [permissions.AllowAny]  # Público
+    pagination_class = KeysetPagination
     
     def get_queryset(self):
-        queryset = TourPackage.objects.filter(is_active=True)
+        queryset = TourPackage.objects.filter(is_active=True).select_related('category', 'destination')
         
         # Filtros opcionais
         category = self.request.query_params.get('category')
@@ -53,19 +61,39 @@ class TourPackageListAPIView(generics.ListAPIView):
             
         return queryset.order_by('-created_at')
 
-class TourPackageDetailAPIView(generics.RetrieveAPIView):
+    def get_validator_querysets(self):
+        # A lista exibe o nome da categoria e do destino de cada pacote
+        packages = self.get_queryset()
+        return [
+            packages,
+            TourPackageCategory.objects.filter(pk__in=packages.values('category')),
+            Destination.objects.filter(pk__in=packages.values('destination')),
+        ]
+
+@query_budget(queries=5)
+class TourPackageDetailAPIView(ConditionalGetMixin, generics.RetrieveAPIView):
     """Detalhes de um pacote específico"""
-    queryset = TourPackage.objects.filter(is_active=True)
+    queryset = TourPackage.objects.filter(is_active=True).select_related('category', 'destination')
     serializer_class = TourPackageDetailSerializer
     lookup_field = 'slug'
     permission_classes = [permissions.AllowAny]  # Público
 
+    def get_validator_querysets(self):
+        package = self.get_queryset().filter(slug=self.kwargs['slug'])
+        return [
+            package,
+            TourPackageCategory.objects.filter(pk__in=package.values('category')),
+            Destination.objects.filter(pk__in=package.values('destination')),
+        ]
+
+@query_budget(queries=4)
 class CategoryListAPIView(generics.ListAPIView):
     """Lista categorias ativas"""
     queryset = TourPackageCategory.objects.filter(is_active=True)
     serializer_class = TourPackageCategorySerializer
     permission_classes = [permissions.AllowAny]  # Público
 
+@query_budget(queries=4)
 class DestinationListAPIView(generics.ListAPIView):
     """Lista destinos ativos"""
     queryset = Destination.objects.filter(is_active=True)
@@ -112,21 +140,26 @@ class CustomerInquiryCreateAPIView(generics.CreateAPIView):
         }, status=status.HTTP_400_BAD_REQUEST)
 
 # Endpoints Privados (Sistema Interno)
+@query_budget(queries=4)
 class SaleListAPIView(generics.ListAPIView):
     """Lista vendas - apenas para sistema interno"""
-    queryset = Sale.objects.all()
+    queryset = Sale.objects.select_related('package')
     serializer_class = SaleSerializer
     authentication_classes = [TokenAuthentication]
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
 
+@query_budget(queries=4)
 class CustomerInquiryListAPIView(generics.ListAPIView):
     """Lista consultas - apenas para sistema interno"""
-    queryset = CustomerInquiry.objects.all()
+    queryset = CustomerInquiry.objects.select_related('package')
     serializer_class = CustomerInquirySerializer
     authentication_classes = [TokenAuthentication]
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
 
 # Dashboard e Estatísticas
+@query_budget(queries=8)
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
 def dashboard_stats(request):
@@ -166,14 +199,51 @@ def dashboard_stats(request):
     serializer = DashboardStatsSerializer(stats)
     return Response(serializer.data)
 
+@query_budget(queries=4)
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
 def recent_sales(request):
     """Vendas recentes para dashboard"""
-    sales = Sale.objects.order_by('-created_at')[:10]
+    sales = Sale.objects.select_related('package').order_by('-created_at')[:10]
     serializer = RecentSalesSerializer(sales, many=True)
     return Response(serializer.data)
 
+# Livro razão das contas bancárias
+@query_budget(queries=10)
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def ledger(request):
+    """
+    Transações das contas do usuário com saldo corrente, da mais recente para
+    a mais antiga. Filtros: conta, categoria, data_inicio, data_fim; páginas
+    por ?cursor= (o `next` da resposta) e ?page_size= (até 200).
+    """
+    form = ExtratoFiltroForm(request.query_params, user=request.user)
+    if not form.is_valid():
+        return Response({'errors': form.errors}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        page_size = min(max(int(request.query_params.get('page_size', 50)), 1), 200)
+        transacoes, cursor = razao.pagina(
+            form.contas(),
+            categoria=form.cleaned_data['categoria'],
+            data_inicio=form.cleaned_data['data_inicio'],
+            data_fim=form.cleaned_data['data_fim'],
+            cursor=request.query_params.get('cursor'),
+            tamanho=page_size,
+        )
+    except ValueError:
+        return Response({'errors': {'cursor': ['Cursor ou page_size inválido.']}}, status=status.HTTP_400_BAD_REQUEST)
+
+    next_url = None
+    if cursor:
+        params = request.query_params.copy()
+        params['cursor'] = cursor
+        next_url = request.build_absolute_uri(f'{request.path}?{params.urlencode()}')
+    return Response({
+        'next': next_url,
+        'results': TransacaoExtratoSerializer(transacoes, many=True).data,
+    })
+
 @api_view(['GET'])
 @permission_classes([permissions.AllowAny])
 def api_health_check(request):
@@ -4,4 +4,7 @@ from django.apps import AppConfig
 class BusinessConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'business'
-    verbose_name = 'Núcleo do Negócio'
\ No newline at end of file
+    verbose_name = 'Núcleo do Negócio'
+
+    def ready(self):
+        import business.signals  # Invalidação do dashboard financeiro em cache
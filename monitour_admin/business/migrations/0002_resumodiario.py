@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('business', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumoDiario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', models.DateField(unique=True)),
+                ('receita_prevista', models.DecimalField(decimal_places=2, default=0, help_text='Preço dos pacotes das inscrições feitas no dia', max_digits=14)),
+                ('inscricoes', models.IntegerField(default=0)),
+                ('receita_confirmada', models.DecimalField(decimal_places=2, default=0, help_text='Pagamentos de clientes recebidos no dia', max_digits=14)),
+                ('despesa_cotacoes', models.DecimalField(decimal_places=2, default=0, help_text='Cotações aceitas com vencimento no dia (ou cadastradas no dia, sem vencimento)', max_digits=14)),
+                ('cotacoes', models.IntegerField(default=0)),
+                ('pagamentos_fornecedores', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('gastos_internos', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('atualizado_em', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Resumo Financeiro Diário',
+                'verbose_name_plural': 'Resumos Financeiros Diários',
+                'ordering': ['data'],
+            },
+        ),
+        migrations.CreateModel(
+            name='DespesaDiariaCategoria',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', models.DateField()),
+                ('origem', models.CharField(choices=[('gasto', 'Gasto Interno'), ('cotacao', 'Cotação Aceita')], max_length=20)),
+                ('categoria', models.CharField(max_length=50)),
+                ('valor', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+            options={
+                'verbose_name': 'Despesa Diária por Categoria',
+                'verbose_name_plural': 'Despesas Diárias por Categoria',
+                'unique_together': {('data', 'origem', 'categoria')},
+            },
+        ),
+    ]
@@ -15,4 +15,50 @@ class AcaoRapida(models.Model):
         ordering = ['ordem']
 
     def __str__(self):
-        return self.label
\ No newline at end of file
+        return self.label
+
+
+class ResumoDiario(models.Model):
+    """
+    Totais financeiros de um dia, mantidos incrementalmente a cada pagamento,
+    inscrição, cotação ou gasto gravado (business.services.resumo_diario).
+    Os totais de um período somam no máximo uma linha por dia.
+    """
+    data = models.DateField(unique=True)
+    receita_prevista = models.DecimalField(max_digits=14, decimal_places=2, default=0, help_text="Preço dos pacotes das inscrições feitas no dia")
+    inscricoes = models.IntegerField(default=0)
+    receita_confirmada = models.DecimalField(max_digits=14, decimal_places=2, default=0, help_text="Pagamentos de clientes recebidos no dia")
+    despesa_cotacoes = models.DecimalField(max_digits=14, decimal_places=2, default=0, help_text="Cotações aceitas com vencimento no dia (ou cadastradas no dia, sem vencimento)")
+    cotacoes = models.IntegerField(default=0)
+    pagamentos_fornecedores = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    gastos_internos = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    atualizado_em = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Resumo Financeiro Diário"
+        verbose_name_plural = "Resumos Financeiros Diários"
+        ordering = ['data']
+
+    def __str__(self):
+        return f"Resumo financeiro de {self.data:%d/%m/%Y}"
+
+
+class DespesaDiariaCategoria(models.Model):
+    """Despesas de um dia por categoria: tipo do gasto interno ou serviço da cotação aceita."""
+    ORIGENS = [
+        ('gasto', 'Gasto Interno'),
+        ('cotacao', 'Cotação Aceita'),
+    ]
+
+    data = models.DateField()
+    origem = models.CharField(max_length=20, choices=ORIGENS)
+    categoria = models.CharField(max_length=50)
+    valor = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        verbose_name = "Despesa Diária por Categoria"
+        verbose_name_plural = "Despesas Diárias por Categoria"
+        unique_together = ('data', 'origem', 'categoria')
+
+    def __str__(self):
+        return f"{self.get_origem_display()} - {self.categoria} em {self.data:%d/%m/%Y}"
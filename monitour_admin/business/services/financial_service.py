@@ -2,19 +2,43 @@
 Serviço centralizado para cálculos financeiros do sistema.
 Evita duplicação de código e melhora testabilidade.
 """
+import uuid
 from decimal import Decimal
-from django.db.models import Sum, Q, F, DecimalField, Case, When, Value
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Sum, Count, Q, F, DecimalField, Case, When, Value
+from django.db.models.functions import Coalesce, Trunc
 from django.utils import timezone
 from datetime import timedelta
 
+CENTAVOS = Decimal('0.01')
+ZERO = Value(Decimal('0.00'), output_field=DecimalField(max_digits=12, decimal_places=2))
+
+# Carimbo de geração do dashboard em cache: trocá-lo invalida todos os períodos
+DASHBOARD_GERACAO_KEY = 'financas:dashboard:geracao'
+
 
 class FinancialService:
     """Serviço para cálculos e análises financeiras consolidadas."""
     
+    @staticmethod
+    def _totais_diarios(data_inicio, data_fim, *campos):
+        """Soma os campos de ResumoDiario no período: no máximo uma linha por dia."""
+        from business.models import ResumoDiario
+        
+        totais = ResumoDiario.objects.filter(data__range=[data_inicio, data_fim]).aggregate(
+            **{campo: Sum(campo) for campo in campos}
+        )
+        # Somas de decimais no SQLite voltam com resíduo de ponto flutuante
+        return {campo: Decimal(valor or 0).quantize(CENTAVOS) if campo not in ('inscricoes', 'cotacoes') else valor or 0
+                for campo, valor in totais.items()}
+    
     @staticmethod
     def get_receitas_periodo(data_inicio=None, data_fim=None):
         """
-        Calcula receitas (pagamentos recebidos de clientes) no período.
+        Calcula receitas (pagamentos recebidos de clientes) no período, a
+        partir dos resumos diários.
         
         Args:
             data_inicio: Data inicial do período (default: primeiro dia do mês atual)
@@ -23,27 +47,17 @@ class FinancialService:
         Returns:
             dict com receita_total, receita_confirmada, receita_pendente
         """
-        from passeios.models import Inscricao, Pagamento
-        
         if not data_inicio:
             hoje = timezone.now().date()
             data_inicio = hoje.replace(day=1)
         if not data_fim:
             data_fim = timezone.now().date()
         
-        # Receita de inscrições no período
-        inscricoes_periodo = Inscricao.objects.filter(
-            data_inscricao__date__range=[data_inicio, data_fim]
+        totais = FinancialService._totais_diarios(
+            data_inicio, data_fim, 'receita_prevista', 'inscricoes', 'receita_confirmada'
         )
-        
-        receita_total_prevista = inscricoes_periodo.aggregate(
-            total=Sum('pacote__preco')
-        )['total'] or Decimal('0.00')
-        
-        # Pagamentos efetivamente recebidos no período
-        pagamentos_recebidos = Pagamento.objects.filter(
-            data_pagamento__date__range=[data_inicio, data_fim]
-        ).aggregate(total=Sum('valor'))['total'] or Decimal('0.00')
+        receita_total_prevista = totais['receita_prevista']
+        pagamentos_recebidos = totais['receita_confirmada']
         
         receita_pendente = receita_total_prevista - pagamentos_recebidos
         
@@ -51,48 +65,31 @@ class FinancialService:
             'receita_total_prevista': receita_total_prevista,
             'receita_confirmada': pagamentos_recebidos,
             'receita_pendente': receita_pendente,
-            'total_inscricoes': inscricoes_periodo.count()
+            'total_inscricoes': totais['inscricoes']
         }
     
     @staticmethod
     def get_despesas_periodo(data_inicio=None, data_fim=None):
         """
-        Calcula despesas (pagamentos a fornecedores + gastos internos) no período.
+        Calcula despesas (pagamentos a fornecedores + gastos internos) no
+        período, a partir dos resumos diários. Cotações aceitas contam no dia
+        do vencimento ou, sem vencimento, no dia em que foram registradas.
         
         Returns:
             dict com despesa_total, despesa_paga, despesa_pendente
         """
-        from passeios.models import Cotacao, PagamentoFornecedor, GastoPasseio
-        
         if not data_inicio:
             hoje = timezone.now().date()
             data_inicio = hoje.replace(day=1)
         if not data_fim:
             data_fim = timezone.now().date()
         
-        # Despesas de cotações aceitas com vencimento no período
-        cotacoes_periodo = Cotacao.objects.filter(
-            status='aceita',
-            data_vencimento_pagamento__range=[data_inicio, data_fim]
-        ) | Cotacao.objects.filter(
-            status='aceita',
-            data_cotacao__date__range=[data_inicio, data_fim],
-            data_vencimento_pagamento__isnull=True
+        totais = FinancialService._totais_diarios(
+            data_inicio, data_fim, 'despesa_cotacoes', 'cotacoes', 'pagamentos_fornecedores', 'gastos_internos'
         )
-        
-        despesa_cotacoes_prevista = cotacoes_periodo.aggregate(
-            total=Sum('valor_cotado')
-        )['total'] or Decimal('0.00')
-        
-        # Pagamentos efetivamente feitos a fornecedores no período
-        pagamentos_fornecedores = PagamentoFornecedor.objects.filter(
-            data_pagamento__date__range=[data_inicio, data_fim]
-        ).aggregate(total=Sum('valor'))['total'] or Decimal('0.00')
-        
-        # Gastos internos no período
-        gastos_internos = GastoPasseio.objects.filter(
-            data_gasto__date__range=[data_inicio, data_fim]
-        ).aggregate(total=Sum('valor'))['total'] or Decimal('0.00')
+        despesa_cotacoes_prevista = totais['despesa_cotacoes']
+        pagamentos_fornecedores = totais['pagamentos_fornecedores']
+        gastos_internos = totais['gastos_internos']
         
         despesa_total = despesa_cotacoes_prevista + gastos_internos
         despesa_paga = pagamentos_fornecedores + gastos_internos
@@ -102,27 +99,92 @@ class FinancialService:
             'despesa_total_prevista': despesa_total,
             'despesa_confirmada': despesa_paga,
             'despesa_pendente': despesa_pendente,
-            'cotacoes_previstas': cotacoes_periodo.count(),
+            'cotacoes_previstas': totais['cotacoes'],
             'gastos_internos': gastos_internos
         }
     
+    @staticmethod
+    def get_serie(data_inicio, data_fim, periodo='month'):
+        """
+        Receitas e despesas agrupadas por dia, semana, mês ou ano
+        (periodo: 'day', 'week', 'month' ou 'year'), somando os resumos diários.
+        
+        Returns:
+            Lista de dicts com periodo (data de início), receita_prevista,
+            receita_confirmada, despesa_prevista e despesa_confirmada
+        """
+        from business.models import ResumoDiario
+        
+        linhas = ResumoDiario.objects.filter(data__range=[data_inicio, data_fim]).annotate(
+            periodo=Trunc('data', periodo)
+        ).order_by('periodo').values('periodo').annotate(
+            receita_prevista=Sum('receita_prevista'),
+            receita_confirmada=Sum('receita_confirmada'),
+            despesa_cotacoes=Sum('despesa_cotacoes'),
+            pagamentos_fornecedores=Sum('pagamentos_fornecedores'),
+            gastos_internos=Sum('gastos_internos'),
+        )
+        serie = []
+        for linha in linhas:
+            valores = {campo: valor.quantize(CENTAVOS) for campo, valor in linha.items() if campo != 'periodo'}
+            serie.append({
+                'periodo': linha['periodo'],
+                'receita_prevista': valores['receita_prevista'],
+                'receita_confirmada': valores['receita_confirmada'],
+                'despesa_prevista': valores['despesa_cotacoes'] + valores['gastos_internos'],
+                'despesa_confirmada': valores['pagamentos_fornecedores'] + valores['gastos_internos'],
+            })
+        return serie
+    
+    @staticmethod
+    def get_comparativo_mensal(hoje, meses=12):
+        """
+        Receita e despesa confirmadas dos últimos `meses` meses (incluindo o
+        atual) ao lado dos mesmos meses do ano anterior.
+        
+        Returns:
+            Lista de dicts com mes, receita, despesa, receita_ano_anterior e despesa_ano_anterior
+        """
+        from .resumo_diario import somar_meses, ultimo_dia_do_mes
+        
+        inicio = somar_meses(hoje, 1 - meses)
+        inicio_anterior = somar_meses(inicio, -12)
+        serie = {
+            linha['periodo']: linha
+            for linha in FinancialService.get_serie(inicio_anterior, ultimo_dia_do_mes(hoje), 'month')
+        }
+        
+        comparativo = []
+        for i in range(meses):
+            mes = somar_meses(inicio, i)
+            atual = serie.get(mes, {})
+            anterior = serie.get(somar_meses(mes, -12), {})
+            comparativo.append({
+                'mes': mes,
+                'receita': atual.get('receita_confirmada', Decimal('0.00')),
+                'despesa': atual.get('despesa_confirmada', Decimal('0.00')),
+                'receita_ano_anterior': anterior.get('receita_confirmada', Decimal('0.00')),
+                'despesa_ano_anterior': anterior.get('despesa_confirmada', Decimal('0.00')),
+            })
+        return comparativo
+    
     @staticmethod
     def get_contas_a_receber():
         """
         Lista todas as inscrições com saldo devedor (contas a receber de clientes).
         
         Returns:
-            QuerySet anotado com saldo_devedor
+            QuerySet anotado com saldo_a_receber (total_pago alimenta Inscricao.valor_pago)
         """
         from passeios.models import Inscricao
-        from django.db.models import Sum
         
+        # Sem pagamento nenhum a soma é NULL: Coalesce mantém a inscrição na lista
         return Inscricao.objects.annotate(
-            valor_pago_total=Sum('pagamentos__valor')
+            total_pago=Coalesce(Sum('pagamentos__valor'), ZERO)
         ).annotate(
-            saldo_devedor=F('pacote__preco') - F('valor_pago_total')
+            saldo_a_receber=F('pacote__preco') - F('total_pago')
         ).filter(
-            saldo_devedor__gt=0,
+            saldo_a_receber__gt=0,
             status_inscricao='confirmada'
         ).select_related('cliente', 'pacote__passeio').order_by('pacote__passeio__data_ida')
     
@@ -132,41 +194,51 @@ class FinancialService:
         Lista todas as cotações aceitas com saldo a pagar (contas a pagar a fornecedores).
         
         Returns:
-            QuerySet anotado com saldo_a_pagar
+            QuerySet anotado com saldo_calculado (total_pago_fornecedor alimenta Cotacao.valor_pago)
         """
         from passeios.models import Cotacao
         
         return Cotacao.objects.annotate(
-            valor_pago_total=Sum('pagamentos_fornecedor__valor')
+            total_pago_fornecedor=Coalesce(Sum('pagamentos_fornecedor__valor'), ZERO)
         ).annotate(
-            saldo_calculado=F('valor_cotado') - F('valor_pago_total')
+            saldo_calculado=F('valor_cotado') - F('total_pago_fornecedor')
         ).filter(
             status='aceita',
             saldo_calculado__gt=0
         ).select_related('fornecedor', 'passeio').order_by('data_vencimento_pagamento')
     
     @staticmethod
-    def get_resultados_por_passeio():
+    def get_resultados_por_passeio(limite=None):
         """
         Calcula o resultado financeiro (lucro/prejuízo) de cada passeio.
         
+        Receita, custo e lucro saem do resumo financeiro de cada passeio, já
+        ordenados pelo lucro, em uma única consulta.
+        
+        Args:
+            limite: Quantidade máxima de passeios (default: todos)
+            
         Returns:
             Lista de dicts com informações de cada passeio
         """
-        from passeios.models import Passeio, Inscricao
-        
-        passeios = Passeio.objects.with_custo_total().filter(
-            status__in=['confirmado', 'realizado']
-        ).prefetch_related('pacotes__inscricoes')
+        from passeios import resumos
+        from passeios.models import Passeio
+        
+        passeios = Passeio.objects.filter(status__in=['confirmado', 'realizado'])
+        resumos.garantir(passeios)
+        passeios = passeios.annotate(
+            receita=F('resumo_financeiro__receita_prevista'),
+            custo=resumos.custo_total(),
+        ).annotate(
+            lucro=F('receita') - F('custo')
+        ).order_by('-lucro', 'pk')
+        if limite is not None:
+            passeios = passeios[:limite]
         
         resultados = []
         for passeio in passeios:
-            receita = Inscricao.objects.filter(
-                pacote__passeio=passeio
-            ).aggregate(total=Sum('pacote__preco'))['total'] or Decimal('0.00')
-            
-            custo = passeio.custo_total_previsto
-            lucro = receita - custo
+            # Contas com decimais no SQLite voltam com resíduo de ponto flutuante
+            receita, custo, lucro = (valor.quantize(CENTAVOS) for valor in (passeio.receita, passeio.custo, passeio.lucro))
             margem = (lucro / receita * 100) if receita > 0 else 0
             
             resultados.append({
@@ -178,7 +250,7 @@ class FinancialService:
                 'status': 'lucro' if lucro > 0 else 'prejuizo'
             })
         
-        return sorted(resultados, key=lambda x: x['lucro'], reverse=True)
+        return resultados
     
     @staticmethod
     def get_dashboard_completo(periodo_dias=30):
@@ -189,8 +261,12 @@ class FinancialService:
             periodo_dias: Número de dias para análise (default: 30)
             
         Returns:
-            dict com todas as métricas financeiras consolidadas
+            dict com todas as métricas financeiras consolidadas. Só dicts e
+            valores simples, sem instâncias de modelos: o resultado vai em
+            pickle para o cache (get_dashboard) e não pode depender do schema.
         """
+        from passeios.models import Cotacao
+        
         hoje = timezone.now().date()
         data_inicio = hoje - timedelta(days=periodo_dias)
         
@@ -208,19 +284,21 @@ class FinancialService:
         contas_receber = FinancialService.get_contas_a_receber()
         contas_pagar = FinancialService.get_contas_a_pagar()
         
-        total_a_receber = contas_receber.aggregate(
-            total=Sum('saldo_devedor')
-        )['total'] or Decimal('0.00')
-        
-        total_a_pagar = contas_pagar.aggregate(
-            total=Sum('saldo_calculado')
-        )['total'] or Decimal('0.00')
+        # Total e quantidade na mesma consulta; as listas são avaliadas uma vez só
+        receber = contas_receber.aggregate(total=Sum('saldo_a_receber'), quantidade=Count('id'))
+        pagar = contas_pagar.aggregate(total=Sum('saldo_calculado'), quantidade=Count('id'))
+        total_a_receber = receber['total'] or Decimal('0.00')
+        total_a_pagar = pagar['total'] or Decimal('0.00')
         
         # Saldo líquido previsto (caixa + a receber - a pagar)
         saldo_liquido_previsto = receitas['receita_confirmada'] - despesas['despesa_confirmada'] + total_a_receber - total_a_pagar
         
-        # Resultados por passeio
-        resultados_passeios = FinancialService.get_resultados_por_passeio()
+        # Resultados por passeio (Top 5)
+        resultados_passeios = [
+            {**resultado, 'passeio': resultado['passeio'].titulo}
+            for resultado in FinancialService.get_resultados_por_passeio(limite=5)
+        ]
+        tipos_servico = dict(Cotacao._meta.get_field('tipo_servico').flatchoices)
         
         return {
             'periodo': {
@@ -237,14 +315,73 @@ class FinancialService:
             },
             'contas_receber': {
                 'total': total_a_receber,
-                'quantidade': contas_receber.count(),
-                'lista': contas_receber[:10]  # Top 10 para o dashboard
+                'quantidade': receber['quantidade'],
+                'lista': [  # Top 10 para o dashboard
+                    {'cliente': cliente, 'passeio': passeio, 'saldo': saldo}
+                    for cliente, passeio, saldo in contas_receber.values_list(
+                        'cliente__nome', 'pacote__passeio__titulo', 'saldo_a_receber',
+                    )[:10]
+                ]
             },
             'contas_pagar': {
                 'total': total_a_pagar,
-                'quantidade': contas_pagar.count(),
-                'lista': contas_pagar[:10]  # Top 10 para o dashboard
+                'quantidade': pagar['quantidade'],
+                'lista': [  # Top 10 para o dashboard
+                    {'fornecedor': fornecedor, 'tipo_servico': tipos_servico.get(tipo, tipo), 'saldo': saldo, 'vencimento': vencimento}
+                    for fornecedor, tipo, saldo, vencimento in contas_pagar.values_list(
+                        'fornecedor__nome_fantasia', 'tipo_servico', 'saldo_calculado', 'data_vencimento_pagamento',
+                    )[:10]
+                ]
             },
             'saldo_liquido_previsto': saldo_liquido_previsto,
-            'resultados_passeios': resultados_passeios[:5],  # Top 5 passeios
+            'resultados_passeios': resultados_passeios,
+            'composicao_despesas': FinancialService.get_composicao_despesas(data_inicio),
+            'comparativo_mensal': FinancialService.get_comparativo_mensal(hoje),
+        }
+    
+    @staticmethod
+    def get_composicao_despesas(data_inicio):
+        """
+        Soma gastos internos e cotações aceitas por categoria desde data_inicio,
+        a partir das despesas diárias por categoria.
+        
+        Returns:
+            dict {categoria: valor}
+        """
+        from business.models import DespesaDiariaCategoria
+        from passeios.models import Cotacao, GastoPasseio
+        
+        nomes = {
+            'gasto': dict(GastoPasseio.TIPO_GASTO_CHOICES),
+            'cotacao': dict(Cotacao.TIPO_SERVICO_COTADO),
         }
+        composicao = {}
+        for linha in DespesaDiariaCategoria.objects.filter(data__gte=data_inicio).order_by().values(
+            'origem', 'categoria'
+        ).annotate(total=Sum('valor')):
+            tipo = nomes[linha['origem']].get(linha['categoria'], linha['categoria'])
+            composicao[tipo] = composicao.get(tipo, 0) + float(linha['total'])
+        
+        return composicao
+    
+    @staticmethod
+    def get_dashboard(periodo_dias=30):
+        """
+        get_dashboard_completo guardado em cache por periodo_dias (e pelo dia).
+        
+        O cache é invalidado por invalidar_dashboard() a cada escrita em
+        pagamentos, inscrições, cotações, gastos e passeios (business.signals);
+        FINANCIAL_DASHBOARD_CACHE_TIMEOUT limita a validade no restante.
+        """
+        geracao = cache.get_or_set(DASHBOARD_GERACAO_KEY, uuid.uuid4().hex, None)
+        key = f'financas:dashboard:{geracao}:{timezone.now().date().isoformat()}:{periodo_dias}'
+        dados = cache.get(key)
+        if dados is None:
+            dados = FinancialService.get_dashboard_completo(periodo_dias=periodo_dias)
+            cache.set(key, dados, settings.FINANCIAL_DASHBOARD_CACHE_TIMEOUT)
+        return dados
+    
+    @staticmethod
+    def invalidar_dashboard():
+        """Troca a geração do dashboard em cache após o commit (todas as versões de periodo_dias)."""
+        transaction.on_commit(lambda: cache.set(DASHBOARD_GERACAO_KEY, uuid.uuid4().hex, None))
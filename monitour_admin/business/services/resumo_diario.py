@@ -0,0 +1,185 @@
+"""
+Resumos financeiros diários (ResumoDiario e DespesaDiariaCategoria).
+
+Cada pagamento, inscrição, cotação e gasto contribui para o resumo do dia em
+que conta no dashboard financeiro (ver FONTES). Os sinais em business.signals
+leem a contribuição da linha no banco antes e depois de salvar ou excluir e
+somam só a diferença; recalcular() refaz um intervalo de datas a partir das
+tabelas de origem (comando backfill_resumo_diario), pelas mesmas regras.
+
+Os dias seguem o fuso do projeto, como os filtros __date que substituem.
+"""
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from business.models import DespesaDiariaCategoria, ResumoDiario
+from passeios.models import Cotacao, GastoPasseio, Inscricao, Pagamento, PagamentoFornecedor
+
+
+def _dia(momento):
+    return timezone.localdate(momento) if timezone.is_aware(momento) else momento.date()
+
+
+def _diario(data, **valores):
+    return ResumoDiario, {'data': data}, valores
+
+
+def _categoria(data, origem, categoria, valor):
+    return DespesaDiariaCategoria, {'data': data, 'origem': origem, 'categoria': categoria}, {'valor': valor}
+
+
+def _inscricao(linha):
+    return [_diario(_dia(linha['quando']), receita_prevista=linha['preco'], inscricoes=1)]
+
+
+def _pagamento(linha):
+    return [_diario(_dia(linha['quando']), receita_confirmada=linha['valor_pago'])]
+
+
+def _pagamento_fornecedor(linha):
+    return [_diario(_dia(linha['quando']), pagamentos_fornecedores=linha['valor_pago'])]
+
+
+def _gasto(linha):
+    data = _dia(linha['quando'])
+    return [
+        _diario(data, gastos_internos=linha['valor_gasto']),
+        _categoria(data, 'gasto', linha['tipo'], linha['valor_gasto']),
+    ]
+
+
+def _cotacao(linha):
+    if linha['situacao'] != 'aceita':
+        return []
+    cadastro = _dia(linha['quando'])
+    return [
+        _diario(linha['vencimento'] or cadastro, despesa_cotacoes=linha['valor'], cotacoes=1),
+        _categoria(cadastro, 'cotacao', linha['tipo'], linha['valor']),
+    ]
+
+
+# Modelo: (colunas lidas da linha, contribuições da linha, campos de data usados para filtrar um intervalo).
+# Os apelidos das colunas não podem repetir nomes de campos do modelo.
+FONTES = {
+    Inscricao: (
+        {'quando': F('data_inscricao'), 'preco': F('pacote__preco')}, _inscricao, ['data_inscricao__date'],
+    ),
+    Pagamento: (
+        {'quando': F('data_pagamento'), 'valor_pago': F('valor')}, _pagamento, ['data_pagamento__date'],
+    ),
+    PagamentoFornecedor: (
+        {'quando': F('data_pagamento'), 'valor_pago': F('valor')}, _pagamento_fornecedor, ['data_pagamento__date'],
+    ),
+    GastoPasseio: (
+        {'quando': F('data_gasto'), 'tipo': F('tipo_gasto'), 'valor_gasto': F('valor')}, _gasto, ['data_gasto__date'],
+    ),
+    Cotacao: (
+        {
+            'quando': F('data_cotacao'), 'vencimento': F('data_vencimento_pagamento'), 'situacao': F('status'),
+            'tipo': F('tipo_servico'), 'valor': F('valor_cotado'),
+        },
+        _cotacao,
+        ['data_vencimento_pagamento', 'data_cotacao__date'],
+    ),
+}
+
+
+def contribuicao(instance):
+    """Contribuições da linha como está gravada no banco ([] se não existir)."""
+    colunas, calcular, _ = FONTES[instance._meta.concrete_model]
+    linha = instance._meta.concrete_model._base_manager.filter(pk=instance.pk).values(**colunas).first()
+    return calcular(linha) if linha else []
+
+
+def _acumular(destino, contribuicoes, sinal=1):
+    for model, chave, valores in contribuicoes:
+        acumulado = destino[(model, tuple(sorted(chave.items())))]
+        for campo, valor in valores.items():
+            acumulado[campo] += sinal * valor
+
+
+def aplicar(anteriores, atuais):
+    """Soma aos resumos a diferença entre as contribuições anteriores e as atuais."""
+    deltas = defaultdict(lambda: defaultdict(Decimal))
+    _acumular(deltas, anteriores, -1)
+    _acumular(deltas, atuais)
+    for (model, chave), valores in deltas.items():
+        valores = {campo: valor for campo, valor in valores.items() if valor}
+        if valores:
+            _somar(model, dict(chave), valores)
+
+
+def _somar(model, chave, valores):
+    alteracoes = {campo: F(campo) + valor for campo, valor in valores.items()}
+    if model.objects.filter(**chave).update(**alteracoes):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**chave, **valores)
+    except IntegrityError:
+        # Outra transação criou a linha do dia no meio do caminho
+        model.objects.filter(**chave).update(**alteracoes)
+
+
+def recalcular(data_inicio=None, data_fim=None, chunk_size=5000):
+    """
+    Refaz os resumos dos dias entre data_inicio e data_fim (inclusive; sem
+    limites, todos) a partir das tabelas de origem. Retorna (dias, categorias).
+    """
+    def no_intervalo(data):
+        return (data_inicio is None or data >= data_inicio) and (data_fim is None or data <= data_fim)
+
+    totais = defaultdict(lambda: defaultdict(Decimal))
+    for model, (colunas, calcular, campos_data) in FONTES.items():
+        linhas = model._base_manager.order_by()
+        if data_inicio is not None or data_fim is not None:
+            filtro = Q()
+            for campo in campos_data:
+                limites = {}
+                if data_inicio is not None:
+                    limites[f'{campo}__gte'] = data_inicio
+                if data_fim is not None:
+                    limites[f'{campo}__lte'] = data_fim
+                filtro |= Q(**limites)
+            linhas = linhas.filter(filtro)
+        for linha in linhas.values(**colunas).iterator(chunk_size=chunk_size):
+            _acumular(totais, [parte for parte in calcular(linha) if no_intervalo(parte[1]['data'])])
+
+    novos = defaultdict(list)
+    for (model, chave), valores in totais.items():
+        novos[model].append(model(**dict(chave), **valores))
+
+    with transaction.atomic():
+        for model in (ResumoDiario, DespesaDiariaCategoria):
+            existentes = model.objects.all()
+            if data_inicio is not None:
+                existentes = existentes.filter(data__gte=data_inicio)
+            if data_fim is not None:
+                existentes = existentes.filter(data__lte=data_fim)
+            existentes.delete()
+            model.objects.bulk_create(novos[model], batch_size=1000)
+    return len(novos[ResumoDiario]), len(novos[DespesaDiariaCategoria])
+
+
+def recalcular_pacote(pacote_id):
+    """Preço do pacote alterado: refaz os dias das inscrições feitas nele."""
+    datas = [
+        _dia(momento) for momento in Inscricao.objects.filter(pacote_id=pacote_id).values_list('data_inscricao', flat=True)
+    ]
+    if datas:
+        recalcular(min(datas), max(datas))
+
+
+def somar_meses(data, meses):
+    """Primeiro dia do mês `meses` meses depois (ou antes, se negativo) do mês de `data`."""
+    mes = data.year * 12 + data.month - 1 + meses
+    return data.replace(year=mes // 12, month=mes % 12 + 1, day=1)
+
+
+def ultimo_dia_do_mes(data):
+    return somar_meses(data, 1) - timedelta(days=1)
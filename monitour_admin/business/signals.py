@@ -0,0 +1,65 @@
+from django.db.models.signals import post_save, post_delete, pre_save, pre_delete
+from django.dispatch import receiver
+
+from passeios.models import Cotacao, GastoPasseio, Inscricao, Pacote, Pagamento, PagamentoFornecedor, Passeio
+from .services import resumo_diario
+from .services.financial_service import FinancialService
+
+
+@receiver([post_save, post_delete], sender=Pagamento)
+@receiver([post_save, post_delete], sender=PagamentoFornecedor)
+@receiver([post_save, post_delete], sender=GastoPasseio)
+@receiver([post_save, post_delete], sender=Cotacao)
+@receiver([post_save, post_delete], sender=Inscricao)
+@receiver([post_save, post_delete], sender=Pacote)
+@receiver([post_save, post_delete], sender=Passeio)
+def invalidar_dashboard_financeiro(sender, **kwargs):
+    """Qualquer escrita que muda os números do dashboard financeiro descarta a versão em cache."""
+    FinancialService.invalidar_dashboard()
+
+
+# --- Resumos diários (atualização incremental, ver business.services.resumo_diario) ---
+
+@receiver([pre_save, pre_delete], sender=Inscricao)
+@receiver([pre_save, pre_delete], sender=Pagamento)
+@receiver([pre_save, pre_delete], sender=PagamentoFornecedor)
+@receiver([pre_save, pre_delete], sender=Cotacao)
+@receiver([pre_save, pre_delete], sender=GastoPasseio)
+def guardar_contribuicao_diaria(sender, instance, raw=False, **kwargs):
+    """Lê o que a linha somava nos resumos diários antes de ser alterada ou excluída."""
+    if not raw and not instance._state.adding:
+        instance._resumo_diario_anterior = resumo_diario.contribuicao(instance)
+
+
+@receiver(post_save, sender=Inscricao)
+@receiver(post_save, sender=Pagamento)
+@receiver(post_save, sender=PagamentoFornecedor)
+@receiver(post_save, sender=Cotacao)
+@receiver(post_save, sender=GastoPasseio)
+def atualizar_resumo_diario(sender, instance, raw=False, **kwargs):
+    anterior = instance.__dict__.pop('_resumo_diario_anterior', [])
+    if not raw:
+        resumo_diario.aplicar(anterior, resumo_diario.contribuicao(instance))
+
+
+@receiver(post_delete, sender=Inscricao)
+@receiver(post_delete, sender=Pagamento)
+@receiver(post_delete, sender=PagamentoFornecedor)
+@receiver(post_delete, sender=Cotacao)
+@receiver(post_delete, sender=GastoPasseio)
+def descontar_do_resumo_diario(sender, instance, **kwargs):
+    resumo_diario.aplicar(instance.__dict__.pop('_resumo_diario_anterior', []), [])
+
+
+@receiver(pre_save, sender=Pacote)
+def guardar_preco_anterior(sender, instance, raw=False, **kwargs):
+    if not raw and not instance._state.adding:
+        instance._preco_anterior = Pacote.objects.filter(pk=instance.pk).values_list('preco', flat=True).first()
+
+
+@receiver(post_save, sender=Pacote)
+def recalcular_resumo_diario_do_pacote(sender, instance, raw=False, **kwargs):
+    """Preço do pacote alterado muda a receita prevista dos dias das inscrições dele."""
+    anterior = instance.__dict__.pop('_preco_anterior', None)
+    if not raw and anterior is not None and anterior != instance.preco:
+        resumo_diario.recalcular_pacote(instance.pk)
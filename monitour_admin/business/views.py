@@ -6,13 +6,14 @@ from django.shortcuts import render, redirect
 from django.http import FileResponse, Http404
 from django.views.static import serve
 from datetime import timedelta
-from django.db.models import Count, F
+from django.db.models import F
 import json
 import os
 import mimetypes
 
 from cadastros.models import Cliente, Fornecedor
 from passeios.models import Passeio, Inscricao, VeiculoPasseio
+from passeios import resumos
 
 @staff_member_required
 def dashboard_view(request):
@@ -24,8 +25,11 @@ def dashboard_view(request):
     proximos_passeios = Passeio.objects.filter(
         data_ida__gte=hoje,
         status__in=['agendado', 'confirmado']
-    ).annotate(
-        num_inscricoes=Count('pacotes__inscricoes', distinct=True)
+    )
+    # Inscrições lidas do resumo financeiro em vez de contar as tabelas filhas
+    resumos.garantir(proximos_passeios)
+    proximos_passeios = proximos_passeios.annotate(
+        num_inscricoes=F('resumo_financeiro__total_inscricoes')
     ).select_related('tipo_veiculo').order_by('data_ida')
 
     data_limite = hoje - timedelta(days=7)
@@ -1,9 +1,10 @@
 from django.contrib import admin
 from .models import Cliente, Fornecedor, TipoVeiculo, ContatoFornecedor, ContaBancariaFornecedor, MatriculaCliente
-from django.db.models import Count, Sum
+from django.db.models import Count, Exists, OuterRef, Sum
 from django.contrib import messages
 from passeios.models import Inscricao  # Importa o modelo diretamente, o que é seguro.
 from import_export.admin import ImportExportModelAdmin
+from monitour_common.query_budget import QueryBudget
 from import_export import resources
 
 class InscricaoInline(admin.TabularInline):
@@ -243,6 +244,7 @@ class FornecedorAdmin(admin.ModelAdmin):
     list_filter = ('tipo',)
     inlines = [ContatoFornecedorInline, ContaBancariaFornecedorInline]
     ordering = ('nome_fantasia',) # Ordena por nome fantasia por padrão
+    query_budget = QueryBudget(queries=8)
     fieldsets = (
         ('Informações Principais', {
             'fields': ('nome_fantasia', 'razao_social', 'cnpj', 'tipo')
@@ -255,20 +257,21 @@ class FornecedorAdmin(admin.ModelAdmin):
     @admin.display(description='Contatos?', boolean=True)
     def has_contacts(self, obj):
         """Verifica se o fornecedor possui contatos cadastrados."""
-        # Usamos .exists() para ser eficiente e não carregar todos os objetos
-        return obj.contatos.exists()
+        # Anotado em get_queryset com EXISTS, sem consulta por linha
+        return obj.tem_contatos
 
     @admin.display(description='Contas Bancárias?', boolean=True)
     def has_bank_accounts(self, obj):
         """Verifica se o fornecedor possui contas bancárias cadastradas."""
-        return obj.contas_bancarias.exists()
+        return obj.tem_contas_bancarias
 
     def get_queryset(self, request):
         """Otimiza a consulta para o list_display."""
         queryset = super().get_queryset(request)
-        # Prefetch related para as inlines, se você quiser usar os dados delas em list_display
-        # ou para evitar N+1 ao acessar contatos/contas em outras partes do admin.
-        return queryset.prefetch_related('contatos', 'contas_bancarias')
+        return queryset.annotate(
+            tem_contatos=Exists(ContatoFornecedor.objects.filter(fornecedor=OuterRef('pk'))),
+            tem_contas_bancarias=Exists(ContaBancariaFornecedor.objects.filter(fornecedor=OuterRef('pk'))),
+        )
 
 @admin.register(TipoVeiculo)
 class TipoVeiculoAdmin(admin.ModelAdmin):
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cadastros', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contatofornecedor',
+            name='data_atualizacao',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='fornecedor',
+            name='data_atualizacao',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='tipoveiculo',
+            name='data_atualizacao',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
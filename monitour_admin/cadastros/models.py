@@ -194,6 +194,7 @@ class Fornecedor(models.Model):
     cnpj = models.CharField(max_length=18, unique=True, blank=True, null=True, help_text="CNPJ no formato XX.XXX.XXX/XXXX-XX")
     tipo = models.CharField(max_length=20, choices=TIPO_CHOICES, help_text="Tipo de serviço prestado")
     observacoes = models.TextField(blank=True, help_text="Anotações gerais sobre o fornecedor")
+    data_atualizacao = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.nome_fantasia} ({self.get_tipo_display()})"
@@ -212,6 +213,7 @@ class ContatoFornecedor(models.Model):
     email = models.EmailField(max_length=254, blank=True)
     telefone = PhoneNumberField(region="BR", blank=True, help_text="Telefone principal do contato")
     observacoes = models.TextField(blank=True, help_text="Anotações sobre este contato específico")
+    data_atualizacao = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.nome} ({self.fornecedor.nome_fantasia})"
@@ -258,6 +260,7 @@ class TipoVeiculo(models.Model):
         default=0.00,
         help_text="Custo estimado para o transporte deste tipo de veículo, usado se não houver cotação aceita."
     )
+    data_atualizacao = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.nome
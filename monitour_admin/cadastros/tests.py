@@ -1,3 +1,43 @@
+from django.contrib.auth.models import User
 from django.test import TestCase
+from django.urls import reverse
 
-# Create your tests here.
+from monitour_common.query_budget import QueryBudgetTestMixin
+
+from .models import ContaBancariaFornecedor, ContatoFornecedor, Fornecedor
+
+
+class FornecedorAdminQueryBudgetTests(QueryBudgetTestMixin, TestCase):
+    """A lista de fornecedores não faz consultas por linha."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('admin', 'admin@example.com', 'senha')
+
+    def create_fornecedores(self, total):
+        start = Fornecedor.objects.count()
+        for index in range(start, start + total):
+            fornecedor = Fornecedor.objects.create(nome_fantasia=f'Fornecedor {index}', tipo='transporte')
+            ContatoFornecedor.objects.create(fornecedor=fornecedor, nome='Contato')
+            if index % 2:
+                ContaBancariaFornecedor.objects.create(
+                    fornecedor=fornecedor, banco='341', agencia='0001', conta='12345-6', titular='Titular',
+                )
+
+    def test_changelist_within_budget(self):
+        self.client.force_login(self.user)
+        url = reverse('admin:cadastros_fornecedor_changelist')
+        for total in (2, 20):
+            self.create_fornecedores(total)
+            with self.subTest(total=total):
+                response = self.assertWithinQueryBudget(url)
+                self.assertEqual(response.status_code, 200)
+
+    def test_changelist_flags(self):
+        self.create_fornecedores(2)
+        self.client.force_login(self.user)
+        response = self.assertWithinQueryBudget(reverse('admin:cadastros_fornecedor_changelist'))
+        rows = {fornecedor.nome_fantasia: fornecedor for fornecedor in response.context['cl'].result_list}
+        self.assertTrue(rows['Fornecedor 0'].tem_contatos)
+        self.assertFalse(rows['Fornecedor 0'].tem_contas_bancarias)
+        self.assertTrue(rows['Fornecedor 1'].tem_contas_bancarias)
@@ -0,0 +1,561 @@
+"""
+Massa de dados sintética para testes de carga e benchmarks (generate_benchmark_data).
+
+Os dados são gerados com bulk_create em lotes, com chaves primárias atribuídas
+aqui mesmo, então os relacionamentos ficam consistentes sem reler nada do
+banco. Como bulk_create não chama save() nem sinais, o que eles fariam é
+reproduzido na geração: matrícula do cliente, voucher e status de pagamento da
+inscrição, veículo principal do passeio, hash da transação, o resumo
+financeiro de cada passeio, as margens históricas dos destinos e os resumos
+financeiros diários.
+
+A geração usa um random.Random com semente fixa e datas relativas a uma data
+de referência: a mesma semente, escala e data de referência sobre o mesmo banco
+produzem os mesmos dados. Valores únicos (CPF, e-mail, voucher, hash) derivam
+da chave primária, então rodar o comando de novo acrescenta dados sem conflito.
+
+Volume por unidade de escala (aproximado): 20 mil clientes e matrículas,
+500 passeios com pacotes, veículos, cotações e gastos, ~12 mil inscrições,
+~17 mil pagamentos, 40 mil transações bancárias, 200 pacotes do site com
+5 mil vendas e mil consultas. --scale 10 passa de 1 milhão de linhas.
+"""
+import itertools
+import random
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.color import no_style
+from django.db import connection, models, transaction
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.text import slugify
+
+from business.models import DespesaDiariaCategoria, ResumoDiario
+from business.services import resumo_diario
+from business.services.financial_service import FinancialService
+from cadastros.models import (
+    Cliente, ContaBancariaFornecedor, ContatoFornecedor, Fornecedor, MatriculaCliente, TipoVeiculo,
+)
+from financas import razao
+from financas.models import Categoria, Conta, Transacao, calcular_hash_transacao
+from passeios import margens, resumos
+from passeios.models import (
+    Cotacao, GastoPasseio, Inscricao, ItemPacote, MargemDestino, Pacote, Pagamento, PagamentoFornecedor,
+    Passeio, PasseioResumoFinanceiro, PaymentGatewayTransaction, VeiculoPasseio,
+)
+
+from .models import CustomerInquiry, Destination, Sale, TourPackage, TourPackageCategory
+
+# Quantidades por unidade de --scale
+CLIENTES = 20000
+PASSEIOS = 500
+FORNECEDORES = 12
+TRANSACOES = 40000
+PACOTES_SITE = 200
+VENDAS_SITE = 5000
+CONSULTAS_SITE = 1000
+
+# Ordem de gravação: pais antes dos filhos
+MODELS = [
+    MatriculaCliente, Cliente, Fornecedor, ContatoFornecedor, ContaBancariaFornecedor,
+    Passeio, Pacote, ItemPacote, VeiculoPasseio, Cotacao, PagamentoFornecedor, GastoPasseio,
+    Inscricao, Pagamento, PaymentGatewayTransaction, Transacao,
+    TourPackage, Sale, CustomerInquiry,
+]
+
+NOMES = [
+    'Ana', 'Bruno', 'Carla', 'Daniel', 'Eduarda', 'Felipe', 'Gabriela', 'Henrique', 'Isabela', 'João',
+    'Juliana', 'Lucas', 'Mariana', 'Nicolas', 'Patrícia', 'Rafael', 'Sabrina', 'Thiago', 'Vanessa', 'Wesley',
+]
+SOBRENOMES = [
+    'Silva', 'Santos', 'Oliveira', 'Souza', 'Lima', 'Pereira', 'Costa', 'Rodrigues', 'Almeida', 'Nascimento',
+    'Carvalho', 'Ferreira', 'Gomes', 'Martins', 'Araújo', 'Ribeiro', 'Barbosa', 'Rocha', 'Dias', 'Moreira',
+]
+PROFISSOES = ['Professor(a)', 'Enfermeiro(a)', 'Engenheiro(a)', 'Comerciante', 'Aposentado(a)', 'Estudante', 'Advogado(a)']
+CIDADES = [
+    ('Salvador', 'BA'), ('Feira de Santana', 'BA'), ('São Paulo', 'SP'), ('Campinas', 'SP'),
+    ('Belo Horizonte', 'MG'), ('Rio de Janeiro', 'RJ'), ('Recife', 'PE'), ('Aracaju', 'SE'),
+]
+DESTINOS = [
+    ('Porto Seguro', 'BA'), ('Morro de São Paulo', 'BA'), ('Chapada Diamantina', 'BA'), ('Praia do Forte', 'BA'),
+    ('Maragogi', 'AL'), ('Porto de Galinhas', 'PE'), ('Gramado', 'RS'), ('Bonito', 'MS'),
+    ('Jericoacoara', 'CE'), ('Foz do Iguaçu', 'PR'), ('Ouro Preto', 'MG'), ('Arraial do Cabo', 'RJ'),
+]
+# (nome, capacidade, fileiras, layout, custo base)
+TIPOS_VEICULO = [
+    ('Van Executiva 15 Lugares', 15, 5, '2-1', Decimal('1800.00')),
+    ('Micro-ônibus 28 Lugares', 28, 7, '2-2', Decimal('3200.00')),
+    ('Ônibus Executivo 46 Lugares', 46, 12, '2-2', Decimal('5200.00')),
+    ('Ônibus Double Deck 60 Lugares', 60, 15, '2-2', Decimal('7800.00')),
+]
+CATEGORIAS_FINANCAS = ['Transporte', 'Hospedagem', 'Alimentação', 'Combustível', 'Taxas Bancárias', 'Receitas', 'Impostos']
+# (descrição, categoria, faixa de valor); valores negativos são débitos
+LANCAMENTOS = [
+    ('PIX RECEBIDO {nome}', 'Receitas', (150, 2500)),
+    ('TED RECEBIDA {nome}', 'Receitas', (500, 6000)),
+    ('PAG BOLETO VIACAO {doc}', 'Transporte', (-9000, -1500)),
+    ('POSTO IPIRANGA {doc}', 'Combustível', (-900, -120)),
+    ('PEDAGIO SEM PARAR {doc}', 'Transporte', (-180, -15)),
+    ('HOTEL POUSADA {doc}', 'Hospedagem', (-7000, -800)),
+    ('RESTAURANTE {doc}', 'Alimentação', (-1500, -60)),
+    ('TARIFA PACOTE SERVICOS', 'Taxas Bancárias', (-90, -25)),
+    ('DARF SIMPLES NACIONAL', 'Impostos', (-4000, -300)),
+    ('COMPRA CARTAO {doc}', None, (-600, -20)),
+]
+CATEGORIAS_SITE = ['Praia', 'Serra', 'Ecoturismo', 'Histórico', 'Aventura', 'Religioso']
+
+
+def _cpf(base):
+    """CPF válido (com dígitos verificadores) a partir de 9 dígitos."""
+    digits = [int(d) for d in f'{base:09d}']
+    for size in (9, 10):
+        total = sum(d * w for d, w in zip(digits, range(size + 1, 1, -1)))
+        digits.append(total * 10 % 11 % 10)
+    return ''.join(map(str, digits))
+
+
+def _money(value):
+    return Decimal(value).quantize(Decimal('0.01'))
+
+
+class BulkWriter:
+    """Acumula objetos por modelo e grava em lotes, sempre na ordem de MODELS."""
+
+    def __init__(self, batch_size):
+        self.batch_size = batch_size
+        self.buffers = {model: [] for model in MODELS}
+        self.counts = Counter()
+
+    def add(self, obj):
+        buffer = self.buffers[type(obj)]
+        buffer.append(obj)
+        if len(buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        for model, buffer in self.buffers.items():
+            if buffer:
+                model._base_manager.bulk_create(buffer, batch_size=self.batch_size)
+                self.counts[model] += len(buffer)
+                buffer.clear()
+
+
+class IdSequence:
+    """Próximas chaves primárias de cada modelo, a partir do maior id existente."""
+
+    def __init__(self, models_with_int_pk):
+        self._counters = {
+            model: itertools.count((model._base_manager.aggregate(top=Max('pk'))['top'] or 0) + 1)
+            for model in models_with_int_pk
+        }
+
+    def __call__(self, model):
+        return next(self._counters[model])
+
+
+@contextmanager
+def explicit_timestamps(model_list):
+    """Desliga auto_now/auto_now_add para gravar as datas geradas."""
+    changed = []
+    for model in model_list:
+        for field in model._meta.concrete_fields:
+            if isinstance(field, models.DateField) and (field.auto_now or field.auto_now_add):
+                changed.append((field, field.auto_now, field.auto_now_add))
+                field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in changed:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def reset_sequences(model_list):
+    """Ajusta as sequências do banco depois de inserir chaves primárias explícitas."""
+    statements = connection.ops.sequence_reset_sql(no_style(), model_list)
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+class Generator:
+    def __init__(self, scale, seed, reference_date, batch_size):
+        self.scale = scale
+        self.rng = random.Random(seed)
+        self.now = timezone.make_aware(datetime.combine(reference_date, time(18, 0)))
+        self.writer = BulkWriter(batch_size)
+        self.next_id = IdSequence([model for model in MODELS if model is not MatriculaCliente])
+
+    def moment(self, start, end):
+        """Instante aleatório entre start e end (limitado à data de referência)."""
+        end = min(end, self.now)
+        if end <= start:
+            return end
+        return start + timedelta(seconds=self.rng.randrange(int((end - start).total_seconds())))
+
+    def person(self):
+        return f'{self.rng.choice(NOMES)} {self.rng.choice(SOBRENOMES)} {self.rng.choice(SOBRENOMES)}'
+
+    def phone(self):
+        return f'+55719{self.rng.randrange(10**7, 10**8)}'
+
+    # Cadastros básicos (poucas linhas, reaproveitadas entre execuções)
+
+    def reference_data(self):
+        User = get_user_model()
+        self.user, created = User.objects.get_or_create(
+            username='benchmark', defaults={'first_name': 'Benchmark', 'email': 'benchmark@monitour.com.br'},
+        )
+        if created:
+            self.user.set_unusable_password()
+            self.user.save(update_fields=['password'])
+
+        self.tipos_veiculo = [
+            TipoVeiculo.objects.get_or_create(nome=nome, defaults={
+                'capacidade': capacidade, 'fileiras': fileiras, 'layout_colunas': layout,
+                'custo_base_transporte': custo,
+            })[0]
+            for nome, capacidade, fileiras, layout, custo in TIPOS_VEICULO
+        ]
+        self.categorias_financas = {
+            nome: Categoria.objects.get_or_create(nome=nome)[0] for nome in CATEGORIAS_FINANCAS
+        }
+        self.contas = [
+            Conta.objects.get_or_create(nome=nome, usuario=self.user)[0]
+            for nome in ('Conta Corrente Itaú', 'Conta Corrente Banco do Brasil', 'Conta PJ Inter')
+        ]
+        self.categorias_site = [
+            TourPackageCategory.objects.get_or_create(slug=slugify(nome), defaults={'name': nome})[0]
+            for nome in CATEGORIAS_SITE
+        ]
+        self.destinos_site = [
+            Destination.objects.get_or_create(slug=slugify(nome), defaults={
+                'name': nome, 'country': 'Brasil', 'state': uf, 'city': nome,
+            })[0]
+            for nome, uf in DESTINOS
+        ]
+
+    # Clientes e fornecedores
+
+    def clientes(self):
+        total = CLIENTES * self.scale
+        used_cpfs = set(Cliente.objects.values_list('cpf', flat=True))
+        used_cpfs.update(MatriculaCliente.objects.values_list('cpf', flat=True))
+        used_matriculas = set(MatriculaCliente.objects.values_list('id', flat=True))
+        if len(used_matriculas) + total > 10**6:
+            raise ValueError('Escala grande demais: as matrículas têm só 6 dígitos (máximo de 1 milhão)')
+        # Matrículas aleatórias e únicas, como gerar_matricula_aleatoria
+        free = (f'{n:06d}' for n in self.rng.sample(range(10**6), min(10**6, total + len(used_matriculas))))
+        matriculas = (m for m in free if m not in used_matriculas)
+
+        self.cliente_ids = []
+        cpf_base = 100_000_000
+        for _ in range(total):
+            pk = self.next_id(Cliente)
+            cpf = _cpf(cpf_base + pk)
+            while cpf in used_cpfs:
+                cpf_base += 1
+                cpf = _cpf(cpf_base + pk)
+            nome = self.person()
+            cidade, uf = self.rng.choice(CIDADES)
+            cadastro = self.moment(self.now - timedelta(days=4 * 365), self.now)
+            matricula = MatriculaCliente(id=next(matriculas), cpf=cpf)
+            self.writer.add(matricula)
+            self.writer.add(Cliente(
+                pk=pk, nome=nome, cpf=cpf, matricula=matricula,
+                data_nascimento=(self.now - timedelta(days=self.rng.randrange(18 * 365, 80 * 365))).date(),
+                genero=self.rng.choice('MFM'),
+                estado_civil=self.rng.choice(['solteiro', 'casado', 'divorciado', 'viuvo', 'uniao_estavel']),
+                profissao=self.rng.choice(PROFISSOES),
+                email=f'{slugify(nome).replace("-", ".")}.{pk}@exemplo.com.br',
+                telefone=self.phone(),
+                endereco=f'Rua {self.rng.choice(SOBRENOMES)}', numero=str(self.rng.randrange(1, 2000)),
+                bairro='Centro', cep=f'{self.rng.randrange(40000, 49999)}-{self.rng.randrange(1000):03d}',
+                cidade=cidade, estado=uf,
+                data_cadastro=cadastro, data_atualizacao=cadastro,
+            ))
+            self.cliente_ids.append(pk)
+
+    def fornecedores(self):
+        self.fornecedores_por_tipo = {}
+        for tipo, prefixo in [('transporte', 'Viação'), ('hospedagem', 'Pousada'), ('restaurante', 'Restaurante'),
+                              ('atracao', 'Receptivo'), ('outro', 'Serviços')]:
+            ids = []
+            for _ in range(FORNECEDORES * self.scale // 3 + 2):
+                pk = self.next_id(Fornecedor)
+                self.writer.add(Fornecedor(
+                    pk=pk, nome_fantasia=f'{prefixo} {self.rng.choice(SOBRENOMES)} {pk}',
+                    razao_social=f'{prefixo} {self.rng.choice(SOBRENOMES)} LTDA', tipo=tipo,
+                    cnpj=f'{pk:08d}0001{self.rng.randrange(100):02d}', data_atualizacao=self.now,
+                ))
+                self.writer.add(ContatoFornecedor(
+                    pk=self.next_id(ContatoFornecedor), fornecedor_id=pk, nome=self.person(),
+                    telefone=self.phone(), email=f'contato{pk}@fornecedor.com.br', data_atualizacao=self.now,
+                ))
+                self.writer.add(ContaBancariaFornecedor(
+                    pk=self.next_id(ContaBancariaFornecedor), fornecedor_id=pk, banco='341',
+                    agencia=f'{self.rng.randrange(10000):04d}', conta=f'{self.rng.randrange(10**6):06d}-{pk % 10}',
+                    titular=f'{prefixo} {pk}',
+                ))
+                ids.append(pk)
+            self.fornecedores_por_tipo[tipo] = ids
+
+    # Passeios com pacotes, cotações, gastos, inscrições e pagamentos
+
+    def passeios(self):
+        self.passeio_ids = []
+        for _ in range(PASSEIOS * self.scale):
+            self.passeio()
+
+    def passeio(self):
+        rng = self.rng
+        pk = self.next_id(Passeio)
+        self.passeio_ids.append(pk)
+        destino, uf = rng.choice(DESTINOS)
+        origem, uf_origem = rng.choice(CIDADES)
+        tipo = rng.choice(self.tipos_veiculo)
+        ida = self.now - timedelta(days=3 * 365) + timedelta(days=rng.randrange(3 * 365 + 180), hours=rng.randrange(4, 8))
+        noites = rng.choice([0, 0, 1, 2, 3, 4])
+        volta = ida + timedelta(days=noites, hours=rng.randrange(10, 16))
+        passado = volta < self.now
+        status = ('cancelado' if rng.random() < 0.04 else 'realizado') if passado else rng.choice(['agendado', 'confirmado'])
+        hospedagem = rng.choice(self.fornecedores_por_tipo['hospedagem']) if noites else None
+        passeio = Passeio(
+            pk=pk, titulo=f'{destino} {ida:%d/%m/%Y}', descricao=f'Excursão de {origem} para {destino}.',
+            cidade_origem=origem, uf_origem=uf_origem, cidade_destino=destino, uf_destino=uf,
+            data_ida=ida, data_volta=volta, status=status, tipo_veiculo=tipo,
+            fornecedor_transporte_id=rng.choice(self.fornecedores_por_tipo['transporte']),
+            fornecedor_hospedagem_id=hospedagem,
+            margem_lucro_desejada=Decimal(rng.choice([20, 25, 30, 35])), margem_lucro_promocional=Decimal('10.00'),
+            lotacao_minima_desejada=tipo.capacidade // 2, atualizado_em=min(ida, self.now),
+        )
+
+        # Veículo principal, como o sinal criar_ou_atualizar_veiculo_passeio
+        filhos = [VeiculoPasseio(
+            pk=self.next_id(VeiculoPasseio), passeio_id=pk, tipo_veiculo=tipo, identificacao='Veículo Principal',
+        )]
+
+        planejamento = ida - timedelta(days=rng.randrange(60, 150))
+        custo = Decimal('0')
+        servicos = [('transporte', 'transporte', tipo.custo_base_transporte * Decimal(rng.uniform(0.9, 1.3)))]
+        if hospedagem:
+            servicos.append(('hospedagem', 'hospedagem', Decimal(rng.randrange(90, 220) * tipo.capacidade * noites)))
+        servicos.append(('alimentacao', 'restaurante', Decimal(rng.randrange(25, 60) * tipo.capacidade)))
+        if rng.random() < 0.5:
+            servicos.append(('guia', 'atracao', Decimal(rng.randrange(300, 900))))
+        for tipo_servico, tipo_fornecedor, valor_base in servicos:
+            aceita = status in ('confirmado', 'realizado') or rng.random() < 0.4
+            for proposta in range(rng.randint(1, 3)):
+                escolhida = aceita and proposta == 0
+                valor = _money(valor_base * Decimal(rng.uniform(0.95, 1.15)))
+                cotacao_id = self.next_id(Cotacao)
+                cotada = self.moment(planejamento, ida)
+                filhos.append(Cotacao(
+                    pk=cotacao_id, passeio_id=pk, fornecedor_id=rng.choice(self.fornecedores_por_tipo[tipo_fornecedor]),
+                    tipo_servico=tipo_servico, valor_cotado=valor,
+                    data_cotacao=cotada, atualizado_em=cotada,
+                    status='aceita' if escolhida else rng.choice(['rejeitada', 'pendente', 'negociando']),
+                    data_vencimento_pagamento=(ida - timedelta(days=7)).date(),
+                    fornecedor_selecionado=escolhida,
+                ))
+                if escolhida:
+                    custo += valor
+                    if passado:
+                        sinal = _money(valor * Decimal('0.3'))
+                        for parcela in (sinal, valor - sinal):
+                            filhos.append(PagamentoFornecedor(
+                                pk=self.next_id(PagamentoFornecedor), cotacao_id=cotacao_id, valor=parcela,
+                                data_pagamento=self.moment(planejamento, ida + timedelta(days=3)),
+                                metodo=rng.choice(['pix', 'transferencia', 'boleto']),
+                            ))
+
+        if passado or rng.random() < 0.3:
+            for _ in range(rng.randint(2, 6)):
+                valor = _money(rng.uniform(30, 600))
+                custo += valor
+                tipo_gasto = rng.choice(['alimentacao', 'combustivel', 'taxas', 'material', 'imprevisto'])
+                filhos.append(GastoPasseio(
+                    pk=self.next_id(GastoPasseio), passeio_id=pk, valor=valor, tipo_gasto=tipo_gasto,
+                    descricao=f'{tipo_gasto.capitalize()} - {destino}', responsavel=self.user,
+                    data_gasto=self.moment(ida - timedelta(days=10), volta),
+                ))
+
+        # Pacotes: preço pelo custo por pessoa com a margem desejada
+        lotacao = tipo.capacidade
+        preco_base = _money(custo / max(lotacao * Decimal('0.75'), 1) * (1 + passeio.margem_lucro_desejada / 100))
+        pacotes = [(self.next_id(Pacote), 'Somente Passagem', preco_base)]
+        if hospedagem:
+            pacotes.append((self.next_id(Pacote), 'Pacote Completo', _money(preco_base * Decimal('1.6'))))
+        for pacote_id, titulo, preco in pacotes:
+            filhos.append(Pacote(pk=pacote_id, passeio_id=pk, titulo=titulo, preco=preco))
+            for item in ['Transporte ida e volta', 'Seguro viagem', 'Guia acompanhante'][:rng.randint(1, 3)]:
+                filhos.append(ItemPacote(pk=self.next_id(ItemPacote), pacote_id=pacote_id, descricao=item))
+
+        if passado:
+            inscritos = rng.randint(lotacao // 3, lotacao)
+        else:
+            inscritos = rng.randint(0, lotacao * 2 // 3)
+        # O sinal verificar_ponto_de_equilibrio já teria enviado o alerta
+        passeio.alerta_equilibrio_enviado = bool(preco_base) and inscritos >= custo / preco_base
+        self.writer.add(passeio)
+        for filho in filhos:
+            self.writer.add(filho)
+
+        # Inscrições: clientes distintos por passeio (unique_together pacote/cliente)
+        for cliente_id in rng.sample(self.cliente_ids, min(inscritos, len(self.cliente_ids))):
+            pacote_id, _, preco = rng.choice(pacotes)
+            self.inscricao(pacote_id, preco, cliente_id, planejamento, ida, status)
+
+    def inscricao(self, pacote_id, preco, cliente_id, inicio, ida, status_passeio):
+        rng = self.rng
+        pk = self.next_id(Inscricao)
+        data = self.moment(inicio, ida)
+        cancelada = status_passeio == 'cancelado' or rng.random() < 0.05
+        pago = Decimal('0')
+        filhos = []
+        if not cancelada:
+            # Parcelas iguais; passeios passados quitados, futuros só em parte
+            parcelas = rng.choice([1, 1, 2, 3])
+            valores = [_money(preco / parcelas)] * parcelas
+            valores[-1] = preco - sum(valores[:-1])
+            if ida > self.now and rng.random() < 0.6:
+                valores = valores[:rng.randint(0, parcelas - 1)]
+            for valor in valores:
+                pagamento_id = self.next_id(Pagamento)
+                quando = self.moment(data, ida)
+                metodo = rng.choice(['pix', 'pix', 'cartao_credito', 'dinheiro', 'transferencia'])
+                filhos.append(Pagamento(
+                    pk=pagamento_id, inscricao_id=pk, valor=valor, data_pagamento=quando, metodo=metodo,
+                ))
+                if metodo in ('pix', 'cartao_credito') and rng.random() < 0.5:
+                    filhos.append(PaymentGatewayTransaction(
+                        pk=self.next_id(PaymentGatewayTransaction), gateway='mercadopago',
+                        gateway_id=f'bench-{pagamento_id}', pagamento_id=pagamento_id, status='aprovado',
+                        valor=valor, metodo_pagamento=metodo, parcelas=1 if metodo == 'pix' else rng.randint(1, 6),
+                        webhook_confirmado=True, criada_em=quando, confirmada_em=quando + timedelta(seconds=rng.randrange(5, 300)),
+                    ))
+                pago += valor
+
+        # Status como o sinal atualizar_status_pagamento_inscricao
+        if cancelada:
+            status_pagamento = 'cancelado'
+        elif pago >= preco:
+            status_pagamento = 'pago'
+        elif pago > 0:
+            status_pagamento = 'parcial'
+        else:
+            status_pagamento = 'aguardando'
+        self.writer.add(Inscricao(
+            pk=pk, pacote_id=pacote_id, cliente_id=cliente_id, data_inscricao=data, atualizado_em=data,
+            status_pagamento=status_pagamento,
+            status_inscricao=rng.choice(['cancelada_cliente', 'cancelada_agencia']) if cancelada else 'confirmada',
+            # Voucher derivado da chave: não colide com os de 8 caracteres do sinal
+            voucher=f'B{pk:08X}',
+        ))
+        for filho in filhos:
+            self.writer.add(filho)
+
+    # Finanças
+
+    def transacoes(self):
+        rng = self.rng
+        inicio = self.now - timedelta(days=3 * 365)
+        for _ in range(TRANSACOES * self.scale):
+            pk = self.next_id(Transacao)
+            modelo, categoria, (minimo, maximo) = rng.choice(LANCAMENTOS)
+            descricao = modelo.format(nome=self.person().upper(), doc=f'{pk:08d}')
+            if '{doc}' not in modelo:
+                # O número do documento mantém o hash (data-valor-descrição) único
+                descricao = f'{descricao} {pk:08d}'
+            data = self.moment(inicio, self.now).date()
+            valor = _money(rng.uniform(minimo, maximo))
+            self.writer.add(Transacao(
+                pk=pk, conta=rng.choice(self.contas), data=data, descricao=descricao, valor=valor,
+                categoria=self.categorias_financas[categoria] if categoria and rng.random() < 0.7 else None,
+                # Mesmo hash de Transacao.save()
+                hash_transacao=calcular_hash_transacao(data, valor, descricao),
+            ))
+
+    # Pacotes, vendas e consultas do site público
+
+    def site(self):
+        rng = self.rng
+        pacotes = []
+        for _ in range(PACOTES_SITE * self.scale):
+            pk = self.next_id(TourPackage)
+            destino = rng.choice(self.destinos_site)
+            dias = rng.randint(1, 7)
+            preco = _money(rng.uniform(150, 4500))
+            criado = self.moment(self.now - timedelta(days=3 * 365), self.now)
+            titulo = f'{destino.name} {rng.choice(["Essencial", "Completo", "Premium", "Família", "Aventura"])}'
+            self.writer.add(TourPackage(
+                pk=pk, title=titulo, slug=f'{slugify(titulo)}-{pk}', category=rng.choice(self.categorias_site),
+                destination=destino, short_description=f'{dias} dias em {destino.name}',
+                description=f'Roteiro de {dias} dias em {destino.name} com transporte e guia.',
+                duration_days=dias, duration_nights=dias - 1, price_per_person=preco,
+                max_participants=rng.choice([15, 28, 46]), available_spots=rng.randrange(0, 46),
+                start_date=(criado + timedelta(days=rng.randrange(30, 200))).date(),
+                is_active=rng.random() < 0.85, is_featured=rng.random() < 0.1, created_by=self.user,
+                created_at=criado, updated_at=criado,
+            ))
+            pacotes.append((pk, preco, criado))
+
+        for _ in range(VENDAS_SITE * self.scale):
+            pacote_id, preco, criado = rng.choice(pacotes)
+            quantidade = rng.randint(1, 5)
+            quando = self.moment(criado, self.now)
+            status = rng.choice(['pending', 'confirmed', 'paid', 'paid', 'completed', 'cancelled'])
+            nome = self.person()
+            pk = self.next_id(Sale)
+            self.writer.add(Sale(
+                # A chave nos 32 bits finais garante pedidos únicos entre execuções
+                pk=pk, order_id=uuid.UUID(int=rng.getrandbits(96) << 32 | pk, version=4),
+                package_id=pacote_id, customer_name=nome,
+                customer_email=f'{slugify(nome).replace("-", ".")}@exemplo.com.br', customer_phone=self.phone(),
+                quantity=quantidade, unit_price=preco, total_amount=preco * quantidade,
+                payment_method=rng.choice(['credit_card', 'pix', 'pix', 'debit_card', 'installments']),
+                payment_status=status, payment_date=quando if status in ('paid', 'completed') else None,
+                created_at=quando, updated_at=quando,
+            ))
+
+        for _ in range(CONSULTAS_SITE * self.scale):
+            pacote_id, _, criado = rng.choice(pacotes)
+            quando = self.moment(criado, self.now)
+            nome = self.person()
+            self.writer.add(CustomerInquiry(
+                pk=self.next_id(CustomerInquiry), name=nome,
+                email=f'{slugify(nome).replace("-", ".")}@exemplo.com.br', phone=self.phone(),
+                inquiry_type=rng.choice(['general', 'booking', 'booking', 'support']),
+                subject='Dúvida sobre o pacote', message='Gostaria de saber se ainda há vagas.',
+                package_id=pacote_id if rng.random() < 0.8 else None,
+                status=rng.choice(['new', 'in_progress', 'resolved', 'closed']),
+                created_at=quando, updated_at=quando,
+            ))
+
+
+def generate(scale=1, seed=42, reference_date=None, batch_size=5000):
+    """Gera a massa de dados e retorna um Counter {modelo: linhas inseridas}."""
+    generator = Generator(scale, seed, reference_date or timezone.localdate(), batch_size)
+    with transaction.atomic(), explicit_timestamps(MODELS):
+        generator.reference_data()
+        generator.clientes()
+        generator.fornecedores()
+        generator.passeios()
+        generator.transacoes()
+        generator.site()
+        generator.writer.flush()
+        reset_sequences([model for model in MODELS if model is not MatriculaCliente])
+        # Resumos financeiros, que os sinais manteriam a cada linha
+        generator.writer.counts[PasseioResumoFinanceiro] += resumos.recalcular(generator.passeio_ids)
+        generator.writer.counts[MargemDestino] += margens.atualizar()
+        dias, categorias = resumo_diario.recalcular()
+        generator.writer.counts[ResumoDiario] += dias
+        generator.writer.counts[DespesaDiariaCategoria] += categorias
+        # bulk_create não dispara os sinais que invalidam o dashboard financeiro e os saldos das contas em cache
+        FinancialService.invalidar_dashboard()
+        for conta in generator.contas:
+            razao.invalidar_saldos(conta.pk)
+    return generator.writer.counts
@@ -0,0 +1,370 @@
+"""
+Micro-benchmarks dos caminhos mais pesados do sistema (run_benchmarks).
+
+Cada benchmark roda contra massas de dados de tamanhos crescentes, geradas
+por dashboard.benchmark_data num banco de teste descartável. Para cada
+tamanho são medidos:
+
+- tempo de relógio (mediana e mínimo de --repeat execuções, depois de um aquecimento);
+- número de consultas ao banco (de uma execução);
+- pico de memória alocada pelo Python (tracemalloc, numa execução à parte).
+
+O resultado é um JSON no mesmo formato do baseline guardado no repositório
+(benchmarks/baseline.json). compare_benchmarks aponta regressões: tempo ou
+memória acima do baseline mais a tolerância, ou qualquer consulta a mais.
+
+Novos benchmarks são registrados com @benchmark; `setup` recebe o tamanho da
+massa e devolve os argumentos da função medida, ou levanta Indisponivel quando
+o benchmark não pode rodar no ambiente (ele é pulado). Benchmarks que gravam no
+banco (writes=True) rodam dentro de uma transação desfeita ao final de cada
+execução.
+"""
+import json
+import platform
+import statistics
+import time
+import tracemalloc
+from datetime import timedelta
+from decimal import Decimal
+from pathlib import Path
+from types import SimpleNamespace
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test import RequestFactory
+from django.utils import timezone
+
+from monitour_common.query_budget import record_queries
+
+from . import benchmark_data
+
+BASELINE_PATH = Path(settings.BASE_DIR) / 'benchmarks' / 'baseline.json'
+
+# Diferença de tempo abaixo da qual não se aponta regressão (ruído de medição)
+MIN_TIME_DELTA_MS = 2.0
+
+BENCHMARKS = {}
+
+
+class Indisponivel(Exception):
+    """Levantada pelo setup de um benchmark que não pode rodar neste ambiente."""
+
+
+class Benchmark:
+    def __init__(self, name, func, setup=None, writes=False):
+        self.name = name
+        self.func = func
+        self.setup = setup
+        self.writes = writes
+        self.description = (func.__doc__ or '').strip()
+
+    def __call__(self, *args):
+        if not self.writes:
+            return self.func(*args)
+        with transaction.atomic():
+            result = self.func(*args)
+            transaction.set_rollback(True)
+        return result
+
+
+def benchmark(name, setup=None, writes=False):
+    """Registra a função como benchmark."""
+    def decorator(func):
+        BENCHMARKS[name] = Benchmark(name, func, setup=setup, writes=writes)
+        return func
+
+    return decorator
+
+
+# ---------------------------------------------------------------------------
+# Benchmarks
+# ---------------------------------------------------------------------------
+
+def _maior_passeio():
+    """Passeio com mais inscrições (o pior caso dos relatórios)."""
+    from passeios.models import Passeio
+
+    return (
+        Passeio.objects.annotate(total=Count('pacotes__inscricoes'))
+        .order_by('-total', 'pk').values_list('pk', flat=True).first()
+    )
+
+
+def _staff_user():
+    user, _ = get_user_model().objects.get_or_create(
+        username='benchmark_staff', defaults={'is_staff': True, 'is_superuser': True},
+    )
+    return user
+
+
+@benchmark('financial_dashboard')
+def financial_dashboard():
+    """FinancialService.get_dashboard_completo (30 dias)."""
+    from business.services.financial_service import FinancialService
+
+    return FinancialService.get_dashboard_completo(periodo_dias=30)
+
+
+@benchmark('passeio_custo_total')
+def passeio_custo_total():
+    """Passeio.objects.with_custo_total() em todos os passeios."""
+    from passeios.models import Passeio
+
+    return [passeio.custo_total_previsto for passeio in Passeio.objects.with_custo_total()]
+
+
+def _setup_relatorio_financeiro(size):
+    request = RequestFactory().get('/passeios/relatorio-financeiro/')
+    request.user = _staff_user()
+    return request, _maior_passeio()
+
+
+@benchmark('relatorio_financeiro', setup=_setup_relatorio_financeiro)
+def relatorio_financeiro(request, passeio_id):
+    """relatorio_financeiro_view do passeio com mais inscrições, com o HTML renderizado."""
+    from passeios.views import relatorio_financeiro_view
+
+    return relatorio_financeiro_view(request, passeio_id).content
+
+
+def _setup_layout_assentos(size):
+    from passeios.models import Assento, Inscricao, VeiculoPasseio
+
+    veiculo = VeiculoPasseio.objects.select_related('tipo_veiculo').filter(passeio_id=_maior_passeio()).first()
+    if not veiculo.assentos.exists():
+        # A massa gerada não aloca assentos: ocupa o veículo com os inscritos do passeio
+        clientes = Inscricao.objects.filter(pacote__passeio=veiculo.passeio_id).values_list('cliente_id', flat=True)
+        Assento.objects.bulk_create([
+            Assento(veiculo_passeio=veiculo, numero=numero, cliente_id=cliente_id)
+            for numero, cliente_id in enumerate(clientes[:veiculo.tipo_veiculo.capacidade], start=1)
+        ])
+    return (veiculo,)
+
+
+@benchmark('layout_assentos', setup=_setup_layout_assentos)
+def layout_assentos(veiculo):
+    """montar_layout_assentos do veículo mais cheio, com os dados dos clientes."""
+    from passeios.relatorios import montar_layout_assentos
+
+    return montar_layout_assentos(veiculo, com_dados_cliente=True)
+
+
+# Motivo da falha ao carregar o WeasyPrint, guardado para os tamanhos seguintes
+_weasyprint_indisponivel = None
+
+
+def _setup_relatorios_pdf(size):
+    global _weasyprint_indisponivel
+    from passeios import relatorios
+    from passeios.models import Passeio
+
+    if _weasyprint_indisponivel:
+        raise Indisponivel(_weasyprint_indisponivel)
+    try:
+        relatorios.aquecer()
+    except OSError as exc:
+        # O WeasyPrint carrega o Pango e o HarfBuzz do sistema ao ser importado; depois
+        # de uma falha, importar de novo não dá o mesmo erro (o pacote fica pela metade)
+        _weasyprint_indisponivel = f'WeasyPrint sem as bibliotecas do sistema: {exc}'
+        raise Indisponivel(_weasyprint_indisponivel) from exc
+    _setup_layout_assentos(size)
+    return (Passeio.objects.select_related('tipo_veiculo').get(pk=_maior_passeio()),)
+
+
+@benchmark('relatorios_pdf', setup=_setup_relatorios_pdf)
+def relatorios_pdf(passeio):
+    """PDFs da lista de passageiros (com o mapa de assentos) e das cotações do maior passeio."""
+    from passeios import relatorios
+
+    return relatorios.renderizar('passageiros', passeio), relatorios.renderizar('cotacoes', passeio)
+
+
+# Lançamentos do extrato sintético: metade casa com uma regra de categorização
+_MEMOS = ['PIX RECEBIDO', 'PAGAMENTO BOLETO', 'TARIFA BANCARIA', 'POSTO COMBUSTIVEL', 'PEDAGIO', 'RESTAURANTE']
+
+
+def _setup_importacao_ofx(size):
+    from financas.importacao import importar_transacoes
+    from financas.models import Categoria, Conta, RegraCategorizacao
+
+    user = _staff_user()
+    conta, _ = Conta.objects.get_or_create(nome='Conta Benchmark OFX', usuario=user)
+    categoria, _ = Categoria.objects.get_or_create(nome='Benchmark OFX')
+    if not RegraCategorizacao.objects.filter(usuario=user).exists():
+        RegraCategorizacao.objects.bulk_create([
+            RegraCategorizacao(palavra_chave=f'{palavra} {indice}', categoria=categoria, usuario=user)
+            for indice in range(10) for palavra in ('UBER', 'IFOOD', 'AMAZON')
+        ] + [RegraCategorizacao(palavra_chave=memo, categoria=categoria, usuario=user) for memo in _MEMOS[:3]])
+
+    # Extrato com 500 lançamentos por unidade de tamanho; 10% já importados antes
+    inicio = timezone.now() - timedelta(days=90)
+    extrato = [
+        SimpleNamespace(
+            date=inicio + timedelta(hours=indice * 3),
+            amount=Decimal(indice % 900 + 1) * (1 if indice % 3 else -1),
+            memo=f'{_MEMOS[indice % len(_MEMOS)]} {indice:06d}',
+        )
+        for indice in range(500 * size)
+    ]
+    importar_transacoes(conta, extrato[::10], user)
+    return conta, extrato, user
+
+
+@benchmark('importacao_ofx', setup=_setup_importacao_ofx, writes=True)
+def importacao_ofx(conta, extrato, user):
+    """Laço de importação do extrato OFX (deduplicação, regras e gravação)."""
+    from financas.importacao import importar_transacoes
+
+    return importar_transacoes(conta, extrato, user)
+
+
+def _setup_livro_razao(size):
+    from financas.models import Conta, Transacao
+    from financas.razao import codificar_cursor
+
+    conta = Conta.objects.annotate(total=Count('transacoes')).order_by('-total').first()
+    # Cursor no meio do histórico: a página funda custa o mesmo que a primeira
+    meio = Transacao.objects.filter(conta=conta).order_by('-data', '-id')[conta.total // 2]
+    return conta, codificar_cursor(meio)
+
+
+@benchmark('livro_razao', setup=_setup_livro_razao)
+def livro_razao(conta, cursor):
+    """Primeira página e uma página do meio do livro razão da maior conta, com saldo corrente."""
+    from financas import razao
+
+    return razao.pagina([conta])[0] + razao.pagina([conta], cursor=cursor)[0]
+
+
+# ---------------------------------------------------------------------------
+# Medição
+# ---------------------------------------------------------------------------
+
+def measure(bench, args, repeat=5):
+    """Mede um benchmark já preparado. Retorna o dicionário de métricas."""
+    bench(*args)  # aquecimento (caches do Django, planos de consulta)
+
+    times = []
+    for _ in range(repeat):
+        with record_queries() as stats:
+            start = time.perf_counter()
+            bench(*args)
+            times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        bench(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'time_ms': round(statistics.median(times) * 1000, 3),
+        'time_min_ms': round(min(times) * 1000, 3),
+        'queries': stats.count,
+        'peak_kb': round(peak / 1024, 1),
+    }
+
+
+def run(sizes=(1, 2), names=None, repeat=5, seed=42, log=print):
+    """
+    Gera massas cumulativas (tamanho = escala do benchmark_data) no banco atual
+    e roda os benchmarks em cada uma. Use num banco descartável.
+    """
+    selected = [BENCHMARKS[name] for name in (names or BENCHMARKS)]
+    results = {bench.name: {} for bench in selected}
+    rows = {}
+    generated = 0
+    reference_date = timezone.localdate()
+
+    for size in sorted(sizes):
+        if size > generated:
+            log(f'Gerando massa até o tamanho {size}...')
+            counts = benchmark_data.generate(
+                scale=size - generated, seed=seed + generated, reference_date=reference_date,
+            )
+            generated = size
+            rows[size] = sum(counts.values()) + rows.get(max(rows, default=0), 0)
+
+        for bench in selected:
+            try:
+                args = bench.setup(size) if bench.setup else ()
+            except Indisponivel as exc:
+                log(f'  {bench.name} [{size}]: ignorado ({exc})')
+                continue
+            metrics = measure(bench, args, repeat=repeat)
+            metrics['rows'] = rows[size]
+            results[bench.name][str(size)] = metrics
+            log(f"  {bench.name} [{size}]: {metrics['time_ms']:.1f} ms, {metrics['queries']} consultas, "
+                f"{metrics['peak_kb']:.0f} KB")
+
+    return {
+        'meta': {
+            'created_at': timezone.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'machine': f'{platform.system()} {platform.machine()}',
+            'repeat': repeat,
+            'seed': seed,
+        },
+        'results': results,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Comparação
+# ---------------------------------------------------------------------------
+
+def load(path):
+    with open(path, encoding='utf-8') as source:
+        return json.load(source)
+
+
+def save(data, path):
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as output:
+        json.dump(data, output, indent=2, ensure_ascii=False)
+        output.write('\n')
+
+
+def compare(baseline, current, threshold=0.25):
+    """
+    Lista de dicts (benchmark, tamanho, métrica, baseline, atual, variação, regressão)
+    para cada par medido nos dois arquivos.
+    """
+    rows = []
+    for name, sizes in current['results'].items():
+        for size, metrics in sizes.items():
+            base = baseline['results'].get(name, {}).get(size)
+            if not base:
+                continue
+            for metric in ('time_ms', 'queries', 'peak_kb'):
+                old, new = base[metric], metrics[metric]
+                change = (new - old) / old if old else 0.0
+                if metric == 'queries':
+                    # Consultas são determinísticas: qualquer aumento é regressão
+                    regression = new > old
+                elif metric == 'time_ms':
+                    regression = change > threshold and new - old > MIN_TIME_DELTA_MS
+                else:
+                    regression = change > threshold
+                rows.append({
+                    'benchmark': name, 'size': size, 'metric': metric,
+                    'baseline': old, 'current': new, 'change': change, 'regression': regression,
+                })
+    return rows
+
+
+def format_comparison(rows):
+    lines = [f"{'benchmark':<24} {'tam':>4} {'métrica':<8} {'baseline':>11} {'atual':>11} {'variação':>9}"]
+    for row in rows:
+        flag = '  << REGRESSÃO' if row['regression'] else ''
+        lines.append(
+            f"{row['benchmark']:<24} {row['size']:>4} {row['metric']:<8} {row['baseline']:>11.1f} "
+            f"{row['current']:>11.1f} {row['change'] * 100:>+8.1f}%{flag}"
+        )
+    return '\n'.join(lines)
@@ -0,0 +1,148 @@
+"""
+Servidor local que imita a API REST do Mercado Pago, para testes de carga offline.
+
+Implementa só o que o sistema usa:
+
+    POST /checkout/preferences   cria a preferência (id, init_point, sandbox_init_point)
+    GET  /v1/payments/<id>       detalhes do pagamento consultado pelo webhook
+    PUT  /v1/payments/<id>       atualização (cancelamento)
+
+Aponte o sistema para ele com MERCADOPAGO_API_URL=http://127.0.0.1:8900 e rode
+`python manage.py fake_mercadopago` (ou run_load_test --fake-mercadopago).
+
+O status de cada pagamento é sorteado a partir do id (o mesmo id responde sempre
+igual), na proporção de --approve-rate; --latency-ms e --error-rate simulam um
+gateway lento ou instável. Valores e external_reference vêm da preferência de
+mesmo id, quando ela foi criada aqui.
+"""
+import hashlib
+import json
+import logging
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+_PAYMENT_RE = re.compile(r'^/v1/payments/(?P<id>[^/?]+)')
+
+
+class FakeMercadoPagoHandler(BaseHTTPRequestHandler):
+    server_version = 'FakeMercadoPago/1.0'
+
+    def log_message(self, format, *args):
+        logger.debug('%s - %s', self.address_string(), format % args)
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if not length:
+            return {}
+        try:
+            return json.loads(self.rfile.read(length))
+        except ValueError:
+            return {}
+
+    def _simulate(self):
+        """Aplica a latência configurada; retorna False quando deve responder com erro."""
+        server = self.server
+        if server.latency:
+            time.sleep(server.latency * random.uniform(0.5, 1.5))
+        if server.error_rate and random.random() < server.error_rate:
+            self._send(503, {'message': 'service unavailable', 'status': 503})
+            return False
+        if not self.headers.get('Authorization', '').startswith('Bearer '):
+            self._send(401, {'message': 'invalid access token', 'status': 401})
+            return False
+        return True
+
+    def do_POST(self):
+        if not self.path.startswith('/checkout/preferences'):
+            return self._send(404, {'message': 'not found', 'status': 404})
+        data = self._body()
+        if not self._simulate():
+            return
+        preference_id = f'{uuid.uuid4().int % 10**10}-{uuid.uuid4()}'
+        amount = sum(float(item.get('unit_price', 0)) * int(item.get('quantity', 1)) for item in data.get('items', []))
+        self.server.remember(preference_id, amount, data.get('external_reference', ''))
+        self._send(201, {
+            'id': preference_id,
+            'external_reference': data.get('external_reference', ''),
+            'init_point': f'https://www.mercadopago.com.br/checkout/v1/redirect?pref_id={preference_id}',
+            'sandbox_init_point': f'https://sandbox.mercadopago.com.br/checkout/v1/redirect?pref_id={preference_id}',
+        })
+
+    def do_GET(self):
+        match = _PAYMENT_RE.match(self.path)
+        if not match:
+            return self._send(404, {'message': 'not found', 'status': 404})
+        if not self._simulate():
+            return
+        self._send(200, self.server.payment(match['id']))
+
+    def do_PUT(self):
+        match = _PAYMENT_RE.match(self.path)
+        if not match:
+            return self._send(404, {'message': 'not found', 'status': 404})
+        data = self._body()
+        if not self._simulate():
+            return
+        payment = self.server.payment(match['id'])
+        payment.update(data)
+        self._send(200, payment)
+
+
+class FakeMercadoPago(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency_ms=0, approve_rate=0.8, error_rate=0.0):
+        super().__init__(address, FakeMercadoPagoHandler)
+        self.latency = latency_ms / 1000
+        self.approve_rate = approve_rate
+        self.error_rate = error_rate
+        self._preferences = {}
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def remember(self, preference_id, amount, external_reference):
+        with self._lock:
+            self._preferences[preference_id] = (amount, external_reference)
+
+    def status_for(self, payment_id):
+        """Status estável por id: approved na proporção de approve_rate, o resto dividido."""
+        roll = int(hashlib.md5(str(payment_id).encode()).hexdigest()[:8], 16) / 0xFFFFFFFF
+        if roll < self.approve_rate:
+            return 'approved'
+        return ('pending', 'rejected', 'cancelled')[int(roll * 1000) % 3]
+
+    def payment(self, payment_id):
+        with self._lock:
+            amount, external_reference = self._preferences.get(payment_id, (0.0, ''))
+        return {
+            'id': payment_id,
+            'status': self.status_for(payment_id),
+            'transaction_amount': amount,
+            'external_reference': external_reference,
+            'payment_method_id': 'pix',
+            'currency_id': 'BRL',
+        }
+
+    def start(self):
+        """Atende em uma thread em segundo plano (para uso dentro do run_load_test)."""
+        thread = threading.Thread(target=self.serve_forever, name='fake-mercadopago', daemon=True)
+        thread.start()
+        return thread
@@ -0,0 +1,295 @@
+"""
+Teste de carga ponta a ponta (run_load_test).
+
+Usuários virtuais (threads, cada um com sua sessão e cookies) repetem um
+roteiro contra os servidores já no ar, pelo HTTP de verdade:
+
+    browse     visitante anônimo no site: home, pacotes, detalhe, busca e blog
+    venda      operador na tela de venda (tela_venda_principal) buscando clientes
+    checkout   operador finalizando vendas (processar_pagamento_inscricao)
+    webhook    rajadas de notificações do Mercado Pago (webhook_mercadopago)
+
+Clientes, pacotes e ids de transação usados nos roteiros são sorteados do
+banco configurado (o mesmo do servidor testado, ex: gerado com
+generate_benchmark_data). Para rodar sem internet, aponte o sistema para o
+gateway falso (dashboard.fake_mercadopago) com MERCADOPAGO_API_URL.
+
+O relatório traz, por cenário e por requisição, vazão, taxa de erro e as
+latências p50/p95/p99.
+"""
+import http.cookiejar
+import json
+import random
+import re
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from cadastros.models import Cliente
+from passeios.models import Pacote, PaymentGatewayTransaction
+
+# Termos usados na busca do site
+SEARCH_TERMS = ['praia', 'serra', 'bahia', 'cachoeira', 'trilha', 'mergulho', 'histórico', 'chapada', 'barco']
+
+_PACKAGE_LINK_RE = re.compile(r'href="/pacotes/(?!destinos/|categorias/)([\w-]+)/"')
+_POST_LINK_RE = re.compile(r'href="/blog/(?!categorias/)([\w-]+)/"')
+
+
+def percentile(values, pct):
+    """Percentil por posição mais próxima (values já ordenados)."""
+    if not values:
+        return 0.0
+    index = max(0, min(len(values) - 1, round(pct / 100 * len(values) + 0.5) - 1))
+    return values[index]
+
+
+class Stats:
+    """Latências e erros por (cenário, requisição), compartilhados entre as threads."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(Counter)
+        self.started = time.monotonic()
+        self.finished = None
+
+    def record(self, scenario, name, elapsed, error=None):
+        with self._lock:
+            self.latencies[(scenario, name)].append(elapsed)
+            if error:
+                self.errors[(scenario, name)][error] += 1
+
+    def finish(self):
+        self.finished = time.monotonic()
+
+    @property
+    def elapsed(self):
+        return (self.finished or time.monotonic()) - self.started
+
+    def summary(self):
+        """{cenário: {requisição: métricas}}, com a linha 'total' de cada cenário."""
+        grouped = defaultdict(dict)
+        by_scenario = defaultdict(list)
+        with self._lock:
+            for (scenario, name), values in self.latencies.items():
+                errors = self.errors[(scenario, name)]
+                grouped[scenario][name] = self._metrics(values, errors)
+                by_scenario[scenario].append((values, errors))
+        for scenario, parts in by_scenario.items():
+            values = [value for part, _ in parts for value in part]
+            errors = sum((errors for _, errors in parts), Counter())
+            grouped[scenario]['total'] = self._metrics(values, errors)
+        return dict(grouped)
+
+    def _metrics(self, values, errors):
+        ordered = sorted(values)
+        failed = sum(errors.values())
+        return {
+            'requests': len(ordered),
+            'errors': failed,
+            'error_rate': failed / len(ordered) if ordered else 0.0,
+            'rps': len(ordered) / self.elapsed if self.elapsed else 0.0,
+            'p50_ms': percentile(ordered, 50) * 1000,
+            'p95_ms': percentile(ordered, 95) * 1000,
+            'p99_ms': percentile(ordered, 99) * 1000,
+            'max_ms': (ordered[-1] if ordered else 0.0) * 1000,
+            'error_kinds': dict(errors.most_common(5)),
+        }
+
+
+class Session:
+    """Cliente HTTP de um usuário virtual: cookies, CSRF e medição de cada requisição."""
+
+    def __init__(self, base_url, stats, scenario, timeout=30):
+        self.base_url = base_url.rstrip('/')
+        self.stats = stats
+        self.scenario = scenario
+        self.timeout = timeout
+        self.cookies = http.cookiejar.CookieJar()
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(self.cookies))
+
+    def cookie(self, name):
+        return next((cookie.value for cookie in self.cookies if cookie.name == name), '')
+
+    def request(self, method, path, name, data=None, json_body=None, expect=(200,)):
+        url = self.base_url + path
+        headers = {'User-Agent': 'monitour-loadtest/1.0', 'Referer': url}
+        body = None
+        if json_body is not None:
+            body = json.dumps(json_body).encode()
+            headers['Content-Type'] = 'application/json'
+        elif data is not None:
+            body = urllib.parse.urlencode(data).encode()
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        if method != 'GET' and self.cookie('csrftoken'):
+            headers['X-CSRFToken'] = self.cookie('csrftoken')
+
+        error = None
+        content = b''
+        start = time.perf_counter()
+        try:
+            with self.opener.open(urllib.request.Request(url, body, headers, method=method), timeout=self.timeout) as response:
+                status = response.status
+                content = response.read()
+        except urllib.error.HTTPError as exc:
+            status = exc.code
+            content = exc.read()
+        except OSError as exc:
+            status = None
+            error = type(exc).__name__
+        elapsed = time.perf_counter() - start
+
+        if error is None and status not in expect:
+            error = f'HTTP {status}'
+        self.stats.record(self.scenario, name, elapsed, error)
+        return status, content.decode('utf-8', 'replace')
+
+    def get(self, path, name, **kwargs):
+        return self.request('GET', path, name, **kwargs)
+
+    def login(self, username, password, path='/admin/login/'):
+        """Login pelo formulário do admin (o mesmo fluxo de um operador no navegador)."""
+        self.get(path, 'login (formulário)')
+        self.request('POST', path, 'login', data={
+            'username': username, 'password': password,
+            'csrfmiddlewaretoken': self.cookie('csrftoken'), 'next': path,
+        })
+        if not self.cookie('sessionid'):
+            self.stats.record(self.scenario, 'login', 0.0, 'credenciais recusadas')
+            return False
+        return True
+
+
+class Targets:
+    """Dados reais sorteados nos roteiros: clientes, pacotes e transações do gateway."""
+
+    def __init__(self, limit=2000):
+        self.clientes = list(Cliente.objects.order_by('-id').values_list('id', 'nome', 'cpf')[:limit])
+        pacotes = Pacote.objects.order_by('-id').values_list('id', flat=True)
+        self.pacote_ids = list(pacotes.filter(passeio__status='confirmado')[:limit]) or list(pacotes[:limit])
+        self.gateway_ids = list(
+            PaymentGatewayTransaction.objects.filter(gateway='mercadopago')
+            .order_by('-id').values_list('gateway_id', flat=True)[:limit]
+        )
+
+    def missing(self, scenario_names):
+        """Cenários que não têm dados suficientes no banco."""
+        needs = {
+            'venda': self.clientes, 'checkout': self.clientes and self.pacote_ids, 'webhook': self.gateway_ids,
+        }
+        return [name for name in scenario_names if name in needs and not needs[name]]
+
+
+class Scenario:
+    def __init__(self, name, target, run, staff=False):
+        self.name = name
+        self.target = target
+        self.run = run
+        self.staff = staff
+
+
+def browse(session, targets, rng, options):
+    """Visitante anônimo: home, listagem e detalhe de pacote, busca e blog."""
+    session.get('/', 'site: home')
+    _, html = session.get('/pacotes/', 'site: pacotes')
+    slugs = _PACKAGE_LINK_RE.findall(html)
+    if slugs:
+        session.get(f'/pacotes/{rng.choice(slugs)}/', 'site: pacote')
+    session.get('/busca/?' + urllib.parse.urlencode({'q': rng.choice(SEARCH_TERMS)}), 'site: busca')
+    _, html = session.get('/blog/', 'site: blog')
+    slugs = _POST_LINK_RE.findall(html)
+    if slugs:
+        session.get(f'/blog/{rng.choice(slugs)}/', 'site: post')
+
+
+def venda(session, targets, rng, options):
+    """Operador abre a tela de venda e procura clientes por nome e por CPF."""
+    prefix = options['passeios_prefix']
+    session.get(f'{prefix}venda/', 'tela_venda_principal')
+    _, nome, cpf = rng.choice(targets.clientes)
+    session.get(f'{prefix}venda/buscar-cliente/?' + urllib.parse.urlencode({'q': nome.split()[0]}), 'buscar_cliente (nome)')
+    session.get(f'{prefix}venda/buscar-cliente/?' + urllib.parse.urlencode({'q': cpf}), 'buscar_cliente (cpf)')
+
+
+def checkout(session, targets, rng, options):
+    """Operador fecha uma venda: inscrição, transação local e preferência no gateway."""
+    cliente_id = rng.choice(targets.clientes)[0]
+    metodo = rng.choice(['pix', 'cartao_credito', 'cartao_debito'])
+    session.request('POST', f"{options['passeios_prefix']}venda/processar/", 'processar_pagamento_inscricao', json_body={
+        'pacote_id': rng.choice(targets.pacote_ids),
+        'cliente_id': cliente_id,
+        'metodo_pagamento': metodo,
+        'parcelas': rng.randint(1, 12) if metodo == 'cartao_credito' else 1,
+    })
+
+
+def webhook(session, targets, rng, options):
+    """Rajada de notificações do gateway, sem pausa entre elas."""
+    path = f"{options['passeios_prefix']}api/webhook/mercadopago/"
+    for _ in range(options['burst']):
+        session.request('POST', path, 'webhook_mercadopago', json_body={
+            'type': 'payment', 'action': 'payment.updated', 'data': {'id': rng.choice(targets.gateway_ids)},
+        })
+
+
+SCENARIOS = {
+    'browse': Scenario('browse', 'site', browse),
+    'venda': Scenario('venda', 'admin', venda, staff=True),
+    'checkout': Scenario('checkout', 'admin', checkout, staff=True),
+    'webhook': Scenario('webhook', 'admin', webhook),
+}
+
+
+def run(scenario_names, targets, urls, users=10, duration=60, think_time=1.0, credentials=None,
+        seed=None, **options):
+    """
+    Roda os cenários em paralelo, `users` usuários virtuais por cenário, por
+    `duration` segundos. urls = {'site': ..., 'admin': ...}. Retorna Stats.
+    """
+    if seed is None:
+        seed = random.randrange(2 ** 32)
+    options.setdefault('passeios_prefix', '/passeios/')
+    options.setdefault('burst', 20)
+    stats = Stats()
+    deadline = time.monotonic() + duration
+
+    def virtual_user(scenario, index):
+        rng = random.Random(f'{seed}-{scenario.name}-{index}')
+        session = Session(urls[scenario.target], stats, scenario.name)
+        if scenario.staff and not session.login(*credentials):
+            return
+        while time.monotonic() < deadline:
+            try:
+                scenario.run(session, targets, rng, options)
+            except Exception as exc:
+                stats.record(scenario.name, '(roteiro)', 0.0, f'{type(exc).__name__}: {exc}')
+            if think_time:
+                time.sleep(rng.uniform(0, 2 * think_time))
+
+    scenarios = [SCENARIOS[name] for name in scenario_names]
+    with ThreadPoolExecutor(max_workers=users * len(scenarios)) as pool:
+        futures = [pool.submit(virtual_user, scenario, index) for scenario in scenarios for index in range(users)]
+        for future in futures:
+            future.result()
+    stats.finish()
+    return stats
+
+
+def format_report(summary):
+    header = f"{'requisição':<38} {'req':>7} {'req/s':>8} {'erro%':>6} {'p50':>8} {'p95':>8} {'p99':>8} {'máx':>8}"
+    lines = []
+    for scenario, rows in summary.items():
+        lines += ['', f'[{scenario}]', header]
+        for name, row in sorted(rows.items(), key=lambda item: (item[0] == 'total', item[0])):
+            lines.append(
+                f"{name[:38]:<38} {row['requests']:>7} {row['rps']:>8.1f} {row['error_rate'] * 100:>6.1f} "
+                f"{row['p50_ms']:>6.0f}ms {row['p95_ms']:>6.0f}ms {row['p99_ms']:>6.0f}ms {row['max_ms']:>6.0f}ms"
+            )
+        errors = rows['total']['error_kinds']
+        if errors:
+            lines.append('  erros: ' + ', '.join(f'{kind} ({total}x)' for kind, total in errors.items()))
+    return '\n'.join(lines)
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from dashboard import benchmarks
+
+
+class Command(BaseCommand):
+    help = 'Compara um resultado de run_benchmarks com o baseline e aponta regressões'
+
+    def add_arguments(self, parser):
+        parser.add_argument('current', help='JSON gerado por run_benchmarks --output')
+        parser.add_argument(
+            '--baseline', default=str(benchmarks.BASELINE_PATH),
+            help=f'JSON de referência (padrão: {benchmarks.BASELINE_PATH.parent.name}/{benchmarks.BASELINE_PATH.name})',
+        )
+        parser.add_argument(
+            '--threshold', type=float, default=0.25,
+            help='Aumento tolerado de tempo e memória, em fração (padrão: 0.25 = 25%%)',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            baseline = benchmarks.load(options['baseline'])
+            current = benchmarks.load(options['current'])
+        except (OSError, ValueError) as exc:
+            raise CommandError(f'Não foi possível ler os resultados: {exc}')
+
+        rows = benchmarks.compare(baseline, current, options['threshold'])
+        if not rows:
+            raise CommandError('Nenhum benchmark em comum entre os dois arquivos.')
+        self.stdout.write(benchmarks.format_comparison(rows))
+
+        regressions = [row for row in rows if row['regression']]
+        if regressions:
+            raise CommandError(f'{len(regressions)} regressão(ões) acima da tolerância.')
+        self.stdout.write(self.style.SUCCESS(f'✅ Nenhuma regressão em {len(rows)} medições!'))
@@ -0,0 +1,36 @@
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from dashboard.fake_mercadopago import FakeMercadoPago
+
+
+class Command(BaseCommand):
+    help = 'Sobe um servidor local que imita a API do Mercado Pago (para testes de carga offline)'
+
+    def add_arguments(self, parser):
+        address = urlsplit(settings.MERCADO_PAGO_API_URL)
+        parser.add_argument('--host', default=address.hostname or '127.0.0.1', help='Endereço (padrão: o de MERCADOPAGO_API_URL)')
+        parser.add_argument('--port', type=int, default=address.port or 8900, help='Porta (padrão: a de MERCADOPAGO_API_URL)')
+        parser.add_argument('--latency-ms', type=float, default=0, help='Latência média simulada por chamada (padrão: 0)')
+        parser.add_argument(
+            '--approve-rate', type=float, default=0.8,
+            help='Fração dos pagamentos aprovados (padrão: 0.8)',
+        )
+        parser.add_argument('--error-rate', type=float, default=0.0, help='Fração de respostas 503 (padrão: 0)')
+
+    def handle(self, *args, **options):
+        server = FakeMercadoPago(
+            (options['host'], options['port']),
+            latency_ms=options['latency_ms'],
+            approve_rate=options['approve_rate'],
+            error_rate=options['error_rate'],
+        )
+        self.stdout.write(self.style.SUCCESS(f'✅ Mercado Pago falso ouvindo em {server.url} (Ctrl+C para sair)'))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from business.services.financial_service import FinancialService
+from passeios import margens, resumos
+from passeios.models import Passeio
+
+
+class Command(BaseCommand):
+    help = ('Recalcula os resumos financeiros dos passeios a partir das inscrições, pagamentos, cotações e gastos, '
+            'e as margens históricas dos destinos')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'passeios', nargs='*', type=int,
+            help='IDs dos passeios a recalcular (padrão: todos)',
+        )
+        parser.add_argument('--batch-size', type=int, default=500, help='Resumos por INSERT (padrão: 500)')
+
+    def handle(self, *args, **options):
+        inicio = time.monotonic()
+        ids = options['passeios'] or None
+        total = resumos.recalcular(ids, batch_size=options['batch_size'])
+        destinos = None
+        if ids:
+            destinos = set(Passeio.objects.filter(pk__in=ids).values_list('cidade_destino', 'uf_destino'))
+        total_destinos = margens.atualizar(destinos)
+        FinancialService.invalidar_dashboard()
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {total} resumo(s) financeiro(s) e margens de {total_destinos} destino(s) '
+            f'recalculados em {time.monotonic() - inicio:.1f}s!'
+        ))
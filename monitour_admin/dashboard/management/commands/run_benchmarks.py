@@ -0,0 +1,65 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from dashboard import benchmarks
+
+
+class Command(BaseCommand):
+    help = 'Roda os micro-benchmarks (dashboard financeiro, custos, relatórios, assentos e OFX) num banco de teste'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', default='1,2',
+            help='Tamanhos das massas, em escala do generate_benchmark_data (padrão: 1,2)',
+        )
+        parser.add_argument(
+            '--only', help=f"Benchmarks separados por vírgula (padrão: todos: {', '.join(benchmarks.BENCHMARKS)})",
+        )
+        parser.add_argument('--repeat', type=int, default=5, help='Execuções medidas por benchmark (padrão: 5)')
+        parser.add_argument('--seed', type=int, default=42, help='Semente da massa de dados (padrão: 42)')
+        parser.add_argument('--output', help='Grava o resultado em JSON neste arquivo')
+        parser.add_argument(
+            '--save-baseline', action='store_true',
+            help=f'Substitui o baseline do repositório ({benchmarks.BASELINE_PATH.name}) pelo resultado',
+        )
+        parser.add_argument(
+            '--compare', action='store_true',
+            help='Compara o resultado com o baseline e falha se houver regressão',
+        )
+        parser.add_argument('--threshold', type=float, default=0.25, help='Tolerância de tempo/memória (padrão: 0.25)')
+
+    def handle(self, *args, **options):
+        try:
+            sizes = sorted({int(size) for size in options['sizes'].split(',')})
+        except ValueError:
+            raise CommandError('--sizes deve ser uma lista de inteiros, ex: 1,2,4')
+        if sizes[0] < 1 or options['repeat'] < 1:
+            raise CommandError('--sizes e --repeat devem ser 1 ou mais.')
+        names = [name.strip() for name in options['only'].split(',')] if options['only'] else None
+        unknown = [name for name in names or [] if name not in benchmarks.BENCHMARKS]
+        if unknown:
+            raise CommandError(f"Benchmark(s) desconhecido(s): {', '.join(unknown)}")
+
+        # Banco de teste descartável, como no manage.py test
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            result = benchmarks.run(
+                sizes=sizes, names=names, repeat=options['repeat'], seed=options['seed'], log=self.stdout.write,
+            )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        if options['output']:
+            benchmarks.save(result, options['output'])
+        if options['save_baseline']:
+            benchmarks.save(result, benchmarks.BASELINE_PATH)
+            self.stdout.write(f'Baseline atualizado em {benchmarks.BASELINE_PATH}')
+        self.stdout.write(self.style.SUCCESS('✅ Benchmarks concluídos!'))
+
+        if options['compare']:
+            rows = benchmarks.compare(benchmarks.load(benchmarks.BASELINE_PATH), result, options['threshold'])
+            self.stdout.write(benchmarks.format_comparison(rows))
+            regressions = [row for row in rows if row['regression']]
+            if regressions:
+                raise CommandError(f'{len(regressions)} regressão(ões) acima da tolerância.')
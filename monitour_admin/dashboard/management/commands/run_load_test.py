@@ -0,0 +1,98 @@
+import json
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from dashboard import loadtest
+from dashboard.fake_mercadopago import FakeMercadoPago
+
+
+class Command(BaseCommand):
+    help = 'Teste de carga ponta a ponta: site público, tela de vendas, checkout e webhooks do Mercado Pago'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scenarios', default=','.join(loadtest.SCENARIOS),
+            help=f"Cenários separados por vírgula (padrão: {','.join(loadtest.SCENARIOS)})",
+        )
+        parser.add_argument('--users', type=int, default=10, help='Usuários virtuais por cenário (padrão: 10)')
+        parser.add_argument('--duration', type=float, default=60, help='Duração em segundos (padrão: 60)')
+        parser.add_argument(
+            '--think-time', type=float, default=1.0,
+            help='Pausa média entre roteiros de um usuário, em segundos (padrão: 1.0)',
+        )
+        parser.add_argument('--site-url', default=settings.SITE_PUBLIC_URL, help='Site público (padrão: SITE_PUBLIC_URL)')
+        parser.add_argument('--admin-url', default=settings.SITE_URL, help='Sistema interno (padrão: SITE_URL)')
+        parser.add_argument(
+            '--passeios-prefix', default='/passeios/',
+            help='Prefixo em que as URLs de passeios estão montadas (padrão: /passeios/)',
+        )
+        parser.add_argument('--username', help='Usuário da equipe (cenários venda e checkout)')
+        parser.add_argument('--password', help='Senha do usuário da equipe')
+        parser.add_argument('--burst', type=int, default=20, help='Notificações por rajada no cenário webhook (padrão: 20)')
+        parser.add_argument(
+            '--seed', type=int,
+            help='Semente dos sorteios, para repetir uma rodada (padrão: aleatória; repetir a mesma semente '
+                 'no mesmo banco reencontra vendas já pagas)',
+        )
+        parser.add_argument('--json', dest='json_path', help='Também grava o relatório em JSON neste arquivo')
+        parser.add_argument(
+            '--fake-mercadopago', action='store_true',
+            help='Sobe o Mercado Pago falso no endereço de MERCADOPAGO_API_URL durante o teste',
+        )
+
+    def handle(self, *args, **options):
+        names = [name.strip() for name in options['scenarios'].split(',') if name.strip()]
+        unknown = [name for name in names if name not in loadtest.SCENARIOS]
+        if unknown:
+            raise CommandError(f"Cenário(s) desconhecido(s): {', '.join(unknown)}")
+        if options['users'] < 1:
+            raise CommandError('--users deve ser 1 ou mais.')
+        staff = [name for name in names if loadtest.SCENARIOS[name].staff]
+        if staff and not (options['username'] and options['password']):
+            raise CommandError(f"Os cenários {', '.join(staff)} precisam de --username e --password.")
+
+        targets = loadtest.Targets()
+        missing = targets.missing(names)
+        if missing:
+            raise CommandError(
+                f"Sem dados no banco para: {', '.join(missing)} (rode generate_benchmark_data antes)."
+            )
+
+        gateway = None
+        if options['fake_mercadopago']:
+            address = urlsplit(settings.MERCADO_PAGO_API_URL)
+            gateway = FakeMercadoPago((address.hostname, address.port or 80))
+            gateway.start()
+            self.stdout.write(f'Mercado Pago falso em {gateway.url}')
+
+        self.stdout.write(
+            f"Rodando {', '.join(names)} com {options['users']} usuário(s) por cenário "
+            f"por {options['duration']:.0f}s..."
+        )
+        try:
+            stats = loadtest.run(
+                names, targets,
+                urls={'site': options['site_url'], 'admin': options['admin_url']},
+                users=options['users'],
+                duration=options['duration'],
+                think_time=options['think_time'],
+                credentials=(options['username'], options['password']),
+                seed=options['seed'],
+                passeios_prefix=options['passeios_prefix'],
+                burst=options['burst'],
+            )
+        finally:
+            if gateway:
+                gateway.shutdown()
+                gateway.server_close()
+
+        summary = stats.summary()
+        self.stdout.write(loadtest.format_report(summary))
+        if options['json_path']:
+            with open(options['json_path'], 'w', encoding='utf-8') as output:
+                json.dump({'duration': stats.elapsed, 'scenarios': summary}, output, indent=2, ensure_ascii=False)
+
+        total = sum(rows['total']['requests'] for rows in summary.values())
+        self.stdout.write(self.style.SUCCESS(f'✅ {total} requisições em {stats.elapsed:.1f}s!'))
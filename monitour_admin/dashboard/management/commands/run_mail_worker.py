@@ -0,0 +1,7 @@
+from monitour_common.mail_worker import MailWorkerCommand
+
+from dashboard.outbox import fila
+
+
+class Command(MailWorkerCommand):
+    outbox = fila
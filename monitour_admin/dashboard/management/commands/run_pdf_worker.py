@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from passeios import relatorios
+
+
+class Command(BaseCommand):
+    help = 'Gera os relatórios em PDF que estão na fila (lista de passageiros e cotações)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5, help='Relatórios por lote (padrão: 5)')
+        parser.add_argument(
+            '--interval', type=float, default=2,
+            help='Segundos de espera quando a fila está vazia (padrão: 2)',
+        )
+        parser.add_argument('--once', action='store_true', help='Esvazia a fila uma vez e termina')
+
+    def handle(self, *args, **options):
+        totals = {'gerados': 0, 'adiados': 0, 'falhas': 0, 'descartados': 0}
+
+        # Fontes e folhas de estilo carregadas antes do primeiro PDF
+        relatorios.aquecer()
+        self.stdout.write('Gerando relatórios da fila...')
+        try:
+            while True:
+                close_old_connections()
+                lote = relatorios.gerar_lote(options['batch_size'])
+                for chave, valor in zip(totals, lote):
+                    totals[chave] += valor
+                if any(lote):
+                    self.stdout.write(
+                        '  lote: {} gerado(s), {} adiado(s), {} com falha, {} descartado(s)'.format(*lote)
+                    )
+                    continue
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {totals['gerados']} relatório(s) gerado(s), {totals['adiados']} adiado(s), "
+            f"{totals['falhas']} com falha, {totals['descartados']} descartado(s)!"
+        ))
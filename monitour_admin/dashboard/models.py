@@ -5,6 +5,7 @@ Espelha e gerencia os dados do site público
 from django.db import models
 from django.contrib.auth.models import User
 from django.urls import reverse
+from django.utils import timezone
 from decimal import Decimal
 import uuid
 
@@ -228,3 +229,36 @@ class CustomerInquiry(models.Model):
 
     def __str__(self):
         return f"{self.name} - {self.subject}"
+
+
+class OutgoingEmail(models.Model):
+    """E-mail transacional na fila de envio (ver dashboard.outbox e o comando run_mail_worker)"""
+    STATUS_CHOICES = [
+        ('pending', 'Pendente'),
+        ('sent', 'Enviado'),
+        ('dead', 'Falhou definitivamente'),
+    ]
+
+    subject = models.CharField("Assunto", max_length=255)
+    body = models.TextField("Mensagem")
+    from_email = models.CharField("Remetente", max_length=255, blank=True)
+    to = models.JSONField("Destinatários", default=list)
+    reply_to = models.JSONField("Responder para", default=list, blank=True)
+    status = models.CharField("Status", max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField("Tentativas", default=0)
+    next_attempt_at = models.DateTimeField("Próxima tentativa", default=timezone.now)
+    claimed_by = models.CharField("Reservado por", max_length=32, blank=True)
+    last_error = models.TextField("Último erro", blank=True)
+    created_at = models.DateTimeField("Criado em", auto_now_add=True)
+    sent_at = models.DateTimeField("Enviado em", null=True, blank=True)
+
+    class Meta:
+        verbose_name = "E-mail na Fila"
+        verbose_name_plural = "Fila de E-mails"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='dashboard_outgoing_email_due'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.to)}"
@@ -1,3 +1,45 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.core.mail import get_connection
+from django.test import TestCase, override_settings
+
+from monitour_common.outbox import CLAIM_TIMEOUT, _message_time
+
+from . import outbox
+from .models import OutgoingEmail
+
+
+@override_settings(EMAIL_TIMEOUT=200)
+class OutboxTests(TestCase):
+    """Reserva dos lotes da fila de e-mails enquanto o worker envia."""
+
+    def setUp(self):
+        for index in range(3):
+            outbox.enqueue(f'Assunto {index}', 'Mensagem', ['equipe@example.com'])
+        self.connection = get_connection('django.core.mail.backends.locmem.EmailBackend')
+
+    def test_lote_lento_renova_a_reserva(self):
+        # Cada mensagem pode levar 2 x EMAIL_TIMEOUT, mais que CLAIM_TIMEOUT: renova antes de cada uma
+        self.assertGreater(_message_time(), CLAIM_TIMEOUT)
+        with mock.patch.object(outbox.fila, '_renew_claim', wraps=outbox.fila._renew_claim) as renew:
+            self.assertEqual(outbox.deliver_batch(self.connection, 3), (3, 0, 0))
+        self.assertEqual(renew.call_count, 3)
+        self.assertEqual(set(OutgoingEmail.objects.values_list('status', 'claimed_by')), {('sent', '')})
+
+    def test_mensagem_retomada_por_outro_worker_fica_de_fora(self):
+        emails = outbox.fila.claim_batch(3)
+        token = emails[0].claimed_by
+        OutgoingEmail.objects.filter(pk=emails[1].pk).update(claimed_by='outro')
+        deadline, kept = outbox.fila._renew_claim(token, emails)
+        self.assertEqual([email.pk for email in kept], [emails[0].pk, emails[2].pk])
+        self.assertEqual(
+            set(OutgoingEmail.objects.filter(claimed_by=token).values_list('next_attempt_at', flat=True)), {deadline},
+        )
+
+    @override_settings(EMAIL_TIMEOUT=10)
+    def test_lote_rapido_nao_renova(self):
+        self.assertLess(_message_time() * 3, CLAIM_TIMEOUT - timedelta(seconds=1))
+        with mock.patch.object(outbox.fila, '_renew_claim', wraps=outbox.fila._renew_claim) as renew:
+            self.assertEqual(outbox.deliver_batch(self.connection, 3), (3, 0, 0))
+        renew.assert_not_called()
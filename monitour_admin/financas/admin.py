@@ -0,0 +1,41 @@
+from django.contrib import admin, messages
+
+from .models import Conta, RegraCategorizacao
+from .regras import recategorizar
+
+
+def _recategorizar(modeladmin, request, queryset, todas):
+    analisadas = alteradas = 0
+    for conta in queryset:
+        resultado = recategorizar(conta, todas=todas)
+        analisadas += resultado[0]
+        alteradas += resultado[1]
+    modeladmin.message_user(
+        request, f'{alteradas} de {analisadas} transação(ões) analisada(s) foram recategorizadas.', messages.SUCCESS,
+    )
+
+
+@admin.action(description='Categorizar transações sem categoria (regras atuais)')
+def recategorizar_sem_categoria(modeladmin, request, queryset):
+    _recategorizar(modeladmin, request, queryset, todas=False)
+
+
+@admin.action(description='Recategorizar todas as transações (regras atuais)')
+def recategorizar_todas(modeladmin, request, queryset):
+    _recategorizar(modeladmin, request, queryset, todas=True)
+
+
+@admin.register(Conta)
+class ContaAdmin(admin.ModelAdmin):
+    list_display = ('nome', 'usuario', 'saldo_inicial')
+    search_fields = ('nome',)
+    actions = [recategorizar_sem_categoria, recategorizar_todas]
+
+
+@admin.register(RegraCategorizacao)
+class RegraCategorizacaoAdmin(admin.ModelAdmin):
+    list_display = ('palavra_chave', 'categoria', 'prioridade', 'usuario')
+    list_editable = ('prioridade',)
+    list_filter = ('categoria', 'usuario')
+    search_fields = ('palavra_chave',)
+    list_select_related = ('categoria', 'usuario')
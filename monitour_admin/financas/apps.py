@@ -4,4 +4,7 @@ from django.apps import AppConfig
 class FinancasConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'financas'
-    verbose_name = 'Gestão Financeira'
\ No newline at end of file
+    verbose_name = 'Gestão Financeira'
+
+    def ready(self):
+        import financas.signals  # Recompilação das regras de categorização
@@ -1,12 +1,33 @@
 from django import forms
-from .models import Conta
+from .models import Categoria, Conta
+
+
+class MultipleFileInput(forms.ClearableFileInput):
+    allow_multiple_selected = True
+
+
+class MultipleFileField(forms.FileField):
+    """FileField que aceita vários arquivos no mesmo campo (cleaned_data é uma lista)."""
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('widget', MultipleFileInput())
+        super().__init__(*args, **kwargs)
+
+    def clean(self, data, initial=None):
+        if isinstance(data, (list, tuple)):
+            return [super(MultipleFileField, self).clean(arquivo, initial) for arquivo in data]
+        return [super().clean(data, initial)]
+
 
 class ExtratoUploadForm(forms.ModelForm):
     conta = forms.ModelChoiceField(
         queryset=Conta.objects.none(), # Começa vazio, será preenchido na view
         label="Selecione a Conta"
     )
-    arquivo_ofx = forms.FileField(label="Arquivo de Extrato (.ofx)")
+    arquivo_ofx = MultipleFileField(
+        label="Arquivos de Extrato (.ofx ou .zip)",
+        help_text="Selecione um ou mais extratos OFX, ou um ZIP com vários deles.",
+    )
 
     def __init__(self, *args, **kwargs):
         # Remove o usuário do kwargs para passar para o super()
@@ -14,4 +35,23 @@ class ExtratoUploadForm(forms.ModelForm):
         super().__init__(*args, **kwargs)
         if user:
             # Filtra o queryset para mostrar apenas as contas do usuário logado
-            self.fields['conta'].queryset = Conta.objects.filter(usuario=user)
\ No newline at end of file
+            self.fields['conta'].queryset = Conta.objects.filter(usuario=user)
+
+
+class ExtratoFiltroForm(forms.Form):
+    """Filtros do livro razão (tela de transações e API), sobre as contas do usuário."""
+    conta = forms.ModelChoiceField(queryset=Conta.objects.none(), required=False, label="Conta")
+    categoria = forms.ModelChoiceField(queryset=Categoria.objects.all(), required=False, label="Categoria")
+    data_inicio = forms.DateField(required=False, label="De", widget=forms.DateInput(attrs={'type': 'date'}))
+    data_fim = forms.DateField(required=False, label="Até", widget=forms.DateInput(attrs={'type': 'date'}))
+
+    def __init__(self, *args, **kwargs):
+        user = kwargs.pop('user', None)
+        super().__init__(*args, **kwargs)
+        if user:
+            self.fields['conta'].queryset = Conta.objects.filter(usuario=user)
+
+    def contas(self):
+        """Conta escolhida ou, sem filtro, todas as contas do usuário."""
+        conta = self.cleaned_data.get('conta')
+        return [conta] if conta else self.fields['conta'].queryset
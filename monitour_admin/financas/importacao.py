@@ -0,0 +1,91 @@
+"""
+Importação de extratos bancários (OFX) para Transacao.
+
+Usada pela tela de upload (upload_extrato_view) e pelos benchmarks; recebe as
+transações já lidas pelo ofxparse (objetos com date, amount e memo). Os
+hashes já gravados no intervalo de datas do extrato vêm em uma consulta, as
+regras de categorização vêm compiladas de financas.regras e as transações
+novas entram com bulk_create em lotes.
+"""
+from django.conf import settings
+from django.db import transaction
+
+from .models import Categoria, Transacao, calcular_hash_transacao
+from .ofx import ler_arquivos
+from .razao import invalidar_saldos
+from .regras import categorizador
+
+
+def aplicar_regras_categorizacao(descricao, usuario):
+    """Aplica as regras de categorização para encontrar a categoria correta."""
+    categoria_id = categorizador(usuario).categoria_id(descricao)
+    return Categoria.objects.get(pk=categoria_id) if categoria_id else None
+
+
+def _contar_gravadas(hashes, batch_size):
+    """Quantos desses hashes já estão no banco (em lotes, pelo limite de parâmetros do SQLite)."""
+    return sum(
+        Transacao.objects.filter(hash_transacao__in=hashes[inicio:inicio + batch_size]).count()
+        for inicio in range(0, len(hashes), batch_size)
+    )
+
+
+def importar_transacoes(conta, transacoes_ofx, usuario, batch_size=1000):
+    """Grava na conta as transações do extrato ainda não importadas. Retorna (importadas, ignoradas)."""
+    transacoes_ofx = list(transacoes_ofx)
+    if not transacoes_ofx:
+        return 0, 0
+
+    # 1. Deduplicação: o hash inclui a data, então basta o intervalo do extrato
+    datas = [transacao_ofx.date.date() for transacao_ofx in transacoes_ofx]
+    vistos = set(
+        Transacao.objects.filter(data__range=(min(datas), max(datas))).values_list('hash_transacao', flat=True)
+    )
+
+    # 2. Categorização com as regras compiladas do usuário (em cache até mudarem)
+    regras = categorizador(usuario)
+
+    novas = []
+    for data, transacao_ofx in zip(datas, transacoes_ofx):
+        hash_id = calcular_hash_transacao(data, transacao_ofx.amount, transacao_ofx.memo)
+        if hash_id in vistos:
+            continue  # Já importada (ou repetida no próprio extrato)
+        vistos.add(hash_id)
+        novas.append(Transacao(
+            conta=conta,
+            data=data,
+            descricao=transacao_ofx.memo,
+            valor=transacao_ofx.amount,
+            categoria_id=regras.categoria_id(transacao_ofx.memo),
+            hash_transacao=hash_id,  # bulk_create não chama save()
+        ))
+
+    # 3. Persistência em lotes; um hash gravado por outra importação depois da
+    # consulta acima é ignorado em vez de derrubar o lote inteiro, e por isso as
+    # importadas são contadas no banco (antes e depois) e não por len(novas)
+    hashes = [nova.hash_transacao for nova in novas]
+    importadas = 0
+    with transaction.atomic():
+        if novas:
+            antes = _contar_gravadas(hashes, batch_size)
+            Transacao.objects.bulk_create(novas, batch_size=batch_size, ignore_conflicts=True)
+            importadas = _contar_gravadas(hashes, batch_size) - antes
+        if importadas:
+            # bulk_create não dispara os sinais que descartam os saldos da conta em cache
+            invalidar_saldos(conta.pk)
+    return importadas, len(transacoes_ofx) - importadas
+
+
+def importar_extratos(conta, arquivos, usuario):
+    """
+    Importa vários extratos [(nome, bytes)], OFX ou ZIP com OFX, lendo os
+    arquivos em paralelo (OFX_IMPORT_WORKERS). Retorna uma lista de
+    {'arquivo', 'importadas', 'ignoradas', 'erro'} por arquivo OFX.
+    """
+    resultados = []
+    for nome, transacoes_ofx, erro in ler_arquivos(arquivos, workers=settings.OFX_IMPORT_WORKERS):
+        importadas = ignoradas = 0
+        if erro is None:
+            importadas, ignoradas = importar_transacoes(conta, transacoes_ofx, usuario)
+        resultados.append({'arquivo': nome, 'importadas': importadas, 'ignoradas': ignoradas, 'erro': erro})
+    return resultados
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('financas', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='regracategorizacao',
+            options={'ordering': ['-prioridade', 'pk'], 'verbose_name': 'Regra de Categorização', 'verbose_name_plural': 'Regras de Categorização'},
+        ),
+        migrations.AddField(
+            model_name='regracategorizacao',
+            name='prioridade',
+            field=models.PositiveSmallIntegerField(default=0, help_text='Regras de prioridade maior vencem quando mais de uma palavra-chave aparece na descrição'),
+        ),
+        migrations.AlterField(
+            model_name='regracategorizacao',
+            name='palavra_chave',
+            field=models.CharField(help_text="Termo a ser buscado na descrição da transação, sem diferenciar maiúsculas nem acentos (Ex: 'Uber')", max_length=100),
+        ),
+    ]
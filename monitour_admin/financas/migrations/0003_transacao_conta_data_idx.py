@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('financas', '0002_regracategorizacao_prioridade'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transacao',
+            index=models.Index(fields=['conta', 'data', 'id'], name='transacao_conta_data_idx'),
+        ),
+    ]
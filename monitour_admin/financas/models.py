@@ -2,6 +2,12 @@ from django.db import models
 from django.contrib.auth import get_user_model
 import hashlib
 
+
+def calcular_hash_transacao(data, valor, descricao):
+    """Hash de deduplicação da transação (data, valor e descrição)."""
+    unique_string = f"{data.strftime('%Y-%m-%d')}-{valor}-{descricao}"
+    return hashlib.sha256(unique_string.encode()).hexdigest()
+
 class Categoria(models.Model):
     """Categorias para classificar transações (Ex: Alimentação, Transporte)."""
     nome = models.CharField(max_length=100, unique=True)
@@ -41,8 +47,7 @@ class Transacao(models.Model):
 
     def save(self, *args, **kwargs):
         # Gera o hash único para a transação antes de salvar
-        unique_string = f"{self.data.strftime('%Y-%m-%d')}-{self.valor}-{self.descricao}"
-        self.hash_transacao = hashlib.sha256(unique_string.encode()).hexdigest()
+        self.hash_transacao = calcular_hash_transacao(self.data, self.valor, self.descricao)
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -52,11 +57,20 @@ class Transacao(models.Model):
         verbose_name = "Transação"
         verbose_name_plural = "Transações"
         ordering = ['-data']
+        indexes = [
+            # Livro razão: páginas por conta em (data, id) e saldos por janela (financas.razao)
+            models.Index(fields=['conta', 'data', 'id'], name='transacao_conta_data_idx'),
+        ]
 
 class RegraCategorizacao(models.Model):
-    """Regras para categorizar transações automaticamente."""
-    palavra_chave = models.CharField(max_length=100, help_text="Termo a ser buscado na descrição da transação (Ex: 'Uber')")
+    """
+    Regras para categorizar transações automaticamente (ver financas.regras).
+    Quando várias palavras-chave aparecem na descrição, vale a regra de maior
+    prioridade; no empate, a palavra-chave mais longa; depois, a mais antiga.
+    """
+    palavra_chave = models.CharField(max_length=100, help_text="Termo a ser buscado na descrição da transação, sem diferenciar maiúsculas nem acentos (Ex: 'Uber')")
     categoria = models.ForeignKey(Categoria, on_delete=models.CASCADE)
+    prioridade = models.PositiveSmallIntegerField(default=0, help_text="Regras de prioridade maior vencem quando mais de uma palavra-chave aparece na descrição")
     usuario = models.ForeignKey(get_user_model(), on_delete=models.CASCADE, related_name='regras_categorizacao')
 
     def __str__(self):
@@ -64,4 +78,5 @@ class RegraCategorizacao(models.Model):
 
     class Meta:
         verbose_name = "Regra de Categorização"
-        verbose_name_plural = "Regras de Categorização"
\ No newline at end of file
+        verbose_name_plural = "Regras de Categorização"
+        ordering = ['-prioridade', 'pk']
\ No newline at end of file
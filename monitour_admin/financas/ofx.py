@@ -0,0 +1,109 @@
+"""
+Leitura de extratos OFX, soltos ou dentro de arquivos ZIP.
+
+Sem dependência do Django: ler_extrato roda também nos processos do pool de
+ler_arquivos, que recebem só os bytes do arquivo e devolvem tuplas simples.
+"""
+import io
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from types import SimpleNamespace
+
+from ofxparse import OfxParser
+
+
+def ler_extrato(conteudo):
+    """Lançamentos do extrato OFX como tuplas (data, valor, memo)."""
+    ofx = OfxParser.parse(io.BytesIO(conteudo))
+    return [(transacao.date, transacao.amount, transacao.memo) for transacao in ofx.account.statement.transactions]
+
+
+def _ler(conteudo):
+    try:
+        return ler_extrato(conteudo), None
+    except Exception as e:
+        return None, str(e)
+
+
+# Limites de cada ZIP enviado (proteção contra "zip bombs"): arquivos dentro
+# dele e tamanho descompactado de cada OFX; e total descompactado do envio
+MAX_MEMBROS_ZIP = 500
+MAX_TAMANHO_OFX = 20 * 1024 * 1024
+MAX_TOTAL_ENVIO = 100 * 1024 * 1024
+
+
+class EnvioGrandeDemais(Exception):
+    """Os arquivos do envio, descompactados, passam do limite: o envio inteiro é recusado."""
+
+    def __init__(self, max_total):
+        super().__init__(f'o envio tem mais de {max_total} bytes descompactados')
+
+
+def _membros_ofx(pacote, max_membros, max_tamanho, disponivel, max_total):
+    membros = pacote.infolist()
+    if len(membros) > max_membros:
+        raise ValueError(f'o ZIP tem {len(membros)} arquivos (máximo {max_membros})')
+    lidos = []
+    for membro in membros:
+        if membro.is_dir() or not membro.filename.lower().endswith('.ofx'):
+            continue
+        # O zipfile nunca descompacta mais que o tamanho declarado (file_size)
+        if membro.file_size > max_tamanho:
+            raise ValueError(f'{membro.filename} tem mais de {max_tamanho} bytes descompactado')
+        disponivel -= membro.file_size
+        if disponivel < 0:
+            raise EnvioGrandeDemais(max_total)
+        lidos.append((membro.filename, pacote.read(membro)))
+    return lidos
+
+
+def expandir_zips(arquivos, max_membros=MAX_MEMBROS_ZIP, max_tamanho=MAX_TAMANHO_OFX, max_total=MAX_TOTAL_ENVIO):
+    """
+    Troca cada ZIP de [(nome, bytes)] pelos arquivos .ofx de dentro dele.
+    Retorna [(nome, bytes ou None, erro ou None)]: um ZIP inválido ou acima
+    dos limites vira uma única entrada com o erro. Se o envio inteiro passar de
+    max_total bytes (já descompactados) levanta EnvioGrandeDemais, antes de
+    descompactar o membro que estouraria o limite.
+    """
+    expandidos = []
+    disponivel = max_total
+    for nome, conteudo in arquivos:
+        if not zipfile.is_zipfile(io.BytesIO(conteudo)):
+            disponivel -= len(conteudo)
+            if disponivel < 0:
+                raise EnvioGrandeDemais(max_total)
+            expandidos.append((nome, conteudo, None))
+            continue
+        try:
+            with zipfile.ZipFile(io.BytesIO(conteudo)) as pacote:
+                membros = _membros_ofx(pacote, max_membros, max_tamanho, disponivel, max_total)
+        except (ValueError, zipfile.BadZipFile, NotImplementedError) as e:
+            expandidos.append((nome, None, str(e)))
+            continue
+        disponivel -= sum(len(dados) for _, dados in membros)
+        expandidos.extend((f'{nome}/{membro}', dados, None) for membro, dados in membros)
+    return expandidos
+
+
+def ler_arquivos(arquivos, workers=1):
+    """
+    Lê os extratos [(nome, bytes)], abrindo ZIPs, em até `workers` processos.
+    Retorna [(nome, lançamentos ou None, erro ou None)] na ordem dos arquivos;
+    um envio grande demais levanta EnvioGrandeDemais.
+    """
+    arquivos = expandir_zips(arquivos)
+    validos = [conteudo for _, conteudo, erro in arquivos if erro is None]
+    if workers > 1 and len(validos) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(validos))) as pool:
+            lidos = iter(pool.map(_ler, validos))
+    else:
+        lidos = (_ler(conteudo) for conteudo in validos)
+    resultados = []
+    for nome, _, erro in arquivos:
+        lancamentos = None
+        if erro is None:
+            lancamentos, erro = next(lidos)
+        if lancamentos is not None:
+            lancamentos = [SimpleNamespace(date=d, amount=a, memo=m) for d, a, m in lancamentos]
+        resultados.append((nome, lancamentos, erro))
+    return resultados
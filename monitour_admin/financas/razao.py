@@ -0,0 +1,142 @@
+"""
+Livro razão das contas bancárias: transações com saldo corrente, paginadas.
+
+As páginas andam por keyset sobre (-data, -id), com o índice (conta, data,
+id): a página N custa o mesmo que a primeira, sem OFFSET nem COUNT(*).
+
+O saldo de cada linha é calculado no banco por uma função de janela
+(SUM(valor) OVER (ORDER BY data, id)) só sobre o trecho da conta coberto pela
+página, somada ao saldo inicial da conta e ao movimento anterior ao trecho.
+O movimento anterior sai dos saldos mensais da conta, guardados em cache
+(saldos_mensais), mais a soma do mês corrente até a primeira linha. Assim os
+filtros por categoria e período não mudam o saldo mostrado, que é sempre o
+da conta depois daquela transação.
+
+Os saldos mensais são descartados a cada transação gravada ou excluída
+(financas.signals) e a cada importação de extrato.
+"""
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import DecimalField, F, Q, Sum, Value, Window
+from django.db.models.expressions import RowRange
+from django.db.models.functions import TruncMonth
+
+from .models import Transacao
+
+CENTAVOS = Decimal('0.01')
+SALDO_FIELD = DecimalField(max_digits=14, decimal_places=2)
+
+
+def _saldos_key(conta_id):
+    return f'financas:saldos:{conta_id}'
+
+
+def invalidar_saldos(conta_id):
+    """Descarta os saldos mensais da conta em cache (agora e de novo após o commit)."""
+    def descartar():
+        cache.delete(_saldos_key(conta_id))
+
+    descartar()
+    transaction.on_commit(descartar)
+
+
+def saldos_mensais(conta_id):
+    """[(primeiro dia do mês, movimento acumulado até o fim do mês)] da conta, sem o saldo inicial."""
+    saldos = cache.get(_saldos_key(conta_id))
+    if saldos is None:
+        meses = Transacao.objects.filter(conta_id=conta_id).annotate(mes=TruncMonth('data')).order_by(
+            'mes'
+        ).values('mes').annotate(total=Sum('valor'))
+        saldos, acumulado = [], Decimal('0.00')
+        for linha in meses:
+            # Somas de decimais no SQLite voltam com resíduo de ponto flutuante
+            acumulado += linha['total'].quantize(CENTAVOS)
+            saldos.append((linha['mes'], acumulado))
+        cache.set(_saldos_key(conta_id), saldos, None)
+    return saldos
+
+
+def saldo_atual(conta):
+    """Saldo inicial da conta mais todo o movimento importado."""
+    saldos = saldos_mensais(conta.pk)
+    return conta.saldo_inicial + (saldos[-1][1] if saldos else 0)
+
+
+def movimento_anterior(conta_id, data, pk):
+    """Soma das transações da conta antes de (data, pk), sem o saldo inicial."""
+    mes = data.replace(day=1)
+    saldos = saldos_mensais(conta_id)
+    indice = bisect_left(saldos, (mes,))
+    anterior = saldos[indice - 1][1] if indice else Decimal('0.00')
+    no_mes = Transacao.objects.filter(conta_id=conta_id, data__gte=mes).filter(
+        Q(data__lt=data) | Q(data=data, pk__lt=pk)
+    ).aggregate(total=Sum('valor'))['total'] or 0
+    return anterior + Decimal(no_mes).quantize(CENTAVOS)
+
+
+def codificar_cursor(transacao):
+    return f'{transacao.data.isoformat()}.{transacao.pk}'
+
+
+def decodificar_cursor(cursor):
+    """(data, pk) do cursor; ValueError se for inválido."""
+    data, _, pk = cursor.partition('.')
+    return date.fromisoformat(data), int(pk)
+
+
+def pagina(contas, categoria=None, data_inicio=None, data_fim=None, cursor=None, tamanho=50):
+    """
+    Transações das contas, da mais recente para a mais antiga, a partir do
+    cursor. Cada transação ganha o atributo `saldo` (saldo da conta depois
+    dela). Retorna (transações, cursor da próxima página ou None).
+    """
+    transacoes = Transacao.objects.filter(conta__in=contas).select_related('conta', 'categoria').order_by('-data', '-id')
+    if categoria is not None:
+        transacoes = transacoes.filter(categoria=categoria)
+    if data_inicio is not None:
+        transacoes = transacoes.filter(data__gte=data_inicio)
+    if data_fim is not None:
+        transacoes = transacoes.filter(data__lte=data_fim)
+    if cursor:
+        data, pk = decodificar_cursor(cursor)
+        transacoes = transacoes.filter(Q(data__lt=data) | Q(data=data, pk__lt=pk))
+
+    linhas = list(transacoes[:tamanho + 1])
+    proximo = None
+    if len(linhas) > tamanho:
+        linhas = linhas[:tamanho]
+        proximo = codificar_cursor(linhas[-1])
+    anotar_saldos(linhas)
+    return linhas, proximo
+
+
+def anotar_saldos(transacoes):
+    """Preenche `saldo` nas transações, com uma janela por conta sobre o trecho que elas cobrem."""
+    por_conta = defaultdict(list)
+    for transacao in transacoes:
+        por_conta[transacao.conta_id].append(transacao)
+
+    saldos = {}
+    for conta_id, linhas in por_conta.items():
+        primeira = min(linhas, key=lambda t: (t.data, t.pk))
+        ultima = max(linhas, key=lambda t: (t.data, t.pk))
+        anterior = movimento_anterior(conta_id, primeira.data, primeira.pk)
+        trecho = Transacao.objects.filter(conta_id=conta_id, data__range=(primeira.data, ultima.data)).exclude(
+            data=primeira.data, pk__lt=primeira.pk
+        ).exclude(data=ultima.data, pk__gt=ultima.pk)
+        saldos.update(trecho.annotate(
+            saldo=F('conta__saldo_inicial') + Value(anterior, output_field=SALDO_FIELD) + Window(
+                Sum('valor'),
+                order_by=[F('data').asc(), F('id').asc()],
+                frame=RowRange(start=None, end=0),
+                output_field=SALDO_FIELD,
+            ),
+        ).values_list('pk', 'saldo'))
+
+    for transacao in transacoes:
+        transacao.saldo = Decimal(saldos[transacao.pk]).quantize(CENTAVOS)
@@ -0,0 +1,164 @@
+"""
+Motor das regras de categorização (RegraCategorizacao).
+
+As palavras-chave de um usuário são compiladas num autômato de Aho-Corasick:
+uma passada pela descrição acha todas as palavras que aparecem nela, sem
+diferenciar maiúsculas nem acentos, não importa quantas regras existam.
+
+Quando mais de uma regra casa, vence:
+    1. a de maior prioridade;
+    2. no empate, a de palavra-chave mais longa (a mais específica);
+    3. no empate, a mais antiga (menor pk).
+
+O autômato fica guardado por processo e usuário, junto com o carimbo de
+versão das regras do usuário no cache compartilhado; salvar ou excluir uma
+regra troca o carimbo (financas.signals) e o próximo uso recompila.
+update() e bulk_create não disparam sinais: depois deles, chame
+invalidar_regras().
+"""
+import unicodedata
+import uuid
+from collections import deque
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import RegraCategorizacao, Transacao
+
+# Categorizadores compilados neste processo: {usuario_id: (versão das regras, Categorizador)}
+_compilados = {}
+
+
+def normalizar(texto):
+    """Texto sem acentos e em minúsculas (casefold), para comparar palavras-chave."""
+    decomposto = unicodedata.normalize('NFKD', texto)
+    return ''.join(c for c in decomposto if not unicodedata.combining(c)).casefold()
+
+
+class Automato:
+    """Autômato de Aho-Corasick sobre palavras já normalizadas."""
+
+    def __init__(self, palavras):
+        """palavras: [(palavra, valor)]; buscar() devolve os valores das que aparecem no texto."""
+        self.transicoes = [{}]
+        self.falhas = [0]
+        self.saidas = [[]]
+        for palavra, valor in palavras:
+            estado = 0
+            for caractere in palavra:
+                proximo = self.transicoes[estado].get(caractere)
+                if proximo is None:
+                    proximo = len(self.transicoes)
+                    self.transicoes.append({})
+                    self.falhas.append(0)
+                    self.saidas.append([])
+                    self.transicoes[estado][caractere] = proximo
+                estado = proximo
+            self.saidas[estado].append(valor)
+
+        # Links de falha em largura: o maior sufixo do estado que também é prefixo de alguma palavra
+        fila = deque(self.transicoes[0].values())
+        while fila:
+            estado = fila.popleft()
+            for caractere, proximo in self.transicoes[estado].items():
+                fila.append(proximo)
+                falha = self.falhas[estado]
+                while falha and caractere not in self.transicoes[falha]:
+                    falha = self.falhas[falha]
+                self.falhas[proximo] = self.transicoes[falha].get(caractere, 0)
+                self.saidas[proximo] = self.saidas[proximo] + self.saidas[self.falhas[proximo]]
+
+    def buscar(self, texto):
+        """Valores de todas as ocorrências de palavras no texto (com repetições)."""
+        estado = 0
+        for caractere in texto:
+            while estado and caractere not in self.transicoes[estado]:
+                estado = self.falhas[estado]
+            estado = self.transicoes[estado].get(caractere, 0)
+            yield from self.saidas[estado]
+
+
+class Categorizador:
+    """Regras de categorização de um usuário compiladas para buscar a categoria de descrições."""
+
+    def __init__(self, regras):
+        """regras: [(palavra_chave, categoria_id, prioridade, pk)]."""
+        palavras = []
+        for palavra, categoria_id, prioridade, pk in regras:
+            palavra = normalizar(palavra)
+            if palavra:
+                # Maior chave de ordenação vence (ver o docstring do módulo)
+                palavras.append((palavra, ((prioridade, len(palavra), -pk), categoria_id)))
+        self.total_regras = len(palavras)
+        self.automato = Automato(palavras)
+
+    def categoria_id(self, descricao):
+        """Categoria da regra vencedora para a descrição, ou None se nenhuma casar."""
+        if not self.total_regras or not descricao:
+            return None
+        melhor = max(self.automato.buscar(normalizar(descricao)), default=None)
+        return melhor[1] if melhor else None
+
+
+def _versao_key(usuario_id):
+    return f'financas:regras:versao:{usuario_id}'
+
+
+def invalidar_regras(usuario_id):
+    """Troca o carimbo das regras do usuário: todos os processos recompilam no próximo uso."""
+    def trocar():
+        cache.set(_versao_key(usuario_id), uuid.uuid4().hex, None)
+
+    # Já na transação, que pode ler as regras novas, e de novo após o commit, para
+    # descartar o que outro processo compilar nesse meio tempo com as regras antigas
+    trocar()
+    transaction.on_commit(trocar)
+
+
+def categorizador(usuario):
+    """Categorizador com as regras atuais do usuário (ou id), compilado só quando elas mudam."""
+    usuario_id = getattr(usuario, 'pk', usuario)
+    versao = cache.get_or_set(_versao_key(usuario_id), uuid.uuid4().hex, None)
+    guardado = _compilados.get(usuario_id)
+    if guardado is not None and guardado[0] == versao:
+        return guardado[1]
+
+    regras = RegraCategorizacao.objects.filter(usuario_id=usuario_id).values_list(
+        'palavra_chave', 'categoria_id', 'prioridade', 'pk'
+    )
+    compilado = Categorizador(regras)
+    _compilados[usuario_id] = (versao, compilado)
+    return compilado
+
+
+def recategorizar(conta, todas=False, chunk_size=2000):
+    """
+    Aplica as regras do dono da conta às transações dela: só às sem categoria
+    ou, com todas=True, a todas. Transações em que nenhuma regra casa ficam
+    como estão. Lê e grava em lotes de chunk_size, pela pk.
+    Retorna (analisadas, alteradas).
+    """
+    regras = categorizador(conta.usuario_id)
+    transacoes = Transacao.objects.filter(conta=conta).only('pk', 'descricao', 'categoria_id').order_by('pk')
+    if not todas:
+        transacoes = transacoes.filter(categoria__isnull=True)
+
+    analisadas = alteradas = 0
+    ultimo_pk = 0
+    while True:
+        lote = list(transacoes.filter(pk__gt=ultimo_pk)[:chunk_size])
+        if not lote:
+            break
+        ultimo_pk = lote[-1].pk
+        analisadas += len(lote)
+
+        mudaram = []
+        for transacao in lote:
+            categoria_id = regras.categoria_id(transacao.descricao)
+            if categoria_id is not None and categoria_id != transacao.categoria_id:
+                transacao.categoria_id = categoria_id
+                mudaram.append(transacao)
+        if mudaram:
+            Transacao.objects.bulk_update(mudaram, ['categoria'], batch_size=chunk_size)
+            alteradas += len(mudaram)
+    return analisadas, alteradas
@@ -0,0 +1,36 @@
+from django.db.models.signals import post_save, post_delete, pre_save
+from django.dispatch import receiver
+
+from .models import RegraCategorizacao, Transacao
+from .razao import invalidar_saldos
+from .regras import invalidar_regras
+
+
+@receiver(pre_save, sender=RegraCategorizacao)
+def guardar_usuario_anterior(sender, instance, raw=False, **kwargs):
+    if not raw and not instance._state.adding:
+        instance._usuario_anterior = RegraCategorizacao.objects.filter(pk=instance.pk).values_list(
+            'usuario_id', flat=True
+        ).first()
+
+
+@receiver([post_save, post_delete], sender=RegraCategorizacao)
+def invalidar_regras_do_usuario(sender, instance, **kwargs):
+    """Regra criada, alterada ou excluída: o categorizador do usuário é recompilado no próximo uso."""
+    usuarios = {instance.usuario_id, instance.__dict__.pop('_usuario_anterior', None)} - {None}
+    for usuario_id in usuarios:
+        invalidar_regras(usuario_id)
+
+
+@receiver(pre_save, sender=Transacao)
+def guardar_conta_anterior(sender, instance, raw=False, **kwargs):
+    if not raw and not instance._state.adding:
+        instance._conta_anterior = Transacao.objects.filter(pk=instance.pk).values_list('conta_id', flat=True).first()
+
+
+@receiver([post_save, post_delete], sender=Transacao)
+def invalidar_saldos_da_conta(sender, instance, **kwargs):
+    """Transação gravada ou excluída muda os saldos mensais da conta (financas.razao)."""
+    contas = {instance.conta_id, instance.__dict__.pop('_conta_anterior', None)} - {None}
+    for conta_id in contas:
+        invalidar_saldos(conta_id)
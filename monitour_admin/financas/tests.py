@@ -0,0 +1,512 @@
+import io
+import random
+import zipfile
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Count, Model, Sum
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+
+from business.models import DespesaDiariaCategoria, ResumoDiario
+from business.services import resumo_diario
+from business.services.financial_service import DASHBOARD_GERACAO_KEY, FinancialService
+from cadastros.models import Cliente, Fornecedor
+from passeios.admin import InscricaoAdmin, confirmar_inscricoes, marcar_como_pago
+from passeios.models import Cotacao, GastoPasseio, Inscricao, Pacote, Pagamento, PagamentoFornecedor, Passeio
+
+from . import ofx, razao, regras, views
+from .importacao import importar_extratos, importar_transacoes
+from .models import Categoria, Conta, RegraCategorizacao, Transacao, calcular_hash_transacao
+
+
+class AutomatoTests(TestCase):
+    """Aho-Corasick acha todas as palavras, inclusive sobrepostas e uma dentro da outra."""
+
+    def test_encontra_palavras_sobrepostas(self):
+        automato = regras.Automato([(palavra, palavra) for palavra in ('he', 'she', 'his', 'hers')])
+        self.assertEqual(sorted(automato.buscar('ushers')), ['he', 'hers', 'she'])
+        self.assertEqual(list(automato.buscar('xyz')), [])
+
+    def test_normaliza_acentos_e_maiusculas(self):
+        self.assertEqual(regras.normalizar('PADARIA São JOÃO'), 'padaria sao joao')
+
+
+class CategorizadorTests(TestCase):
+    """Prioridade, depois palavra-chave mais longa, depois regra mais antiga."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = get_user_model().objects.create_user('financeiro')
+        cls.combustivel, cls.conveniencia, cls.transporte, cls.alimentacao = (
+            Categoria.objects.create(nome=nome) for nome in ('Combustível', 'Conveniência', 'Transporte', 'Alimentação')
+        )
+
+    def regra(self, palavra, categoria, prioridade=0):
+        return RegraCategorizacao.objects.create(
+            palavra_chave=palavra, categoria=categoria, prioridade=prioridade, usuario=self.usuario,
+        )
+
+    def categoria(self, descricao):
+        return regras.categorizador(self.usuario).categoria_id(descricao)
+
+    def test_palavra_mais_longa_vence_no_empate_de_prioridade(self):
+        self.regra('shell', self.conveniencia)
+        self.regra('posto shell', self.combustivel)
+        self.assertEqual(self.categoria('COMPRA POSTO SHELL 123'), self.combustivel.pk)
+        self.assertEqual(self.categoria('SHELL SELECT'), self.conveniencia.pk)
+
+    def test_prioridade_vence_palavra_mais_longa(self):
+        self.regra('posto shell', self.combustivel)
+        self.regra('shell', self.conveniencia, prioridade=5)
+        self.assertEqual(self.categoria('COMPRA POSTO SHELL 123'), self.conveniencia.pk)
+
+    def test_regra_mais_antiga_vence_no_empate_total(self):
+        self.regra('uber', self.transporte)
+        self.regra('eats', self.alimentacao)
+        self.assertEqual(self.categoria('UBER EATS PEDIDO'), self.transporte.pk)
+
+    def test_ignora_acentos_e_maiusculas(self):
+        self.regra('padaria são joão', self.alimentacao)
+        self.assertEqual(self.categoria('PADARIA SAO JOAO LTDA'), self.alimentacao.pk)
+        self.assertIsNone(self.categoria('PADARIA SANTA RITA'))
+
+    def test_recompila_quando_as_regras_mudam(self):
+        regra = self.regra('uber', self.transporte)
+        self.assertEqual(self.categoria('UBER TRIP'), self.transporte.pk)
+        with self.assertNumQueries(0):
+            regras.categorizador(self.usuario)
+
+        regra.categoria = self.alimentacao
+        regra.save()
+        self.assertEqual(self.categoria('UBER TRIP'), self.alimentacao.pk)
+        regra.delete()
+        self.assertIsNone(self.categoria('UBER TRIP'))
+
+
+class RecategorizarTests(TestCase):
+    """Recategorização em lotes das transações de uma conta."""
+
+    @classmethod
+    def setUpTestData(cls):
+        usuario = get_user_model().objects.create_user('financeiro')
+        cls.conta = Conta.objects.create(nome='Conta Corrente', usuario=usuario)
+        cls.transporte = Categoria.objects.create(nome='Transporte')
+        cls.manual = Categoria.objects.create(nome='Manual')
+        RegraCategorizacao.objects.create(palavra_chave='uber', categoria=cls.transporte, usuario=usuario)
+        for indice in range(25):
+            Transacao.objects.create(
+                conta=cls.conta, data=date(2026, 1, 1), valor=Decimal(-indice - 1),
+                descricao='UBER TRIP' if indice % 2 else 'PIX RECEBIDO',
+                categoria=cls.manual if indice % 5 == 0 else None,
+            )
+
+    def test_so_sem_categoria(self):
+        self.assertEqual(regras.recategorizar(self.conta, chunk_size=4), (20, 10))
+        self.assertEqual(Transacao.objects.filter(categoria=self.transporte).count(), 10)
+        self.assertEqual(Transacao.objects.filter(categoria=self.manual).count(), 5)
+
+    def test_todas(self):
+        self.assertEqual(regras.recategorizar(self.conta, todas=True, chunk_size=4), (25, 12))
+        # Sem regra que case, a categoria manual fica
+        self.assertEqual(Transacao.objects.filter(categoria=self.manual).count(), 3)
+
+
+class LivroRazaoTests(TestCase):
+    """Saldo corrente por janela, páginas por cursor e saldos mensais em cache."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = get_user_model().objects.create_user('financeiro')
+        cls.conta = Conta.objects.create(nome='Conta Corrente', usuario=cls.usuario, saldo_inicial=Decimal('1000.00'))
+        cls.outra = Conta.objects.create(nome='Poupança', usuario=cls.usuario, saldo_inicial=Decimal('50.00'))
+        cls.tarifas = Categoria.objects.create(nome='Tarifas')
+        for indice in range(30):
+            # Três meses, com várias transações no mesmo dia
+            Transacao.objects.create(
+                conta=cls.conta if indice % 4 else cls.outra, data=date(2026, 1, 1) + timedelta(days=indice * 3 // 2),
+                descricao=f'Lançamento {indice}', valor=Decimal(indice * 10 + 1) * (-1 if indice % 3 else 1),
+                categoria=cls.tarifas if indice % 5 == 0 else None,
+            )
+
+    def setUp(self):
+        # O cache sobrevive ao rollback de cada teste
+        for conta in (self.conta, self.outra):
+            razao.invalidar_saldos(conta.pk)
+
+    def esperado(self):
+        """Saldo depois de cada transação, calculado em Python."""
+        saldos = {}
+        for conta in (self.conta, self.outra):
+            saldo = conta.saldo_inicial
+            for transacao in Transacao.objects.filter(conta=conta).order_by('data', 'pk'):
+                saldo += transacao.valor
+                saldos[transacao.pk] = saldo
+        return saldos
+
+    def percorrer(self, **filtros):
+        linhas, cursor = [], None
+        while True:
+            pagina, cursor = razao.pagina([self.conta, self.outra], cursor=cursor, tamanho=4, **filtros)
+            linhas.extend(pagina)
+            if cursor is None:
+                return linhas
+
+    def test_saldo_corrente_em_todas_as_paginas(self):
+        linhas = self.percorrer()
+        self.assertEqual(len(linhas), 30)
+        self.assertEqual([(t.data, t.pk) for t in linhas], sorted(((t.data, t.pk) for t in linhas), reverse=True))
+        esperado = self.esperado()
+        self.assertEqual({t.pk: t.saldo for t in linhas}, esperado)
+
+    def test_filtros_nao_mudam_o_saldo_da_conta(self):
+        esperado = self.esperado()
+        for filtros in ({'categoria': self.tarifas}, {'data_inicio': date(2026, 1, 20), 'data_fim': date(2026, 2, 10)}):
+            with self.subTest(filtros=filtros):
+                linhas = self.percorrer(**filtros)
+                self.assertTrue(linhas)
+                self.assertEqual({t.pk: t.saldo for t in linhas}, {t.pk: esperado[t.pk] for t in linhas})
+
+    def test_saldo_atual_em_cache_ate_a_conta_mudar(self):
+        esperado = self.conta.saldo_inicial + sum(Transacao.objects.filter(conta=self.conta).values_list('valor', flat=True))
+        self.assertEqual(razao.saldo_atual(self.conta), esperado)
+        with self.assertNumQueries(0):
+            razao.saldo_atual(self.conta)
+
+        Transacao.objects.create(conta=self.conta, data=date(2026, 4, 1), descricao='Depósito', valor=Decimal('5.00'))
+        self.assertEqual(razao.saldo_atual(self.conta), esperado + 5)
+
+
+class DashboardFinanceiroTests(TestCase):
+    """Resultados por passeio numa consulta, payload em cache e invalidação a cada escrita."""
+
+    @classmethod
+    def setUpTestData(cls):
+        partida = timezone.now() - timedelta(days=5)
+        transporte = Fornecedor.objects.create(nome_fantasia='Viação', tipo='transporte')
+        clientes = [Cliente.objects.create(nome=f'Cliente {index}', cpf=str(index).zfill(11)) for index in range(3)]
+        cls.passeios = []
+        # Receita de 3 x 400 = 1200 em cada passeio; lucros de 1100, 700, 300 e -100
+        for custo in (100, 500, 900, 1300):
+            passeio = Passeio.objects.create(
+                titulo=f'Passeio {custo}', status='confirmado', data_ida=partida, data_volta=partida + timedelta(days=1),
+                fornecedor_transporte=transporte,
+            )
+            pacote = Pacote.objects.create(passeio=passeio, titulo='Completo', preco=Decimal('400.00'))
+            for cliente in clientes:
+                Inscricao.objects.create(pacote=pacote, cliente=cliente)
+            GastoPasseio.objects.create(passeio=passeio, descricao='Custos', tipo_gasto='outro', valor=Decimal(custo))
+            cls.passeios.append(passeio)
+        cls.staff = get_user_model().objects.create_user('gerente', is_staff=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_resultados_por_passeio_numa_consulta(self):
+        # Uma consulta procura resumos faltando e outra traz os resultados, qualquer que seja o limite
+        for limite in (None, 2):
+            with self.subTest(limite=limite), self.assertNumQueries(2):
+                resultados = FinancialService.get_resultados_por_passeio(limite=limite)
+        todos = FinancialService.get_resultados_por_passeio()
+        self.assertEqual([r['lucro'] for r in todos], [Decimal('1100.00'), Decimal('700.00'), Decimal('300.00'), Decimal('-100.00')])
+        self.assertEqual([r['status'] for r in todos], ['lucro', 'lucro', 'lucro', 'prejuizo'])
+        self.assertEqual(todos[0]['receita'], Decimal('1200.00'))
+        self.assertEqual([r['passeio'] for r in resultados], self.passeios[:2])
+
+    def test_payload_em_cache(self):
+        dados = FinancialService.get_dashboard(periodo_dias=30)
+        with self.assertNumQueries(0):
+            self.assertEqual(FinancialService.get_dashboard(periodo_dias=30)['lucro'], dados['lucro'])
+        # Cada período tem a sua entrada
+        with mock.patch.object(FinancialService, 'get_dashboard_completo', return_value={}) as completo:
+            FinancialService.get_dashboard(periodo_dias=7)
+            FinancialService.get_dashboard(periodo_dias=30)
+        completo.assert_called_once_with(periodo_dias=7)
+
+    def test_payload_sem_instancias_de_modelos(self):
+        # O payload vai em pickle para o cache: instâncias quebrariam após uma migração
+        Inscricao.objects.update(status_inscricao='confirmada')
+        dados = FinancialService.get_dashboard(periodo_dias=30)
+
+        def valores(item):
+            if isinstance(item, dict):
+                for valor in item.values():
+                    yield from valores(valor)
+            elif isinstance(item, (list, tuple)):
+                for valor in item:
+                    yield from valores(valor)
+            else:
+                yield item
+
+        self.assertFalse([valor for valor in valores(dados) if isinstance(valor, Model)])
+        conta = dados['contas_receber']['lista'][0]
+        self.assertEqual(set(conta), {'cliente', 'passeio', 'saldo'})
+        self.assertEqual(dados['resultados_passeios'][0]['passeio'], FinancialService.get_resultados_por_passeio()[0]['passeio'].titulo)
+
+    def test_escrita_invalida_o_payload(self):
+        antes = FinancialService.get_dashboard(periodo_dias=30)['receitas']
+        with self.captureOnCommitCallbacks(execute=True):
+            Pagamento.objects.create(inscricao=Inscricao.objects.first(), valor=Decimal('150.00'))
+        depois = FinancialService.get_dashboard(periodo_dias=30)['receitas']
+        self.assertEqual(depois['receita_confirmada'], antes['receita_confirmada'] + Decimal('150.00'))
+
+    def test_acoes_do_admin_invalidam_o_payload(self):
+        request = RequestFactory().post('/')
+        modeladmin = InscricaoAdmin(Inscricao, admin.site)
+        for acao in (confirmar_inscricoes, marcar_como_pago):
+            with self.subTest(acao=acao.__name__):
+                geracao = cache.get_or_set(DASHBOARD_GERACAO_KEY, 'inicial', None)
+                with mock.patch.object(modeladmin, 'message_user'), self.captureOnCommitCallbacks(execute=True):
+                    acao(modeladmin, request, Inscricao.objects.all())
+                self.assertNotEqual(cache.get(DASHBOARD_GERACAO_KEY), geracao)
+
+    def test_periodo_fora_dos_oferecidos_usa_o_padrao(self):
+        for periodo, esperado in (('7', 7), ('abc', 30), ('9999', 30), ('-1', 30)):
+            request = RequestFactory().get('/', {'periodo': periodo})
+            request.user = self.staff
+            with self.subTest(periodo=periodo), mock.patch.object(
+                FinancialService, 'get_dashboard', side_effect=FinancialService.get_dashboard,
+            ) as get_dashboard:
+                self.assertEqual(views.dashboard_financeiro_view(request).status_code, 200)
+            get_dashboard.assert_called_once_with(periodo_dias=esperado)
+
+
+class ResumoDiarioTests(TestCase):
+    """Os resumos mantidos pelos sinais batem com recalcular() e com as somas por __date que substituíram."""
+
+    @classmethod
+    def setUpTestData(cls):
+        partida = timezone.now() + timedelta(days=30)
+        transporte = Fornecedor.objects.create(nome_fantasia='Viação', tipo='transporte')
+        cls.fornecedores = [transporte, Fornecedor.objects.create(nome_fantasia='Hotel', tipo='hospedagem')]
+        cls.passeio = Passeio.objects.create(
+            titulo='Serra', data_ida=partida, data_volta=partida + timedelta(days=2), fornecedor_transporte=transporte,
+        )
+        cls.clientes = [Cliente.objects.create(nome=f'Cliente {index}', cpf=str(index).zfill(11)) for index in range(8)]
+
+    def quando(self):
+        dia = date(2026, 3, 1) + timedelta(days=self.rng.randint(0, 9))
+        return timezone.make_aware(datetime.combine(dia, time(self.rng.choice([0, 12, 23]), 30)))
+
+    def valor(self):
+        return Decimal(self.rng.randint(100, 90000)) / 100
+
+    def criar(self):
+        rng = self.rng
+        tipo = rng.choice(['pacote', 'inscricao', 'pagamento', 'cotacao', 'pagamento_fornecedor', 'gasto'])
+        if tipo == 'pacote' or not self.pacotes:
+            self.pacotes.append(Pacote.objects.create(passeio=self.passeio, titulo='Pacote', preco=self.valor()))
+        elif tipo == 'inscricao':
+            pacote = rng.choice(self.pacotes)
+            livres = [cliente for cliente in self.clientes if not Inscricao.objects.filter(pacote=pacote, cliente=cliente).exists()]
+            if livres:
+                self.linhas.append(Inscricao.objects.create(pacote=pacote, cliente=rng.choice(livres)))
+        elif tipo == 'pagamento' and Inscricao.objects.exists():
+            self.linhas.append(Pagamento.objects.create(inscricao=rng.choice(list(Inscricao.objects.all())), valor=self.valor()))
+        elif tipo == 'cotacao':
+            self.linhas.append(Cotacao.objects.create(
+                passeio=self.passeio, fornecedor=rng.choice(self.fornecedores),
+                tipo_servico=rng.choice(Cotacao.TIPO_SERVICO_COTADO)[0], status=rng.choice(Cotacao.STATUS_COTACAO)[0],
+                valor_cotado=self.valor(), data_vencimento_pagamento=rng.choice([None, self.quando().date()]),
+            ))
+        elif tipo == 'pagamento_fornecedor' and Cotacao.objects.exists():
+            self.linhas.append(PagamentoFornecedor.objects.create(cotacao=rng.choice(list(Cotacao.objects.all())), valor=self.valor()))
+        elif tipo == 'gasto':
+            self.linhas.append(GastoPasseio.objects.create(
+                passeio=self.passeio, descricao='Gasto', tipo_gasto=rng.choice(GastoPasseio.TIPO_GASTO_CHOICES)[0], valor=self.valor(),
+            ))
+
+    def alterar(self):
+        rng = self.rng
+        if rng.random() < 0.15:
+            pacote = rng.choice(self.pacotes)
+            pacote.preco = self.valor()
+            pacote.save()
+            return
+        linha = rng.choice(self.linhas)
+        linha.refresh_from_db()
+        campo = rng.choice(['valor', 'status', 'data'])
+        if campo == 'valor' and not isinstance(linha, Inscricao):
+            setattr(linha, 'valor_cotado' if isinstance(linha, Cotacao) else 'valor', self.valor())
+        elif campo == 'status' and isinstance(linha, Cotacao):
+            linha.status = rng.choice(Cotacao.STATUS_COTACAO)[0]
+        elif campo == 'status' and isinstance(linha, Inscricao):
+            linha.status_inscricao = rng.choice(Inscricao.STATUS_INSCRICAO)[0]
+        elif isinstance(linha, Cotacao) and rng.random() < 0.5:
+            linha.data_vencimento_pagamento = rng.choice([None, self.quando().date()])
+        else:
+            campo = {Inscricao: 'data_inscricao', Cotacao: 'data_cotacao', GastoPasseio: 'data_gasto'}.get(type(linha), 'data_pagamento')
+            setattr(linha, campo, self.quando())
+        linha.save()
+
+    def excluir(self):
+        self.linhas.pop(self.rng.randrange(len(self.linhas))).delete()
+        # Pagamentos excluídos junto com a inscrição ou a cotação
+        self.linhas = [linha for linha in self.linhas if type(linha).objects.filter(pk=linha.pk).exists()]
+
+    def resumos(self):
+        """Linhas dos resumos, sem as que ficaram zeradas depois das exclusões."""
+        campos = ['receita_prevista', 'inscricoes', 'receita_confirmada', 'despesa_cotacoes', 'cotacoes', 'pagamentos_fornecedores', 'gastos_internos']
+        dias = {
+            linha['data']: tuple(linha[campo] for campo in campos)
+            for linha in ResumoDiario.objects.values('data', *campos)
+            if any(linha[campo] for campo in campos)
+        }
+        categorias = {
+            (linha.data, linha.origem, linha.categoria): linha.valor
+            for linha in DespesaDiariaCategoria.objects.all() if linha.valor
+        }
+        return dias, categorias
+
+    def somas_por_data(self, dia):
+        """Totais do dia como eram calculados antes dos resumos, com filtros __date."""
+        inscricoes = Inscricao.objects.filter(data_inscricao__date=dia).aggregate(total=Sum('pacote__preco'), quantidade=Count('id'))
+        aceitas = Cotacao.objects.filter(status='aceita')
+        cotacoes = (
+            aceitas.filter(data_vencimento_pagamento=dia) | aceitas.filter(data_cotacao__date=dia, data_vencimento_pagamento__isnull=True)
+        ).aggregate(total=Sum('valor_cotado'), quantidade=Count('id'))
+        zero = Decimal('0.00')
+        dias = (
+            inscricoes['total'] or zero,
+            inscricoes['quantidade'],
+            Pagamento.objects.filter(data_pagamento__date=dia).aggregate(total=Sum('valor'))['total'] or zero,
+            cotacoes['total'] or zero,
+            cotacoes['quantidade'],
+            PagamentoFornecedor.objects.filter(data_pagamento__date=dia).aggregate(total=Sum('valor'))['total'] or zero,
+            GastoPasseio.objects.filter(data_gasto__date=dia).aggregate(total=Sum('valor'))['total'] or zero,
+        )
+        categorias = {
+            (dia, 'gasto', linha['tipo_gasto']): linha['total']
+            for linha in GastoPasseio.objects.filter(data_gasto__date=dia).order_by().values('tipo_gasto').annotate(total=Sum('valor'))
+        }
+        categorias.update({
+            (dia, 'cotacao', linha['tipo_servico']): linha['total']
+            for linha in aceitas.filter(data_cotacao__date=dia).order_by().values('tipo_servico').annotate(total=Sum('valor_cotado'))
+        })
+        return dias, categorias
+
+    def test_sinais_conferem_com_recalcular_e_com_as_somas_por_data(self):
+        self.rng = random.Random(20)
+        self.pacotes, self.linhas = [], []
+        for passo in range(300):
+            operacao = self.rng.random()
+            if passo < 40 or operacao < 0.45 or not self.linhas:
+                self.criar()
+            elif operacao < 0.85:
+                self.alterar()
+            else:
+                self.excluir()
+
+        dias, categorias = self.resumos()
+        self.assertTrue(dias and categorias)
+
+        # Dias sorteados em quando() e hoje, dia do cadastro das linhas que mantiveram a data
+        esperados_dias, esperadas_categorias = {}, {}
+        for dia in [date(2026, 3, 1) + timedelta(days=n) for n in range(-1, 11)] + [timezone.localdate()]:
+            totais, por_categoria = self.somas_por_data(dia)
+            if any(totais):
+                esperados_dias[dia] = totais
+            esperadas_categorias.update({chave: valor for chave, valor in por_categoria.items() if valor})
+        self.assertEqual(dias, esperados_dias)
+        self.assertEqual(categorias, esperadas_categorias)
+
+        resumo_diario.recalcular()
+        self.assertEqual(self.resumos(), (dias, categorias))
+
+
+def extrato_ofx(*lancamentos):
+    """OFX mínimo (SGML) com os lançamentos (data AAAAMMDD, valor, memo)."""
+    transacoes = ''.join(
+        f'<STMTTRN><TRNTYPE>OTHER<DTPOSTED>{data}<TRNAMT>{valor}<FITID>{indice}<MEMO>{memo}</STMTTRN>'
+        for indice, (data, valor, memo) in enumerate(lancamentos)
+    )
+    return (
+        'OFXHEADER:100\nDATA:OFXSGML\nVERSION:102\nSECURITY:NONE\nENCODING:USASCII\nCHARSET:1252\n'
+        'COMPRESSION:NONE\nOLDFILEUID:NONE\nNEWFILEUID:NONE\n\n'
+        '<OFX><BANKMSGSRSV1><STMTTRNRS><TRNUID>1<STATUS><CODE>0<SEVERITY>INFO</STATUS><STMTRS><CURDEF>BRL'
+        '<BANKACCTFROM><BANKID>1<ACCTID>123<ACCTTYPE>CHECKING</BANKACCTFROM>'
+        f'<BANKTRANLIST><DTSTART>20260101<DTEND>20260131{transacoes}</BANKTRANLIST>'
+        '<LEDGERBAL><BALAMT>0<DTASOF>20260131</LEDGERBAL></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>'
+    ).encode('cp1252')
+
+
+def zip_de(**arquivos):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as pacote:
+        for nome, conteudo in arquivos.items():
+            pacote.writestr(nome, conteudo)
+    return buffer.getvalue()
+
+
+@override_settings(OFX_IMPORT_WORKERS=1)
+class ImportacaoExtratosTests(TestCase):
+    """Leitura de OFX e ZIPs (com limites), deduplicação e gravação das transações."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = get_user_model().objects.create_user('financeiro')
+        cls.conta = Conta.objects.create(nome='Conta Corrente', usuario=cls.usuario)
+        cls.mercado = Categoria.objects.create(nome='Mercado')
+        RegraCategorizacao.objects.create(usuario=cls.usuario, palavra_chave='padaria', categoria=cls.mercado)
+        cls.janeiro = extrato_ofx(('20260105', '-10.50', 'Padaria'), ('20260106', '200.00', 'Pix recebido'))
+        cls.fevereiro = extrato_ofx(('20260203', '-80.00', 'Farmácia'))
+
+    def test_importa_ofx_e_zip(self):
+        arquivos = [
+            ('janeiro.ofx', self.janeiro),
+            ('extratos.zip', zip_de(**{'fevereiro.OFX': self.fevereiro, 'leia-me.txt': b'nada', 'copia/janeiro.ofx': self.janeiro})),
+        ]
+        resultados = importar_extratos(self.conta, arquivos, self.usuario)
+        self.assertEqual(
+            [(r['arquivo'], r['importadas'], r['ignoradas'], r['erro']) for r in resultados],
+            [
+                ('janeiro.ofx', 2, 0, None),
+                ('extratos.zip/fevereiro.OFX', 1, 0, None),
+                ('extratos.zip/copia/janeiro.ofx', 0, 2, None),
+            ],
+        )
+        self.assertEqual(Transacao.objects.get(descricao='Padaria').categoria, self.mercado)
+        self.assertEqual(Transacao.objects.get(descricao='Farmácia').valor, Decimal('-80.00'))
+
+    def test_arquivo_invalido_nao_impede_os_outros(self):
+        resultados = importar_extratos(self.conta, [('ruim.ofx', b'isto nao e ofx'), ('janeiro.ofx', self.janeiro)], self.usuario)
+        self.assertIsNotNone(resultados[0]['erro'])
+        self.assertEqual(resultados[1]['importadas'], 2)
+
+    def test_limites_do_zip(self):
+        bomba = zip_de(**{'grande.ofx': b'0' * 5000})
+        self.assertLess(len(bomba), 200)
+        muitos = zip_de(**{f'{indice}.ofx': self.janeiro for indice in range(4)})
+        resultado = ofx.expandir_zips([('bomba.zip', bomba), ('muitos.zip', muitos)], max_membros=3, max_tamanho=1000)
+        self.assertEqual([(nome, conteudo) for nome, conteudo, _ in resultado], [('bomba.zip', None), ('muitos.zip', None)])
+        self.assertIn('1000 bytes', resultado[0][2])
+        self.assertIn('4 arquivos', resultado[1][2])
+
+    def test_limite_total_do_envio(self):
+        # Cada ZIP respeita o limite por arquivo, mas juntos passam do total do envio
+        arquivos = [(f'{indice}.zip', zip_de(**{'extrato.ofx': b'0' * 800})) for indice in range(3)]
+        self.assertEqual(len(ofx.expandir_zips(arquivos, max_tamanho=1000, max_total=2400)), 3)
+        with self.assertRaisesMessage(ofx.EnvioGrandeDemais, '2000 bytes'):
+            ofx.expandir_zips(arquivos, max_tamanho=1000, max_total=2000)
+
+    def test_hash_gravado_por_outra_importacao_e_ignorado(self):
+        lancamentos = ofx.ler_arquivos([('janeiro.ofx', self.janeiro)])[0][1]
+        categorizador = regras.categorizador
+
+        def concorrente(usuario):
+            # Outra importação grava o mesmo lançamento depois da consulta dos hashes
+            Transacao.objects.create(conta=self.conta, data=date(2026, 1, 5), descricao='Padaria', valor=Decimal('-10.50'))
+            return categorizador(usuario)
+
+        with mock.patch('financas.importacao.categorizador', side_effect=concorrente):
+            resultado = importar_transacoes(self.conta, lancamentos, self.usuario)
+        self.assertEqual(Transacao.objects.count(), 2)
+        # Só a transação realmente gravada conta como importada
+        self.assertEqual(resultado, (1, 1))
+        self.assertEqual(
+            Transacao.objects.filter(hash_transacao=calcular_hash_transacao(date(2026, 1, 5), Decimal('-10.50'), 'Padaria')).count(), 1,
+        )
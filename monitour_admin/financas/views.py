@@ -1,13 +1,17 @@
 from django.shortcuts import render, redirect
 from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib import messages
-from .forms import ExtratoUploadForm
-from .models import Transacao, RegraCategorizacao, Conta
-from django.db.models import Sum, Count
-from ofxparse import OfxParser
-import hashlib
+from .forms import ExtratoFiltroForm, ExtratoUploadForm
+from .models import Conta
+from .importacao import importar_extratos
+from . import razao
+from decimal import Decimal
 import json
-from core.services.financial_service import FinancialService
+from business.services.financial_service import FinancialService
+
+# Períodos (em dias) oferecidos no dashboard financeiro; outro valor vira o padrão
+PERIODOS_DISPONIVEIS = [7, 15, 30, 60, 90, 180, 365]
+PERIODO_PADRAO = 30
 
 @staff_member_required
 def dashboard_financeiro_view(request):
@@ -15,23 +19,21 @@ def dashboard_financeiro_view(request):
     Dashboard financeiro COMPLETO com visão consolidada de toda a saúde financeira do negócio.
     Mostra receitas, despesas, lucros, contas a pagar/receber, e análise por passeio.
     """
-    # Obtém período de análise (padrão: 30 dias)
-    periodo_dias = int(request.GET.get('periodo', 30))
+    # Obtém período de análise (padrão: 30 dias); só os períodos oferecidos entram na chave do cache
+    try:
+        periodo_dias = int(request.GET.get('periodo', PERIODO_PADRAO))
+    except ValueError:
+        periodo_dias = PERIODO_PADRAO
+    if periodo_dias not in PERIODOS_DISPONIVEIS:
+        periodo_dias = PERIODO_PADRAO
     
-    # Busca todos os dados financeiros consolidados via serviço
-    dados_financeiros = FinancialService.get_dashboard_completo(periodo_dias=periodo_dias)
+    # Busca todos os dados financeiros consolidados via serviço (em cache por período)
+    dados_financeiros = FinancialService.get_dashboard(periodo_dias=periodo_dias)
     
-    # Dados do módulo de contas bancárias (se houver)
-    saldo_contas_bancarias = 0.00
-    try:
-        contas = Conta.objects.filter(usuario=request.user)
-        if contas.exists():
-            saldo_contas_bancarias = contas.aggregate(
-                total=Sum('transacoes__valor')
-            )['total'] or 0.00
-    except Exception as e:
-        # Se houver erro ao acessar contas, apenas ignora
-        pass
+    # Saldo das contas bancárias do usuário, a partir dos saldos mensais em cache
+    saldo_contas_bancarias = sum(
+        (razao.saldo_atual(conta) for conta in Conta.objects.filter(usuario=request.user)), Decimal('0.00')
+    )
     
     # Prepara dados para gráficos
     # Gráfico 1: Receitas vs Despesas
@@ -46,7 +48,7 @@ def dashboard_financeiro_view(request):
     
     # Gráfico 2: Resultado por Passeio (Top 5)
     chart_resultado_passeios = {
-        'labels': [r['passeio'].titulo[:30] for r in dados_financeiros['resultados_passeios']],
+        'labels': [r['passeio'][:30] for r in dados_financeiros['resultados_passeios']],
         'data': [float(r['lucro']) for r in dados_financeiros['resultados_passeios']],
         'colors': ['#28a745' if r['status'] == 'lucro' else '#dc3545' for r in dados_financeiros['resultados_passeios']]
     }
@@ -57,99 +59,63 @@ def dashboard_financeiro_view(request):
         'data': [0]
     }
     
-    # Tenta buscar dados de despesas por tipo, mas não quebra se falhar
-    try:
-        from passeios.models import GastoPasseio, Cotacao
-        gastos_por_tipo = {}
-        for gasto in GastoPasseio.objects.filter(
-            data_gasto__date__gte=dados_financeiros['periodo']['data_inicio']
-        ):
-            tipo = gasto.get_tipo_gasto_display()
-            gastos_por_tipo[tipo] = gastos_por_tipo.get(tipo, 0) + float(gasto.valor)
-        
-        for cotacao in Cotacao.objects.filter(
-            status='aceita',
-            data_cotacao__date__gte=dados_financeiros['periodo']['data_inicio']
-        ):
-            tipo = cotacao.get_tipo_servico_display()
-            gastos_por_tipo[tipo] = gastos_por_tipo.get(tipo, 0) + float(cotacao.valor_cotado)
-        
-        if gastos_por_tipo:
-            chart_composicao_despesas = {
-                'labels': list(gastos_por_tipo.keys()),
-                'data': list(gastos_por_tipo.values())
-            }
-    except Exception as e:
-        # Se houver erro, mantém os dados vazios
-        pass
+    # Despesas por categoria, já agrupadas no payload do dashboard
+    gastos_por_tipo = dados_financeiros['composicao_despesas']
+    if gastos_por_tipo:
+        chart_composicao_despesas = {
+            'labels': list(gastos_por_tipo.keys()),
+            'data': list(gastos_por_tipo.values())
+        }
+    
+    # Gráfico 4: Últimos 12 meses contra os mesmos meses do ano anterior
+    comparativo = dados_financeiros['comparativo_mensal']
+    chart_comparativo_mensal = {
+        'labels': [c['mes'].strftime('%m/%Y') for c in comparativo],
+        'receita': [float(c['receita']) for c in comparativo],
+        'despesa': [float(c['despesa']) for c in comparativo],
+        'receita_ano_anterior': [float(c['receita_ano_anterior']) for c in comparativo],
+        'despesa_ano_anterior': [float(c['despesa_ano_anterior']) for c in comparativo],
+    }
     
     context = {
         'dados': dados_financeiros,
         'saldo_contas_bancarias': saldo_contas_bancarias,
         'periodo_selecionado': periodo_dias,
-        'periodos_disponiveis': [7, 15, 30, 60, 90, 180, 365],
+        'periodos_disponiveis': PERIODOS_DISPONIVEIS,
         # Dados para gráficos (em JSON)
         'chart_receitas_despesas_json': json.dumps(chart_receitas_despesas),
         'chart_resultado_passeios_json': json.dumps(chart_resultado_passeios),
         'chart_composicao_despesas_json': json.dumps(chart_composicao_despesas),
+        'chart_comparativo_mensal_json': json.dumps(chart_comparativo_mensal),
     }
     return render(request, 'financas/dashboard_financeiro.html', context)
 
-def _aplicar_regras_categorizacao(descricao, usuario):
-    """Aplica as regras de categorização para encontrar a categoria correta."""
-    regras = RegraCategorizacao.objects.filter(usuario=usuario)
-    for regra in regras:
-        if regra.palavra_chave.lower() in descricao.lower():
-            return regra.categoria
-    return None
-
 @staff_member_required
 def upload_extrato_view(request):
-    transacoes_importadas = 0
-    transacoes_ignoradas = 0
-
     if request.method == 'POST':
         form = ExtratoUploadForm(request.POST, request.FILES, user=request.user)
         if form.is_valid():
             conta_selecionada = form.cleaned_data['conta']
-            arquivo_ofx = request.FILES['arquivo_ofx']
 
+            # Lê os arquivos em memória; os OFX são interpretados em paralelo
+            arquivos = [(arquivo.name, arquivo.read()) for arquivo in form.cleaned_data['arquivo_ofx']]
             try:
-                # Lê o arquivo em memória
-                ofx_content = arquivo_ofx.read()
-                ofx = OfxParser.parse(ofx_content)
-
-                for transacao_ofx in ofx.account.statement.transactions:
-                    # 1. Lógica de Deduplicação
-                    unique_string = f"{transacao_ofx.date.strftime('%Y-%m-%d')}-{transacao_ofx.amount}-{transacao_ofx.memo}"
-                    hash_id = hashlib.sha256(unique_string.encode()).hexdigest()
-
-                    if Transacao.objects.filter(hash_transacao=hash_id).exists():
-                        transacoes_ignoradas += 1
-                        continue # Pula para a próxima transação
-
-                    # 2. Lógica de Categorização Inteligente
-                    categoria_sugerida = _aplicar_regras_categorizacao(transacao_ofx.memo, request.user)
-
-                    # 3. Persistência no Banco de Dados
-                    Transacao.objects.create(
-                        conta=conta_selecionada,
-                        data=transacao_ofx.date.date(),
-                        descricao=transacao_ofx.memo,
-                        valor=transacao_ofx.amount,
-                        categoria=categoria_sugerida,
-                        # O hash será gerado automaticamente pelo método save() do modelo
-                    )
-                    transacoes_importadas += 1
-
-                messages.success(request, f"{transacoes_importadas} transações importadas com sucesso!")
-                if transacoes_ignoradas > 0:
-                    messages.info(request, f"{transacoes_ignoradas} transações duplicadas foram ignoradas.")
-                
-                return redirect('financas:lista_transacoes')
-
+                resultados = importar_extratos(conta_selecionada, arquivos, request.user)
             except Exception as e:
-                messages.error(request, f"Erro ao processar o arquivo: {e}")
+                messages.error(request, f"Erro ao processar os arquivos: {e}")
+            else:
+                for resultado in resultados:
+                    if resultado['erro']:
+                        messages.error(request, f"{resultado['arquivo']}: erro ao processar o arquivo: {resultado['erro']}")
+                        continue
+                    mensagem = f"{resultado['arquivo']}: {resultado['importadas']} transações importadas com sucesso!"
+                    if resultado['ignoradas'] > 0:
+                        mensagem += f" {resultado['ignoradas']} transações duplicadas foram ignoradas."
+                    messages.success(request, mensagem)
+                if not resultados:
+                    messages.error(request, "Nenhum arquivo OFX encontrado no envio.")
+                elif any(not resultado['erro'] for resultado in resultados):
+                    return redirect('financas:lista_transacoes')
 
     else:
         form = ExtratoUploadForm(user=request.user)
@@ -162,9 +128,36 @@ def upload_extrato_view(request):
 
 @staff_member_required
 def lista_transacoes_view(request):
-    transacoes = Transacao.objects.select_related('conta', 'categoria').all()
+    """Livro razão das contas do usuário: filtros, saldo corrente e páginas por cursor."""
+    form = ExtratoFiltroForm(request.GET, user=request.user)
+    transacoes, proximo = [], None
+    if form.is_valid():
+        try:
+            transacoes, proximo = razao.pagina(
+                form.contas(),
+                categoria=form.cleaned_data['categoria'],
+                data_inicio=form.cleaned_data['data_inicio'],
+                data_fim=form.cleaned_data['data_fim'],
+                cursor=request.GET.get('cursor'),
+            )
+        except ValueError:
+            messages.error(request, "Página inválida: voltando para as transações mais recentes.")
+            return redirect('financas:lista_transacoes')
+
+    parametros = request.GET.copy()
+    parametros.pop('cursor', None)
+    proxima_url = None
+    if proximo:
+        parametros['cursor'] = proximo
+        proxima_url = f"?{parametros.urlencode()}"
+        parametros.pop('cursor')
+
     context = {
+        'form': form,
         'transacoes': transacoes,
+        'proxima_url': proxima_url,
+        'primeira_url': f"?{parametros.urlencode()}",
+        'pagina_inicial': not request.GET.get('cursor'),
         'title': 'Transações Importadas'
     }
-    return render(request, 'financas/lista_transacoes.html', context)
\ No newline at end of file
+    return render(request, 'financas/lista_transacoes.html', context)
@@ -6,7 +6,9 @@ import sys
 
 def main():
     """Run administrative tasks."""
-    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'admin_system.settings')
+    # Os testes rodam com as configurações de admin_system.settings_test
+    settings = 'admin_system.settings_test' if sys.argv[1:2] == ['test'] else 'admin_system.settings'
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings)
     try:
         from django.core.management import execute_from_command_line
     except ImportError as exc:
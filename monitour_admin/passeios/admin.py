@@ -1,10 +1,14 @@
 from django.contrib import admin
 from django.db import models
-from .models import Passeio, Pacote, Inscricao, Pagamento, VeiculoPasseio, Cotacao, GastoPasseio, PagamentoFornecedor, ItemPacote, PaymentGatewayTransaction
+from django.db.models import Count
+from .models import Passeio, Pacote, Inscricao, Pagamento, VeiculoPasseio, Cotacao, GastoPasseio, PagamentoFornecedor, ItemPacote, PaymentGatewayTransaction, RelatorioPDF
+from . import relatorios
 from django.contrib import messages
 from django.urls import reverse
 from django.utils.html import format_html
 from django.utils.safestring import mark_safe
+from monitour_common.query_budget import QueryBudget
+from business.services.financial_service import FinancialService
 
 class PacoteInline(admin.TabularInline):
     model = Pacote
@@ -36,10 +40,11 @@ class GastoPasseioInline(admin.TabularInline):
 
 @admin.register(Passeio)
 class PasseioAdmin(admin.ModelAdmin):
-    list_display = ('titulo', 'get_destino_formatado', 'data_ida', 'status', 'ver_inscricoes_link', 'mapa_de_assentos_link', 'gerar_relatorio_link', 'resumo_financeiro_link', 'relatorio_cotacoes_link')
+    list_display = ('titulo', 'get_destino_formatado', 'data_ida', 'status', 'get_custo_total', 'ver_inscricoes_link', 'mapa_de_assentos_link', 'gerar_relatorio_link', 'resumo_financeiro_link', 'relatorio_cotacoes_link')
     list_filter = ('status', 'cidade_destino', 'data_ida') # Corrigido para usar o campo que existe
     search_fields = ('titulo', 'cidade_destino', 'cidade_origem')
     autocomplete_fields = ['tipo_veiculo', 'fornecedor_transporte', 'fornecedor_hospedagem']
+    query_budget = QueryBudget(queries=10)
 
     # Organiza os campos em seções mais limpas e lógicas
     fieldsets = (
@@ -62,6 +67,13 @@ class PasseioAdmin(admin.ModelAdmin):
         }),
     )
 
+    def get_queryset(self, request):
+        # Total de inscrições, custo e veículos carregados junto com a lista (evita N+1 por linha)
+        queryset = super().get_queryset(request).with_custo_total()
+        return queryset.annotate(
+            total_inscricoes=Count('pacotes__inscricoes', distinct=True),
+        ).prefetch_related('veiculos')
+
     def get_inlines(self, request, obj=None):
         # Mostra a seção de Pacotes apenas se o Passeio já existir
         return [PacoteInline, VeiculoPasseioInline, CotacaoInline, GastoPasseioInline] if obj else []
@@ -77,6 +89,10 @@ class PasseioAdmin(admin.ModelAdmin):
         return format_html('<br>'.join(links))
     mapa_de_assentos_link.short_description = "Mapas de Assentos"
 
+    @admin.display(description="Custo Previsto", ordering='_custo_total_previsto')
+    def get_custo_total(self, obj):
+        return f"R$ {obj.custo_total_previsto:.2f}"
+
     def gerar_relatorio_link(self, obj):
         url = reverse('passeios:relatorio_passageiros', args=[obj.pk])
         return format_html('<a class="button" href="{}">Gerar Relatório</a>', url)
@@ -88,8 +104,8 @@ class PasseioAdmin(admin.ModelAdmin):
     resumo_financeiro_link.short_description = "Resumo Financeiro"
 
     def ver_inscricoes_link(self, obj):
-        # Conta o número de inscrições para este passeio
-        count = Inscricao.objects.filter(pacote__passeio=obj).count()
+        # Número de inscrições anotado em get_queryset
+        count = obj.total_inscricoes
         # Gera a URL para a lista de inscrições, já filtrada por este passeio
         url = reverse('admin:passeios_inscricao_changelist') + f'?pacote__passeio__id__exact={obj.pk}'
         return format_html('<a href="{}">{} Inscrições</a>', url, count)
@@ -108,12 +124,16 @@ class PasseioAdmin(admin.ModelAdmin):
 def confirmar_inscricoes(modeladmin, request, queryset):
     """Ação para mudar o status de inscrições para 'confirmada'."""
     updated_count = queryset.update(status_inscricao='confirmada')
+    # update() não dispara os sinais que invalidam o dashboard financeiro
+    FinancialService.invalidar_dashboard()
     modeladmin.message_user(request, f'{updated_count} inscrições foram confirmadas.', messages.SUCCESS)
 
 @admin.action(description='Marcar como Pago Integralmente')
 def marcar_como_pago(modeladmin, request, queryset):
     """Ação para mudar o status de pagamento para 'pago'."""
     updated_count = queryset.update(status_pagamento='pago')
+    # update() não dispara os sinais que invalidam o dashboard financeiro
+    FinancialService.invalidar_dashboard()
     modeladmin.message_user(request, f'{updated_count} inscrições foram marcadas como pagas.', messages.SUCCESS)
 
 @admin.register(Inscricao)
@@ -352,4 +372,23 @@ class PaymentGatewayTransactionAdmin(admin.ModelAdmin):
     
     def has_delete_permission(self, request, obj=None):
         # Não permitir deletar, apenas para auditoria
-        return False
\ No newline at end of file
+        return False
+
+
+# ========== RELATÓRIOS EM PDF ==========
+@admin.register(RelatorioPDF)
+class RelatorioPDFAdmin(admin.ModelAdmin):
+    list_display = ('passeio', 'tipo', 'status', 'tentativas', 'criado_em', 'concluido_em')
+    list_filter = ('status', 'tipo', 'criado_em')
+    search_fields = ('passeio__titulo',)
+    list_select_related = ('passeio',)
+    readonly_fields = ('passeio', 'tipo', 'versao', 'arquivo', 'tentativas', 'reservado_por', 'reservado_ate', 'ultimo_erro', 'criado_em', 'concluido_em')
+    actions = ['tentar_de_novo']
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.action(description='Gerar de novo os relatórios que falharam')
+    def tentar_de_novo(self, request, queryset):
+        recolocados = sum(relatorios.tentar_de_novo(relatorio) for relatorio in queryset.filter(status='failed'))
+        self.message_user(request, f'{recolocados} relatório(s) colocado(s) de volta na fila.')
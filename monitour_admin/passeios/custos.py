@@ -0,0 +1,73 @@
+"""
+Custo total previsto de um passeio, calculado no banco sem fan-out.
+
+    custo total = cotações aceitas (exceto transporte)
+                + gastos do passeio
+                + transporte: cotações aceitas de transporte ou, se não houver
+                  nenhuma, o custo base do tipo de veículo
+
+Cada parcela é uma subconsulta correlacionada, agregada por passeio: a
+consulta continua com uma linha por passeio, não importa quantas cotações,
+gastos, pacotes ou inscrições ele tenha (somar por JOINs multiplicava os
+valores). O preço dos pacotes é receita e não entra no custo.
+
+Todo cálculo de custo passa por aqui: Passeio.objects.with_custo_total(),
+Passeio.custo_total_previsto, a lista do admin, o FinancialService e o sinal
+de ponto de equilíbrio.
+"""
+from decimal import Decimal
+
+from django.db.models import DecimalField, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+CUSTO_FIELD = DecimalField(max_digits=14, decimal_places=2)
+ZERO = Value(Decimal('0.00'), output_field=CUSTO_FIELD)
+
+
+def soma_por_passeio(queryset, campo, caminho='passeio', agregado=Sum, output_field=CUSTO_FIELD):
+    """
+    Subconsulta com o agregado de `campo` nas linhas do passeio externo (NULL se
+    não houver). `caminho` leva do modelo do queryset até o passeio.
+    """
+    return Subquery(
+        queryset.filter(**{caminho: OuterRef('pk')})
+        .order_by()
+        .values(caminho)
+        .annotate(total=agregado(campo))
+        .values('total'),
+        output_field=output_field,
+    )
+
+
+def anotacoes_custo():
+    """Expressões de custo para QuerySet.annotate() de Passeio."""
+    from .models import Cotacao, GastoPasseio
+
+    aceitas = Cotacao.objects.filter(status='aceita')
+    return {
+        '_custo_cotacoes_outros': Coalesce(
+            soma_por_passeio(aceitas.exclude(tipo_servico='transporte'), 'valor_cotado'), ZERO,
+        ),
+        '_custo_gastos': Coalesce(soma_por_passeio(GastoPasseio.objects.all(), 'valor'), ZERO),
+        '_custo_transporte': Coalesce(
+            soma_por_passeio(aceitas.filter(tipo_servico='transporte'), 'valor_cotado'),
+            F('tipo_veiculo__custo_base_transporte'),
+            ZERO,
+            output_field=CUSTO_FIELD,
+        ),
+    }
+
+
+def with_custo_total(queryset):
+    """Anota _custo_cotacoes_outros, _custo_gastos, _custo_transporte e _custo_total_previsto."""
+    return queryset.annotate(**anotacoes_custo()).annotate(
+        _custo_total_previsto=F('_custo_cotacoes_outros') + F('_custo_gastos') + F('_custo_transporte'),
+    )
+
+
+def custo_total(passeio_id):
+    """Custo total previsto de um passeio, em uma consulta."""
+    from .models import Passeio
+
+    total = with_custo_total(Passeio.objects.filter(pk=passeio_id)).values_list('_custo_total_previsto', flat=True)
+    return Decimal(total.first() or 0).quantize(Decimal('0.01'))
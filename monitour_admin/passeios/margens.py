@@ -0,0 +1,109 @@
+"""
+Margens de lucro históricas por destino (sugestão de margem do resumo financeiro).
+
+A margem de cada passeio realizado usa a receita do seu resumo financeiro e o
+custo de passeios.custos, no mesmo SELECT: uma consulta traz as margens de um
+destino (ou de todos), não importa quantos passeios já foram feitos para ele. As
+estatísticas por destino ficam em MargemDestino, atualizadas quando um
+passeio entra ou sai do status 'realizado', quando a receita ou o custo de um
+passeio já realizado muda (inscrições, pacotes, cotações e gastos; ver
+passeios.signals) e por rebuild_resumos.
+"""
+import statistics
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db.models import Q
+
+from . import resumos
+from .models import MargemDestino, Passeio
+
+CENTAVOS = Decimal('0.01')
+
+
+def margens_por_destino(passeios):
+    """{(cidade, uf): [margem %, ...]} dos passeios com receita, em uma consulta."""
+    linhas = (
+        passeios.filter(resumo_financeiro__receita_prevista__gt=0)
+        .with_custo_total()
+        .values_list('cidade_destino', 'uf_destino', 'resumo_financeiro__receita_prevista', '_custo_total_previsto')
+    )
+    margens = defaultdict(list)
+    for cidade, uf, receita, custo in linhas:
+        margens[(cidade, uf)].append((receita - custo) / receita * 100)
+    return margens
+
+
+def estatisticas(margens):
+    """Média, mediana, desvio padrão, mínima, máxima e tamanho da amostra."""
+    valores = {
+        'media': statistics.mean(margens),
+        'mediana': statistics.median(margens),
+        'desvio_padrao': statistics.stdev(margens) if len(margens) > 1 else Decimal('0'),
+        'minima': min(margens),
+        'maxima': max(margens),
+    }
+    valores = {campo: Decimal(valor).quantize(CENTAVOS) for campo, valor in valores.items()}
+    valores['amostras'] = len(margens)
+    return valores
+
+
+def _realizados(destinos=None):
+    passeios = Passeio.objects.filter(status='realizado')
+    if destinos is not None:
+        filtro = Q(pk__in=[])
+        for cidade, uf in destinos:
+            filtro |= Q(cidade_destino=cidade, uf_destino=uf)
+        passeios = passeios.filter(filtro)
+    resumos.garantir(passeios)
+    return passeios
+
+
+def atualizar(destinos=None):
+    """
+    Recalcula MargemDestino dos destinos [(cidade, uf)] informados, ou de todos.
+    Retorna o número de destinos com estatísticas gravadas.
+    """
+    margens = margens_por_destino(_realizados(destinos))
+    for (cidade, uf), valores in margens.items():
+        MargemDestino.objects.update_or_create(cidade_destino=cidade, uf_destino=uf, defaults=estatisticas(valores))
+
+    # Destinos que ficaram sem passeio realizado com receita
+    existentes = MargemDestino.objects.values_list('pk', 'cidade_destino', 'uf_destino')
+    alvos = None if destinos is None else set(destinos)
+    MargemDestino.objects.filter(pk__in=[
+        pk for pk, cidade, uf in existentes
+        if (cidade, uf) not in margens and (alvos is None or (cidade, uf) in alvos)
+    ]).delete()
+    return len(margens)
+
+
+def atualizar_realizados(passeio_ids):
+    """Recalcula as margens dos destinos dos passeios informados que já foram realizados."""
+    passeio_ids = {passeio_id for passeio_id in passeio_ids if passeio_id is not None}
+    if not passeio_ids:
+        return 0
+    destinos = set(
+        Passeio.objects.filter(pk__in=passeio_ids, status='realizado').values_list('cidade_destino', 'uf_destino')
+    )
+    return atualizar(destinos) if destinos else 0
+
+
+def sugestao(passeio):
+    """
+    Estatísticas das margens dos outros passeios realizados para o destino do
+    passeio, ou None sem histórico.
+    """
+    destino = (passeio.cidade_destino, passeio.uf_destino)
+    if passeio.status == 'realizado':
+        # O próprio passeio entra nas estatísticas guardadas: calcula sem ele
+        margens = margens_por_destino(_realizados([destino]).exclude(pk=passeio.pk)).get(destino)
+        return estatisticas(margens) if margens else None
+
+    guardadas = MargemDestino.objects.filter(cidade_destino=destino[0], uf_destino=destino[1]).first()
+    if guardadas is None and atualizar([destino]):
+        # Destino com histórico anterior à tabela
+        guardadas = MargemDestino.objects.get(cidade_destino=destino[0], uf_destino=destino[1])
+    if guardadas is None:
+        return None
+    return {campo: getattr(guardadas, campo) for campo in ('media', 'mediana', 'desvio_padrao', 'minima', 'maxima', 'amostras')}
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('passeios', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PasseioResumoFinanceiro',
+            fields=[
+                ('passeio', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='resumo_financeiro', serialize=False, to='passeios.passeio')),
+                ('total_inscricoes', models.IntegerField(default=0)),
+                ('receita_prevista', models.DecimalField(decimal_places=2, default=0, help_text='Soma do preço do pacote de cada inscrição', max_digits=14)),
+                ('total_arrecadado', models.DecimalField(decimal_places=2, default=0, help_text='Soma dos pagamentos recebidos', max_digits=14)),
+                ('custo_cotacoes_outros', models.DecimalField(decimal_places=2, default=0, help_text='Cotações aceitas, exceto transporte', max_digits=14)),
+                ('custo_transporte_cotado', models.DecimalField(decimal_places=2, default=0, help_text='Cotações de transporte aceitas', max_digits=14)),
+                ('cotacoes_transporte_aceitas', models.IntegerField(default=0)),
+                ('custo_gastos', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('atualizado_em', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Resumo Financeiro do Passeio',
+                'verbose_name_plural': 'Resumos Financeiros dos Passeios',
+            },
+        ),
+    ]
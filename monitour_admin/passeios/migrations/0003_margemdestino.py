@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('passeios', '0002_passeioresumofinanceiro'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MargemDestino',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cidade_destino', models.CharField(max_length=100)),
+                ('uf_destino', models.CharField(choices=[('AC', 'Acre'), ('AL', 'Alagoas'), ('AP', 'Amapá'), ('AM', 'Amazonas'), ('BA', 'Bahia'), ('CE', 'Ceará'), ('DF', 'Distrito Federal'), ('ES', 'Espírito Santo'), ('GO', 'Goiás'), ('MA', 'Maranhão'), ('MT', 'Mato Grosso'), ('MS', 'Mato Grosso do Sul'), ('MG', 'Minas Gerais'), ('PA', 'Pará'), ('PB', 'Paraíba'), ('PR', 'Paraná'), ('PE', 'Pernambuco'), ('PI', 'Piauí'), ('RJ', 'Rio de Janeiro'), ('RN', 'Rio Grande do Norte'), ('RS', 'Rio Grande do Sul'), ('RO', 'Rondônia'), ('RR', 'Roraima'), ('SC', 'Santa Catarina'), ('SP', 'São Paulo'), ('SE', 'Sergipe'), ('TO', 'Tocantins')], max_length=2)),
+                ('amostras', models.PositiveIntegerField(default=0, help_text='Passeios realizados com receita considerados')),
+                ('media', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('mediana', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('desvio_padrao', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('minima', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('maxima', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('atualizado_em', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Margem Histórica do Destino',
+                'verbose_name_plural': 'Margens Históricas dos Destinos',
+                'unique_together': {('cidade_destino', 'uf_destino')},
+            },
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:17
+
+import django.db.models.deletion
+import passeios.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('passeios', '0003_margemdestino'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='assento',
+            name='atualizado_em',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='cotacao',
+            name='atualizado_em',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='inscricao',
+            name='atualizado_em',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='passeio',
+            name='atualizado_em',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.CreateModel(
+            name='RelatorioPDF',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('passageiros', 'Lista de Passageiros'), ('cotacoes', 'Cotações')], max_length=20)),
+                ('versao', models.CharField(help_text='Hash dos dados usados no relatório', max_length=64)),
+                ('status', models.CharField(choices=[('pending', 'Na fila'), ('done', 'Pronto'), ('failed', 'Falhou')], default='pending', max_length=10)),
+                ('arquivo', models.FileField(blank=True, upload_to=passeios.models.caminho_relatorio_pdf)),
+                ('tentativas', models.PositiveSmallIntegerField(default=0)),
+                ('reservado_por', models.CharField(blank=True, max_length=32)),
+                ('reservado_ate', models.DateTimeField(blank=True, null=True)),
+                ('ultimo_erro', models.TextField(blank=True)),
+                ('criado_em', models.DateTimeField(auto_now_add=True)),
+                ('concluido_em', models.DateTimeField(blank=True, null=True)),
+                ('passeio', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='relatorios_pdf', to='passeios.passeio')),
+            ],
+            options={
+                'verbose_name': 'Relatório em PDF',
+                'verbose_name_plural': 'Relatórios em PDF',
+                'ordering': ['-criado_em'],
+                'indexes': [models.Index(fields=['status', 'reservado_ate'], name='passeios_relatorio_pdf_fila')],
+                'unique_together': {('passeio', 'tipo', 'versao')},
+            },
+        ),
+    ]
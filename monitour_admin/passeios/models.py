@@ -13,30 +13,19 @@ UFS_BRASIL = [
     ('SP', 'São Paulo'), ('SE', 'Sergipe'), ('TO', 'Tocantins')
 ]
 
-class PasseioManager(models.Manager):
-    def get_queryset(self):
-        return super().get_queryset().select_related('tipo_veiculo')
-
+class PasseioQuerySet(models.QuerySet):
     def with_custo_total(self):
         """
-        Anota cada passeio com o seu custo total previsto, calculado de forma eficiente.
+        Anota cada passeio com o seu custo total previsto (ver passeios.custos),
+        mantendo uma linha por passeio.
         """
-        from django.db.models import Sum, F, Case, When, Value, DecimalField
-
-        # Custo de transporte: usa a cotação aceita ou o custo base do veículo
-        custo_transporte = Case(
-            When(cotacoes__status='aceita', cotacoes__tipo_servico='transporte', then=F('cotacoes__valor_cotado')),
-            default=F('tipo_veiculo__custo_base_transporte'),
-            output_field=DecimalField()
-        )
-
-        return self.annotate(
-            _custo_cotacoes_outros=Sum('cotacoes__valor_cotado', filter=models.Q(cotacoes__status='aceita') & ~models.Q(cotacoes__tipo_servico='transporte'), default=Value(0)),
-            _custo_gastos=Sum('gastos__valor', default=Value(0)),
-            _custo_transporte=Sum(custo_transporte, filter=models.Q(cotacoes__tipo_servico='transporte'), default=F('tipo_veiculo__custo_base_transporte')),
-            _custo_pacotes=Sum('pacotes__preco', default=Value(0)),
-            _custo_total_previsto=F('_custo_cotacoes_outros') + F('_custo_gastos') + F('_custo_transporte') + F('_custo_pacotes')
-        )
+        from .custos import with_custo_total
+        return with_custo_total(self)
+
+
+class PasseioManager(models.Manager.from_queryset(PasseioQuerySet)):
+    def get_queryset(self):
+        return super().get_queryset().select_related('tipo_veiculo')
 
 class Passeio(models.Model):
     """
@@ -108,6 +97,7 @@ class Passeio(models.Model):
         default=False,
         help_text="Marca se o e-mail de alerta de ponto de equilíbrio já foi enviado."
     )
+    atualizado_em = models.DateTimeField(auto_now=True)
 
     objects = PasseioManager()
 
@@ -124,31 +114,12 @@ class Passeio(models.Model):
 
     @property
     def custo_total_previsto(self):
-        """Retorna o custo total previsto, idealmente pré-calculado via anotação."""
+        """Retorna o custo total previsto, idealmente pré-calculado via with_custo_total()."""
         if hasattr(self, '_custo_total_previsto'):
             return self._custo_total_previsto
-        # Fallback para cálculo manual (menos eficiente)
-        # Este bloco pode ser removido se garantirmos que a anotação é sempre usada.
-        return self._calculate_custo_total_manual()
-    
-    def _calculate_custo_total_manual(self):
-        """Calcula manualmente o custo total quando a anotação não está disponível."""
-        from decimal import Decimal
-        custo = Decimal('0.00')
-        
-        # Soma custos de cotações aceitas
-        if self.cotacoes.exists():
-            custo += self.cotacoes.filter(status='aceita').aggregate(
-                total=models.Sum('valor_cotado')
-            )['total'] or Decimal('0.00')
-        
-        # Soma custos de gastos
-        if self.gastos.exists():
-            custo += self.gastos.aggregate(
-                total=models.Sum('valor')
-            )['total'] or Decimal('0.00')
-        
-        return custo
+        # Sem a anotação, calcula pelo mesmo motor em uma única consulta
+        from .custos import custo_total
+        return custo_total(self.pk)
 
     class Meta:
         verbose_name = "Passeio"
@@ -203,6 +174,7 @@ class Inscricao(models.Model):
     status_inscricao = models.CharField("Status da Inscrição", max_length=20, choices=STATUS_INSCRICAO, default='confirmada')
     observacoes = models.TextField(blank=True, help_text="Anotações específicas sobre esta inscrição")
     voucher = models.CharField(max_length=10, unique=True, blank=True, null=True, help_text="Código único da inscrição (gerado automaticamente)")
+    atualizado_em = models.DateTimeField(auto_now=True)
 
 
     def __str__(self):
@@ -276,6 +248,7 @@ class Assento(models.Model):
     veiculo_passeio = models.ForeignKey(VeiculoPasseio, on_delete=models.CASCADE, related_name="assentos")
     numero = models.PositiveIntegerField()
     cliente = models.ForeignKey(Cliente, on_delete=models.SET_NULL, null=True, blank=True, related_name="assentos_reservados")
+    atualizado_em = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"Assento {self.numero} - {self.veiculo_passeio.identificacao}"
@@ -316,6 +289,7 @@ class Cotacao(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_COTACAO, default='pendente', help_text="Status atual da cotação")
     data_vencimento_pagamento = models.DateField(null=True, blank=True, help_text="Data limite para o pagamento final")
     fornecedor_selecionado = models.BooleanField(default=False, help_text="Marque se esta cotação foi a escolhida para o serviço")
+    atualizado_em = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"Cotação de {self.fornecedor.nome_fantasia} para {self.get_tipo_servico_display()} no {self.passeio.titulo}"
@@ -444,4 +418,119 @@ class PaymentGatewayTransaction(models.Model):
     class Meta:
         verbose_name = "Transação de Gateway"
         verbose_name_plural = "Transações de Gateway"
-        ordering = ['-criada_em']
\ No newline at end of file
+        ordering = ['-criada_em']
+
+class PasseioResumoFinanceiro(models.Model):
+    """
+    Totais financeiros de um passeio, mantidos por atualizações incrementais
+    (passeios.resumos) a cada inscrição, pagamento, cotação ou gasto salvo ou
+    excluído. As telas financeiras leem uma linha por passeio em vez de somar
+    as tabelas filhas; rebuild_resumos recalcula tudo a partir delas.
+    """
+    passeio = models.OneToOneField(Passeio, on_delete=models.CASCADE, primary_key=True, related_name='resumo_financeiro')
+    total_inscricoes = models.IntegerField(default=0)
+    receita_prevista = models.DecimalField(max_digits=14, decimal_places=2, default=0, help_text="Soma do preço do pacote de cada inscrição")
+    total_arrecadado = models.DecimalField(max_digits=14, decimal_places=2, default=0, help_text="Soma dos pagamentos recebidos")
+    custo_cotacoes_outros = models.DecimalField(max_digits=14, decimal_places=2, default=0, help_text="Cotações aceitas, exceto transporte")
+    custo_transporte_cotado = models.DecimalField(max_digits=14, decimal_places=2, default=0, help_text="Cotações de transporte aceitas")
+    cotacoes_transporte_aceitas = models.IntegerField(default=0)
+    custo_gastos = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    atualizado_em = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Resumo financeiro de {self.passeio}"
+
+    @property
+    def custo_transporte(self):
+        """Cotações de transporte aceitas ou, sem nenhuma, o custo base do veículo (como passeios.custos)."""
+        if self.cotacoes_transporte_aceitas:
+            return self.custo_transporte_cotado
+        tipo_veiculo = self.passeio.tipo_veiculo
+        return tipo_veiculo.custo_base_transporte if tipo_veiculo else Decimal('0.00')
+
+    @property
+    def custo_total_previsto(self):
+        return self.custo_cotacoes_outros + self.custo_gastos + self.custo_transporte
+
+    @property
+    def saldo_a_receber(self):
+        return self.receita_prevista - self.total_arrecadado
+
+    @property
+    def lucro_projetado(self):
+        return self.receita_prevista - self.custo_total_previsto
+
+    class Meta:
+        verbose_name = "Resumo Financeiro do Passeio"
+        verbose_name_plural = "Resumos Financeiros dos Passeios"
+
+
+class MargemDestino(models.Model):
+    """
+    Estatísticas das margens de lucro dos passeios realizados para um destino,
+    usadas na sugestão de margem do resumo financeiro. Atualizadas por
+    passeios.margens quando um passeio é marcado como realizado.
+    """
+    cidade_destino = models.CharField(max_length=100)
+    uf_destino = models.CharField(max_length=2, choices=UFS_BRASIL)
+    amostras = models.PositiveIntegerField(default=0, help_text="Passeios realizados com receita considerados")
+    media = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    mediana = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    desvio_padrao = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    minima = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    maxima = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    atualizado_em = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Margens de {self.cidade_destino}/{self.uf_destino}"
+
+    class Meta:
+        verbose_name = "Margem Histórica do Destino"
+        verbose_name_plural = "Margens Históricas dos Destinos"
+        unique_together = ('cidade_destino', 'uf_destino')
+
+
+def caminho_relatorio_pdf(instance, filename):
+    """Chave do PDF no storage: relatorios/<tipo>/<passeio>/<versão>.pdf."""
+    return f'relatorios/{instance.tipo}/{instance.passeio_id}/{instance.versao}.pdf'
+
+
+class RelatorioPDF(models.Model):
+    """
+    PDF de um relatório do passeio, gerado em segundo plano pelo comando
+    run_pdf_worker (ver passeios.relatorios). Cada versão dos dados do
+    relatório tem o seu; enquanto os dados não mudam, o arquivo é reaproveitado.
+    """
+    TIPOS = [
+        ('passageiros', 'Lista de Passageiros'),
+        ('cotacoes', 'Cotações'),
+    ]
+    STATUS = [
+        ('pending', 'Na fila'),
+        ('done', 'Pronto'),
+        ('failed', 'Falhou'),
+    ]
+
+    passeio = models.ForeignKey(Passeio, on_delete=models.CASCADE, related_name='relatorios_pdf')
+    tipo = models.CharField(max_length=20, choices=TIPOS)
+    versao = models.CharField(max_length=64, help_text="Hash dos dados usados no relatório")
+    status = models.CharField(max_length=10, choices=STATUS, default='pending')
+    arquivo = models.FileField(upload_to=caminho_relatorio_pdf, blank=True)
+    tentativas = models.PositiveSmallIntegerField(default=0)
+    reservado_por = models.CharField(max_length=32, blank=True)
+    reservado_ate = models.DateTimeField(null=True, blank=True)
+    ultimo_erro = models.TextField(blank=True)
+    criado_em = models.DateTimeField(auto_now_add=True)
+    concluido_em = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.get_tipo_display()} de {self.passeio} ({self.versao[:8]})"
+
+    class Meta:
+        verbose_name = "Relatório em PDF"
+        verbose_name_plural = "Relatórios em PDF"
+        ordering = ['-criado_em']
+        unique_together = ('passeio', 'tipo', 'versao')
+        indexes = [
+            models.Index(fields=['status', 'reservado_ate'], name='passeios_relatorio_pdf_fila'),
+        ]
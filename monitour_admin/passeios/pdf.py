@@ -0,0 +1,127 @@
+"""
+Renderização dos relatórios em PDF com o WeasyPrint (usada por passeios.relatorios).
+
+O que não muda de um PDF para outro fica guardado no processo (cada worker do
+run_pdf_worker) desde o primeiro uso, ou desde a partida com aquecer():
+
+- a FontConfiguration, com as fontes do sistema já carregadas pelo fontconfig;
+- as folhas de estilo dos relatórios (static/passeios/pdf), já interpretadas;
+- as imagens já decodificadas.
+
+Os templates vêm compilados do loader com cache do Django. Imagens, @import e
+url() do CSS só são lidos dos arquivos estáticos do projeto, pelo buscador():
+nada é buscado na rede, e um recurso fora de STATIC_URL vira só um aviso do
+WeasyPrint no log.
+"""
+import mimetypes
+import posixpath
+from functools import lru_cache
+from pathlib import Path
+from urllib.parse import unquote, urlsplit
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.exceptions import SuspiciousFileOperation
+from django.template.loader import get_template
+from django.utils._os import safe_join
+
+# Imagens decodificadas pelo WeasyPrint, por URL (opção cache de write_pdf)
+_imagens = {}
+
+
+def base_url():
+    """URL base dos PDFs: o {% static %} dos templates resolve para file://<STATIC_URL>..."""
+    return f'file://{settings.STATIC_URL}'
+
+
+def caminho_estatico(url):
+    """Arquivo estático local da URL; ValueError se ela não for um arquivo estático do projeto."""
+    partes = urlsplit(url)
+    caminho = unquote(partes.path)
+    if partes.scheme != 'file' or partes.netloc or not caminho.startswith(settings.STATIC_URL):
+        raise ValueError(f'Recurso fora dos arquivos estáticos (o PDF não busca na rede): {url}')
+
+    relativo = posixpath.normpath(caminho[len(settings.STATIC_URL):])
+    try:
+        encontrado = finders.find(relativo)
+        if not encontrado and settings.STATIC_ROOT:
+            # Produção: só o que o collectstatic copiou
+            encontrado = safe_join(settings.STATIC_ROOT, relativo)
+    except SuspiciousFileOperation:
+        encontrado = None
+    if not encontrado or not Path(encontrado).is_file():
+        raise ValueError(f'Arquivo estático não encontrado: {url}')
+    return Path(encontrado)
+
+
+def _ler_estatico(url):
+    """Bytes e tipo MIME do arquivo estático da URL."""
+    caminho = caminho_estatico(url)
+    return caminho.read_bytes(), mimetypes.guess_type(caminho.name)[0] or 'application/octet-stream'
+
+
+@lru_cache(maxsize=None)
+def buscador():
+    """
+    url_fetcher do WeasyPrint que só lê arquivos estáticos locais e URLs data:.
+
+    As versões do WeasyPrint com weasyprint.urls.URLFetcher recebem uma
+    instância dele; as anteriores, uma função que devolve um dict.
+    """
+    from weasyprint import urls
+
+    if not hasattr(urls, 'URLFetcherResponse'):
+        def buscar(url, *args, **kwargs):
+            if url.startswith('data:'):
+                return urls.default_url_fetcher(url, *args, **kwargs)
+            conteudo, tipo = _ler_estatico(url)
+            return {'string': conteudo, 'mime_type': tipo, 'redirected_url': url}
+
+        return buscar
+
+    class BuscadorLocal(urls.URLFetcher):
+        def fetch(self, url, headers=None):
+            if url.startswith('data:'):
+                return super().fetch(url, headers)
+            conteudo, tipo = _ler_estatico(url)
+            return urls.URLFetcherResponse(url, body=conteudo, headers={'Content-Type': tipo})
+
+    return BuscadorLocal(allowed_protocols={'file', 'data'})
+
+
+@lru_cache(maxsize=None)
+def fontes():
+    """FontConfiguration compartilhada por todos os PDFs do processo."""
+    from weasyprint.text.fonts import FontConfiguration
+
+    return FontConfiguration()
+
+
+@lru_cache(maxsize=None)
+def folha(nome):
+    """Folha de estilo estática (ex.: 'passeios/pdf/relatorio_cotacoes.css'), interpretada uma vez."""
+    from weasyprint import CSS
+
+    url = base_url() + nome
+    return CSS(
+        string=caminho_estatico(url).read_text(encoding='utf-8'), base_url=url,
+        url_fetcher=buscador(), font_config=fontes(),
+    )
+
+
+def aquecer(folhas=()):
+    """Carrega as fontes e as folhas de estilo antes do primeiro PDF."""
+    fontes()
+    for nome in folhas:
+        folha(nome)
+
+
+def renderizar(nome_template, contexto, folhas=()):
+    """Bytes do PDF do template com o contexto e as folhas de estilo informadas."""
+    from weasyprint import HTML  # pesado: carregado só quando um PDF é gerado
+
+    html_string = get_template(nome_template).render(contexto)
+    documento = HTML(string=html_string, base_url=base_url(), url_fetcher=buscador())
+    return documento.write_pdf(
+        stylesheets=[folha(nome) for nome in folhas], font_config=fontes(), cache=_imagens,
+    )
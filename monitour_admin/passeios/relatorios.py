@@ -0,0 +1,274 @@
+"""
+Relatórios em PDF dos passeios (lista de passageiros e cotações), gerados em
+segundo plano.
+
+A view pede o relatório com solicitar(). A versão dos dados é um hash dos
+maiores atualizado_em/data_atualizacao e das contagens das linhas que aparecem
+no relatório, inclusive fornecedores, contatos e modelos de veículo (ver
+RELATORIOS); as contagens pegam as exclusões. Se já existe um PDF pronto
+para a versão atual, a view o devolve na hora. Se não existe, o pedido fica na
+fila (RelatorioPDF) até o comando run_pdf_worker gerar o arquivo, que vai para
+o storage padrão em relatorios/<tipo>/<passeio>/<versão>.pdf. Quando um PDF
+fica pronto, os das versões anteriores são apagados.
+
+Vários workers podem rodar ao mesmo tempo: cada lote é reservado com um
+UPDATE condicional (reservado_por + prazo), como na fila de e-mails
+(dashboard.outbox). A renderização fica em passeios.pdf.
+
+queryset.update() não mexe em atualizado_em: o que for alterado assim só
+aparece no PDF na próxima mudança que trocar a versão. Aumente
+VERSAO_TEMPLATES quando os templates dos relatórios mudarem.
+"""
+import hashlib
+import logging
+import uuid
+from datetime import timedelta
+from functools import lru_cache
+
+from django.core.files.base import ContentFile
+from django.db.models import Count, DateTimeField, F, IntegerField, Max, Q
+from django.utils import timezone
+
+from cadastros.models import ContatoFornecedor
+
+from . import pdf
+from .custos import soma_por_passeio
+from .models import Assento, Cotacao, Inscricao, Passeio, RelatorioPDF, VeiculoPasseio
+
+logger = logging.getLogger(__name__)
+
+VERSAO_TEMPLATES = 2
+
+# Tempo que um lote fica reservado para o worker que o pegou
+CLAIM_TIMEOUT = timedelta(minutes=5)
+
+# Depois de MAX_TENTATIVAS falhas o relatório fica como 'failed'; antes disso,
+# a tentativa n espera ESPERA_NOVA_TENTATIVA * n
+MAX_TENTATIVAS = 3
+ESPERA_NOVA_TENTATIVA = timedelta(seconds=30)
+
+
+def _ultima(queryset, campo, caminho):
+    return soma_por_passeio(queryset, campo, caminho, agregado=Max, output_field=DateTimeField())
+
+
+def _total(queryset, caminho):
+    return soma_por_passeio(queryset, 'pk', caminho, agregado=Count, output_field=IntegerField())
+
+
+def _dados_passageiros():
+    inscricoes = Inscricao.objects.all()
+    assentos = Assento.objects.all()
+    veiculos = VeiculoPasseio.objects.all()
+    # Contatos da empresa de transporte (o relatório mostra o primeiro)
+    contatos = ContatoFornecedor.objects.all()
+    return {
+        'transporte_em': F('fornecedor_transporte__data_atualizacao'),
+        'contatos_em': _ultima(contatos, 'data_atualizacao', 'fornecedor__passeios_transporte'),
+        'contatos': _total(contatos, 'fornecedor__passeios_transporte'),
+        # Nome do modelo no título e fileiras/layout do mapa de assentos
+        'tipo_veiculo_em': F('tipo_veiculo__data_atualizacao'),
+        'veiculos_em': _ultima(veiculos, 'tipo_veiculo__data_atualizacao', 'passeio'),
+        'veiculos_tipo': soma_por_passeio(veiculos, 'tipo_veiculo_id', 'passeio', agregado=Max, output_field=IntegerField()),
+        'inscricoes_em': _ultima(inscricoes, 'atualizado_em', 'pacote__passeio'),
+        'inscricoes': _total(inscricoes, 'pacote__passeio'),
+        'clientes_em': _ultima(inscricoes, 'cliente__data_atualizacao', 'pacote__passeio'),
+        'assentos_em': _ultima(assentos, 'atualizado_em', 'veiculo_passeio__passeio'),
+        'assentos': _total(assentos, 'veiculo_passeio__passeio'),
+        'ocupantes_em': _ultima(assentos, 'cliente__data_atualizacao', 'veiculo_passeio__passeio'),
+    }
+
+
+def _dados_cotacoes():
+    cotacoes = Cotacao.objects.all()
+    return {
+        'cotacoes_em': _ultima(cotacoes, 'atualizado_em', 'passeio'),
+        'cotacoes': _total(cotacoes, 'passeio'),
+        'fornecedores_em': _ultima(cotacoes, 'fornecedor__data_atualizacao', 'passeio'),
+    }
+
+
+@lru_cache(maxsize=64)
+def esqueleto_assentos(fileiras, capacidade, layout_colunas):
+    """Números dos assentos por fileira e grupo de colunas de um modelo de veículo."""
+    esqueleto = []
+    assento_num = 1
+    for _ in range(fileiras):
+        grupos = []
+        for grupo_str in layout_colunas.split('-'):
+            grupo = []
+            if grupo_str.isdigit():
+                for _ in range(int(grupo_str)):
+                    if assento_num <= capacidade:
+                        grupo.append(assento_num)
+                        assento_num += 1
+            grupos.append(tuple(grupo))
+        esqueleto.append(tuple(grupos))
+    return tuple(esqueleto)
+
+
+def montar_layout_assentos(veiculo_passeio, com_dados_cliente=False):
+    """Fileiras de assentos do veículo, com o nome (e, se pedido, o id) de quem ocupa cada um."""
+    tipo_veiculo = veiculo_passeio.tipo_veiculo
+    ocupantes = {
+        numero: (cliente_id, nome)
+        for numero, cliente_id, nome in veiculo_passeio.assentos.values_list('numero', 'cliente_id', 'cliente__nome')
+    }
+
+    layout = []
+    for fileira in esqueleto_assentos(tipo_veiculo.fileiras, tipo_veiculo.capacidade, tipo_veiculo.layout_colunas):
+        grupos = []
+        for grupo in fileira:
+            assentos = []
+            for numero in grupo:
+                cliente_id, nome = ocupantes.get(numero, (None, None))
+                assento_data = {'numero': numero, 'cliente_nome': nome or ''}
+                if com_dados_cliente:
+                    assento_data.update({'ocupado': cliente_id is not None, 'cliente_id': cliente_id or ''})
+                assentos.append(assento_data)
+            grupos.append(assentos)
+        layout.append({'grupos': grupos})
+    return layout
+
+
+def _contexto_passageiros(passeio):
+    inscricoes = Inscricao.objects.filter(pacote__passeio=passeio).select_related('cliente', 'pacote').order_by('cliente__nome')
+
+    # Se o passeio tem um tipo de veículo, garante que o VeiculoPasseio correspondente exista ou o cria.
+    mapa_layout = None
+    if passeio.tipo_veiculo:
+        veiculo_passeio, _ = VeiculoPasseio.objects.get_or_create(
+            passeio=passeio,
+            defaults={'tipo_veiculo': passeio.tipo_veiculo, 'identificacao': 'Veículo Principal'}
+        )
+        mapa_layout = montar_layout_assentos(veiculo_passeio)
+    return {'passeio': passeio, 'inscricoes': inscricoes, 'mapa_layout': mapa_layout}
+
+
+def _contexto_cotacoes(passeio):
+    cotacoes = Cotacao.objects.filter(passeio=passeio).select_related('fornecedor').order_by('tipo_servico', 'valor_cotado')
+    return {'passeio': passeio, 'cotacoes': cotacoes}
+
+
+# Tipo: (template, folhas de estilo estáticas, contexto do template, colunas da versão dos dados,
+# nome do arquivo baixado)
+RELATORIOS = {
+    'passageiros': (
+        'passeios/relatorio_passageiros.html',
+        ['passeios/pdf/relatorio_passageiros.css'],
+        _contexto_passageiros,
+        _dados_passageiros,
+        lambda passeio: f'relatorio_{passeio.titulo}.pdf',
+    ),
+    'cotacoes': (
+        'passeios/relatorio_cotacoes_pdf.html',
+        ['passeios/pdf/relatorio_cotacoes.css'],
+        _contexto_cotacoes,
+        _dados_cotacoes,
+        lambda passeio: f'cotacoes_{passeio.titulo.replace(" ", "_")}.pdf',
+    ),
+}
+
+
+def versao(tipo, passeio_id):
+    """Hash dos dados do relatório do passeio (uma consulta); None se o passeio não existir."""
+    dados = RELATORIOS[tipo][3]
+    linha = Passeio.objects.filter(pk=passeio_id).values_list('atualizado_em', *dados().values()).first()
+    if linha is None:
+        return None
+    # As subconsultas entram em values_list() pela ordem do dicionário
+    chave = repr((VERSAO_TEMPLATES, tipo, passeio_id, linha))
+    return hashlib.sha256(chave.encode()).hexdigest()
+
+
+def nome_arquivo(relatorio):
+    """Nome do PDF para download."""
+    return RELATORIOS[relatorio.tipo][4](relatorio.passeio)
+
+
+def solicitar(tipo, passeio):
+    """RelatorioPDF da versão atual dos dados, colocado na fila se ainda não existir."""
+    relatorio, _ = RelatorioPDF.objects.get_or_create(passeio=passeio, tipo=tipo, versao=versao(tipo, passeio.pk))
+    relatorio.passeio = passeio
+    if relatorio.status == 'done' and not relatorio.arquivo.storage.exists(relatorio.arquivo.name):
+        # O arquivo sumiu do storage: gera de novo
+        logger.warning('PDF %s do relatório %s não encontrado; gerando de novo', relatorio.arquivo.name, relatorio.pk)
+        tentar_de_novo(relatorio, status='done')
+    return relatorio
+
+
+def tentar_de_novo(relatorio, status='failed'):
+    """Coloca o relatório de volta na fila se ele ainda estiver no status informado."""
+    atualizados = RelatorioPDF.objects.filter(pk=relatorio.pk, status=status).update(
+        status='pending', tentativas=0, reservado_por='', reservado_ate=None, arquivo='', ultimo_erro='',
+    )
+    relatorio.refresh_from_db()
+    return bool(atualizados)
+
+
+def renderizar(tipo, passeio):
+    """Bytes do PDF com os dados atuais do passeio."""
+    template, folhas, contexto, _, _ = RELATORIOS[tipo]
+    return pdf.renderizar(template, contexto(passeio), folhas)
+
+
+def aquecer():
+    """Fontes e folhas de estilo de todos os relatórios carregadas neste processo."""
+    pdf.aquecer([nome for relatorio in RELATORIOS.values() for nome in relatorio[1]])
+
+
+def reservar_lote(tamanho):
+    """Reserva até `tamanho` relatórios da fila para este worker e os retorna."""
+    agora = timezone.now()
+    token = uuid.uuid4().hex
+    na_fila = RelatorioPDF.objects.filter(status='pending').filter(
+        Q(reservado_ate__isnull=True) | Q(reservado_ate__lte=agora)
+    )
+    ids = list(na_fila.order_by('criado_em', 'id').values_list('id', flat=True)[:tamanho])
+    if not ids:
+        return []
+    # Condicional: se outro worker reservou algum desses ids antes, ele fica de fora
+    na_fila.filter(id__in=ids).update(reservado_por=token, reservado_ate=agora + CLAIM_TIMEOUT)
+    return list(
+        RelatorioPDF.objects.filter(reservado_por=token, status='pending').select_related('passeio').order_by('id')
+    )
+
+
+def gerar_lote(tamanho=5):
+    """Gera um lote de PDFs da fila. Retorna (gerados, adiados, falhas, descartados)."""
+    gerados = adiados = falhas = descartados = 0
+    for relatorio in reservar_lote(tamanho):
+        if versao(relatorio.tipo, relatorio.passeio_id) != relatorio.versao:
+            # Os dados mudaram depois do pedido: a próxima visita pede a versão nova
+            relatorio.delete()
+            descartados += 1
+            continue
+
+        relatorio.tentativas += 1
+        relatorio.reservado_por = ''
+        try:
+            conteudo = renderizar(relatorio.tipo, relatorio.passeio)
+            relatorio.arquivo.save('relatorio.pdf', ContentFile(conteudo), save=False)
+        except Exception as exc:
+            logger.warning('Falha ao gerar o relatório %s (tentativa %s): %s', relatorio.pk, relatorio.tentativas, exc)
+            relatorio.ultimo_erro = f'{type(exc).__name__}: {exc}'
+            if relatorio.tentativas >= MAX_TENTATIVAS:
+                relatorio.status = 'failed'
+                falhas += 1
+            else:
+                relatorio.reservado_ate = timezone.now() + ESPERA_NOVA_TENTATIVA * relatorio.tentativas
+                adiados += 1
+            relatorio.save()
+            continue
+
+        relatorio.status = 'done'
+        relatorio.ultimo_erro = ''
+        relatorio.reservado_ate = None
+        relatorio.concluido_em = timezone.now()
+        relatorio.save()
+        gerados += 1
+        # Versões anteriores do mesmo relatório (o sinal post_delete apaga os arquivos)
+        RelatorioPDF.objects.filter(
+            passeio_id=relatorio.passeio_id, tipo=relatorio.tipo, criado_em__lte=relatorio.criado_em,
+        ).exclude(pk=relatorio.pk).delete()
+    return gerados, adiados, falhas, descartados
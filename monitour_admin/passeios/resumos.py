@@ -0,0 +1,139 @@
+"""
+Manutenção incremental de PasseioResumoFinanceiro.
+
+Cada inscrição, pagamento, cotação e gasto contribui com valores para o resumo
+de um passeio (ver CONTRIBUICOES). Os sinais em passeios.signals leem a
+contribuição da linha no banco antes e depois de salvar ou excluir e aplicam
+só a diferença, com F(), sem somar de novo as tabelas filhas.
+
+Alterações que arrastam outras linhas junto (inscrição trocada de passeio,
+que leva os pagamentos; pacote com preço ou passeio alterado) recalculam os
+passeios afetados inteiros. bulk_create, update() e SQL direto não disparam
+sinais: depois deles, rode recalcular() ou o comando rebuild_resumos.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db.models import Case, Count, F, IntegerField, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .custos import CUSTO_FIELD, ZERO, anotacoes_custo, soma_por_passeio
+from .models import Cotacao, GastoPasseio, Inscricao, Pagamento, Passeio, PasseioResumoFinanceiro
+
+CAMPOS = [
+    'total_inscricoes', 'receita_prevista', 'total_arrecadado', 'custo_cotacoes_outros',
+    'custo_transporte_cotado', 'cotacoes_transporte_aceitas', 'custo_gastos',
+]
+
+
+def _cotacao(linha):
+    if linha['situacao'] != 'aceita':
+        return {}
+    if linha['tipo'] == 'transporte':
+        return {'custo_transporte_cotado': linha['valor'], 'cotacoes_transporte_aceitas': 1}
+    return {'custo_cotacoes_outros': linha['valor']}
+
+
+# Modelo: (colunas lidas da linha, com o passeio em 'ref_passeio'; contribuição para o resumo).
+# Os apelidos das colunas não podem repetir nomes de campos do modelo.
+CONTRIBUICOES = {
+    Inscricao: (
+        {'ref_passeio': F('pacote__passeio_id'), 'preco': F('pacote__preco')},
+        lambda linha: {'total_inscricoes': 1, 'receita_prevista': linha['preco']},
+    ),
+    Pagamento: (
+        {'ref_passeio': F('inscricao__pacote__passeio_id'), 'valor_pago': F('valor')},
+        lambda linha: {'total_arrecadado': linha['valor_pago']},
+    ),
+    Cotacao: (
+        {'ref_passeio': F('passeio_id'), 'situacao': F('status'), 'tipo': F('tipo_servico'), 'valor': F('valor_cotado')},
+        _cotacao,
+    ),
+    GastoPasseio: (
+        {'ref_passeio': F('passeio_id'), 'valor_gasto': F('valor')},
+        lambda linha: {'custo_gastos': linha['valor_gasto']},
+    ),
+}
+
+
+def contribuicao(instance):
+    """(passeio_id, {campo: valor}) da linha como está gravada no banco, ou None se não existir."""
+    colunas, calcular = CONTRIBUICOES[instance._meta.concrete_model]
+    linha = instance._meta.concrete_model._base_manager.filter(pk=instance.pk).values(**colunas).first()
+    if linha is None or linha['ref_passeio'] is None:
+        return None
+    return linha['ref_passeio'], calcular(linha)
+
+
+def aplicar(anterior, atual):
+    """Aplica ao resumo a diferença entre duas contribuições (qualquer uma pode ser None)."""
+    deltas = defaultdict(lambda: defaultdict(Decimal))
+    for parte, sinal in ((anterior, -1), (atual, 1)):
+        if parte:
+            passeio_id, valores = parte
+            for campo, valor in valores.items():
+                deltas[passeio_id][campo] += sinal * valor
+
+    for passeio_id, valores in deltas.items():
+        alteracoes = {campo: F(campo) + valor for campo, valor in valores.items() if valor}
+        if alteracoes:
+            # Sem a linha do resumo (passeio anterior à tabela ou sendo excluído) não há o que atualizar
+            PasseioResumoFinanceiro.objects.filter(passeio_id=passeio_id).update(
+                atualizado_em=timezone.now(), **alteracoes,
+            )
+
+
+def custo_total():
+    """PasseioResumoFinanceiro.custo_total_previsto como expressão SQL, para querysets de Passeio."""
+    return F('resumo_financeiro__custo_cotacoes_outros') + F('resumo_financeiro__custo_gastos') + Case(
+        When(resumo_financeiro__cotacoes_transporte_aceitas__gt=0, then=F('resumo_financeiro__custo_transporte_cotado')),
+        default=Coalesce(F('tipo_veiculo__custo_base_transporte'), ZERO),
+        output_field=CUSTO_FIELD,
+    )
+
+
+def _contagem(queryset, caminho='passeio'):
+    return Coalesce(
+        soma_por_passeio(queryset, 'pk', caminho=caminho, agregado=Count, output_field=IntegerField()), 0,
+    )
+
+
+def recalcular(passeio_ids=None, batch_size=500):
+    """
+    Recalcula os resumos a partir das tabelas filhas, criando os que faltam.
+    Sem passeio_ids, recalcula todos. Retorna o número de resumos gravados.
+    """
+    passeios = Passeio._base_manager.order_by('pk')
+    if passeio_ids is not None:
+        passeios = passeios.filter(pk__in=list(passeio_ids))
+
+    custos = anotacoes_custo()
+    transporte = Cotacao.objects.filter(status='aceita', tipo_servico='transporte')
+    linhas = passeios.annotate(
+        total_inscricoes=_contagem(Inscricao.objects.all(), caminho='pacote__passeio'),
+        receita_prevista=Coalesce(
+            soma_por_passeio(Inscricao.objects.all(), 'pacote__preco', caminho='pacote__passeio'), ZERO,
+        ),
+        total_arrecadado=Coalesce(
+            soma_por_passeio(Pagamento.objects.all(), 'valor', caminho='inscricao__pacote__passeio'), ZERO,
+        ),
+        custo_cotacoes_outros=custos['_custo_cotacoes_outros'],
+        custo_transporte_cotado=Coalesce(soma_por_passeio(transporte, 'valor_cotado'), ZERO),
+        cotacoes_transporte_aceitas=_contagem(transporte),
+        custo_gastos=custos['_custo_gastos'],
+    ).values('pk', *CAMPOS)
+
+    resumos = [PasseioResumoFinanceiro(passeio_id=linha.pop('pk'), **linha) for linha in linhas]
+    PasseioResumoFinanceiro.objects.bulk_create(
+        resumos, batch_size=batch_size,
+        update_conflicts=True, unique_fields=['passeio'], update_fields=CAMPOS + ['atualizado_em'],
+    )
+    return len(resumos)
+
+
+def garantir(passeios):
+    """Cria os resumos que faltam para os passeios do queryset (ex: passeios anteriores à tabela)."""
+    faltando = list(passeios.filter(resumo_financeiro__isnull=True).values_list('pk', flat=True))
+    if faltando:
+        recalcular(faltando)
@@ -35,6 +35,9 @@ class MercadoPagoService:
         # Use sandbox se em desenvolvimento
         self.is_sandbox = settings.DEBUG or not self.access_token
         self.base_url = self.SANDBOX_URL if self.is_sandbox else self.BASE_URL
+        # Gateway falso dos testes de carga (dashboard.fake_mercadopago)
+        if settings.MERCADO_PAGO_API_URL.rstrip('/') != self.BASE_URL:
+            self.base_url = settings.MERCADO_PAGO_API_URL.rstrip('/')
     
     def criar_preferencia_pagamento(self, inscricao_id, cliente_nome, cliente_email, valor, metodo=''):
         """
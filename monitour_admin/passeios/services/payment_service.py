@@ -16,6 +16,26 @@ try:
 except ImportError:
     logger.warning("Mercado Pago SDK não instalado. Execute: pip install mercado-pago-sdk")
 
+MERCADO_PAGO_DEFAULT_API_URL = "https://api.mercadopago.com"
+
+
+def _http_client():
+    """
+    HttpClient do SDK apontando para MERCADO_PAGO_API_URL quando ela não é a
+    API oficial (ex: dashboard.fake_mercadopago nos testes de carga).
+    """
+    api_url = settings.MERCADO_PAGO_API_URL.rstrip('/')
+    if api_url == MERCADO_PAGO_DEFAULT_API_URL:
+        return None
+    from mercadopago.http import HttpClient
+
+    class ApiUrlHttpClient(HttpClient):
+        def request(self, method, url, maxretries=None, **kwargs):
+            url = url.replace(MERCADO_PAGO_DEFAULT_API_URL, api_url, 1)
+            return super().request(method, url, maxretries, **kwargs)
+
+    return ApiUrlHttpClient()
+
 
 class MercadoPagoService:
     """
@@ -27,7 +47,7 @@ class MercadoPagoService:
         self.access_token = settings.MERCADO_PAGO_ACCESS_TOKEN
         self.public_key = settings.MERCADO_PAGO_PUBLIC_KEY
         try:
-            self.sdk = mercadopago.SDK(self.access_token)
+            self.sdk = mercadopago.SDK(self.access_token, http_client=_http_client())
         except NameError:
             logger.error("Mercado Pago SDK não carregado. Instale: pip install mercado-pago-sdk")
             raise
@@ -59,7 +79,7 @@ class MercadoPagoService:
             "items": [
                 {
                     "title": f"{inscricao.pacote.passeio.titulo}",
-                    "description": f"Passeio de {inscricao.pacote.data_ida.strftime('%d/%m/%Y')}",
+                    "description": f"Passeio de {inscricao.pacote.passeio.data_ida.strftime('%d/%m/%Y')}",
                     "picture_url": "https://www.mercadopago.com/img/home/logoMP3.gif",
                     "category_id": "art",
                     "quantity": 1,
@@ -1,11 +1,15 @@
-from django.db.models.signals import post_save, post_delete
+from django.db.models.signals import post_save, post_delete, pre_save, pre_delete
 from django.dispatch import receiver
-from django.core.mail import send_mail
 from django.db import models
 from django.conf import settings
 from decimal import Decimal
+import logging
 import uuid
-from .models import Passeio, VeiculoPasseio, Inscricao, Pagamento
+from dashboard import outbox
+from .models import Passeio, VeiculoPasseio, Inscricao, Pagamento, Pacote, Cotacao, GastoPasseio, PasseioResumoFinanceiro, RelatorioPDF
+from . import margens, resumos
+
+logger = logging.getLogger(__name__)
 
 @receiver(post_save, sender=Passeio)
 def criar_ou_atualizar_veiculo_passeio(sender, instance, created, **kwargs):
@@ -51,19 +55,25 @@ def verificar_ponto_de_equilibrio(sender, instance, created, **kwargs):
 
         # Verifica se atingiu ou ultrapassou o ponto de equilíbrio
         if total_inscricoes >= lotacao_break_even:
-            # Envia o e-mail (com tratamento de erro para desenvolvimento)
-            try:
-                subject = f"Ponto de Equilibrio Atingido: {passeio.titulo}"
-                message = f"Olá!\n\nO passeio '{passeio.titulo}' acaba de atingir seu ponto de equilibrio com {total_inscricoes} inscricoes.\n\nA partir de agora, cada nova inscricao representa lucro!\n\nParabens!"
-                send_mail(subject, message, settings.DEFAULT_FROM_EMAIL, [settings.EMAIL_HOST_USER])
-            except Exception as e:
-                # Em desenvolvimento, falha silenciosa no envio de email
-                if settings.DEBUG:
-                    import logging
-                    logger = logging.getLogger(__name__)
-                    logger.warning(f"Falha ao enviar email de equilibrio: {str(e)}")
-                else:
-                    raise
+            # Sem ADMIN_ALERT_EMAILS o alerta vai para a caixa do próprio sistema
+            destinatarios = list(settings.ALERT_EMAILS)
+            if not destinatarios and settings.EMAIL_HOST_USER:
+                destinatarios = [settings.EMAIL_HOST_USER]
+            if not destinatarios:
+                # Fica pendente: sai na próxima inscrição depois de configurar os destinatários
+                logger.warning(
+                    "Passeio '%s' atingiu o ponto de equilíbrio, mas não há destinatários para o alerta "
+                    "(ADMIN_ALERT_EMAILS ou EMAIL_HOST_USER)", passeio.titulo,
+                )
+                return
+
+            # Coloca o e-mail na fila junto com a inscrição; o envio fica com o
+            # run_mail_worker, então uma falha de SMTP não impede mais o save
+            outbox.enqueue(
+                subject=f"Ponto de Equilibrio Atingido: {passeio.titulo}",
+                body=f"Olá!\n\nO passeio '{passeio.titulo}' acaba de atingir seu ponto de equilibrio com {total_inscricoes} inscricoes.\n\nA partir de agora, cada nova inscricao representa lucro!\n\nParabens!",
+                to=destinatarios,
+            )
 
             # Marca o alerta como enviado para não repetir
             passeio.alerta_equilibrio_enviado = True
@@ -95,4 +105,111 @@ def atualizar_status_pagamento_inscricao(sender, instance, **kwargs):
     else:
         inscricao.status_pagamento = 'aguardando'
     
-    inscricao.save(update_fields=['status_pagamento'])
\ No newline at end of file
+    inscricao.save(update_fields=['status_pagamento'])
+
+# --- Resumo financeiro do passeio (atualização incremental, ver passeios.resumos) ---
+
+@receiver(post_save, sender=Passeio)
+def criar_resumo_financeiro(sender, instance, created, raw=False, **kwargs):
+    """Todo passeio novo nasce com o seu resumo financeiro zerado."""
+    if created and not raw:
+        PasseioResumoFinanceiro.objects.get_or_create(passeio=instance)
+
+
+@receiver([pre_save, pre_delete], sender=Inscricao)
+@receiver([pre_save, pre_delete], sender=Pagamento)
+@receiver([pre_save, pre_delete], sender=Cotacao)
+@receiver([pre_save, pre_delete], sender=GastoPasseio)
+def guardar_contribuicao_anterior(sender, instance, raw=False, **kwargs):
+    """Lê o que a linha somava no resumo antes de ser alterada ou excluída."""
+    if not raw and not instance._state.adding:
+        instance._resumo_anterior = resumos.contribuicao(instance)
+
+
+@receiver(post_save, sender=Inscricao)
+@receiver(post_save, sender=Pagamento)
+@receiver(post_save, sender=Cotacao)
+@receiver(post_save, sender=GastoPasseio)
+def atualizar_resumo_financeiro(sender, instance, raw=False, **kwargs):
+    """Aplica ao resumo a diferença entre a contribuição anterior e a atual."""
+    anterior = instance.__dict__.pop('_resumo_anterior', None)
+    if raw:
+        return
+    atual = resumos.contribuicao(instance)
+    if sender is Inscricao and anterior and atual and anterior[0] != atual[0]:
+        # A inscrição mudou de passeio e levou os pagamentos junto
+        resumos.recalcular([anterior[0], atual[0]])
+    else:
+        resumos.aplicar(anterior, atual)
+    if anterior != atual:
+        _atualizar_margens(sender, anterior, atual)
+
+
+@receiver(post_delete, sender=Inscricao)
+@receiver(post_delete, sender=Pagamento)
+@receiver(post_delete, sender=Cotacao)
+@receiver(post_delete, sender=GastoPasseio)
+def descontar_do_resumo_financeiro(sender, instance, **kwargs):
+    """Retira do resumo o que a linha excluída somava."""
+    anterior = instance.__dict__.pop('_resumo_anterior', None)
+    resumos.aplicar(anterior, None)
+    _atualizar_margens(sender, anterior, None)
+
+
+def _atualizar_margens(sender, anterior, atual):
+    """Receita ou custo de um passeio já realizado mudou: refaz as margens do destino dele."""
+    if sender is not Pagamento:  # pagamentos não entram na margem
+        margens.atualizar_realizados(parte[0] for parte in (anterior, atual) if parte)
+
+
+@receiver(pre_save, sender=Pacote)
+def guardar_pacote_anterior(sender, instance, raw=False, **kwargs):
+    if not raw and not instance._state.adding:
+        instance._resumo_anterior = Pacote.objects.filter(pk=instance.pk).values_list('passeio_id', 'preco').first()
+
+
+@receiver(post_save, sender=Pacote)
+def recalcular_resumo_do_pacote(sender, instance, raw=False, **kwargs):
+    """Preço ou passeio do pacote alterado muda a receita de todas as inscrições dele."""
+    anterior = instance.__dict__.pop('_resumo_anterior', None)
+    if not raw and anterior and anterior != (instance.passeio_id, instance.preco):
+        resumos.recalcular({anterior[0], instance.passeio_id})
+        margens.atualizar_realizados({anterior[0], instance.passeio_id})
+
+
+# --- Margens históricas por destino (ver passeios.margens) ---
+
+@receiver(pre_save, sender=Passeio)
+def guardar_situacao_anterior(sender, instance, raw=False, **kwargs):
+    if not raw and not instance._state.adding:
+        instance._situacao_anterior = Passeio._base_manager.filter(pk=instance.pk).values_list(
+            'status', 'cidade_destino', 'uf_destino', 'tipo_veiculo_id'
+        ).first()
+
+
+@receiver(post_save, sender=Passeio)
+def atualizar_margens_do_destino(sender, instance, raw=False, **kwargs):
+    """
+    Passeio que entra ou sai de 'realizado', muda de destino ou (já realizado)
+    troca de veículo, cujo custo base entra no custo, muda as margens do destino.
+    """
+    anterior = instance.__dict__.pop('_situacao_anterior', None)
+    atual = (instance.status, instance.cidade_destino, instance.uf_destino, instance.tipo_veiculo_id)
+    if raw or anterior == atual:
+        return
+    destinos = {situacao[1:3] for situacao in (anterior, atual) if situacao and situacao[0] == 'realizado'}
+    if destinos:
+        margens.atualizar(destinos)
+
+
+@receiver(post_delete, sender=Passeio)
+def retirar_das_margens_do_destino(sender, instance, **kwargs):
+    if instance.status == 'realizado':
+        margens.atualizar([(instance.cidade_destino, instance.uf_destino)])
+
+
+@receiver(post_delete, sender=RelatorioPDF)
+def apagar_arquivo_do_relatorio(sender, instance, **kwargs):
+    """Versões antigas e relatórios de passeios excluídos não deixam PDFs no storage."""
+    if instance.arquivo:
+        instance.arquivo.delete(save=False)
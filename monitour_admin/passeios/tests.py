@@ -1,3 +1,607 @@
-from django.test import TestCase
+import random
+import shutil
+import sys
+import tempfile
+import types
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.template.loader import get_template
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import resolve, reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api.pagination import InscricaoPagination
+from cadastros.models import Cliente, ContatoFornecedor, Fornecedor, TipoVeiculo
+from dashboard.models import OutgoingEmail
+
+from .admin import PasseioAdmin
+from . import margens, pdf, relatorios, resumos, views
+from .models import (
+    Assento, Cotacao, GastoPasseio, Inscricao, MargemDestino, Pacote, Pagamento, Passeio, PasseioResumoFinanceiro, RelatorioPDF,
+    VeiculoPasseio,
+)
+
+
+class PasseioAdminQueryTests(TestCase):
+    """As colunas da lista de passeios usam dados carregados pelo get_queryset."""
+
+    @classmethod
+    def setUpTestData(cls):
+        partida = timezone.now() + timedelta(days=30)
+        transporte = Fornecedor.objects.create(nome_fantasia='Viação', tipo='transporte')
+        for index in range(3):
+            passeio = Passeio.objects.create(
+                titulo=f'Passeio {index}', data_ida=partida, data_volta=partida + timedelta(days=2),
+                fornecedor_transporte=transporte,
+            )
+            pacote = Pacote.objects.create(passeio=passeio, titulo='Completo', preco=500)
+            for numero in range(index):
+                cliente = Cliente.objects.create(nome=f'Cliente {index}-{numero}', cpf=f'{index}{numero}'.zfill(11))
+                Inscricao.objects.create(pacote=pacote, cliente=cliente)
+
+    def test_ver_inscricoes_link_sem_consulta_por_linha(self):
+        model_admin = PasseioAdmin(Passeio, admin.site)
+        passeios = list(model_admin.get_queryset(RequestFactory().get('/')).order_by('titulo'))
+        with self.assertNumQueries(0):
+            links = [model_admin.ver_inscricoes_link(passeio) for passeio in passeios]
+        self.assertEqual([link.split('>')[1].split(' ')[0] for link in links], ['0', '1', '2'])
+
+
+class AlertaEquilibrioTests(TestCase):
+    """O alerta de ponto de equilíbrio vai para ALERT_EMAILS (ou EMAIL_HOST_USER) e fica pendente sem destinatários."""
+
+    def setUp(self):
+        partida = timezone.now() + timedelta(days=30)
+        passeio = Passeio.objects.create(
+            titulo='Serra', data_ida=partida, data_volta=partida + timedelta(days=2),
+            fornecedor_transporte=Fornecedor.objects.create(nome_fantasia='Viação', tipo='transporte'),
+        )
+        self.pacote = Pacote.objects.create(passeio=passeio, titulo='Completo', preco=500)
+        self.cliente = Cliente.objects.create(nome='Cliente', cpf='1'.zfill(11))
+
+    @override_settings(ALERT_EMAILS=[], EMAIL_HOST_USER='')
+    def test_sem_destinatarios_avisa_e_nao_enfileira(self):
+        with self.assertLogs('passeios.signals', 'WARNING') as logs:
+            Inscricao.objects.create(pacote=self.pacote, cliente=self.cliente)
+        self.assertIn('ADMIN_ALERT_EMAILS', logs.output[0])
+        self.assertFalse(OutgoingEmail.objects.exists())
+        self.assertFalse(Passeio.objects.get().alerta_equilibrio_enviado)
+
+    @override_settings(ALERT_EMAILS=[], EMAIL_HOST_USER='sistema@example.com')
+    def test_sem_alert_emails_usa_email_host_user(self):
+        Inscricao.objects.create(pacote=self.pacote, cliente=self.cliente)
+        self.assertEqual(list(OutgoingEmail.objects.values_list('to', flat=True)), [['sistema@example.com']])
+
+    @override_settings(ALERT_EMAILS=['financeiro@example.com'])
+    def test_enfileira_para_os_destinatarios(self):
+        Inscricao.objects.create(pacote=self.pacote, cliente=self.cliente)
+        self.assertEqual(list(OutgoingEmail.objects.values_list('to', flat=True)), [['financeiro@example.com']])
+        self.assertTrue(Passeio.objects.get().alerta_equilibrio_enviado)
+
+
+@mock.patch.object(InscricaoPagination, 'page_size', 2)
+class InscricaoPaginationTests(TestCase):
+    """GET /passeios/api/inscricoes/ pagina por cursor sobre (-data_inscricao, -id)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        partida = timezone.now() + timedelta(days=30)
+        passeio = Passeio.objects.create(
+            titulo='Serra', data_ida=partida, data_volta=partida + timedelta(days=2),
+            fornecedor_transporte=Fornecedor.objects.create(nome_fantasia='Viação', tipo='transporte'),
+        )
+        pacote = Pacote.objects.create(passeio=passeio, titulo='Completo', preco=500)
+        for index in range(5):
+            cliente = Cliente.objects.create(nome=f'Cliente {index}', cpf=str(index).zfill(11))
+            Inscricao.objects.create(pacote=pacote, cliente=cliente)
+        # Três inscrições no mesmo instante: o id desempata
+        Inscricao.objects.filter(cliente__nome__in=['Cliente 1', 'Cliente 2', 'Cliente 3']).update(
+            data_inscricao=timezone.now() - timedelta(days=1),
+        )
+        cls.user = get_user_model().objects.create_user('operador')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = reverse('passeios:api_inscricoes')
+
+    def ids(self, response):
+        return [inscricao['id'] for inscricao in response.data['inscricoes']]
+
+    def test_percorre_as_paginas_nos_dois_sentidos(self):
+        response = self.client.get(self.url)
+        self.assertIsNone(response.data['previous'])
+        paginas = [self.ids(response)]
+        while response.data['next']:
+            response = self.client.get(response.data['next'])
+            paginas.append(self.ids(response))
+        esperado = list(Inscricao.objects.order_by('-data_inscricao', '-id').values_list('id', flat=True))
+        self.assertEqual([pk for pagina in paginas for pk in pagina], esperado)
+        self.assertEqual([len(pagina) for pagina in paginas], [2, 2, 1])
+
+        # De volta da última página até a primeira
+        voltando = [paginas[-1]]
+        while response.data['previous']:
+            response = self.client.get(response.data['previous'])
+            voltando.insert(0, self.ids(response))
+        self.assertEqual(voltando, paginas)
+
+    def test_cursor_invalido(self):
+        self.assertEqual(self.client.get(self.url, {'cursor': 'nao-e-um-cursor'}).status_code, 404)
+
+    def test_paginacao_numerada_continua_disponivel(self):
+        response = self.client.get(self.url, {'page': 2})
+        self.assertEqual((response.data['count'], response.data['total_pages']), (5, 1))
+
+
+class PasseiosUrlsTests(TestCase):
+    """As rotas de passeios ficam em /passeios/ (caminhos usados pelo run_load_test)."""
+
+    def test_rotas_montadas(self):
+        self.assertEqual(reverse('passeios:venda_principal'), '/passeios/venda/')
+        self.assertEqual(reverse('passeios:checkout', args=[1]), '/passeios/venda/checkout/1/')
+        self.assertEqual(resolve('/passeios/api/webhook/mercadopago/').view_name, 'passeios:webhook_mp')
+
+
+class CustoTotalTests(TestCase):
+    """with_custo_total() confere com o cálculo manual, sem multiplicar valores pelos JOINs."""
+
+    @classmethod
+    def setUpTestData(cls):
+        rng = random.Random(16)
+        partida = timezone.now() + timedelta(days=30)
+        transporte = Fornecedor.objects.create(nome_fantasia='Viação', tipo='transporte')
+        hotel = Fornecedor.objects.create(nome_fantasia='Hotel', tipo='hospedagem')
+        veiculos = [None] + [
+            TipoVeiculo.objects.create(nome=f'Veículo {index}', custo_base_transporte=Decimal(1500 * index))
+            for index in range(1, 4)
+        ]
+        clientes = [Cliente.objects.create(nome=f'Cliente {index}', cpf=str(index).zfill(11)) for index in range(12)]
+        tipos = [tipo for tipo, _ in Cotacao.TIPO_SERVICO_COTADO]
+        status = [opcao for opcao, _ in Cotacao.STATUS_COTACAO]
+
+        cotacoes, gastos = [], []
+        for index in range(40):
+            passeio = Passeio.objects.create(
+                titulo=f'Passeio {index}', data_ida=partida, data_volta=partida + timedelta(days=2),
+                fornecedor_transporte=transporte, tipo_veiculo=rng.choice(veiculos),
+            )
+            # Vários pacotes e inscrições: multiplicariam as somas num JOIN
+            for numero in range(rng.randint(0, 3)):
+                pacote = Pacote.objects.create(passeio=passeio, titulo=f'Pacote {numero}', preco=Decimal(rng.randint(200, 900)))
+                for cliente in rng.sample(clientes, rng.randint(0, 4)):
+                    Inscricao.objects.create(pacote=pacote, cliente=cliente)
+            cotacoes += [
+                Cotacao(
+                    passeio=passeio, fornecedor=rng.choice([transporte, hotel]), tipo_servico=rng.choice(tipos),
+                    status=rng.choice(status), valor_cotado=Decimal(rng.randint(100, 500000)) / 100,
+                )
+                for _ in range(rng.randint(0, 8))
+            ]
+            gastos += [
+                GastoPasseio(passeio=passeio, descricao='Gasto', tipo_gasto='outro', valor=Decimal(rng.randint(100, 90000)) / 100)
+                for _ in range(rng.randint(0, 6))
+            ]
+        Cotacao.objects.bulk_create(cotacoes)
+        GastoPasseio.objects.bulk_create(gastos)
+
+    def custo_manual(self, passeio):
+        aceitas = [cotacao for cotacao in Cotacao.objects.filter(passeio=passeio) if cotacao.status == 'aceita']
+        transporte = [cotacao.valor_cotado for cotacao in aceitas if cotacao.tipo_servico == 'transporte']
+        if not transporte and passeio.tipo_veiculo:
+            transporte = [passeio.tipo_veiculo.custo_base_transporte]
+        return (
+            sum(cotacao.valor_cotado for cotacao in aceitas if cotacao.tipo_servico != 'transporte')
+            + sum(gasto.valor for gasto in GastoPasseio.objects.filter(passeio=passeio))
+            + sum(transporte)
+        )
+
+    def test_totais_conferem_com_calculo_manual(self):
+        passeios = list(Passeio.objects.with_custo_total().order_by('pk'))
+        self.assertEqual(len(passeios), Passeio.objects.count())
+        for passeio in passeios:
+            with self.subTest(passeio=passeio.titulo):
+                self.assertEqual(passeio.custo_total_previsto, self.custo_manual(passeio))
+
+    def test_cobre_os_casos_de_transporte(self):
+        # A massa precisa ter passeios com cotação de transporte aceita, com custo base e sem veículo
+        transporte_aceito = Cotacao.objects.filter(status='aceita', tipo_servico='transporte').values('passeio')
+        sem_cotacao = Passeio.objects.exclude(pk__in=transporte_aceito)
+        self.assertTrue(Passeio.objects.filter(pk__in=transporte_aceito).exists())
+        self.assertTrue(sem_cotacao.filter(tipo_veiculo__isnull=False).exists())
+        self.assertTrue(sem_cotacao.filter(tipo_veiculo__isnull=True).exists())
+
+    def test_uma_consulta_para_a_lista(self):
+        with self.assertNumQueries(1):
+            totais = [passeio.custo_total_previsto for passeio in Passeio.objects.with_custo_total()]
+        self.assertEqual(len(totais), 40)
+
+    def test_sem_anotacao_usa_o_mesmo_calculo(self):
+        passeio = Passeio.objects.order_by('pk')[3]
+        with self.assertNumQueries(1):
+            custo = passeio.custo_total_previsto
+        self.assertEqual(custo, self.custo_manual(passeio))
+
+    def test_admin_usa_o_mesmo_custo(self):
+        model_admin = PasseioAdmin(Passeio, admin.site)
+        passeios = list(model_admin.get_queryset(RequestFactory().get('/')).order_by('pk'))
+        self.assertEqual(len(passeios), 40)
+        with self.assertNumQueries(0):
+            colunas = [model_admin.get_custo_total(passeio) for passeio in passeios]
+        self.assertEqual(colunas, [f'R$ {self.custo_manual(passeio):.2f}' for passeio in passeios])
+
+
+class ResumoFinanceiroTests(TestCase):
+    """As atualizações incrementais deixam o resumo igual ao recálculo completo."""
+
+    @classmethod
+    def setUpTestData(cls):
+        partida = timezone.now() + timedelta(days=30)
+        cls.transporte = Fornecedor.objects.create(nome_fantasia='Viação', tipo='transporte')
+        veiculo = TipoVeiculo.objects.create(nome='Van', custo_base_transporte=Decimal('1200.00'))
+        cls.passeios = [
+            Passeio.objects.create(
+                titulo=f'Passeio {index}', data_ida=partida, data_volta=partida + timedelta(days=1),
+                fornecedor_transporte=cls.transporte, tipo_veiculo=veiculo,
+            )
+            for index in range(2)
+        ]
+        cls.pacotes = [Pacote.objects.create(passeio=passeio, titulo='Completo', preco=Decimal('300.00')) for passeio in cls.passeios]
+        cls.clientes = [Cliente.objects.create(nome=f'Cliente {index}', cpf=str(index).zfill(11)) for index in range(4)]
+
+    def assertResumosConsistentes(self):
+        campos = ['passeio_id'] + resumos.CAMPOS
+        incrementais = list(PasseioResumoFinanceiro.objects.order_by('pk').values_list(*campos))
+        resumos.recalcular()
+        self.assertEqual(incrementais, list(PasseioResumoFinanceiro.objects.order_by('pk').values_list(*campos)))
+
+    def test_passeio_novo_tem_resumo_zerado(self):
+        resumo = self.passeios[0].resumo_financeiro
+        self.assertEqual((resumo.total_inscricoes, resumo.receita_prevista), (0, 0))
+        self.assertEqual(resumo.custo_total_previsto, Decimal('1200.00'))
+
+    def test_alteracoes_e_exclusoes(self):
+        inscricoes = [Inscricao.objects.create(pacote=self.pacotes[0], cliente=cliente) for cliente in self.clientes]
+        pagamento = Pagamento.objects.create(inscricao=inscricoes[0], valor=Decimal('100.00'))
+        Pagamento.objects.create(inscricao=inscricoes[1], valor=Decimal('300.00'))
+        cotacao = Cotacao.objects.create(
+            passeio=self.passeios[0], fornecedor=self.transporte, tipo_servico='transporte', valor_cotado=Decimal('900.00'),
+        )
+        gasto = GastoPasseio.objects.create(passeio=self.passeios[0], descricao='Pedágio', tipo_gasto='taxas', valor=Decimal('80.00'))
+        self.assertResumosConsistentes()
+
+        cotacao.status = 'aceita'
+        cotacao.save()
+        pagamento.valor = Decimal('150.00')
+        pagamento.save()
+        self.assertResumosConsistentes()
+        resumo = PasseioResumoFinanceiro.objects.get(passeio=self.passeios[0])
+        self.assertEqual(resumo.receita_prevista, Decimal('1200.00'))
+        self.assertEqual(resumo.total_arrecadado, Decimal('450.00'))
+        self.assertEqual(resumo.custo_total_previsto, Passeio.objects.with_custo_total().get(pk=self.passeios[0].pk).custo_total_previsto)
+
+        # Inscrição trocada de passeio leva os pagamentos junto
+        inscricoes[0].pacote = self.pacotes[1]
+        inscricoes[0].save()
+        self.pacotes[1].preco = Decimal('450.00')
+        self.pacotes[1].save()
+        self.assertResumosConsistentes()
+
+        inscricoes[1].delete()
+        gasto.delete()
+        cotacao.delete()
+        self.assertResumosConsistentes()
+        resumo = PasseioResumoFinanceiro.objects.get(passeio=self.passeios[0])
+        self.assertEqual((resumo.total_inscricoes, resumo.total_arrecadado), (2, 0))
+
+    def test_recalcular_cria_os_que_faltam(self):
+        PasseioResumoFinanceiro.objects.all().delete()
+        Inscricao.objects.create(pacote=self.pacotes[1], cliente=self.clientes[0])
+        resumos.garantir(Passeio.objects.all())
+        self.assertEqual(PasseioResumoFinanceiro.objects.get(passeio=self.passeios[1]).total_inscricoes, 1)
+        self.assertResumosConsistentes()
+
+    def test_exclusao_do_passeio(self):
+        Cotacao.objects.create(
+            passeio=self.passeios[1], fornecedor=self.transporte, tipo_servico='guia',
+            status='aceita', valor_cotado=Decimal('200.00'),
+        )
+        self.passeios[1].delete()
+        self.assertFalse(PasseioResumoFinanceiro.objects.filter(passeio_id=self.passeios[1].pk).exists())
+
+
+class MargemDestinoTests(TestCase):
+    """Margens históricas por destino, atualizadas quando um passeio é realizado."""
+
+    @classmethod
+    def setUpTestData(cls):
+        partida = timezone.now() - timedelta(days=60)
+        cls.transporte = Fornecedor.objects.create(nome_fantasia='Viação', tipo='transporte')
+        clientes = [Cliente.objects.create(nome=f'Cliente {index}', cpf=str(index).zfill(11)) for index in range(4)]
+        cls.passeios = []
+        # Receita = 4 x 500; custo variável: margens de 80%, 50%, 20% e -10%
+        for custo in (400, 1000, 1600, 2200):
+            passeio = Passeio.objects.create(
+                titulo=f'Bonito {custo}', cidade_destino='Bonito', uf_destino='MS',
+                data_ida=partida, data_volta=partida + timedelta(days=2), fornecedor_transporte=cls.transporte,
+            )
+            pacote = Pacote.objects.create(passeio=passeio, titulo='Completo', preco=Decimal('500.00'))
+            for cliente in clientes:
+                Inscricao.objects.create(pacote=pacote, cliente=cliente)
+            GastoPasseio.objects.create(passeio=passeio, descricao='Custos', tipo_gasto='outro', valor=Decimal(custo))
+            cls.passeios.append(passeio)
+
+    def realizar(self, *passeios):
+        for passeio in passeios:
+            passeio.status = 'realizado'
+            passeio.save()
+
+    def test_atualiza_ao_marcar_realizado(self):
+        self.assertFalse(MargemDestino.objects.exists())
+        self.realizar(*self.passeios[:3])
+        estatisticas = MargemDestino.objects.get(cidade_destino='Bonito', uf_destino='MS')
+        self.assertEqual(estatisticas.amostras, 3)
+        self.assertEqual(estatisticas.media, Decimal('50.00'))
+        self.assertEqual(estatisticas.mediana, Decimal('50.00'))
+        self.assertEqual(estatisticas.desvio_padrao, Decimal('30.00'))
+        self.assertEqual((estatisticas.minima, estatisticas.maxima), (Decimal('20.00'), Decimal('80.00')))
+
+        self.passeios[0].status = 'cancelado'
+        self.passeios[0].save()
+        self.assertEqual(MargemDestino.objects.get().media, Decimal('35.00'))
+
+    def test_custo_e_receita_de_passeio_realizado_atualizam_as_margens(self):
+        self.realizar(*self.passeios[:3])
+        passeio = self.passeios[0]
+        # Margem de 80% vira 50%: custo de 400 + 600 sobre receita de 2000
+        gasto = GastoPasseio.objects.create(passeio=passeio, descricao='Guia', tipo_gasto='outro', valor=Decimal('600'))
+        self.assertEqual(MargemDestino.objects.get().maxima, Decimal('50.00'))
+
+        gasto.delete()
+        Cotacao.objects.create(
+            passeio=passeio, fornecedor=self.transporte, tipo_servico='hospedagem', status='aceita',
+            valor_cotado=Decimal('600'),
+        )
+        self.assertEqual(MargemDestino.objects.get().maxima, Decimal('50.00'))
+
+        # Receita cai para 1500 (custo 1000): margem de 33,33%
+        Inscricao.objects.filter(pacote__passeio=passeio).first().delete()
+        self.assertEqual(MargemDestino.objects.get().maxima, Decimal('50.00'))
+        self.assertEqual(MargemDestino.objects.get().minima, Decimal('20.00'))
+        self.assertEqual(MargemDestino.objects.get().media, Decimal('34.44'))
+
+        pacote = passeio.pacotes.get()
+        pacote.preco = Decimal('1000.00')
+        pacote.save()
+        # Receita de 3000 e custo de 1000: 66,67%
+        self.assertEqual(MargemDestino.objects.get().maxima, Decimal('66.67'))
+
+    def test_passeio_nao_realizado_nao_mexe_nas_margens(self):
+        self.realizar(self.passeios[1])
+        antes = MargemDestino.objects.get().atualizado_em
+        GastoPasseio.objects.create(passeio=self.passeios[0], descricao='Guia', tipo_gasto='outro', valor=Decimal('600'))
+        estatisticas = MargemDestino.objects.get()
+        self.assertEqual((estatisticas.amostras, estatisticas.media), (1, Decimal('50.00')))
+        self.assertEqual(estatisticas.atualizado_em, antes)
+
+    def test_sugestao_le_as_estatisticas_guardadas(self):
+        self.realizar(*self.passeios[:3])
+        with self.assertNumQueries(1):
+            sugestao = margens.sugestao(self.passeios[3])
+        self.assertEqual((sugestao['media'], sugestao['amostras']), (Decimal('50.00'), 3))
+
+    def test_sugestao_de_passeio_realizado_nao_conta_ele_mesmo(self):
+        self.realizar(*self.passeios)
+        sugestao = margens.sugestao(self.passeios[3])
+        self.assertEqual((sugestao['media'], sugestao['amostras']), (Decimal('50.00'), 3))
+        self.assertEqual(MargemDestino.objects.get().amostras, 4)
+
+    def test_uma_consulta_para_as_margens(self):
+        self.realizar(*self.passeios)
+        with self.assertNumQueries(1):
+            por_destino = margens.margens_por_destino(Passeio.objects.filter(status='realizado'))
+        self.assertEqual(sorted(por_destino[('Bonito', 'MS')]), [-10, 20, 50, 80])
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class RelatorioPDFTests(TestCase):
+    """Relatórios em PDF: versão dos dados, fila do run_pdf_worker e download do arquivo guardado."""
+
+    @classmethod
+    def setUpTestData(cls):
+        partida = timezone.now() + timedelta(days=30)
+        cls.transporte = Fornecedor.objects.create(nome_fantasia='Viação', tipo='transporte')
+        cls.passeio = Passeio.objects.create(
+            titulo='Serra', data_ida=partida, data_volta=partida + timedelta(days=2), fornecedor_transporte=cls.transporte,
+            tipo_veiculo=TipoVeiculo.objects.create(nome='Van', fileiras=4, capacidade=15, layout_colunas='2-2'),
+        )
+        cls.pacote = Pacote.objects.create(passeio=cls.passeio, titulo='Completo', preco=500)
+        cls.clientes = [Cliente.objects.create(nome=f'Cliente {index}', cpf=str(index).zfill(11)) for index in range(3)]
+        for cliente in cls.clientes[:2]:
+            Inscricao.objects.create(pacote=cls.pacote, cliente=cliente)
+        cls.usuario = get_user_model().objects.create_user('staff', password='x', is_staff=True)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(settings.MEDIA_ROOT, ignore_errors=True)
+
+    def pedir(self, view, **params):
+        request = RequestFactory().get(f'/relatorio/{self.passeio.pk}/', params)
+        request.user = self.usuario
+        return view(request, self.passeio.pk)
+
+    def gerar_lote(self):
+        # O WeasyPrint depende do Pango do sistema; aqui interessa a fila, não o PDF
+        with mock.patch.object(relatorios, 'renderizar', return_value=b'%PDF-1.7 teste'):
+            return relatorios.gerar_lote()
+
+    def test_versao_muda_com_os_dados_do_relatorio(self):
+        versao = relatorios.versao('passageiros', self.passeio.pk)
+        self.assertEqual(relatorios.versao('passageiros', self.passeio.pk), versao)
+
+        # Cotações não aparecem na lista de passageiros
+        Cotacao.objects.create(passeio=self.passeio, fornecedor=self.transporte, tipo_servico='transporte', valor_cotado=900)
+        self.assertEqual(relatorios.versao('passageiros', self.passeio.pk), versao)
+
+        versoes = {versao}
+        inscricao = Inscricao.objects.create(pacote=self.pacote, cliente=self.clientes[2])
+        versoes.add(relatorios.versao('passageiros', self.passeio.pk))
+        self.clientes[0].telefone = '11 99999-0000'
+        self.clientes[0].save()
+        versoes.add(relatorios.versao('passageiros', self.passeio.pk))
+        inscricao.delete()
+        versoes.add(relatorios.versao('passageiros', self.passeio.pk))
+        self.assertEqual(len(versoes), 4)
+        self.assertIsNone(relatorios.versao('passageiros', 0))
+
+    def test_versao_muda_com_fornecedores_e_veiculos(self):
+        versoes = [relatorios.versao('passageiros', self.passeio.pk)]
+        self.transporte.nome_fantasia = 'Viação Serra'
+        self.transporte.save()
+        versoes.append(relatorios.versao('passageiros', self.passeio.pk))
+        contato = ContatoFornecedor.objects.create(fornecedor=self.transporte, nome='Motorista', telefone='+5511999990000')
+        versoes.append(relatorios.versao('passageiros', self.passeio.pk))
+        contato.delete()
+        versoes.append(relatorios.versao('passageiros', self.passeio.pk))
+        self.passeio.tipo_veiculo.layout_colunas = '2-1'
+        self.passeio.tipo_veiculo.save()
+        versoes.append(relatorios.versao('passageiros', self.passeio.pk))
+        onibus = TipoVeiculo.objects.create(nome='Ônibus', fileiras=12, capacidade=46)
+        VeiculoPasseio.objects.create(passeio=self.passeio, tipo_veiculo=onibus, identificacao='Veículo Principal')
+        versoes.append(relatorios.versao('passageiros', self.passeio.pk))
+        onibus.fileiras = 11
+        onibus.save()
+        versoes.append(relatorios.versao('passageiros', self.passeio.pk))
+        # Cada passo troca a versão (sem o contato, os dados voltam a ser os do passo 2)
+        self.assertTrue(all(anterior != atual for anterior, atual in zip(versoes, versoes[1:])))
+        self.assertEqual(versoes[3], versoes[1])
+        self.assertEqual(len(set(versoes)), 6)
+
+        hotel = Fornecedor.objects.create(nome_fantasia='Hotel', tipo='hospedagem')
+        Cotacao.objects.create(passeio=self.passeio, fornecedor=hotel, tipo_servico='hospedagem', valor_cotado=900)
+        versao = relatorios.versao('cotacoes', self.passeio.pk)
+        hotel.nome_fantasia = 'Hotel da Serra'
+        hotel.save()
+        self.assertNotEqual(relatorios.versao('cotacoes', self.passeio.pk), versao)
+
+    def test_pdf_gerado_na_fila_e_reaproveitado(self):
+        resposta = self.pedir(views.gerar_relatorio_passageiros)
+        self.assertEqual(resposta.status_code, 202)
+        self.assertEqual(self.pedir(views.gerar_relatorio_passageiros, formato='json').status_code, 202)
+        self.assertEqual(RelatorioPDF.objects.get().status, 'pending')
+
+        self.assertEqual(self.gerar_lote(), (1, 0, 0, 0))
+        relatorio = RelatorioPDF.objects.get()
+        self.assertEqual(relatorio.status, 'done')
+        self.assertEqual(relatorio.arquivo.name, f'relatorios/passageiros/{self.passeio.pk}/{relatorio.versao}.pdf')
+
+        with self.assertNumQueries(3):
+            resposta = self.pedir(views.gerar_relatorio_passageiros)
+        self.assertEqual(resposta.status_code, 200)
+        self.assertTrue(b''.join(resposta.streaming_content).startswith(b'%PDF'))
+        self.assertIn('attachment; filename="relatorio_Serra.pdf"', resposta['Content-Disposition'])
+
+        # Dados novos: nova versão na fila; quando ela fica pronta, o PDF antigo é apagado
+        Inscricao.objects.create(pacote=self.pacote, cliente=self.clientes[2])
+        self.assertEqual(self.pedir(views.gerar_relatorio_passageiros).status_code, 202)
+        self.assertEqual(self.gerar_lote(), (1, 0, 0, 0))
+        self.assertEqual(RelatorioPDF.objects.get().versao, relatorios.versao('passageiros', self.passeio.pk))
+        self.assertFalse(relatorio.arquivo.storage.exists(relatorio.arquivo.name))
+
+    def test_pedido_de_versao_antiga_e_descartado(self):
+        self.pedir(views.gerar_relatorio_cotacoes_pdf)
+        Cotacao.objects.create(passeio=self.passeio, fornecedor=self.transporte, tipo_servico='transporte', valor_cotado=900)
+        self.assertEqual(self.gerar_lote(), (0, 0, 0, 1))
+        self.assertFalse(RelatorioPDF.objects.exists())
+
+    def test_falhas_e_nova_tentativa(self):
+        self.pedir(views.gerar_relatorio_cotacoes_pdf)
+        with mock.patch.object(relatorios, 'renderizar', side_effect=OSError('sem fontes')):
+            self.assertEqual(relatorios.gerar_lote(), (0, 1, 0, 0))
+            # Adiado: só volta depois da espera
+            self.assertEqual(relatorios.gerar_lote(), (0, 0, 0, 0))
+            RelatorioPDF.objects.update(reservado_ate=None, tentativas=relatorios.MAX_TENTATIVAS - 1)
+            self.assertEqual(relatorios.gerar_lote(), (0, 0, 1, 0))
+
+        relatorio = RelatorioPDF.objects.get()
+        self.assertEqual((relatorio.status, relatorio.ultimo_erro), ('failed', 'OSError: sem fontes'))
+        self.assertEqual(self.pedir(views.gerar_relatorio_cotacoes_pdf).status_code, 202)
+        self.assertEqual(self.pedir(views.gerar_relatorio_cotacoes_pdf, tentar=1).status_code, 202)
+        relatorio.refresh_from_db()
+        self.assertEqual((relatorio.status, relatorio.tentativas), ('pending', 0))
+
+    def test_mapa_de_assentos_do_pdf(self):
+        veiculo = self.passeio.veiculos.select_related('tipo_veiculo').get()
+        Assento.objects.create(veiculo_passeio=veiculo, numero=3, cliente=self.clientes[0])
+
+        with self.assertNumQueries(1):
+            layout = relatorios.montar_layout_assentos(veiculo, com_dados_cliente=True)
+        numeros = [[[assento['numero'] for assento in grupo] for grupo in fileira['grupos']] for fileira in layout]
+        self.assertEqual(numeros, [[[1, 2], [3, 4]], [[5, 6], [7, 8]], [[9, 10], [11, 12]], [[13, 14], [15]]])
+        self.assertEqual(layout[0]['grupos'][1][0], {
+            'numero': 3, 'cliente_nome': 'Cliente 0', 'ocupado': True, 'cliente_id': self.clientes[0].pk,
+        })
+
+        html = get_template('passeios/relatorio_passageiros.html').render(relatorios._contexto_passageiros(self.passeio))
+        self.assertEqual(html.count('class="seat-number"'), 15)
+        self.assertIn('<span class="passenger-name">Cliente 0</span>', html)
+
+    def test_recursos_do_pdf_so_dos_arquivos_estaticos(self):
+        folha = pdf.caminho_estatico(pdf.base_url() + 'passeios/pdf/relatorio_passageiros.css')
+        self.assertTrue(folha.read_text(encoding='utf-8').startswith('/* Lista de passageiros'))
+        for url in (
+            'https://example.com/logo.png',
+            'file:///etc/passwd',
+            pdf.base_url() + '../../etc/passwd',
+            pdf.base_url() + 'passeios/pdf/nao_existe.css',
+        ):
+            with self.subTest(url=url), self.assertRaises(ValueError):
+                pdf.caminho_estatico(url)
+
+    def buscador_com(self, urls):
+        """buscador() montado sobre um weasyprint.urls falso (o WeasyPrint não carrega sem o Pango)."""
+        pdf.buscador.cache_clear()
+        self.addCleanup(pdf.buscador.cache_clear)
+        with mock.patch.dict(sys.modules, {'weasyprint': types.SimpleNamespace(urls=urls), 'weasyprint.urls': urls}):
+            return pdf.buscador()
+
+    def test_buscador_com_funcao_das_versoes_antigas(self):
+        urls = types.SimpleNamespace(default_url_fetcher=mock.Mock(return_value={'string': b'x', 'mime_type': 'image/png'}))
+        buscar = self.buscador_com(urls)
+        folha = buscar(pdf.base_url() + 'passeios/pdf/relatorio_passageiros.css', timeout=10)
+        self.assertEqual(folha['mime_type'], 'text/css')
+        self.assertTrue(folha['string'].startswith(b'/* Lista de passageiros'))
+        self.assertEqual(folha['redirected_url'], pdf.base_url() + 'passeios/pdf/relatorio_passageiros.css')
+
+        self.assertEqual(buscar('data:image/png;base64,eA==')['string'], b'x')
+        urls.default_url_fetcher.assert_called_once_with('data:image/png;base64,eA==')
+        with self.assertRaises(ValueError):
+            buscar('https://example.com/logo.png')
+
+    def test_buscador_com_urlfetcher(self):
+        class URLFetcher:
+            def __init__(self, allowed_protocols=None):
+                self.allowed_protocols = allowed_protocols
+
+            def fetch(self, url, headers=None):
+                return ('rede', url)
+
+            def __call__(self, url):
+                return self.fetch(url)
+
+        urls = types.SimpleNamespace(URLFetcher=URLFetcher, URLFetcherResponse=lambda url, body, headers: (url, body, headers))
+        buscar = self.buscador_com(urls)
+        self.assertEqual(buscar.allowed_protocols, {'file', 'data'})
+        url, body, headers = buscar(pdf.base_url() + 'passeios/pdf/relatorio_passageiros.css')
+        self.assertTrue(body.startswith(b'/* Lista de passageiros'))
+        self.assertEqual(headers, {'Content-Type': 'text/css'})
+        self.assertEqual(buscar('data:,x'), ('rede', 'data:,x'))
+        with self.assertRaises(ValueError):
+            buscar('file:///etc/passwd')
@@ -1,78 +1,57 @@
 from django.shortcuts import render
-from django.http import HttpResponse
-from django.template.loader import render_to_string
+from django.http import FileResponse
 import json
 from decimal import Decimal
 from django.db.models import Sum, F, DecimalField
 from django.shortcuts import get_object_or_404
-from weasyprint import HTML
 from django.contrib.admin.views.decorators import staff_member_required
 from django.http import JsonResponse
 from django.views.decorators.http import require_POST
 
 from .models import Passeio, Inscricao, VeiculoPasseio, Assento, Pacote, Cotacao, GastoPasseio
+from . import margens, relatorios, resumos
+from .relatorios import montar_layout_assentos
 from cadastros.models import Cliente
 
 # Create your views here.
 
-def _montar_layout_assentos(veiculo_passeio, com_dados_cliente=False):
-    """Função auxiliar para gerar a estrutura de assentos de um veículo."""
-    tipo_veiculo = veiculo_passeio.tipo_veiculo
-    assentos_ocupados = {a.numero: a.cliente for a in veiculo_passeio.assentos.all().select_related('cliente')}
-    
-    layout = []
-    assento_num = 1
-    colunas_layout = tipo_veiculo.layout_colunas.split('-')
-    
-    for fileira_num in range(1, tipo_veiculo.fileiras + 1):
-        fileira_obj = {'grupos': []}
-        for grupo_str in colunas_layout:
-            grupo_assentos = []
-            if grupo_str.isdigit():
-                for _ in range(int(grupo_str)):
-                    if assento_num > tipo_veiculo.capacidade:
-                        continue
-    
-                    cliente = assentos_ocupados.get(assento_num)
-                    assento_data = {'numero': assento_num, 'cliente_nome': cliente.nome if cliente else ''}
-                    if com_dados_cliente:
-                        assento_data.update({'ocupado': cliente is not None, 'cliente_id': cliente.id if cliente else ''})
-                    grupo_assentos.append(assento_data)
-                    assento_num += 1
-            fileira_obj['grupos'].append(grupo_assentos)
-        layout.append(fileira_obj)
-    return layout
-
-def gerar_relatorio_passageiros(request, passeio_id):
+def _relatorio_pdf(request, tipo, passeio_id):
     """
-    Gera um relatório em PDF com a lista de passageiros de um passeio.
+    PDF da versão atual dos dados, se já estiver pronto; senão, coloca o
+    relatório na fila do run_pdf_worker e mostra uma página que acompanha a
+    geração (consultando a mesma URL com ?formato=json).
     """
     passeio = get_object_or_404(Passeio, pk=passeio_id)
-    inscricoes = Inscricao.objects.filter(pacote__passeio=passeio).select_related('cliente', 'pacote').order_by('cliente__nome')
-    
-    # --- Lógica para montar o mapa de assentos para o PDF ---
-    mapa_layout = None
-    # Lógica CORRIGIDA e robusta:
-    # Se o passeio tem um tipo de veículo, garante que o VeiculoPasseio correspondente exista ou o cria.
-    if passeio.tipo_veiculo:
-        veiculo_passeio, _ = VeiculoPasseio.objects.get_or_create(
-            passeio=passeio,
-            defaults={'tipo_veiculo': passeio.tipo_veiculo, 'identificacao': 'Veículo Principal'}
+    relatorio = relatorios.solicitar(tipo, passeio)
+    if relatorio.status == 'failed' and request.GET.get('tentar'):
+        relatorios.tentar_de_novo(relatorio)
+
+    if request.GET.get('formato') == 'json':
+        pronto = relatorio.status == 'done'
+        return JsonResponse({'status': relatorio.status, 'erro': relatorio.ultimo_erro}, status=200 if pronto else 202)
+    if relatorio.status == 'done':
+        return FileResponse(
+            relatorio.arquivo.open('rb'), as_attachment=True,
+            filename=relatorios.nome_arquivo(relatorio), content_type='application/pdf',
         )
-        mapa_layout = _montar_layout_assentos(veiculo_passeio)
 
-    context = {'passeio': passeio, 'inscricoes': inscricoes, 'mapa_layout': mapa_layout}
-    html_string = render_to_string('passeios/relatorio_passageiros.html', context)
-    pdf = HTML(string=html_string).write_pdf()
+    context = {
+        'title': f'{relatorio.get_tipo_display()}: {passeio.titulo}',
+        'passeio': passeio,
+        'relatorio': relatorio,
+    }
+    return render(request, 'passeios/relatorio_pdf_status.html', context, status=202)
 
-    response = HttpResponse(pdf, content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="relatorio_{passeio.titulo}.pdf"'
-    return response
+def gerar_relatorio_passageiros(request, passeio_id):
+    """
+    Relatório em PDF com a lista de passageiros de um passeio (gerado em segundo plano).
+    """
+    return _relatorio_pdf(request, 'passageiros', passeio_id)
 
 @staff_member_required
 def mapa_assentos_view(request, veiculo_passeio_id):
     veiculo_passeio = get_object_or_404(VeiculoPasseio.objects.select_related('tipo_veiculo', 'passeio'), pk=veiculo_passeio_id)
-    layout_data = _montar_layout_assentos(veiculo_passeio, com_dados_cliente=True)
+    layout_data = montar_layout_assentos(veiculo_passeio, com_dados_cliente=True)
 
     # Otimização: Pega apenas os clientes que AINDA NÃO estão alocados neste veículo
     # E também os clientes que estão inscritos no passeio, para relevância.
@@ -122,13 +101,13 @@ def relatorio_financeiro_view(request, passeio_id):
     """
     Gera uma página com o resumo financeiro de um passeio.
     """
-    # Usando o manager otimizado para calcular o custo total em uma única consulta
-    passeio = get_object_or_404(
-        Passeio.objects.with_custo_total().prefetch_related('cotacoes', 'gastos', 'pacotes__inscricoes'), pk=passeio_id
-    )
+    # Totais lidos de PasseioResumoFinanceiro (uma linha por passeio, mantida pelos sinais)
+    resumos.garantir(Passeio.objects.filter(pk=passeio_id))
+    passeio = get_object_or_404(Passeio.objects.select_related('resumo_financeiro'), pk=passeio_id)
+    resumo = passeio.resumo_financeiro
 
     # --- CÁLCULO DE CUSTOS ---
-    custo_total_previsto = passeio.custo_total_previsto
+    custo_total_previsto = resumo.custo_total_previsto
     custos_detalhados = {
         'cotacoes_aceitas': passeio.cotacoes.filter(status='aceita').select_related('fornecedor'),
         'gastos_internos': passeio.gastos.all()
@@ -149,9 +128,7 @@ def relatorio_financeiro_view(request, passeio_id):
     }
 
     # --- CÁLCULO DE RECEITAS ---
-    total_inscricoes = Inscricao.objects.filter(
-        pacote__passeio=passeio
-    ).count()
+    total_inscricoes = resumo.total_inscricoes
 
     # Usa o preço médio dos pacotes para uma análise mais precisa
     from django.db.models import Avg
@@ -159,15 +136,9 @@ def relatorio_financeiro_view(request, passeio_id):
     if preco_medio_pacote == Decimal('0.00') and passeio.pacotes.exists():
         preco_medio_pacote = passeio.pacotes.first().preco # Fallback para o primeiro pacote
 
-    # Cálculo de receita mais preciso, somando o preço do pacote de cada inscrição
-    receita_total_prevista = Inscricao.objects.filter(
-        pacote__passeio=passeio
-    ).aggregate(total=Sum('pacote__preco'))['total'] or Decimal('0.00')
-
-    # Calcula o total efetivamente pago até o momento
-    total_arrecadado = Inscricao.objects.filter(
-        pacote__passeio=passeio
-    ).aggregate(total=Sum('pagamentos__valor'))['total'] or 0
+    # Receita somando o preço do pacote de cada inscrição e total efetivamente pago até o momento
+    receita_total_prevista = resumo.receita_prevista
+    total_arrecadado = resumo.total_arrecadado
 
     saldo_a_receber = receita_total_prevista - total_arrecadado
 
@@ -216,26 +187,10 @@ def relatorio_financeiro_view(request, passeio_id):
             preco_sugerido = custo_por_pessoa_break_even * 2 # Apenas um fallback
 
     # --- "INTELIGÊNCIA ARTIFICIAL": SUGESTÃO DE MARGEM DE LUCRO ---
-    margem_sugerida = None
-    passeios_similares_count = 0
-    passeios_historicos = Passeio.objects.filter(
-        cidade_destino=passeio.cidade_destino,
-        uf_destino=passeio.uf_destino,
-        status='realizado'
-    ).exclude(pk=passeio.pk).prefetch_related('pacotes__inscricoes', 'cotacoes', 'gastos')
-
-    margens_historicas = []
-    if passeios_historicos.exists():
-        for p_hist in passeios_historicos:
-            receita_hist = p_hist.pacotes.aggregate(total=Sum('inscricoes__pacote__preco'))['total'] or Decimal('0.00')
-            custo_hist = p_hist.custo_total_previsto
-            if receita_hist > 0:
-                lucro_hist = receita_hist - custo_hist
-                margem_real = (lucro_hist / receita_hist) * 100
-                margens_historicas.append(margem_real)
-        if margens_historicas:
-            margem_sugerida = sum(margens_historicas) / len(margens_historicas)
-            passeios_similares_count = len(margens_historicas)
+    # Estatísticas pré-calculadas das margens dos passeios realizados para o mesmo destino
+    margem_historica = margens.sugestao(passeio)
+    margem_sugerida = margem_historica['media'] if margem_historica else None
+    passeios_similares_count = margem_historica['amostras'] if margem_historica else 0
 
     context = {
         'title': f'Resumo Financeiro: {passeio.titulo}',
@@ -259,6 +214,7 @@ def relatorio_financeiro_view(request, passeio_id):
         'chart_data_json': json.dumps(chart_data),
         'margem_sugerida': margem_sugerida,
         'passeios_similares_count': passeios_similares_count,
+        'margem_historica': margem_historica,
     }
 
     return render(request, 'passeios/relatorio_financeiro.html', context)
@@ -285,21 +241,9 @@ def relatorio_cotacoes_view(request, passeio_id):
 @staff_member_required
 def gerar_relatorio_cotacoes_pdf(request, passeio_id):
     """
-    Gera um relatório em PDF com a lista de cotações de um passeio.
+    Relatório em PDF com a lista de cotações de um passeio (gerado em segundo plano).
     """
-    passeio = get_object_or_404(Passeio, pk=passeio_id)
-    cotacoes = Cotacao.objects.filter(passeio=passeio).select_related('fornecedor').order_by('tipo_servico', 'valor_cotado')
-
-    context = {
-        'passeio': passeio,
-        'cotacoes': cotacoes,
-    }
-    html_string = render_to_string('passeios/relatorio_cotacoes_pdf.html', context)
-    pdf = HTML(string=html_string, base_url=request.build_absolute_uri()).write_pdf()
-
-    response = HttpResponse(pdf, content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="cotacoes_{passeio.titulo.replace(" ", "_")}.pdf"'
-    return response
+    return _relatorio_pdf(request, 'cotacoes', passeio_id)
 
 @staff_member_required
 def relatorio_contas_a_pagar_view(request):
@@ -19,6 +19,7 @@ from rest_framework import status as rest_status
 from passeios.models import Inscricao, Pacote, Passeio, PaymentGatewayTransaction
 from cadastros.models import Cliente, limpar_cpf
 from passeios.services.payment_service import PaymentService
+from api.pagination import InscricaoPagination
 import logging
 import json
 
@@ -251,30 +252,42 @@ def api_listar_inscricoes(request):
     if status_pagamento:
         inscricoes = inscricoes.filter(status_pagamento=status_pagamento)
     
-    # Paginação
-    paginator = Paginator(inscricoes, 20)
-    page = request.query_params.get('page', 1)
-    inscricoes_page = paginator.get_page(page)
+    def serializar(inscricoes_page):
+        return [
+            {
+                'id': i.id,
+                'cliente': i.cliente.nome,
+                'pacote': i.pacote.titulo,
+                'valor': float(i.pacote.preco),
+                'status_pagamento': i.status_pagamento,
+                'data_inscricao': i.data_inscricao.isoformat(),
+                'valor_pago': float(i.valor_pago),
+                'saldo_devedor': float(i.saldo_devedor),
+            }
+            for i in inscricoes_page
+        ]
     
-    serialized = [
-        {
-            'id': i.id,
-            'cliente': i.cliente.nome,
-            'pacote': i.pacote.titulo,
-            'valor': float(i.pacote.preco),
-            'status_pagamento': i.status_pagamento,
-            'data_inscricao': i.data_inscricao.isoformat(),
-            'valor_pago': float(i.valor_pago),
-            'saldo_devedor': float(i.saldo_devedor),
-        }
-        for i in inscricoes_page
-    ]
+    # Paginação numerada (?page=), mantida para clientes antigos
+    if 'page' in request.query_params:
+        paginator = Paginator(inscricoes.order_by('-data_inscricao', '-id'), 20)
+        page = request.query_params.get('page', 1)
+        inscricoes_page = paginator.get_page(page)
+        
+        return Response({
+            'count': paginator.count,
+            'total_pages': paginator.num_pages,
+            'current_page': page,
+            'inscricoes': serializar(inscricoes_page)
+        })
+    
+    # Paginação por cursor (?cursor=): sem COUNT(*) nem OFFSET
+    paginator = InscricaoPagination()
+    inscricoes_page = paginator.paginate_queryset(inscricoes, request)
     
     return Response({
-        'count': paginator.count,
-        'total_pages': paginator.num_pages,
-        'current_page': page,
-        'inscricoes': serialized
+        'next': paginator.get_next_link(),
+        'previous': paginator.get_previous_link(),
+        'inscricoes': serializar(inscricoes_page)
     })
 
 
@@ -0,0 +1,5 @@
+"""
+Código compartilhado pelo site público (monitour_site) e pelo sistema
+administrativo (monitour_admin). Não é um app Django: os módulos daqui não têm
+modelos e recebem dos apps de cada projeto o que precisam.
+"""
@@ -0,0 +1,43 @@
+"""
+Base dos validadores de requisições condicionais (ETag / Last-Modified).
+
+Usada pelas páginas do site (core.conditional) e pelos endpoints da API do
+sistema interno (api.conditional): uma única consulta devolve o maior
+updated_at e o total de linhas de cada conjunto de objetos exibidos, sem
+carregar nenhum deles.
+"""
+import datetime
+
+from django.db import connections
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+
+def _as_datetime(value):
+    """O SQLite devolve MAX(updated_at) como texto em consultas diretas."""
+    if isinstance(value, str):
+        value = parse_datetime(value)
+    if isinstance(value, datetime.datetime) and timezone.is_naive(value):
+        value = timezone.make_aware(value, datetime.timezone.utc)
+    return value
+
+
+def latest_changes(querysets):
+    """
+    Maior updated_at e total de linhas de cada queryset, em uma única consulta.
+
+    Retorna uma lista de pares (datetime ou None, total) na ordem recebida.
+    """
+    if not querysets:
+        return []
+    selects, params = [], []
+    for index, queryset in enumerate(querysets):
+        sql, query_params = queryset.order_by().values('updated_at').query.sql_with_params()
+        selects.append(f'(SELECT MAX(updated_at) FROM ({sql}) AS latest_{index})')
+        selects.append(f'(SELECT COUNT(*) FROM ({sql}) AS total_{index})')
+        params.extend(query_params * 2)
+
+    with connections[querysets[0].db].cursor() as cursor:
+        cursor.execute('SELECT ' + ', '.join(selects), params)
+        row = cursor.fetchone()
+    return [(_as_datetime(row[i]), row[i + 1]) for i in range(0, len(row), 2)]
@@ -0,0 +1,65 @@
+"""
+Comando run_mail_worker, comum ao site público e ao sistema interno.
+
+Cada projeto estende MailWorkerCommand no seu management/commands/ apontando
+`outbox` para a sua fila (core.outbox.fila, dashboard.outbox.fila).
+"""
+import time
+
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from .outbox import BACKENDS
+
+
+class MailWorkerCommand(BaseCommand):
+    # monitour_common.outbox.Outbox esvaziada pelo comando
+    outbox = None
+
+    help = 'Envia os e-mails da fila (outbox) em lotes, com novas tentativas e descarte após o limite'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50, help='E-mails por lote (padrão: 50)')
+        parser.add_argument(
+            '--interval', type=float, default=5,
+            help='Segundos de espera quando a fila está vazia (padrão: 5)',
+        )
+        parser.add_argument('--once', action='store_true', help='Esvazia a fila uma vez e termina')
+        parser.add_argument(
+            '--backend',
+            help='smtp, console, file ou caminho de um backend (padrão: EMAIL_BACKEND)',
+        )
+        parser.add_argument('--file-path', help='Diretório das mensagens com --backend file')
+
+    def handle(self, *args, **options):
+        backend = BACKENDS.get(options['backend'], options['backend'])
+        kwargs = {'file_path': options['file_path']} if options['file_path'] else {}
+        connection = get_connection(backend, **kwargs)
+        totals = {'sent': 0, 'retried': 0, 'dead': 0}
+
+        self.stdout.write('Enviando e-mails da fila...')
+        try:
+            while True:
+                close_old_connections()
+                sent, retried, dead = self.outbox.deliver_batch(connection, options['batch_size'])
+                totals['sent'] += sent
+                totals['retried'] += retried
+                totals['dead'] += dead
+                if sent or retried or dead:
+                    self.stdout.write(f'  lote: {sent} enviado(s), {retried} adiado(s), {dead} descartado(s)')
+                    continue
+                if options['once']:
+                    break
+                # Fila vazia: não segurar a conexão SMTP ociosa
+                connection.close()
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            connection.close()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {totals['sent']} e-mail(s) enviado(s), {totals['retried']} adiado(s), "
+            f"{totals['dead']} descartado(s)!"
+        ))
@@ -0,0 +1,167 @@
+"""
+Fila de saída (outbox) dos e-mails transacionais.
+
+As views e os sinais gravam o e-mail na tabela da fila junto com os dados
+(enqueue) e respondem sem esperar o servidor SMTP. O comando
+run_mail_worker esvazia a fila em lotes usando uma única conexão SMTP
+reaproveitada; falhas são tentadas de novo com espera exponencial e, depois de
+MAIL_MAX_ATTEMPTS tentativas, o e-mail fica como 'dead' para análise no admin.
+O backend pode ser trocado por console ou arquivo (--backend) para testes.
+
+Vários workers podem rodar ao mesmo tempo: cada lote é reservado com um
+UPDATE condicional (claimed_by + prazo), e um lote de um worker que morreu
+volta para a fila quando o prazo expira. Um lote lento (cada mensagem pode levar
+até EMAIL_TIMEOUT) renova o prazo das mensagens que faltam antes que ele vença.
+
+Cada projeto tem o seu modelo OutgoingEmail (core no site público, dashboard
+no sistema interno) e expõe uma Outbox ligada a ele em core.outbox e
+dashboard.outbox; o comando run_mail_worker de cada um estende
+monitour_common.mail_worker.MailWorkerCommand.
+"""
+import logging
+import random
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage
+from django.db import transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Tempo que um lote fica reservado para o worker que o pegou (renovado durante o envio)
+CLAIM_TIMEOUT = timedelta(minutes=5)
+
+# Backends aceitos por run_mail_worker --backend, além de caminhos completos
+BACKENDS = {
+    'smtp': 'django.core.mail.backends.smtp.EmailBackend',
+    'console': 'django.core.mail.backends.console.EmailBackend',
+    'file': 'django.core.mail.backends.filebased.EmailBackend',
+}
+
+# Espera antes da tentativa n: BACKOFF_BASE * 2^(n-1), limitada a BACKOFF_MAX
+BACKOFF_BASE = timedelta(seconds=30)
+BACKOFF_MAX = timedelta(hours=6)
+
+
+def backoff(attempts):
+    """Espera até a próxima tentativa, com variação aleatória para não sincronizar os workers."""
+    delay = min(BACKOFF_BASE * 2 ** (attempts - 1), BACKOFF_MAX)
+    return delay * random.uniform(0.8, 1.2)
+
+
+def _message_time():
+    """Tempo máximo de uma mensagem: reconexão e envio, cada um limitado por EMAIL_TIMEOUT."""
+    return timedelta(seconds=2 * (getattr(settings, 'EMAIL_TIMEOUT', None) or 60))
+
+
+def _reopen(connection, close=True):
+    """Abre a conexão (no-op se já estiver aberta). Retorna False se o servidor não respondeu."""
+    try:
+        if close:
+            connection.close()
+        connection.open()
+        return True
+    except Exception as exc:
+        logger.warning('Falha ao conectar ao servidor de e-mail: %s', exc)
+        return False
+
+
+class Outbox:
+    """Fila de e-mails guardada em `model` (o OutgoingEmail de cada projeto)."""
+
+    def __init__(self, model):
+        self.model = model
+
+    def enqueue(self, subject, body, to, from_email=None, reply_to=None):
+        """Coloca um e-mail na fila (dentro da transação atual, se houver)."""
+        return self.model.objects.create(
+            subject=subject[:255],
+            body=body,
+            from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+            to=list(to),
+            reply_to=list(reply_to or []),
+        )
+
+    def claim_batch(self, batch_size):
+        """Reserva até batch_size e-mails vencidos para este worker e os retorna."""
+        now = timezone.now()
+        token = uuid.uuid4().hex
+        due = self.model.objects.filter(status='pending', next_attempt_at__lte=now)
+        ids = list(due.order_by('next_attempt_at', 'id').values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return []
+        # Condicional: se outro worker reservou algum desses ids antes, ele fica de fora
+        due.filter(id__in=ids).update(claimed_by=token, next_attempt_at=now + CLAIM_TIMEOUT)
+        return list(self.model.objects.filter(claimed_by=token, status='pending').order_by('id'))
+
+    def _renew_claim(self, token, emails):
+        """
+        Renova o prazo das mensagens ainda reservadas por este worker. Retorna o novo
+        prazo e as mensagens que continuam com ele (as demais já voltaram para a fila).
+        """
+        deadline = timezone.now() + CLAIM_TIMEOUT
+        ids = [email.pk for email in emails]
+        claimed = self.model.objects.filter(id__in=ids, claimed_by=token, status='pending')
+        if claimed.update(next_attempt_at=deadline) < len(ids):
+            kept = set(claimed.values_list('id', flat=True))
+            emails = [email for email in emails if email.pk in kept]
+        return deadline, emails
+
+    def deliver_batch(self, connection, batch_size=50):
+        """Envia um lote pela conexão informada. Retorna (enviados, adiados, descartados)."""
+        emails = self.claim_batch(batch_size)
+        max_attempts = getattr(settings, 'MAIL_MAX_ATTEMPTS', 8)
+        sent = retried = dead = 0
+        if not emails:
+            return sent, retried, dead
+
+        token, deadline = emails[0].claimed_by, emails[0].next_attempt_at
+        message_time = _message_time()
+        connected = _reopen(connection, close=False)
+        pending = list(emails)
+        processed = []
+        while pending:
+            if timezone.now() + message_time > deadline:
+                deadline, pending = self._renew_claim(token, pending)
+                if not pending:
+                    break
+            email = pending.pop(0)
+            processed.append(email)
+            message = EmailMessage(
+                subject=email.subject,
+                body=email.body,
+                from_email=email.from_email or None,
+                to=email.to,
+                reply_to=email.reply_to or None,
+                connection=connection,
+            )
+            email.attempts += 1
+            email.claimed_by = ''
+            try:
+                if not connected:
+                    raise ConnectionError('Não foi possível conectar ao servidor de e-mail')
+                message.send()
+            except Exception as exc:
+                logger.warning('Falha ao enviar e-mail %s (tentativa %s): %s', email.pk, email.attempts, exc)
+                email.last_error = f'{type(exc).__name__}: {exc}'
+                if email.attempts >= max_attempts:
+                    email.status = 'dead'
+                    dead += 1
+                else:
+                    email.next_attempt_at = timezone.now() + backoff(email.attempts)
+                    retried += 1
+                # A conexão pode ter caído: reabre para as próximas mensagens do lote
+                connected = _reopen(connection)
+            else:
+                email.status = 'sent'
+                email.sent_at = timezone.now()
+                email.last_error = ''
+                sent += 1
+
+        with transaction.atomic():
+            self.model.objects.bulk_update(
+                processed, ['status', 'attempts', 'next_attempt_at', 'claimed_by', 'last_error', 'sent_at'],
+            )
+        return sent, retried, dead
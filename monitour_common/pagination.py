@@ -0,0 +1,228 @@
+"""
+Paginação por cursor (keyset) para as listagens públicas do site e a API do
+sistema interno (api.pagination).
+
+O Paginator do Django faz um COUNT(*) e um OFFSET que fica mais lento a cada
+página. Aqui a posição é um cursor opaco com os valores da ordenação do último
+(ou primeiro) item exibido, e a próxima página é buscada com
+"WHERE (created_at, id) < (...)", sempre usando o índice. Como o cursor leva
+todos os campos da ordenação, itens empatados no primeiro campo não são
+pulados nem repetidos em nenhum dos sentidos.
+
+No site o modo numerado continua disponível com LISTING_PAGINATION = 'numbered'.
+"""
+import base64
+import binascii
+import datetime
+import json
+from bisect import bisect_left, bisect_right
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q, QuerySet
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+class _CursorEncoder(DjangoJSONEncoder):
+    """Mantém os microssegundos das datas (o DjangoJSONEncoder corta em milissegundos)."""
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def encode_cursor(values, reverse=False):
+    payload = json.dumps({'v': list(values), 'r': int(reverse)}, cls=_CursorEncoder, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Retorna (valores, reverse) ou levanta InvalidCursor."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return list(payload['v']), bool(payload['r'])
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        raise InvalidCursor(token)
+
+
+class _Descending:
+    """Inverte a comparação de um valor, para ordenar listas por campos decrescentes."""
+
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __lt__(self, other):
+        return other.value < self.value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+
+class KeysetPage:
+    """Página de um KeysetPaginator, com a mesma interface básica de django.core.paginator.Page."""
+
+    is_keyset = True
+
+    def __init__(self, object_list, paginator, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f'<KeysetPage of {len(self.object_list)} items>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """
+    Pagina um queryset (ou uma lista já ordenada) por cursor.
+
+    ordering: campos da ordenação, terminando em um campo único (ex: ('-created_at', '-id')).
+    key: para listas, função que devolve os valores da ordenação de um item.
+    model: modelo usado para converter os valores do cursor (padrão: o do queryset).
+    """
+
+    def __init__(self, object_list, per_page, ordering, key=None, model=None):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.fields = [(name.lstrip('-'), name.startswith('-')) for name in ordering]
+        self.is_queryset = isinstance(object_list, QuerySet)
+        if self.is_queryset:
+            self.object_list = object_list.order_by(*ordering)
+            model = model or object_list.model
+        elif key is None:
+            raise ValueError('KeysetPaginator precisa de key para paginar listas.')
+        self.model = model
+        self.key = key or self._attribute_values
+
+    @property
+    def count(self):
+        """Total de itens. Em querysets faz um COUNT(*): evite em páginas públicas."""
+        if self.is_queryset:
+            return self.object_list.count()
+        return len(self.object_list)
+
+    def _attribute_values(self, obj):
+        return tuple(getattr(obj, name) for name, _ in self.fields)
+
+    def _to_python(self, values):
+        if len(values) != len(self.fields):
+            raise InvalidCursor(values)
+        try:
+            return tuple(
+                self.model._meta.get_field(name).to_python(value)
+                for (name, _), value in zip(self.fields, values)
+            )
+        except Exception:
+            raise InvalidCursor(values)
+
+    def _after(self, values, reverse):
+        """Filtro dos itens depois (ou antes, com reverse) dos valores do cursor."""
+        condition = Q()
+        for position, (name, descending) in enumerate(self.fields):
+            lookup = 'lt' if descending != reverse else 'gt'
+            term = Q(**{f'{name}__{lookup}': values[position]})
+            for index, (previous, _) in enumerate(self.fields[:position]):
+                term &= Q(**{previous: values[index]})
+            condition |= term
+        return condition
+
+    def parse_cursor(self, cursor):
+        """Retorna (valores, reverse) do cursor ou levanta InvalidCursor."""
+        values, reverse = decode_cursor(cursor)
+        return self._to_python(values), reverse
+
+    def _sort_key(self, values):
+        return tuple(_Descending(v) if descending else v for v, (_, descending) in zip(values, self.fields))
+
+    def get_page(self, cursor=None):
+        """Retorna a página do cursor; cursores ausentes ou inválidos levam à primeira página."""
+        values, reverse = None, False
+        if cursor:
+            try:
+                values, reverse = self.parse_cursor(cursor)
+            except InvalidCursor:
+                values, reverse = None, False
+
+        if self.is_queryset:
+            items, has_more = self._slice_queryset(values, reverse)
+        else:
+            items, has_more = self._slice_list(values, reverse)
+
+        if values is None:
+            has_next, has_previous = has_more, False
+        elif reverse:
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, True
+
+        next_cursor = encode_cursor(self.key(items[-1])) if has_next and items else None
+        previous_cursor = encode_cursor(self.key(items[0]), reverse=True) if has_previous and items else None
+        return KeysetPage(items, self, next_cursor, previous_cursor)
+
+    def _slice_queryset(self, values, reverse):
+        queryset = self.object_list
+        if values is not None:
+            queryset = queryset.filter(self._after(values, reverse))
+        if reverse:
+            queryset = queryset.reverse()
+        items = list(queryset[:self.per_page + 1])
+        has_more = len(items) > self.per_page
+        items = items[:self.per_page]
+        if reverse:
+            items.reverse()
+        return items, has_more
+
+    def _slice_list(self, values, reverse):
+        sort_key = lambda item: self._sort_key(self.key(item))  # noqa: E731
+        if values is None:
+            start = 0
+        elif reverse:
+            end = bisect_left(self.object_list, self._sort_key(values), key=sort_key)
+            start = max(0, end - self.per_page)
+            return self.object_list[start:end], start > 0
+        else:
+            start = bisect_right(self.object_list, self._sort_key(values), key=sort_key)
+        items = self.object_list[start:start + self.per_page]
+        return items, start + self.per_page < len(self.object_list)
+
+
+def paginate(request, object_list, per_page, ordering, key=None, model=None):
+    """
+    Pagina a listagem no modo configurado em LISTING_PAGINATION.
+
+    'keyset' (padrão) lê o parâmetro ?cursor=; 'numbered' usa o Paginator do
+    Django com ?page=.
+    """
+    if getattr(settings, 'LISTING_PAGINATION', 'keyset') == 'numbered':
+        if isinstance(object_list, QuerySet):
+            object_list = object_list.order_by(*ordering)
+        return Paginator(object_list, per_page).get_page(request.GET.get('page'))
+    paginator = KeysetPaginator(object_list, per_page, ordering, key=key, model=model)
+    return paginator.get_page(request.GET.get('cursor'))
@@ -0,0 +1,258 @@
+"""
+Orçamento de consultas por view e detector de N+1.
+
+QueryBudgetMiddleware registra, para cada requisição, o número de consultas,
+o tempo gasto no banco e as consultas repetidas, agrupadas pela "impressão
+digital" do SQL (o texto com os parâmetros e as listas de IN normalizados).
+A mesma impressão digital executada muitas vezes numa requisição é o sinal
+clássico de N+1.
+
+O orçamento fica junto da view:
+
+    @query_budget(queries=8)
+    def home(request): ...       # core/views.py (site público)
+
+    @query_budget(queries=10, repeated=2)
+    class MinhaAPIView(APIView): ...
+
+    class MeuAdmin(admin.ModelAdmin):
+        query_budget = QueryBudget(queries=12)
+
+Com QUERY_BUDGET_MODE = 'raise' (usado nos testes) uma view acima do orçamento
+levanta QueryBudgetExceeded; com 'log' o excesso só é registrado. O resumo por
+view fica em `report` e é exibido para a equipe em /__queries__/.
+
+Nos testes, QueryBudgetTestMixin liga o middleware em modo 'raise' e sem o
+cache de páginas, e limpa o cache antes de cada requisição: o orçamento vale
+para a requisição mais cara (cache frio), e uma view que passa dele falha o
+teste.
+"""
+import logging
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.cache import cache
+from django.db import connections
+from django.http import HttpResponse
+
+logger = logging.getLogger(__name__)
+
+# Repetições da mesma consulta tratadas como N+1 quando a view não declara outro limite
+DEFAULT_REPEATED = 5
+
+_IN_LIST_RE = re.compile(r'\bIN\s*\((?:\s*%s\s*,?)+\)', re.IGNORECASE)
+_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_SPACE_RE = re.compile(r'\s+')
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def fingerprint(sql):
+    """SQL normalizado: literais viram ?, listas de IN viram IN (...)."""
+    sql = _IN_LIST_RE.sub('IN (...)', sql)
+    sql = _LITERAL_RE.sub('?', sql)
+    return _SPACE_RE.sub(' ', sql).strip()
+
+
+class QueryStats:
+    """Consultas executadas durante um trecho de código."""
+
+    def __init__(self):
+        self.count = 0
+        self.time = 0.0
+        self.fingerprints = Counter()
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.time += time.perf_counter() - start
+            self.count += 1
+            self.fingerprints[fingerprint(sql)] += 1
+            self.statements[(sql, repr(params))] += 1
+
+    @property
+    def duplicates(self):
+        """Consultas idênticas (mesmo SQL e mesmos parâmetros) executadas mais de uma vez."""
+        return sum(total - 1 for total in self.statements.values() if total > 1)
+
+    @property
+    def max_repeated(self):
+        """Maior número de execuções de uma mesma impressão digital (N+1)."""
+        return max(self.fingerprints.values(), default=0)
+
+    def most_repeated(self, limit=3):
+        return [(sql, total) for sql, total in self.fingerprints.most_common(limit) if total > 1]
+
+
+@contextmanager
+def record_queries(using=None):
+    """Registra as consultas do bloco em todos os bancos (ou só em `using`)."""
+    stats = QueryStats()
+    aliases = [using] if using else list(connections)
+    with ExitStack() as stack:
+        for alias in aliases:
+            stack.enter_context(connections[alias].execute_wrapper(stats))
+        yield stats
+
+
+class QueryBudget:
+    """
+    Limites de uma view: queries (total), repeated (execuções da mesma consulta)
+    e time_ms (tempo no banco). None desativa o limite.
+    """
+
+    def __init__(self, queries=None, repeated=DEFAULT_REPEATED, time_ms=None):
+        self.queries = queries
+        self.repeated = repeated
+        self.time_ms = time_ms
+
+    def violations(self, stats):
+        problems = []
+        if self.queries is not None and stats.count > self.queries:
+            problems.append(f'{stats.count} consultas (orçamento: {self.queries})')
+        if self.repeated is not None and stats.max_repeated > self.repeated:
+            sql, total = stats.most_repeated(1)[0]
+            problems.append(f'consulta repetida {total}x (limite: {self.repeated}): {sql[:200]}')
+        if self.time_ms is not None and stats.time * 1000 > self.time_ms:
+            problems.append(f'{stats.time * 1000:.1f} ms no banco (orçamento: {self.time_ms} ms)')
+        return problems
+
+
+def query_budget(queries=None, repeated=DEFAULT_REPEATED, time_ms=None):
+    """Declara o orçamento de consultas de uma view (função ou classe)."""
+    budget = QueryBudget(queries=queries, repeated=repeated, time_ms=time_ms)
+
+    def decorator(view):
+        view.query_budget = budget
+        return view
+
+    return decorator
+
+
+def budget_for(resolver_match):
+    """Orçamento declarado na view resolvida (função, classe ou ModelAdmin)."""
+    if resolver_match is None:
+        return None
+    func = resolver_match.func
+    for candidate in (func, getattr(func, 'view_class', None), getattr(func, 'cls', None),
+                      getattr(func, 'model_admin', None)):
+        budget = getattr(candidate, 'query_budget', None)
+        if isinstance(budget, QueryBudget):
+            return budget
+    # Sem orçamento declarado: só o detector de N+1
+    return QueryBudget()
+
+
+class QueryReport:
+    """Resumo por view das requisições registradas neste processo."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        self.views = defaultdict(lambda: {
+            'requests': 0, 'queries': 0, 'max_queries': 0, 'time': 0.0,
+            'max_repeated': 0, 'violations': 0,
+        })
+
+    def add(self, view_name, stats, violated):
+        with self._lock:
+            entry = self.views[view_name]
+            entry['requests'] += 1
+            entry['queries'] += stats.count
+            entry['max_queries'] = max(entry['max_queries'], stats.count)
+            entry['time'] += stats.time
+            entry['max_repeated'] = max(entry['max_repeated'], stats.max_repeated)
+            entry['violations'] += int(violated)
+
+    def as_text(self):
+        lines = [f"{'view':<50} {'req':>6} {'média':>7} {'máx':>5} {'ms/req':>8} {'rep':>5} {'viol':>5}"]
+        with self._lock:
+            rows = sorted(self.views.items(), key=lambda item: -item[1]['queries'])
+            for view_name, entry in rows:
+                requests = entry['requests']
+                lines.append(
+                    f"{view_name[:50]:<50} {requests:>6} {entry['queries'] / requests:>7.1f} "
+                    f"{entry['max_queries']:>5} {entry['time'] * 1000 / requests:>8.1f} "
+                    f"{entry['max_repeated']:>5} {entry['violations']:>5}"
+                )
+        return '\n'.join(lines)
+
+
+report = QueryReport()
+
+
+def _view_name(resolver_match):
+    if resolver_match is None:
+        return '(não resolvida)'
+    return resolver_match.view_name or resolver_match._func_path
+
+
+class QueryBudgetMiddleware:
+    """Mede as consultas de cada requisição e aplica o orçamento da view."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not getattr(settings, 'QUERY_BUDGET_ENABLED', settings.DEBUG):
+            return self.get_response(request)
+
+        with record_queries() as stats:
+            response = self.get_response(request)
+
+        match = request.resolver_match
+        view_name = _view_name(match)
+        budget = budget_for(match)
+        problems = budget.violations(stats) if budget else []
+        report.add(view_name, stats, bool(problems))
+
+        if settings.DEBUG:
+            response['X-Query-Count'] = str(stats.count)
+            response['X-Query-Time'] = f'{stats.time * 1000:.1f}ms'
+
+        if problems:
+            message = f'{view_name} ({request.path}) acima do orçamento: ' + '; '.join(problems)
+            if getattr(settings, 'QUERY_BUDGET_MODE', 'log') == 'raise':
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
+
+
+@staff_member_required
+def query_report(request):
+    """Resumo das consultas por view neste processo (somente equipe)"""
+    if request.GET.get('clear'):
+        report.clear()
+    return HttpResponse(report.as_text(), content_type='text/plain; charset=utf-8')
+
+
+class QueryBudgetTestMixin:
+    """Mixin de TestCase: requisições acima do orçamento declarado na view falham."""
+
+    def setUp(self):
+        super().setUp()
+        budget_settings = self.settings(
+            QUERY_BUDGET_ENABLED=True, QUERY_BUDGET_MODE='raise', PAGE_CACHE_ENABLED=False,
+        )
+        budget_settings.enable()
+        self.addCleanup(budget_settings.disable)
+
+    def assertWithinQueryBudget(self, path, method='get', **kwargs):
+        """Faz a requisição pelo self.client, com o cache frio, e devolve a resposta."""
+        cache.clear()
+        try:
+            return getattr(self.client, method)(path, **kwargs)
+        except QueryBudgetExceeded as exc:
+            self.fail(str(exc))
@@ -59,6 +59,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'monitour_common.query_budget.QueryBudgetMiddleware',
 ]
 
 ROOT_URLCONF = 'monitour_site.urls'
@@ -107,6 +108,49 @@ else:
     }
 
 
+# Cache
+# Compartilhado entre os workers do gunicorn (carimbos de versão, cache de páginas)
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': config('CACHE_LOCATION', default=str(BASE_DIR / '.cache')),
+    }
+}
+# Os testes usam monitour_site.settings_test, com um cache em memória
+
+# Cache de páginas públicas para visitantes anônimos (core.page_cache)
+PAGE_CACHE_ENABLED = config('PAGE_CACHE_ENABLED', default=True, cast=bool)
+PAGE_CACHE_TIMEOUT = config('PAGE_CACHE_TIMEOUT', default=3600, cast=int)
+
+# Paginação das listagens públicas: 'keyset' (?cursor=) ou 'numbered' (?page=)
+LISTING_PAGINATION = config('LISTING_PAGINATION', default='keyset')
+
+# Derivados responsivos das imagens (core.images) gerados fora da requisição
+IMAGE_DERIVATIVES_ASYNC = config('IMAGE_DERIVATIVES_ASYNC', default=True, cast=bool)
+
+# Exportação estática das páginas públicas servidas pelo nginx (core.static_export)
+STATIC_EXPORT_ROOT = config('STATIC_EXPORT_ROOT', default=str(BASE_DIR / 'static_pages'))
+STATIC_EXPORT_HOST = config('STATIC_EXPORT_HOST', default='')
+# Regenera as páginas afetadas a cada alteração (ative quando o nginx servir a exportação)
+STATIC_EXPORT_ENABLED = config('STATIC_EXPORT_ENABLED', default=False, cast=bool)
+
+# E-mail: as views gravam na fila (core.outbox) e o comando run_mail_worker envia
+EMAIL_BACKEND = config('EMAIL_BACKEND', default='django.core.mail.backends.smtp.EmailBackend')
+EMAIL_HOST = config('EMAIL_HOST', default='localhost')
+EMAIL_PORT = config('EMAIL_PORT', default=587, cast=int)
+EMAIL_USE_TLS = config('EMAIL_USE_TLS', default=True, cast=bool)
+EMAIL_HOST_USER = config('EMAIL_HOST_USER', default='')
+EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='')
+EMAIL_TIMEOUT = config('EMAIL_TIMEOUT', default=30, cast=int)
+DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default='MONITOUR <contato@monitour.com.br>')
+# Tentativas de envio antes de o e-mail ser marcado como 'dead'
+MAIL_MAX_ATTEMPTS = config('MAIL_MAX_ATTEMPTS', default=8, cast=int)
+
+# Orçamento de consultas por view (monitour_common.query_budget): 'log' registra o excesso, 'raise' falha
+QUERY_BUDGET_ENABLED = config('QUERY_BUDGET_ENABLED', default=DEBUG, cast=bool)
+QUERY_BUDGET_MODE = config('QUERY_BUDGET_MODE', default='log')
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -0,0 +1,15 @@
+"""
+Configurações dos testes: as do site com um cache em memória, isolado por
+processo, para que nada dos arquivos de .cache do desenvolvimento vaze para os
+testes (nem o contrário).
+
+`manage.py test` usa este módulo; em outros executores (pytest-django, IDE)
+defina DJANGO_SETTINGS_MODULE=monitour_site.settings_test.
+"""
+from .settings import *  # noqa: F401,F403
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
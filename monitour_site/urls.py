@@ -19,6 +19,8 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
+from monitour_common.query_budget import query_report
+
 # Admin customização
 admin.site.site_header = "MONITOUR Admin"
 admin.site.site_title = "MONITOUR Admin Portal"
@@ -26,6 +28,7 @@ admin.site.index_title = "Bem-vindo ao Portal Administrativo MONITOUR"
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('__queries__/', query_report, name='query_report'),
     
     # Apps URLs
     path('', include('core.urls')),
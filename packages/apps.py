@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class PackagesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'packages'
+
+    def ready(self):
+        import packages.signals  # Mantém o índice de facetas atualizado
@@ -0,0 +1,263 @@
+"""
+Facetas do catálogo de pacotes (categoria, destino, faixa de preço, duração e dificuldade).
+
+O índice guarda, para cada pacote ativo, os valores de cada faceta e as
+listas invertidas (valor -> ids). Uma consulta percorre os candidatos uma única
+vez e devolve os ids que passam em todos os filtros junto com a contagem de
+cada opção, calculada com os demais filtros aplicados (contagem "disjuntiva"),
+sem nenhum COUNT extra no banco.
+
+O índice é compartilhado entre os workers pelo cache (settings.CACHES) como
+um retrato do banco numerado. Os sinais em packages.signals não reescrevem o
+retrato: cada alteração vira uma linha de FacetChange, cujo id (gerado pelo
+banco) é o número da alteração, com os ids dos pacotes alterados. Cada worker
+mantém uma cópia em memória e, quando o último número muda, relê do banco só
+esses pacotes. Se faltar alguma alteração no intervalo (apagada, ainda não
+confirmada por outra transação) ou uma delas pedir a reconstrução completa, o
+índice é refeito a partir do banco; um número menor que o do índice (banco
+recriado) também força a reconstrução. O cache só guarda o retrato: perder a
+chave custa uma reconstrução, não uma atualização.
+"""
+import threading
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import transaction
+
+# O sufixo muda quando o formato dos documentos (ou da numeração) muda
+INDEX_KEY = 'packages:facets:index:4'
+
+# Acima de MAX_REPLAY alterações pendentes sai mais barato refazer o índice; as
+# alterações mais antigas que isso são apagadas a cada MAX_REPLAY novas
+MAX_REPLAY = 500
+
+FACETS = ('category', 'destination', 'price', 'duration', 'difficulty')
+
+# Faixas de preço: (valor do filtro, rótulo, mínimo inclusivo, máximo exclusivo)
+PRICE_BUCKETS = [
+    ('ate-500', 'Até R$ 500', None, Decimal('500')),
+    ('500-1000', 'R$ 500 a R$ 1.000', Decimal('500'), Decimal('1000')),
+    ('1000-2000', 'R$ 1.000 a R$ 2.000', Decimal('1000'), Decimal('2000')),
+    ('2000-5000', 'R$ 2.000 a R$ 5.000', Decimal('2000'), Decimal('5000')),
+    ('acima-5000', 'Acima de R$ 5.000', Decimal('5000'), None),
+]
+
+
+# Ordenações da listagem: nome -> (campos do modelo, valores correspondentes de um documento)
+ORDERINGS = {
+    'recent': (('-created_at', '-id'), lambda pk, doc: (doc['_created_at'], pk)),
+    'rating': (('-avg_rating', '-review_count', '-id'), lambda pk, doc: (doc['_rating'], doc['_review_count'], pk)),
+}
+
+
+def price_bucket(price):
+    for value, _, minimum, maximum in PRICE_BUCKETS:
+        if (minimum is None or price >= minimum) and (maximum is None or price < maximum):
+            return value
+    return None
+
+
+class FacetIndex:
+    """Listas invertidas das facetas dos pacotes ativos."""
+
+    def __init__(self):
+        self.docs = {}
+        self.postings = {facet: {} for facet in FACETS}
+
+    @staticmethod
+    def rows():
+        """Campos dos pacotes ativos usados pelos documentos do índice."""
+        from .models import TourPackage
+
+        return TourPackage.objects.filter(status='active').values(
+            'id', 'created_at', 'price', 'duration_days', 'difficulty',
+            'avg_rating', 'review_count', 'category__slug', 'destination__slug',
+        )
+
+    @classmethod
+    def build(cls):
+        index = cls()
+        for row in cls.rows():
+            index.add(row['id'], cls._document(row))
+        return index
+
+    def copy(self):
+        """Cópia que pode ser alterada sem afetar consultas em andamento na original."""
+        index = type(self)()
+        index.docs = dict(self.docs)
+        index.postings = {
+            facet: {value: set(ids) for value, ids in postings.items()}
+            for facet, postings in self.postings.items()
+        }
+        return index
+
+    @staticmethod
+    def _document(row):
+        return {
+            'category': row['category__slug'],
+            'destination': row['destination__slug'],
+            'price': price_bucket(row['price']),
+            'duration': row['duration_days'],
+            'difficulty': row['difficulty'],
+            # Campos usados para ordenar e filtrar por faixa livre de preço e nota mínima
+            '_price': row['price'],
+            '_created_at': row['created_at'],
+            '_rating': row['avg_rating'],
+            '_review_count': row['review_count'],
+        }
+
+    def add(self, package_id, doc):
+        self.remove(package_id)
+        self.docs[package_id] = doc
+        for facet in FACETS:
+            self.postings[facet].setdefault(doc[facet], set()).add(package_id)
+
+    def remove(self, package_id):
+        doc = self.docs.pop(package_id, None)
+        if doc is None:
+            return
+        for facet in FACETS:
+            ids = self.postings[facet].get(doc[facet])
+            if ids is not None:
+                ids.discard(package_id)
+                if not ids:
+                    del self.postings[facet][doc[facet]]
+
+    def sort_key(self, order='recent'):
+        """Função que devolve os valores da ordenação de um id (usada pela paginação por cursor)."""
+        _, values = ORDERINGS[order]
+        return lambda pk: values(pk, self.docs[pk])
+
+    def query(self, filters, candidates=None, min_price=None, max_price=None, min_rating=None, order='recent'):
+        """
+        Aplica os filtros de faceta e devolve (ids na ordem pedida, contagens).
+
+        filters: dict faceta -> valor selecionado (valores vazios são ignorados).
+        candidates: ids pré-filtrados (ex: busca textual) ou None para todos.
+        order: chave de ORDERINGS ('recent' ou 'rating').
+        """
+        filters = {facet: value for facet, value in filters.items() if facet in FACETS and value not in (None, '')}
+        selected = {facet: self.postings[facet].get(value, set()) for facet, value in filters.items()}
+        counts = {facet: {} for facet in FACETS}
+        matched = []
+
+        ids = self.docs.keys() if candidates is None else (set(candidates) & self.docs.keys())
+        for package_id in ids:
+            doc = self.docs[package_id]
+            if min_price is not None and doc['_price'] < min_price:
+                continue
+            if max_price is not None and doc['_price'] > max_price:
+                continue
+            if min_rating is not None and doc['_rating'] < min_rating:
+                continue
+
+            failed = [facet for facet, posting in selected.items() if package_id not in posting]
+            if len(failed) > 1:
+                continue
+            if failed:
+                # Falha só na própria faceta: conta como opção alternativa dela
+                facet = failed[0]
+                counts[facet][doc[facet]] = counts[facet].get(doc[facet], 0) + 1
+                continue
+
+            matched.append(package_id)
+            for facet in FACETS:
+                counts[facet][doc[facet]] = counts[facet].get(doc[facet], 0) + 1
+
+        matched.sort(key=self.sort_key(order), reverse=True)
+        return matched, counts
+
+
+_lock = threading.Lock()
+_local = {'seq': None, 'index': None}
+
+
+def _last_change():
+    """Número da última alteração registrada (0 se nenhuma)."""
+    from .models import FacetChange
+
+    return FacetChange.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+
+
+def _replay(seq, index, until):
+    """
+    Aplica ao índice as alterações seq+1..until e devolve um índice novo; None
+    se faltar alguma ou uma delas pedir a reconstrução completa.
+    """
+    from .models import FacetChange
+
+    if until - seq > MAX_REPLAY:
+        return None
+    changes = list(FacetChange.objects.filter(pk__gt=seq, pk__lte=until).values_list('package_ids', flat=True))
+    if len(changes) != until - seq:
+        return None
+    package_ids = set()
+    for ids in changes:
+        if ids is None:
+            return None
+        package_ids.update(ids)
+
+    index = index.copy()
+    for package_id in package_ids:
+        index.remove(package_id)
+    for row in FacetIndex.rows().filter(pk__in=package_ids):
+        index.add(row['id'], FacetIndex._document(row))
+    return index
+
+
+def get_facet_index():
+    """
+    Retorna o índice de facetas. Cada worker guarda uma cópia em memória e
+    aplica a ela as alterações registradas pelos outros desde a última consulta.
+    """
+    until = _last_change()
+    if _local['index'] is not None and _local['seq'] == until:
+        return _local['index']
+    with _lock:
+        seq, index = _local['seq'], _local['index']
+        if index is None or seq > until:
+            seq, index = cache.get(INDEX_KEY) or (None, None)
+        if index is not None and seq > until:
+            # Número maior que o do banco: o retrato é de outro banco (ou de antes de recriá-lo)
+            index = None
+        if index is not None and seq < until:
+            index = _replay(seq, index, until)
+        if index is None:
+            # Sem retrato, alteração faltando ou reconstrução pedida: as alterações
+            # até `until` já estavam no banco quando foram numeradas
+            seq, index = until, FacetIndex.build()
+            cache.set(INDEX_KEY, (seq, index), None)
+        _local['seq'], _local['index'] = until, index
+        return index
+
+
+def _record(package_ids):
+    """Registra, após o commit, que as facetas desses pacotes mudaram (None: todas)."""
+    from .models import FacetChange
+
+    def apply():
+        change = FacetChange.objects.create(package_ids=package_ids)
+        if change.pk % MAX_REPLAY == 0:
+            FacetChange.objects.filter(pk__lte=change.pk - MAX_REPLAY).delete()
+
+    transaction.on_commit(apply)
+
+
+def update_packages(package_ids):
+    """Atualiza as facetas dos pacotes após o commit (os que não estiverem mais ativos saem do índice)."""
+    package_ids = list(package_ids)
+    if package_ids:
+        _record(package_ids)
+
+
+def update_package(package):
+    update_packages([package.pk])
+
+
+def remove_package(package_id):
+    update_packages([package_id])
+
+
+def invalidate():
+    """Descarta o índice inteiro; a próxima consulta o reconstrói a partir do banco."""
+    _record(None)
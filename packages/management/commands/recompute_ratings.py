@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from packages import facets, ratings
+
+
+class Command(BaseCommand):
+    help = 'Recalcula nota média, contagem e histograma de avaliações de todos os pacotes'
+
+    def handle(self, *args, **options):
+        self.stdout.write('Recalculando agregados de avaliações...')
+
+        total = ratings.recompute()
+        facets.invalidate()
+
+        self.stdout.write(self.style.SUCCESS(f'✅ Agregados recalculados para {total} pacote(s)!'))
@@ -0,0 +1,79 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:09
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def preencher_agregados(apps, schema_editor):
+    TourPackage = apps.get_model('packages', 'TourPackage')
+    Review = apps.get_model('packages', 'Review')
+
+    rows = Review.objects.filter(approved=True).values('package_id').annotate(
+        total=Count('id'),
+        soma=Sum('rating'),
+        **{f'stars_{n}': Count('id', filter=Q(rating=n)) for n in range(1, 6)},
+    )
+    for row in rows:
+        TourPackage.objects.filter(pk=row['package_id']).update(
+            review_count=row['total'],
+            rating_sum=row['soma'],
+            avg_rating=(Decimal(row['soma']) / row['total']).quantize(Decimal('0.01')),
+            **{f'rating_{n}_count': row[f'stars_{n}'] for n in range(1, 6)},
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('packages', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tourpackage',
+            name='avg_rating',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=3, verbose_name='Nota Média'),
+        ),
+        migrations.AddField(
+            model_name='tourpackage',
+            name='rating_1_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Avaliações 1 estrela'),
+        ),
+        migrations.AddField(
+            model_name='tourpackage',
+            name='rating_2_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Avaliações 2 estrelas'),
+        ),
+        migrations.AddField(
+            model_name='tourpackage',
+            name='rating_3_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Avaliações 3 estrelas'),
+        ),
+        migrations.AddField(
+            model_name='tourpackage',
+            name='rating_4_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Avaliações 4 estrelas'),
+        ),
+        migrations.AddField(
+            model_name='tourpackage',
+            name='rating_5_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Avaliações 5 estrelas'),
+        ),
+        migrations.AddField(
+            model_name='tourpackage',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Soma das Notas'),
+        ),
+        migrations.AddField(
+            model_name='tourpackage',
+            name='review_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Avaliações'),
+        ),
+        migrations.AddIndex(
+            model_name='tourpackage',
+            index=models.Index(fields=['status', '-avg_rating', '-review_count'], name='packages_tp_rating_idx'),
+        ),
+        migrations.RunPython(preencher_agregados, migrations.RunPython.noop),
+    ]
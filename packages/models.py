@@ -2,9 +2,10 @@ from django.db import models
 from django.urls import reverse
 from django.utils.text import slugify
 from django.core.validators import MinValueValidator, MaxValueValidator
-from PIL import Image
 from decimal import Decimal
 
+from core.images import ResponsiveImagesMixin
+
 
 class Destination(models.Model):
     name = models.CharField('Nome do Destino', max_length=100)
@@ -47,7 +48,7 @@ class PackageCategory(models.Model):
         super().save(*args, **kwargs)
 
 
-class TourPackage(models.Model):
+class TourPackage(ResponsiveImagesMixin, models.Model):
     STATUS_CHOICES = [
         ('active', 'Ativo'),
         ('inactive', 'Inativo'),
@@ -102,30 +103,36 @@ class TourPackage(models.Model):
     created_at = models.DateTimeField('Criado em', auto_now_add=True)
     updated_at = models.DateTimeField('Atualizado em', auto_now=True)
     
+    # Agregados das avaliações aprovadas (mantidos por packages.ratings)
+    avg_rating = models.DecimalField('Nota Média', max_digits=3, decimal_places=2, default=0, editable=False)
+    review_count = models.PositiveIntegerField('Avaliações', default=0, editable=False)
+    rating_sum = models.PositiveIntegerField('Soma das Notas', default=0, editable=False)
+    rating_1_count = models.PositiveIntegerField('Avaliações 1 estrela', default=0, editable=False)
+    rating_2_count = models.PositiveIntegerField('Avaliações 2 estrelas', default=0, editable=False)
+    rating_3_count = models.PositiveIntegerField('Avaliações 3 estrelas', default=0, editable=False)
+    rating_4_count = models.PositiveIntegerField('Avaliações 4 estrelas', default=0, editable=False)
+    rating_5_count = models.PositiveIntegerField('Avaliações 5 estrelas', default=0, editable=False)
+    
     class Meta:
         verbose_name = 'Pacote Turístico'
         verbose_name_plural = 'Pacotes Turísticos'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', '-avg_rating', '-review_count'], name='packages_tp_rating_idx'),
+        ]
     
     def __str__(self):
         return self.title
     
+    responsive_image_fields = ('featured_image', 'gallery_image_1', 'gallery_image_2', 'gallery_image_3')
+    
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.title)
         super().save(*args, **kwargs)
         
-        # Redimensionar imagens se necessário
-        self.resize_images()
-    
-    def resize_images(self):
-        images = [self.featured_image, self.gallery_image_1, self.gallery_image_2, self.gallery_image_3]
-        for image in images:
-            if image:
-                img = Image.open(image.path)
-                if img.height > 800 or img.width > 1200:
-                    img.thumbnail((1200, 800))
-                    img.save(image.path)
+        # Derivados responsivos só das imagens que mudaram, em segundo plano
+        self.schedule_image_derivatives()
     
     def get_absolute_url(self):
         return reverse('packages:package_detail', kwargs={'slug': self.slug})
@@ -138,6 +145,16 @@ class TourPackage(models.Model):
     def has_discount(self):
         return self.discount_percentage > 0 and self.original_price and self.original_price > self.price
     
+    @property
+    def rating_histogram(self):
+        """Lista de (estrelas, quantidade, percentual), de 5 a 1 estrela."""
+        histogram = []
+        for stars in range(5, 0, -1):
+            count = getattr(self, f'rating_{stars}_count')
+            percent = round(count * 100 / self.review_count) if self.review_count else 0
+            histogram.append((stars, count, percent))
+        return histogram
+    
     def get_duration_text(self):
         if self.duration_nights > 0:
             return f"{self.duration_days} dias / {self.duration_nights} noites"
@@ -194,3 +211,38 @@ class Review(models.Model):
     
     def __str__(self):
         return f"Avaliação de {self.name} - {self.package.title} ({self.rating}/5)"
+    
+    # Campos lidos por rating_contribution()
+    CONTRIBUTION_FIELDS = {'approved', 'package_id', 'rating'}
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Estado salvo, usado para atualizar os agregados do pacote pela diferença. Com
+        # algum desses campos adiado, lê-lo aqui recarregaria a instância (e chamaria
+        # from_db de novo): packages.ratings.saved_contribution lê do banco antes de salvar
+        if cls.CONTRIBUTION_FIELDS.issubset(field_names):
+            instance._saved_contribution = instance.rating_contribution()
+        return instance
+    
+    def rating_contribution(self):
+        """(pacote, nota) que esta avaliação soma aos agregados, ou None se não aprovada."""
+        if not self.approved:
+            return None
+        return self.package_id, self.rating
+
+
+class FacetChange(models.Model):
+    """
+    Alteração nas facetas do catálogo (ver packages.facets): o id é o número da
+    alteração e package_ids os pacotes a reler (None: reconstruir tudo).
+    """
+    package_ids = models.JSONField('Pacotes', null=True)
+    created_at = models.DateTimeField('Criado em', auto_now_add=True)
+    
+    class Meta:
+        verbose_name = 'Alteração de Facetas'
+        verbose_name_plural = 'Alterações de Facetas'
+    
+    def __str__(self):
+        return f'Alteração {self.pk}'
@@ -0,0 +1,120 @@
+"""
+Agregados das avaliações aprovadas guardados em TourPackage.
+
+avg_rating, review_count, rating_sum e rating_<n>_count são atualizados pela
+diferença quando uma avaliação é aprovada, editada ou removida (ver
+packages.signals), com UPDATEs atômicos em vez de agregar a cada visualização.
+O comando recompute_ratings recalcula tudo a partir das avaliações.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Q, Sum, Value
+from django.db.models.functions import Coalesce, NullIf
+
+from core.page_cache import invalidate_model
+
+from .models import Review, TourPackage
+
+STARS = range(1, 6)
+
+
+def _average_expression():
+    return Coalesce(
+        ExpressionWrapper(
+            F('rating_sum') * Value(1.0) / NullIf(F('review_count'), 0),
+            output_field=DecimalField(max_digits=3, decimal_places=2),
+        ),
+        Value(0),
+        output_field=DecimalField(max_digits=3, decimal_places=2),
+    )
+
+
+def apply_delta(package_id, rating, sign):
+    """Soma (sign=1) ou subtrai (sign=-1) uma nota aprovada dos agregados do pacote."""
+    with transaction.atomic():
+        TourPackage.objects.filter(pk=package_id).update(**{
+            'review_count': F('review_count') + sign,
+            'rating_sum': F('rating_sum') + sign * rating,
+            f'rating_{rating}_count': F(f'rating_{rating}_count') + sign,
+            # A nota exibida mudou: invalida os validadores HTTP (core.conditional)
+            'updated_at': timezone.now(),
+        })
+        TourPackage.objects.filter(pk=package_id).update(avg_rating=_average_expression())
+
+
+def saved_contribution(review):
+    """
+    Contribuição gravada no banco da avaliação (pre_save e pre_delete). Só faz
+    uma consulta quando a instância foi carregada com campos adiados.
+    """
+    if not hasattr(review, '_saved_contribution'):
+        row = None
+        if not review._state.adding and review.pk is not None:
+            row = Review.objects.filter(pk=review.pk).values_list('approved', 'package_id', 'rating').first()
+        review._saved_contribution = row[1:] if row and row[0] else None
+    return review._saved_contribution
+
+
+def review_changed(review):
+    """Aplica a diferença entre o estado salvo anteriormente e o atual de uma avaliação."""
+    before = getattr(review, '_saved_contribution', None)
+    after = review.rating_contribution()
+    if before == after:
+        return []
+    if before is not None:
+        apply_delta(*before, sign=-1)
+    if after is not None:
+        apply_delta(*after, sign=1)
+    review._saved_contribution = after
+    return sorted({contribution[0] for contribution in (before, after) if contribution})
+
+
+def review_deleted(review):
+    before = getattr(review, '_saved_contribution', None)
+    if before is None:
+        return []
+    apply_delta(*before, sign=-1)
+    return [before[0]]
+
+
+def recompute(queryset=None):
+    """Recalcula os agregados a partir das avaliações aprovadas. Retorna o número de pacotes alterados."""
+    queryset = TourPackage.objects.all() if queryset is None else queryset
+    approved = Review.objects.filter(approved=True)
+    stats = {
+        row['package_id']: row
+        for row in approved.values('package_id').annotate(
+            total=Count('id'),
+            soma=Sum('rating'),
+            **{f'stars_{n}': Count('id', filter=Q(rating=n)) for n in STARS},
+        )
+    }
+
+    fields = ['review_count', 'rating_sum', 'avg_rating'] + [f'rating_{n}_count' for n in STARS]
+    now = timezone.now()
+    changed = []
+    for package in queryset.only('id', *fields):
+        row = stats.get(package.pk, {})
+        values = {
+            'review_count': row.get('total', 0),
+            'rating_sum': row.get('soma') or 0,
+            **{f'rating_{n}_count': row.get(f'stars_{n}', 0) for n in STARS},
+        }
+        values['avg_rating'] = (
+            (Decimal(values['rating_sum']) / values['review_count']).quantize(Decimal('0.01'))
+            if values['review_count'] else Decimal('0.00')
+        )
+        if any(getattr(package, field) != value for field, value in values.items()):
+            for field, value in values.items():
+                setattr(package, field, value)
+            # A nota exibida mudou: invalida os validadores HTTP (core.conditional)
+            package.updated_at = now
+            changed.append(package)
+
+    TourPackage.objects.bulk_update(changed, fields + ['updated_at'], batch_size=500)
+    if changed:
+        # bulk_update não dispara o post_save que troca a geração do cache de páginas
+        invalidate_model(TourPackage)
+    return len(changed)
@@ -0,0 +1,52 @@
+"""
+Signals do app packages.
+Mantém o índice de facetas do catálogo e os agregados de avaliações
+atualizados quando pacotes, categorias, destinos ou avaliações são alterados.
+"""
+from django.db.models.signals import post_save, post_delete, pre_save, pre_delete
+from django.dispatch import receiver
+
+from .models import TourPackage, PackageCategory, Destination, Review
+from . import facets, ratings
+
+
+@receiver(post_save, sender=TourPackage)
+def atualizar_facetas_do_pacote(sender, instance, **kwargs):
+    """Atualiza as facetas do pacote salvo (ou o remove se deixou de estar ativo)."""
+    facets.update_package(instance)
+
+
+@receiver(post_delete, sender=TourPackage)
+def remover_facetas_do_pacote(sender, instance, **kwargs):
+    facets.remove_package(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=PackageCategory)
+@receiver([post_save, post_delete], sender=Destination)
+def reconstruir_facetas(sender, instance, created=False, **kwargs):
+    """Slugs de categoria e destino fazem parte do índice; novos registros ainda não têm pacotes."""
+    if not created:
+        facets.invalidate()
+
+
+def _atualizar_facetas(package_ids):
+    # Os agregados são gravados com UPDATE, sem disparar o post_save do pacote
+    facets.update_packages(package_ids)
+
+
+@receiver([pre_save, pre_delete], sender=Review)
+def guardar_contribuicao_da_avaliacao(sender, instance, raw=False, **kwargs):
+    """Lê o estado salvo da avaliação carregada com campos adiados (ver Review.from_db)."""
+    if not raw:
+        ratings.saved_contribution(instance)
+
+
+@receiver(post_save, sender=Review)
+def atualizar_agregados_da_avaliacao(sender, instance, **kwargs):
+    """Atualiza nota média, contagem e histograma do pacote quando a avaliação muda."""
+    _atualizar_facetas(ratings.review_changed(instance))
+
+
+@receiver(post_delete, sender=Review)
+def remover_avaliacao_dos_agregados(sender, instance, **kwargs):
+    _atualizar_facetas(ratings.review_deleted(instance))
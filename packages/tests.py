@@ -1,3 +1,184 @@
+from datetime import date
+
+from django.core.cache import cache
 from django.test import TestCase
+from django.urls import reverse
+
+from core.page_cache import model_generations
+
+from . import facets, ratings
+from .models import Destination, FacetChange, PackageCategory, Review, TourPackage
+
+
+class FacetIndexTests(TestCase):
+    """Índice de facetas atualizado pelos sinais sem reescrever o retrato compartilhado."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = PackageCategory.objects.create(name='Praia', slug='praia')
+        cls.destination = Destination.objects.create(
+            name='Bahia', slug='bahia', country='Brasil', description='Litoral',
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.new_worker()
+
+    def new_worker(self):
+        """Descarta a cópia em memória, como um worker que acabou de subir."""
+        facets._local.update(seq=None, index=None)
+
+    def create_package(self, slug, **kwargs):
+        fields = dict(
+            title=slug, slug=slug, category=self.category, destination=self.destination,
+            short_description='Resumo', description='Descrição', highlights='Destaques', price=300,
+            duration_days=3, available_from=date(2026, 1, 1), available_until=date(2027, 1, 1),
+            featured_image='packages/featured/teste.jpg',
+        )
+        fields.update(kwargs)
+        with self.captureOnCommitCallbacks(execute=True):
+            return TourPackage.objects.create(**fields)
+
+    def ids(self, **filters):
+        return set(facets.get_facet_index().query(filters)[0])
+
+    def test_changes_are_applied_incrementally(self):
+        first = self.create_package('primeiro')
+        self.assertEqual(self.ids(), {first.pk})
+        snapshot = cache.get(facets.INDEX_KEY)
+
+        with self.assertNumQueries(1):
+            # Sem alterações basta conferir o último número
+            self.assertEqual(self.ids(), {first.pk})
+
+        second = self.create_package('segundo', price=1500)
+        with self.assertNumQueries(3):
+            # Último número, alterações pendentes e só o pacote alterado
+            self.assertEqual(self.ids(price='1000-2000'), {second.pk})
+        self.assertEqual(self.ids(), {first.pk, second.pk})
+
+        first.status = 'inactive'
+        with self.captureOnCommitCallbacks(execute=True):
+            first.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertEqual(self.ids(), set())
+        # O retrato compartilhado não foi reescrito
+        self.assertEqual(cache.get(facets.INDEX_KEY)[0], snapshot[0])
+
+    def test_concurrent_changes_are_not_lost(self):
+        self.assertEqual(self.ids(), set())
+        # Dois workers salvam pacotes diferentes sem ver a alteração um do outro
+        first = self.create_package('primeiro')
+        second = self.create_package('segundo')
+        self.new_worker()
+        self.assertEqual(self.ids(), {first.pk, second.pk})
+
+    def test_missing_change_rebuilds_from_database(self):
+        self.assertEqual(self.ids(), set())
+        package = self.create_package('primeiro')
+        FacetChange.objects.filter(pk=facets._last_change()).delete()
+        second = self.create_package('segundo')
+        self.assertEqual(self.ids(), {package.pk, second.pk})
+
+    def test_older_sequence_forces_a_rebuild(self):
+        package = self.create_package('primeiro')
+        self.assertEqual(self.ids(), {package.pk})
+        # Banco recriado: a numeração volta para trás do índice em memória e do retrato
+        FacetChange.objects.all().delete()
+        TourPackage.objects.filter(pk=package.pk).update(status='inactive')
+        self.assertEqual(self.ids(), set())
+        self.new_worker()
+        self.assertEqual(self.ids(), set())
+
+    def test_list_skips_packages_no_longer_active(self):
+        package = self.create_package('primeiro')
+        self.assertEqual(self.ids(), {package.pk})
+        # Desativado sem passar pelos sinais: o índice ainda o considera ativo
+        TourPackage.objects.filter(pk=package.pk).update(status='inactive')
+        response = self.client.get(reverse('packages:package_list'))
+        self.assertEqual(response.context['page_obj'].object_list, [])
+
+    def test_invalidate_rebuilds_the_index(self):
+        package = self.create_package('primeiro')
+        self.assertEqual(self.ids(category='praia'), {package.pk})
+        PackageCategory.objects.filter(pk=self.category.pk).update(slug='litoral')
+        with self.captureOnCommitCallbacks(execute=True):
+            facets.invalidate()
+        self.assertEqual(self.ids(category='litoral'), {package.pk})
+
+
+class PackageDetailTests(TestCase):
+    """Página do pacote com a nota média e o histograma mantidos em packages.ratings."""
+
+    def test_rating_summary_is_rendered(self):
+        cache.clear()
+        package = TourPackage.objects.create(
+            title='Escuna', slug='escuna',
+            category=PackageCategory.objects.create(name='Praia', slug='praia'),
+            destination=Destination.objects.create(name='Bahia', slug='bahia', country='Brasil', description='Litoral'),
+            short_description='Resumo', description='Descrição', highlights='Destaques', price=300,
+            duration_days=3, available_from=date(2026, 1, 1), available_until=date(2027, 1, 1),
+            featured_image='packages/featured/teste.jpg',
+        )
+        for rating in (5, 5, 4, 2):
+            Review.objects.create(
+                package=package, name='Cliente', email='cliente@example.com', rating=rating,
+                comment='Comentário', approved=True,
+            )
+        response = self.client.get(reverse('packages:package_detail', args=[package.slug]))
+        self.assertContains(response, '(4,0)')
+        self.assertContains(response, '2 (50%)')
+        self.assertContains(response, 'width: 25%')
+        self.assertEqual(response.context['rating_histogram'][0], (5, 2, 50))
+
+
+class ReviewAggregateTests(TestCase):
+    """Agregados mantidos pela diferença, inclusive com campos adiados, e recompute()."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.package = TourPackage.objects.create(
+            title='Escuna', slug='escuna',
+            category=PackageCategory.objects.create(name='Praia', slug='praia'),
+            destination=Destination.objects.create(name='Bahia', slug='bahia', country='Brasil', description='Litoral'),
+            short_description='Resumo', description='Descrição', highlights='Destaques', price=300,
+            duration_days=3, available_from=date(2026, 1, 1), available_until=date(2027, 1, 1),
+            featured_image='packages/featured/teste.jpg',
+        )
+        for rating in (5, 3):
+            Review.objects.create(
+                package=cls.package, name='Cliente', email='cliente@example.com', rating=rating,
+                comment='Comentário', approved=True,
+            )
+
+    def aggregates(self):
+        package = TourPackage.objects.get(pk=self.package.pk)
+        return package.review_count, package.rating_sum, package.rating_5_count
+
+    def test_campos_adiados(self):
+        self.assertEqual(self.aggregates(), (2, 8, 1))
+        self.assertIsNotNone(Review.objects.only('id').first())
+
+        review = Review.objects.defer('rating', 'approved').get(rating=5)
+        review.approved = False
+        review.save()
+        self.assertEqual(self.aggregates(), (1, 3, 0))
+
+        Review.objects.only('id').get(rating=3).delete()
+        self.assertEqual(self.aggregates(), (0, 0, 0))
+        review.delete()
+        self.assertEqual(self.aggregates(), (0, 0, 0))
+
+    def test_recompute_invalida_paginas_e_validadores(self):
+        self.assertEqual(ratings.recompute(), 0)
+        TourPackage.objects.filter(pk=self.package.pk).update(review_count=0, rating_sum=0, avg_rating=0)
+        updated_at = TourPackage.objects.get(pk=self.package.pk).updated_at
+        generations = model_generations([TourPackage])
 
-# Create your tests here.
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(ratings.recompute(), 1)
+        package = TourPackage.objects.get(pk=self.package.pk)
+        self.assertEqual((package.review_count, package.avg_rating), (2, 4))
+        self.assertGreater(package.updated_at, updated_at)
+        self.assertNotEqual(model_generations([TourPackage]), generations)
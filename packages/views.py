@@ -1,19 +1,32 @@
 from django.shortcuts import render, get_object_or_404, redirect
-from django.core.paginator import Paginator
 from django.contrib import messages
-from django.db.models import Q, Avg, Count
+from django.db.models import Q
+from decimal import Decimal, InvalidOperation
 from .models import TourPackage, PackageCategory, Destination, BookingInquiry, Review
-from core.models import SiteSettings
+from .facets import get_facet_index, ORDERINGS, PRICE_BUCKETS
+from core.site_cache import get_site_settings
+from core.page_cache import cache_public_page
+from core.conditional import conditional_page
+from monitour_common.query_budget import query_budget
+from core import recommendations, search_index
+from monitour_common.pagination import paginate
 
+# Máximo de pacotes considerados pela busca textual dentro da listagem
+SEARCH_CANDIDATES_LIMIT = 1000
 
-def get_site_settings():
-    """Helper para obter configurações do site"""
-    settings_obj, created = SiteSettings.objects.get_or_create(pk=1)
-    return settings_obj
 
+def _package_list_querysets(request):
+    # Avaliações aprovadas atualizam os agregados (e o updated_at) do pacote
+    return [TourPackage.objects.filter(status='active')]
 
+
+# Com o cache frio: validador, configurações, estatísticas (2), índice de facetas
+# (número e reconstrução), página, filtros (2), destaques e imagens
+@query_budget(queries=11)
+@conditional_page(PackageCategory, Destination, querysets=_package_list_querysets)
+@cache_public_page(TourPackage, PackageCategory, Destination, Review)
 def package_list(request):
-    """Lista de pacotes com filtros e paginação"""
+    """Lista de pacotes com filtros, contagem por faceta e paginação"""
     site_settings = get_site_settings()
     
     # Filtros
@@ -21,71 +34,103 @@ def package_list(request):
     destination_slug = request.GET.get('destination')
     min_price = request.GET.get('min_price')
     max_price = request.GET.get('max_price')
+    price_range = request.GET.get('price_range')
     duration = request.GET.get('duration')
+    difficulty = request.GET.get('difficulty')
+    min_rating = request.GET.get('min_rating')
     search_query = request.GET.get('q')
+    sort = request.GET.get('sort')
+    if sort not in ORDERINGS:
+        sort = 'recent'
     
-    # Query base - apenas pacotes ativos
-    packages = TourPackage.objects.filter(status='active').order_by('-created_at')
-    
-    # Aplicar filtros
-    if category_slug:
-        packages = packages.filter(category__slug=category_slug)
-    
-    if destination_slug:
-        packages = packages.filter(destination__slug=destination_slug)
-    
-    if min_price:
+    filters = {
+        'category': category_slug,
+        'destination': destination_slug,
+        'price': price_range,
+        'difficulty': difficulty,
+    }
+    if duration:
         try:
-            packages = packages.filter(price__gte=float(min_price))
+            filters['duration'] = int(duration)
         except ValueError:
             pass
     
-    if max_price:
-        try:
-            packages = packages.filter(price__lte=float(max_price))
-        except ValueError:
-            pass
+    # Busca textual restringe os candidatos aos pacotes encontrados no índice;
+    # uma busca só com stopwords ("de", "para") não filtra nada
+    candidates = None
+    if search_index.query_terms(search_query):
+        hits = search_index.get_search_backend().search(search_query, limit_per_type=SEARCH_CANDIDATES_LIMIT)
+        candidates = [object_id for doc_type, object_id, _ in hits if doc_type == 'package']
     
-    if duration:
-        try:
-            packages = packages.filter(duration_days=int(duration))
-        except ValueError:
-            pass
+    facet_index = get_facet_index()
+    package_ids, counts = facet_index.query(
+        filters,
+        candidates=candidates,
+        min_price=_parse_decimal(min_price),
+        max_price=_parse_decimal(max_price),
+        min_rating=_parse_decimal(min_rating),
+        order=sort,
+    )
     
-    if search_query:
-        packages = packages.filter(
-            Q(title__icontains=search_query) |
-            Q(description__icontains=search_query) |
-            Q(destination__name__icontains=search_query)
-        )
+    # Paginação sobre os ids; só os pacotes da página são carregados
+    page_obj = paginate(
+        request, package_ids, 12,  # 12 pacotes por página
+        ordering=ORDERINGS[sort][0],
+        key=facet_index.sort_key(sort),
+        model=TourPackage,
+    )
+    # O índice pode estar um passo atrás do banco: só pacotes ainda ativos são exibidos
+    packages = TourPackage.objects.filter(status='active').select_related('category', 'destination').in_bulk(
+        list(page_obj.object_list)
+    )
+    page_obj.object_list = [packages[pk] for pk in page_obj.object_list if pk in packages]
     
-    # Paginação
-    paginator = Paginator(packages, 12)  # 12 pacotes por página
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Dados para filtros, com o número de pacotes de cada opção
+    categories = list(PackageCategory.objects.all())
+    for category in categories:
+        category.facet_count = counts['category'].get(category.slug, 0)
+    destinations = list(Destination.objects.all())
+    for destination in destinations:
+        destination.facet_count = counts['destination'].get(destination.slug, 0)
     
-    # Dados para filtros
-    categories = PackageCategory.objects.all()
-    destinations = Destination.objects.all()
+    facet_options = {
+        'price': [
+            {'value': value, 'label': label, 'count': counts['price'].get(value, 0)}
+            for value, label, _, _ in PRICE_BUCKETS
+        ],
+        'duration': [
+            {'value': days, 'label': f'{days} dia{"s" if days > 1 else ""}', 'count': count}
+            for days, count in sorted(counts['duration'].items())
+        ],
+        'difficulty': [
+            {'value': value, 'label': label, 'count': counts['difficulty'].get(value, 0)}
+            for value, label in TourPackage.DIFFICULTY_CHOICES
+        ],
+    }
     
     # Pacotes em destaque
     featured_packages = TourPackage.objects.filter(
         status='active',
         featured=True
-    )[:6]
+    ).select_related('category', 'destination')[:6]
     
     context = {
         'site_settings': site_settings,
         'page_obj': page_obj,
         'categories': categories,
         'destinations': destinations,
+        'facet_options': facet_options,
         'featured_packages': featured_packages,
         'current_filters': {
             'category': category_slug,
             'destination': destination_slug,
             'min_price': min_price,
             'max_price': max_price,
-            'duration': duration,
+            'price_range': price_range,
+            'duration': filters.get('duration'),
+            'difficulty': difficulty,
+            'min_rating': min_rating,
+            'sort': sort,
             'search': search_query,
         }
     }
@@ -93,15 +138,41 @@ def package_list(request):
     return render(request, 'packages/package_list.html', context)
 
 
+def _parse_decimal(value):
+    if not value:
+        return None
+    try:
+        number = Decimal(value)
+    except InvalidOperation:
+        return None
+    return number if number.is_finite() else None
+
+
+def _package_detail_querysets(request, slug):
+    # O pacote e os que podem aparecer como relacionados (recomendados ou mesma categoria/destino)
+    package = TourPackage.objects.filter(slug=slug)
+    return [TourPackage.objects.filter(
+        Q(slug=slug)
+        | Q(pk__in=recommendations.related_ids(TourPackage, package.values('pk')))
+        | Q(status='active', category__in=package.values('category'))
+        | Q(status='active', destination__in=package.values('destination'))
+    )]
+
+
+@query_budget(queries=8)
+@conditional_page(PackageCategory, Destination, Review, querysets=_package_detail_querysets)
+@cache_public_page(TourPackage, PackageCategory, Destination, Review)
 def package_detail(request, slug):
     """Detalhe do pacote com formulário de reserva"""
     site_settings = get_site_settings()
     
-    package = get_object_or_404(TourPackage, slug=slug, status='active')
+    package = get_object_or_404(
+        TourPackage.objects.select_related('category', 'destination'), slug=slug, status='active',
+    )
     
-    # Avaliações aprovadas
+    # Avaliações aprovadas (média e contagem já ficam guardadas no pacote)
     reviews = package.reviews.filter(approved=True).order_by('-created_at')
-    avg_rating = reviews.aggregate(Avg('rating'))['rating__avg'] or 0
+    avg_rating = package.avg_rating
     
     # Processar formulário de reserva
     if request.method == 'POST':
@@ -150,12 +221,15 @@ def package_detail(request, slug):
             else:
                 messages.error(request, 'Por favor, preencha todos os campos da avaliação.')
     
-    # Pacotes relacionados (mesma categoria ou destino)
-    related_packages = TourPackage.objects.filter(
-        status='active'
-    ).filter(
-        Q(category=package.category) | Q(destination=package.destination)
-    ).exclude(id=package.id)[:4]
+    # Pacotes relacionados (pré-calculados por semelhança de conteúdo)
+    related_packages = list(recommendations.related(package, limit=4))
+    if not related_packages:
+        # Ainda sem recomendações: mesma categoria ou destino
+        related_packages = TourPackage.objects.filter(
+            status='active'
+        ).filter(
+            Q(category=package.category) | Q(destination=package.destination)
+        ).exclude(id=package.id)[:4]
     
     # Galeria de imagens
     gallery_images = []
@@ -169,6 +243,7 @@ def package_detail(request, slug):
         'package': package,
         'reviews': reviews,
         'avg_rating': avg_rating,
+        'rating_histogram': package.rating_histogram,
         'related_packages': related_packages,
         'gallery_images': gallery_images,
     }